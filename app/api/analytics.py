@@ -4,9 +4,11 @@ Analytics API Router
 Exposes endpoints for analytics (global, country, company, manager).
 """
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from app.db.database import get_db
+from typing import Optional
+from datetime import date
+from app.db.database import get_read_db
 from app.services import analytics as analytics_service
 
 router = APIRouter()
@@ -16,17 +18,17 @@ router = APIRouter()
 # ---------------------------------------------------------------------
 
 @router.get("/global/top-companies")
-async def get_global_top_companies_endpoint(db: Session = Depends(get_db)):
+async def get_global_top_companies_endpoint(db: Session = Depends(get_read_db)):
     return await analytics_service.get_global_top_companies(db)
 
 
 @router.get("/global/top-managers")
-async def get_global_top_managers_endpoint(db: Session = Depends(get_db)):
+async def get_global_top_managers_endpoint(db: Session = Depends(get_read_db)):
     return await analytics_service.get_global_top_managers(db)
 
 
 @router.get("/global")
-async def get_global_analytics_endpoint(timeframe: str = "3m", db: Session = Depends(get_db)):
+async def get_global_analytics_endpoint(timeframe: str = "3m", db: Session = Depends(get_read_db)):
     return await analytics_service.get_global_analytics(db, timeframe)
 
 
@@ -53,19 +55,19 @@ async def get_country_by_identifier(identifier: str, db: Session):
     return country
 
 @router.get("/countries/{country_identifier}/most-shorted")
-async def get_country_most_shorted_endpoint(country_identifier: str, db: Session = Depends(get_db)):
+async def get_country_most_shorted_endpoint(country_identifier: str, db: Session = Depends(get_read_db)):
     country = await get_country_by_identifier(country_identifier, db)
     return await analytics_service.get_most_shorted_companies(db, country.id)
 
 
 @router.get("/countries/{country_identifier}/top-managers")
-async def get_country_top_managers_endpoint(country_identifier: str, db: Session = Depends(get_db)):
+async def get_country_top_managers_endpoint(country_identifier: str, db: Session = Depends(get_read_db)):
     country = await get_country_by_identifier(country_identifier, db)
     return await analytics_service.get_top_managers(db, country.id)
 
 
 @router.get("/countries/{country_identifier}/analytics")
-async def get_country_analytics_endpoint(country_identifier: str, db: Session = Depends(get_db)):
+async def get_country_analytics_endpoint(country_identifier: str, db: Session = Depends(get_read_db)):
     country = await get_country_by_identifier(country_identifier, db)
     return await analytics_service.get_country_analytics(db, country.id)
 
@@ -74,14 +76,37 @@ async def get_country_analytics_endpoint(country_identifier: str, db: Session =
 # Company endpoints
 # ---------------------------------------------------------------------
 
+def check_date_range(start: Optional[date], end: Optional[date]):
+    """422 for a custom range that ends before it starts (end defaults to today)"""
+    if start and start > (end or date.today()):
+        raise HTTPException(status_code=422, detail="start must not be after end (or today when end is omitted)")
+
+
 @router.get("/companies/{company_id}")
-async def get_company_analytics_endpoint(company_id: int, timeframe: str = "3m", db: Session = Depends(get_db)):
-    return await analytics_service.get_company_analytics(db, company_id, timeframe)
+async def get_company_analytics_endpoint(
+    company_id: int,
+    timeframe: str = "3m",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    max_points: int = Query(analytics_service.DEFAULT_MAX_POINTS, ge=10, le=5000),
+    db: Session = Depends(get_read_db)
+):
+    """Company positions over time; timeframe 1w..1y or all, or a custom start/end range"""
+    check_date_range(start, end)
+    return await analytics_service.get_company_analytics(db, company_id, timeframe, start, end, max_points)
 
 
 @router.get("/companies/by-name/{company_name}")
-async def get_company_analytics_by_name_endpoint(company_name: str, timeframe: str = "3m", db: Session = Depends(get_db)):
-    return await analytics_service.get_company_analytics_by_name(db, company_name, timeframe)
+async def get_company_analytics_by_name_endpoint(
+    company_name: str,
+    timeframe: str = "3m",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    max_points: int = Query(analytics_service.DEFAULT_MAX_POINTS, ge=10, le=5000),
+    db: Session = Depends(get_read_db)
+):
+    check_date_range(start, end)
+    return await analytics_service.get_company_analytics_by_name(db, company_name, timeframe, start, end, max_points)
 
 
 # ---------------------------------------------------------------------
@@ -89,5 +114,19 @@ async def get_company_analytics_by_name_endpoint(company_name: str, timeframe: s
 # ---------------------------------------------------------------------
 
 @router.get("/managers/{manager_slug}")
-async def get_manager_analytics_endpoint(manager_slug: str, timeframe: str = "3m", db: Session = Depends(get_db)):
-    return await analytics_service.get_manager_analytics_by_slug(db, manager_slug, timeframe)
+async def get_manager_analytics_endpoint(
+    manager_slug: str,
+    timeframe: str = "3m",
+    country_code: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(analytics_service.HISTORY_PAGE_SIZE, ge=1, le=500),
+    db: Session = Depends(get_read_db)
+):
+    """Manager positions; historical ones are paged by passing back next_cursor as ?cursor="""
+    try:
+        decoded_cursor = analytics_service.decode_history_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return await analytics_service.get_manager_analytics_by_slug(
+        db, manager_slug, timeframe, country_code, decoded_cursor, limit
+    )
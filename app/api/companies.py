@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
-from app.db.database import get_db
+from app.db.database import get_read_db
 from app.db.models import Company, Country
 from app.schemas.company import CompanyResponse
 
@@ -11,7 +11,7 @@ router = APIRouter()
 @router.get("/", response_model=List[CompanyResponse])
 async def get_companies(
     country_code: str = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get companies, optionally filtered by country"""
     query = db.query(Company)
@@ -24,7 +24,7 @@ async def get_companies(
 
 
 @router.get("/{company_id}", response_model=CompanyResponse)
-async def get_company(company_id: int, db: Session = Depends(get_db)):
+async def get_company(company_id: int, db: Session = Depends(get_read_db)):
     """Get company by ID"""
     company = db.query(Company).filter(Company.id == company_id).first()
     
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
-from app.db.database import get_db
+from app.db.database import get_read_db
 from app.db.models import Country
 from app.schemas.country import CountryResponse, CountryCreate
 from app.services.analytics import get_country_analytics
@@ -10,14 +10,14 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[CountryResponse])
-async def get_countries(db: Session = Depends(get_db)):
+async def get_countries(db: Session = Depends(get_read_db)):
     """Get all countries"""
     countries = db.query(Country).filter(Country.is_active == True).all()
     return countries
 
 
 @router.get("/{country_code}", response_model=CountryResponse)
-async def get_country(country_code: str, db: Session = Depends(get_db)):
+async def get_country(country_code: str, db: Session = Depends(get_read_db)):
     """Get country by code"""
     country = db.query(Country).filter(
         Country.code == country_code.upper(),
@@ -31,7 +31,7 @@ async def get_country(country_code: str, db: Session = Depends(get_db)):
 
 
 @router.get("/{country_code}/analytics")
-async def get_country_analytics_data(country_code: str, db: Session = Depends(get_db)):
+async def get_country_analytics_data(country_code: str, db: Session = Depends(get_read_db)):
     """Get analytics data for a specific country"""
     country = db.query(Country).filter(
         Country.code == country_code.upper(),
@@ -45,7 +45,7 @@ async def get_country_analytics_data(country_code: str, db: Session = Depends(ge
 
 
 @router.get("/{country_code}/most-shorted")
-async def get_most_shorted_companies(country_code: str, db: Session = Depends(get_db)):
+async def get_most_shorted_companies(country_code: str, db: Session = Depends(get_read_db)):
     """Get most shorted companies for a country"""
     country = db.query(Country).filter(
         Country.code == country_code.upper(),
@@ -61,7 +61,7 @@ async def get_most_shorted_companies(country_code: str, db: Session = Depends(ge
 
 
 @router.get("/{country_code}/top-managers")
-async def get_top_managers(country_code: str, db: Session = Depends(get_db)):
+async def get_top_managers(country_code: str, db: Session = Depends(get_read_db)):
     """Get top managers with most active positions for a country"""
     country = db.query(Country).filter(
         Country.code == country_code.upper(),
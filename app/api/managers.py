@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
-from app.db.database import get_db
+from app.db.database import get_read_db
 from app.db.models import Manager
 from app.schemas.manager import ManagerResponse
 
@@ -9,14 +9,14 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[ManagerResponse])
-async def get_managers(db: Session = Depends(get_db)):
+async def get_managers(db: Session = Depends(get_read_db)):
     """Get all managers"""
     managers = db.query(Manager).all()
     return managers
 
 
 @router.get("/{manager_id}", response_model=ManagerResponse)
-async def get_manager(manager_id: int, db: Session = Depends(get_db)):
+async def get_manager(manager_id: int, db: Session = Depends(get_read_db)):
     """Get manager by ID"""
     manager = db.query(Manager).filter(Manager.id == manager_id).first()
     
@@ -27,7 +27,7 @@ async def get_manager(manager_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/slug/{manager_slug}", response_model=ManagerResponse)
-async def get_manager_by_slug(manager_slug: str, db: Session = Depends(get_db)):
+async def get_manager_by_slug(manager_slug: str, db: Session = Depends(get_read_db)):
     """Get manager by slug"""
     manager = db.query(Manager).filter(Manager.slug == manager_slug).first()
     
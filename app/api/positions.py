@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
-from datetime import datetime
-from app.db.database import get_db
+from datetime import datetime, date as date_type
+from app.db.database import get_read_db
 from app.db.models import ShortPosition, Company, Manager, Country
 from app.schemas.position import PositionResponse
+from app.services.position_validity import OPEN_VALID_TO, positions_as_of_subq
 
 router = APIRouter()
 
@@ -17,10 +18,11 @@ async def get_positions(
     is_active: Optional[bool] = None,
     date: Optional[datetime] = None,
     limit: int = Query(100, le=1000),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get short positions with optional filters"""
-    query = db.query(ShortPosition)
+    # source_url comes from position_payloads: loaded in one query for the page
+    query = db.query(ShortPosition).options(selectinload(ShortPosition.payload))
     
     if country_code:
         query = query.join(Country).filter(Country.code == country_code.upper())
@@ -45,7 +47,7 @@ async def get_positions(
 async def get_latest_positions(
     country_code: Optional[str] = None,
     limit: int = Query(50, le=500),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get latest short positions from entire database in descending order"""
     # Query with proper joins to get company, manager, and country names
@@ -82,3 +84,55 @@ async def get_latest_positions(
         }
         for pos in positions
     ]
+
+
+@router.get("/as-of")
+async def get_positions_as_of(
+    date: date_type,
+    country_code: Optional[str] = None,
+    limit: int = Query(500, le=5000),
+    db: Session = Depends(get_read_db)
+):
+    """Get the short positions in force on a date (each manager's latest disclosure per company up to then, >= 0.5%)"""
+    country_id = None
+    if country_code:
+        country = db.query(Country).filter(Country.code == country_code.upper()).first()
+        if not country:
+            raise HTTPException(status_code=404, detail="Country not found")
+        country_id = country.id
+
+    snapshot = positions_as_of_subq(db, date, country_id=country_id)
+    # Names come from the joins, not from lazy loads per row
+    rows = db.query(
+        ShortPosition.id, ShortPosition.date, ShortPosition.valid_to, ShortPosition.position_size,
+        ShortPosition.is_active, Company.id.label('company_id'), Company.name.label('company_name'),
+        Manager.name.label('manager_name'), Manager.slug.label('manager_slug'),
+        Country.name.label('country_name'), Country.code.label('country_code'),
+    ).join(
+        snapshot, snapshot.c.sp_id == ShortPosition.id
+    ).join(
+        Company, ShortPosition.company_id == Company.id
+    ).join(
+        Manager, ShortPosition.manager_id == Manager.id
+    ).join(
+        Country, ShortPosition.country_id == Country.id
+    ).order_by(
+        ShortPosition.position_size.desc(), ShortPosition.id
+    ).limit(limit).all()
+
+    return [
+        {
+            "id": row.id,
+            "date": row.date,
+            "valid_to": None if row.valid_to == OPEN_VALID_TO else row.valid_to,  # None: still the latest disclosure
+            "company": row.company_name,
+            "company_id": row.company_id,
+            "manager": row.manager_name,
+            "manager_slug": row.manager_slug,
+            "country": row.country_name,
+            "country_code": row.country_code,
+            "position_size": row.position_size,
+            "is_active": row.is_active
+        }
+        for row in rows
+    ]
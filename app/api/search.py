@@ -6,10 +6,11 @@ Provides search functionality for companies and managers
 
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
+from sqlalchemy import or_
 from typing import List, Dict, Any
-from app.db.database import get_db
+from app.db.database import get_read_db
 from app.db.models import Company, Manager, Country
+from app.utils.name_normalization import name_key
 
 router = APIRouter()
 
@@ -17,17 +18,18 @@ router = APIRouter()
 async def search(
     q: str = Query(..., min_length=2, description="Search query"),
     limit: int = Query(10, le=50, description="Maximum number of results"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ) -> List[Dict[str, Any]]:
     """
     Search for companies and managers by name
     Returns combined results with type indicators
     """
     query = q.strip()
+    query_key = name_key(query)
     
     results = []
     
-    # Search companies (case-insensitive)
+    # Search companies (case/accent-insensitive, on the stored lookup key)
     companies = db.query(
         Company.id,
         Company.name,
@@ -37,8 +39,8 @@ async def search(
         Country, Company.country_id == Country.id
     ).filter(
         or_(
-            func.upper(Company.name).contains(func.upper(query)),
-            func.upper(Company.isin).contains(func.upper(query))
+            Company.name_key.contains(query_key),
+            Company.isin.contains(query.upper())
         )
     ).limit(limit // 2).all()  # Split results between companies and managers
     
@@ -51,7 +53,7 @@ async def search(
             "country": company.country_name
         })
     
-    # Search managers (case-insensitive)
+    # Search managers (case/accent-insensitive, on the stored lookup key)
     remaining_slots = limit - len(results)
     if remaining_slots > 0:
         managers = db.query(
@@ -59,7 +61,7 @@ async def search(
             Manager.name,
             Manager.slug
         ).filter(
-            func.upper(Manager.name).contains(func.upper(query))
+            Manager.name_key.contains(query_key)
         ).limit(remaining_slots).all()
         
         for manager in managers:
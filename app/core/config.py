@@ -21,6 +21,10 @@ class Settings:
             
         print(f"🐛 LOADED DATABASE_URL: {self.database_url}")
         
+        # Optional read replicas (comma separated) for the read-only endpoints
+        read_urls = os.environ.get("DATABASE_READ_URLS") or os.environ.get("DATABASE_READ_URL") or ""
+        self.database_read_urls = [url.strip() for url in read_urls.split(",") if url.strip()]
+        
         # Security
         self.secret_key = os.environ.get("SECRET_KEY", "your-secret-key-change-this-in-production")
         
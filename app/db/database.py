@@ -1,9 +1,12 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine.url import make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import OperationalError
+import os
 import time
 import logging
 from app.core.config import settings
+from app.db.replicas import ReplicaRouter, RoutingSession, create_replica_engines
 
 logger = logging.getLogger(__name__)
 
@@ -11,14 +14,77 @@ logger = logging.getLogger(__name__)
 DATABASE_URL = settings.database_url
 print(f"🐛 USING DATABASE_URL: {DATABASE_URL}")
 
-# Create simple database engine 
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    echo=settings.debug
-)
+# Opt-in SQLite deployment profile (file databases only): WAL so ingestion doesn't
+# block readers, one writer connection, and a pool of query_only reader connections.
+# Off by default: WAL mode is stored in the database file and stays after the first connect.
+SQLITE_PROFILE = os.environ.get("SQLITE_PROFILE", "false").lower() == "true"
+SQLITE_READERS = int(os.environ.get("SQLITE_READERS", "8"))
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", "-32000"))  # Negative: KiB per connection
+SQLITE_BUSY_TIMEOUT = 30  # Seconds a connection waits for a lock
 
-print(f"🐛 ENGINE CREATED SUCCESSFULLY")
+
+def _is_file_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:") \
+        and "mode=memory" not in str(parsed)
+
+
+def _apply_sqlite_pragmas(engine, read_only: bool):
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not read_only:
+            cursor.execute("PRAGMA journal_mode=WAL")  # Persistent: stored in the database file
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT * 1000}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
+def create_sqlite_engines(url: str, readers: int = SQLITE_READERS):
+    """Writer engine (one connection) and read-only reader engine for a SQLite file, with the profile pragmas"""
+    # Single writer: writes queue on the pool instead of failing with "database is locked"
+    writer = create_engine(
+        url,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=SQLITE_BUSY_TIMEOUT,
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT},
+        echo=settings.debug
+    )
+    _apply_sqlite_pragmas(writer, read_only=False)
+
+    # Readers see the last committed state through WAL while a write is in progress
+    reader = create_engine(
+        url,
+        pool_size=readers,
+        max_overflow=0,
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT},
+        echo=settings.debug
+    )
+    _apply_sqlite_pragmas(reader, read_only=True)
+    return writer, reader
+
+
+sqlite_profile = SQLITE_PROFILE and _is_file_sqlite(DATABASE_URL)
+
+if sqlite_profile:
+    engine, read_engine = create_sqlite_engines(DATABASE_URL)
+else:
+    # Create simple database engine 
+    engine = create_engine(
+        DATABASE_URL,
+        pool_pre_ping=True,
+        echo=settings.debug
+    )
+    read_engine = engine
+
+print(f"🐛 ENGINE CREATED SUCCESSFULLY{' (SQLite WAL profile)' if sqlite_profile else ''}")
 
 # Global database readiness flag
 db_ready = False
@@ -50,6 +116,21 @@ def ensure_db_ready():
 
 # Create session factory
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+# Read-only endpoints: the reader pool (the same engine unless a profile separates them),
+# or caught-up read replicas when DATABASE_READ_URL(S) is set
+if settings.database_read_urls:
+    replica_router = ReplicaRouter(read_engine, create_replica_engines(settings.database_read_urls, _apply_sqlite_pragmas))
+    ReadSessionLocal = sessionmaker(
+        class_=RoutingSession, router=replica_router, writer=engine,
+        autoflush=False, autocommit=False, future=True, info={"read_only": True},
+    )
+    print(f"🐛 READ REPLICAS: {len(replica_router.replicas)}")
+else:
+    replica_router = None
+    ReadSessionLocal = sessionmaker(
+        bind=read_engine, autoflush=False, autocommit=False, future=True,
+        info={"read_only": read_engine is not engine},
+    )
 
 
 def get_db():
@@ -61,6 +142,15 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """Dependency to get a session for read-only endpoints"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def init_db():
     """Initialize database with tables"""
     from app.db.models import Base
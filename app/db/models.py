@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Index
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, ForeignKey, Text, Index, LargeBinary, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
 
+from app.utils.name_normalization import name_key
+
 Base = declarative_base()
 
 
@@ -25,24 +27,43 @@ class Country(Base):
     companies = relationship("Company", back_populates="country")
 
 
+class Issuer(Base):
+    """Global issuer identity keyed by ISIN - one row per security, whichever regulators disclose it"""
+    __tablename__ = "issuers"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    isin = Column(String(12), unique=True, index=True, nullable=False)
+    name = Column(String(200), nullable=False)  # Name of the first company linked to it
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    companies = relationship("Company", back_populates="issuer")
+
+
 class Company(Base):
     __tablename__ = "companies"
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False)
+    name_key = Column(String(200))  # name_key(name): upper-cased, accent-folded lookup key
     isin = Column(String(12), index=True)  # ISIN code
     country_id = Column(Integer, ForeignKey("countries.id"), nullable=False)
+    issuer_id = Column(Integer, ForeignKey("issuers.id"))  # Same issuer across countries (by ISIN)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
     country = relationship("Country", back_populates="companies")
+    issuer = relationship("Issuer", back_populates="companies")
     short_positions = relationship("ShortPosition", back_populates="company")
     
     # Indexes
     __table_args__ = (
         Index('idx_company_country', 'country_id'),
         Index('idx_company_isin', 'isin'),
+        Index('idx_company_issuer', 'issuer_id'),
+        Index('idx_company_name_key_country', 'name_key', 'country_id'),
     )
 
 
@@ -51,6 +72,7 @@ class Manager(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False, index=True)
+    name_key = Column(String(200), index=True)  # name_key(name): upper-cased, accent-folded lookup key
     slug = Column(String(200), unique=True, index=True)  # For URL routing (e.g., "blackrock")
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -59,6 +81,15 @@ class Manager(Base):
     short_positions = relationship("ShortPosition", back_populates="manager")
 
 
+@event.listens_for(Company, "before_insert")
+@event.listens_for(Company, "before_update")
+@event.listens_for(Manager, "before_insert")
+@event.listens_for(Manager, "before_update")
+def _set_name_key(mapper, connection, target):
+    """Keep name_key in sync with name on every ORM insert/update"""
+    target.name_key = name_key(target.name)
+
+
 class ShortPosition(Base):
     __tablename__ = "short_positions"
     
@@ -69,8 +100,8 @@ class ShortPosition(Base):
     country_id = Column(Integer, ForeignKey("countries.id"), nullable=False)
     position_size = Column(Float, nullable=False)  # Percentage
     is_active = Column(Boolean, default=True)  # True if from current tab/file, False if from historical tab/file
-    source_url = Column(String(500))
-    raw_data = Column(Text)  # Store original scraped data
+    valid_from = Column(DateTime)  # In force from its date...
+    valid_to = Column(DateTime)  # ...until the manager's next disclosure for the company (9999-12-31 while latest)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
@@ -78,6 +109,17 @@ class ShortPosition(Base):
     company = relationship("Company", back_populates="short_positions")
     manager = relationship("Manager", back_populates="short_positions")
     country = relationship("Country", back_populates="short_positions")
+    # Scraped record and source live in position_payloads, off the hot table
+    payload = relationship(
+        "PositionPayload",
+        primaryjoin="ShortPosition.id == foreign(PositionPayload.position_id)",
+        uselist=False,
+        viewonly=True,
+    )
+    
+    @property
+    def source_url(self):
+        return self.payload.source_url if self.payload else None
     
     # Indexes
     __table_args__ = (
@@ -87,9 +129,24 @@ class ShortPosition(Base):
         Index('idx_position_country', 'country_id'),
         Index('idx_position_active', 'is_active'),
         Index('idx_position_date_active', 'date', 'is_active'),
+        Index('idx_position_validity', 'valid_to', 'valid_from'),
+        Index('idx_position_country_validity', 'country_id', 'valid_to', 'valid_from'),
+        Index('idx_position_key_validity', 'company_id', 'manager_id', 'valid_to'),
     )
 
 
+class PositionPayload(Base):
+    """Cold per-position data: the compressed scraped record, its source and the ingest run that stored it"""
+    __tablename__ = "position_payloads"
+
+    # short_positions.id; no foreign key, since a partitioned short_positions has no unique key on id alone
+    position_id = Column(Integer, primary_key=True)
+    raw_data = Column(LargeBinary)  # zlib-compressed JSON (see app/services/position_payloads.py)
+    source_url = Column(String(500))
+    ingest_run_id = Column(String(32), index=True)
+    created_at = Column(DateTime, default=func.now())
+
+
 class Subscription(Base):
     __tablename__ = "subscriptions"
     
@@ -124,6 +181,137 @@ class ScrapingLog(Base):
     country = relationship("Country")
 
 
+class IngestionState(Base):
+    """Per-country high-water marks used by the daily ingest to pick out new rows"""
+    __tablename__ = "ingestion_state"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    country_id = Column(Integer, ForeignKey("countries.id"), nullable=False, unique=True)
+    max_date = Column(Date)  # Latest disclosure date ingested
+    window_fingerprints = Column(Text)  # JSON list of row fingerprints in the trailing window before max_date
+    source_hash = Column(String(64))  # Hash of the last scraped dataset (unchanged source -> nothing to do)
+    rows_ingested = Column(Integer, default=0)
+    backfill_requested = Column(Boolean, default=False)  # Next run imports every scraped row
+    last_run_at = Column(DateTime)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    country = relationship("Country")
+
+
+class RejectedPosition(Base):
+    """Scraped rows that failed validation or insertion, kept for inspection instead of being dropped"""
+    __tablename__ = "rejected_positions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    country_id = Column(Integer, ForeignKey("countries.id"), nullable=False, index=True)
+    reason = Column(String(50), nullable=False, index=True)  # missing_manager, future_date, db_error, ...
+    manager_name = Column(String(500))
+    company_name = Column(String(500))
+    isin = Column(String(50))
+    raw_date = Column(String(100))
+    raw_position_size = Column(String(100))
+    details = Column(Text)  # Error message for db_error rows
+    fingerprint = Column(String(16))  # daily_scraping_service.rejected_fingerprint: one row per rejected input
+    created_at = Column(DateTime, default=func.now(), index=True)
+
+    # Relationships
+    country = relationship("Country")
+
+    __table_args__ = (
+        Index('uq_rejected_country_fingerprint', 'country_id', 'fingerprint', unique=True),
+    )
+
+
+class EntityAlias(Base):
+    """Duplicate manager/company rows found by the entity resolution job, pointing at their canonical row"""
+    __tablename__ = "entity_aliases"
+
+    id = Column(Integer, primary_key=True, index=True)
+    entity_type = Column(String(20), nullable=False)  # manager, company
+    alias_id = Column(Integer, nullable=False)  # managers.id / companies.id of the duplicate
+    canonical_id = Column(Integer, nullable=False, index=True)
+    alias_name = Column(String(500))
+    alias_key = Column(String(500), nullable=False)  # entity_resolution.match_key(alias_name)
+    country_id = Column(Integer, ForeignKey("countries.id"))  # companies only
+    score = Column(Float)
+    method = Column(String(20))  # exact_key, isin, fuzzy
+    created_at = Column(DateTime, default=func.now())
+
+    __table_args__ = (
+        Index('ix_entity_aliases_type_alias', 'entity_type', 'alias_id', unique=True),
+    )
+
+
+class CountryDailyStats(Base):
+    """Per-country daily rollup of the positions in force (country_id NULL: all countries together)"""
+    __tablename__ = "country_daily_stats"
+
+    id = Column(Integer, primary_key=True, index=True)
+    country_id = Column(Integer, ForeignKey("countries.id"))  # NULL row: global totals with cross-country distinct counts
+    date = Column(Date, nullable=False)
+    active_positions = Column(Integer, default=0)  # Positions >= 0.5% in force at the end of the day
+    total_short_interest = Column(Float, default=0.0)  # Sum of their sizes (percent points)
+    managers = Column(Integer, default=0)  # Distinct managers holding one
+    companies = Column(Integer, default=0)  # Distinct companies (issuers) with one
+    entries = Column(Integer, default=0)  # Positions that crossed above 0.5% that day
+    exits = Column(Integer, default=0)  # Positions that fell below 0.5% that day
+    created_at = Column(DateTime, default=func.now())
+
+    # Relationships
+    country = relationship("Country")
+
+    __table_args__ = (
+        Index('idx_country_stats_country_date', 'country_id', 'date'),
+        Index('idx_country_stats_date', 'date'),
+    )
+
+
+class CompanyDailyStats(Base):
+    """Per-company daily rollup, one row for every day the company has (or just lost) an active position"""
+    __tablename__ = "company_daily_stats"
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    country_id = Column(Integer, ForeignKey("countries.id"), nullable=False)
+    date = Column(Date, nullable=False)
+    active_positions = Column(Integer, default=0)
+    total_short_interest = Column(Float, default=0.0)
+    managers = Column(Integer, default=0)
+    entries = Column(Integer, default=0)
+    exits = Column(Integer, default=0)
+    latest_disclosure = Column(Date)  # Most recent disclosure for the company up to that day
+    created_at = Column(DateTime, default=func.now())
+
+    # Relationships
+    company = relationship("Company")
+
+    __table_args__ = (
+        Index('idx_company_stats_company_date', 'company_id', 'date'),
+        Index('idx_company_stats_date_country', 'date', 'country_id'),
+    )
+
+
+class CompanyTimeline(Base):
+    """Precomputed per-manager position series of a company at one resolution (daily, weekly or monthly)"""
+    __tablename__ = "company_timelines"
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    resolution = Column(String(10), nullable=False)  # daily, weekly, monthly
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)  # Day it was built up to (later days carry the last point forward)
+    points = Column(Integer, nullable=False)
+    managers = Column(Text, nullable=False)  # JSON list of manager names (matrix columns)
+    data = Column(LargeBinary, nullable=False)  # Compressed npz: days, sizes matrix, last disclosure per manager
+    built_at = Column(DateTime, default=func.now())
+
+    __table_args__ = (
+        Index('ix_company_timelines_company_resolution', 'company_id', 'resolution', unique=True),
+    )
+
+
 class AnalyticsCache(Base):
     __tablename__ = "analytics_cache"
     
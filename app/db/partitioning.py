@@ -0,0 +1,86 @@
+# app/db/partitioning.py
+"""
+Country list partitioning of short_positions (Postgres, opt-in)
+
+scripts/migrate_partition_positions.py turns short_positions into a table
+partitioned BY LIST (country_id): one partition per country
+(short_positions_<code>) plus short_positions_default. The primary key becomes
+(id, country_id), since a partitioned table's unique keys must contain the partition
+key; ids still come from the same sequence.
+
+Queries that filter on country_id only touch that country's partition and its
+indexes. The ingestion service calls ensure_country_partition() before loading
+a country, so a country added after the migration gets its own partition
+instead of filling the default one. On other databases, or before the
+migration, everything here is a no-op.
+"""
+
+import logging
+import re
+from typing import Dict
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+PARENT = "short_positions"
+DEFAULT_PARTITION = "short_positions_default"
+
+_partitioned: Dict[str, bool] = {}
+
+
+def partition_name(country_code: str) -> str:
+    return f"{PARENT}_{re.sub(r'[^a-z0-9]', '', country_code.lower())}"
+
+
+def is_partitioned(bind) -> bool:
+    """Whether short_positions is a partitioned table (cached per database URL)"""
+    engine: Engine = getattr(bind, 'engine', bind)
+    key = str(engine.url)
+    if key not in _partitioned:
+        if engine.dialect.name != 'postgresql':
+            _partitioned[key] = False
+        else:
+            with engine.connect() as conn:
+                relkind = conn.execute(text("SELECT relkind FROM pg_class WHERE relname = :name"),
+                                       {"name": PARENT}).scalar()
+            _partitioned[key] = relkind == 'p'
+    return _partitioned[key]
+
+
+def partitions(conn: Connection) -> Dict[str, str]:
+    """Partition name -> bound expression ('FOR VALUES IN (3)' / 'DEFAULT')"""
+    rows = conn.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :parent
+    """), {"parent": PARENT}).fetchall()
+    return {name: bound for name, bound in rows}
+
+
+def create_country_partition(conn: Connection, country_id: int, country_code: str) -> bool:
+    """Give a country its own partition, moving its rows out of the default one; False if it has one"""
+    name = partition_name(country_code)
+    if name in partitions(conn):
+        return False
+
+    # A partition can't be created while the default one holds matching rows:
+    # build it standalone, move the rows, then attach it
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE country_id = :id"),
+                 {"id": country_id})
+    conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE country_id = :id"), {"id": country_id})
+    conn.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES IN ({int(country_id)})"))
+    logger.info(f"Created partition {name} for country {country_code} (id {country_id})")
+    return True
+
+
+def ensure_country_partition(engine: Engine, country_id: int, country_code: str) -> bool:
+    """Create the country's partition if short_positions is partitioned and it has none; True if created"""
+    if not is_partitioned(engine):
+        return False
+    with engine.begin() as conn:
+        return create_country_partition(conn, country_id, country_code)
@@ -0,0 +1,114 @@
+# app/db/replicas.py
+"""
+Read-replica routing for the read-only endpoints
+
+With DATABASE_READ_URL(S) set, get_read_db() sessions are RoutingSessions:
+queries go to a replica (round robin), while flushes and INSERT/UPDATE/DELETE
+statements always go to the primary.
+
+Replicas lag. The ingest watermark is the latest ingestion_state.last_run_at,
+committed with each country's new disclosures. A replica is only used while
+its watermark has caught up with the primary's; otherwise the session reads
+from the primary. Watermarks are re-read at most every REPLICA_CHECK_SECONDS.
+"""
+
+import itertools
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import Delete, Insert, Update, create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+REPLICA_CHECK_SECONDS = float(os.environ.get("REPLICA_CHECK_SECONDS", "10"))
+WATERMARK_SQL = text("SELECT MAX(last_run_at) FROM ingestion_state")
+
+
+def ingest_watermark(engine: Engine) -> Optional[datetime]:
+    """Latest ingest run visible on an engine (None before the first run)"""
+    with engine.connect() as conn:
+        value = conn.execute(WATERMARK_SQL).scalar()
+    if isinstance(value, str):  # SQLite returns the stored text
+        value = datetime.fromisoformat(value)
+    return value
+
+
+class ReplicaRouter:
+    """Picks the engine for each read session: a caught-up replica, else the primary"""
+
+    def __init__(self, primary: Engine, replicas: List[Engine]):
+        self.primary = primary
+        self.replicas = replicas
+        self._next = itertools.cycle(range(len(replicas)))
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._fresh: List[Engine] = []
+
+    def _refresh(self):
+        try:
+            primary_mark = ingest_watermark(self.primary)
+        except Exception as e:
+            logger.warning(f"Could not read the primary ingest watermark: {e}")
+            self._fresh = []
+            return
+
+        fresh = []
+        for replica in self.replicas:
+            try:
+                mark = ingest_watermark(replica)
+            except Exception as e:
+                logger.warning(f"Replica {replica.url.host or replica.url.database} unavailable: {e}")
+                continue
+            if primary_mark is None or (mark is not None and mark >= primary_mark):
+                fresh.append(replica)
+            else:
+                logger.info(f"Replica {replica.url.host or replica.url.database} behind the last ingest "
+                            f"({mark} < {primary_mark}), reading from the primary")
+        self._fresh = fresh
+
+    def read_engine(self) -> Engine:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at >= REPLICA_CHECK_SECONDS:
+                self._checked_at = now
+                self._refresh()
+            if not self._fresh:
+                return self.primary
+            for _ in range(len(self.replicas)):
+                replica = self.replicas[next(self._next)]
+                if replica in self._fresh:
+                    return replica
+            return self.primary
+
+
+class RoutingSession(Session):
+    """Session reading from the router's pick (made once per session) and writing to the primary"""
+
+    def __init__(self, router: ReplicaRouter, writer: Engine, **kwargs):
+        super().__init__(**kwargs)
+        self.router = router
+        self.writer = writer
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            return self.writer
+        if 'read_engine' not in self.info:
+            self.info['read_engine'] = self.router.read_engine()
+        return self.info['read_engine']
+
+
+def create_replica_engines(urls: List[str], apply_sqlite_pragmas=None) -> List[Engine]:
+    """One engine per replica URL (SQLite files get the reader pragmas when a hook is given)"""
+    engines = []
+    for url in urls:
+        engine = create_engine(url, pool_pre_ping=True)
+        if apply_sqlite_pragmas is not None and engine.url.get_backend_name() == "sqlite":
+            apply_sqlite_pragmas(engine, read_only=True)
+        engines.append(engine)
+    return engines
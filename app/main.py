@@ -87,6 +87,10 @@ async def startup_event():
             print(f"⚠️ Table initialization failed: {e}")
     else:
         print("⚠️ Database not ready - API endpoints will return 503")
+    
+    # Business-day calendars used by the timelines
+    from app.services.trading_calendar import warm_calendars
+    print(f"📅 Trading calendars loaded: {warm_calendars()}")
 
 
 @app.get("/", response_class=HTMLResponse)
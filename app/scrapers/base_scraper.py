@@ -11,12 +11,20 @@ from abc import ABC, abstractmethod
 import requests
 from bs4 import BeautifulSoup
 import pandas as pd
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from datetime import datetime
 import logging
 import time
 import random
 
+from .scrape_state import ScrapeState
+from .validation import split_positions, REASON_KEY
+from ..utils.spreadsheet import is_spreadsheet, looks_like_html
+from ..utils.name_normalization import normalize_company_name, normalize_manager_name
+
+# ScrapeState entry holding the last known good download URL per file key
+RESOLVED_URLS_STATE = "resolved_urls"
+
 class BaseScraper(ABC):
     """Abstract base class for all country scrapers"""
     
@@ -25,6 +33,8 @@ class BaseScraper(ABC):
         self.country_name = country_name
         self.session = requests.Session()
         self.logger = logging.getLogger(f"scraper.{country_code}")
+        # Rows dropped by validate_positions(), with a reason code, for quarantining
+        self.rejected_positions: List[Dict[str, Any]] = []
         
         # Set up headers to mimic a real browser
         self.session.headers.update({
@@ -77,6 +87,10 @@ class BaseScraper(ABC):
             self.logger.error(f"Error scraping {self.country_name}: {str(e)}")
             raise
     
+    def mark_ingested(self):
+        """Hook called once the scraped positions have been stored (e.g. to advance a watermark)"""
+        pass
+    
     def download_with_retry(self, url: str, max_retries: int = 3) -> requests.Response:
         """Download content with retry logic"""
         for attempt in range(max_retries):
@@ -90,49 +104,99 @@ class BaseScraper(ABC):
                 self.logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
                 time.sleep(random.uniform(1, 3))  # Random delay between retries
     
-    def validate_position(self, position: Dict[str, Any]) -> bool:
+    @staticmethod
+    def is_data_response(response: requests.Response) -> bool:
+        """True if a response carries a data file (not an error or landing page)"""
+        return response.status_code == 200 and bool(response.content) and not looks_like_html(response.content)
+
+    @staticmethod
+    def is_spreadsheet_response(response: requests.Response) -> bool:
+        """True if a response carries an xlsx / ods / xls file"""
+        return response.status_code == 200 and is_spreadsheet(response.content)
+
+    def get_cached_download_url(self, key: str) -> Optional[str]:
+        """Last known good download URL for a file key, if any"""
+        return ScrapeState(self.country_code).load(RESOLVED_URLS_STATE, {}).get(key)
+
+    def remember_download_url(self, key: str, url: str):
+        """Persist a working download URL so the next run can skip discovery"""
+        state = ScrapeState(self.country_code)
+        urls = state.load(RESOLVED_URLS_STATE, {})
+        if urls.get(key) != url:
+            urls[key] = url
+            state.save(RESOLVED_URLS_STATE, urls)
+
+    def try_download_url(self, url: str, is_valid: Callable[[requests.Response], bool] = None,
+                         session: requests.Session = None, timeout: int = 60,
+                         **kwargs) -> Optional[requests.Response]:
+        """GET url and return the response only if it passes is_valid (defaults to is_data_response)"""
+        is_valid = is_valid or self.is_data_response
+        try:
+            response = (session or self.session).get(url, timeout=timeout, **kwargs)
+        except requests.RequestException as e:
+            self.logger.info(f"Download from {url} failed: {e}")
+            return None
+        if not is_valid(response):
+            self.logger.info(f"{url} returned non-data content (HTTP {response.status_code})")
+            return None
+        return response
+
+    def download_with_cached_url(self, key: str, discover: Callable[[], Optional[str]],
+                                 is_valid: Callable[[requests.Response], bool] = None,
+                                 session: requests.Session = None, default_url: str = None,
+                                 timeout: int = 60, **kwargs) -> Tuple[Optional[requests.Response], Optional[str]]:
         """
-        Validate a single position.
+        Download a data file through the per-country resolved-URL cache.
+
+        The last known good URL for key (or default_url on the first run) is
+        tried directly; the discover() page crawl only runs when that fails
+        or returns non-data content. A URL that yields data is remembered
+        for the next run.
 
-        Key fixes:
-        - Allow position_size == 0.0 (zero is valid).
-        - Still require manager_name, company_name, date.
-        - position_size must be numeric and 0 <= size <= 100.
+        Returns (response, url); response is None if nothing valid was found.
         """
-        # Manager and company must be non-empty strings
-        if not position.get('manager_name'):
-            return False
-        if not position.get('company_name'):
-            return False
-
-        # Date must exist and not be in the future
-        date_val = position.get('date')
-        if not date_val:
-            return False
-        try:
-            date_obj = pd.to_datetime(date_val)
-            if date_obj > datetime.now():
-                return False
-        except Exception:
-            return False
-
-        # position_size must be present and numeric; zero is allowed
-        if 'position_size' not in position:
-            return False
-        try:
-            size = float(position['position_size'])
-        except (TypeError, ValueError):
-            return False
-        if not (0.0 <= size <= 100.0):
-            return False
+        cached_url = self.get_cached_download_url(key) or default_url
+        if cached_url:
+            response = self.try_download_url(cached_url, is_valid, session, timeout, **kwargs)
+            if response is not None:
+                self.logger.info(f"Downloaded {key} from known URL, skipped discovery")
+                self.remember_download_url(key, cached_url)
+                return response, cached_url
+            self.logger.info(f"Known {key} URL is stale, rediscovering download link")
+
+        url = discover()
+        if not url:
+            self.logger.warning(f"Could not discover {key} download URL")
+            return None, None
 
-        return True
+        response = self.try_download_url(url, is_valid, session, timeout, **kwargs) if url != cached_url else None
+        if response is None:
+            return None, url
+
+        self.remember_download_url(key, url)
+        return response, url
+
+    def validate_positions(self, positions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Validate a batch of positions in one vectorized pass (see validation.py).
+
+        Returns the valid rows; the others are kept with their reason code in
+        self.rejected_positions so the ingestion stage can quarantine them.
+        """
+        valid, rejected = split_positions(positions)
+        if rejected:
+            self.rejected_positions.extend(rejected)
+            reasons = pd.Series([r[REASON_KEY] for r in rejected]).value_counts().to_dict()
+            self.logger.info(f"Rejected {len(rejected)} invalid positions: {reasons}")
+        return valid
+
+    def validate_position(self, position: Dict[str, Any]) -> bool:
+        """Validate a single position (prefer validate_positions() for whole batches)"""
+        valid, _ = split_positions([position])
+        return bool(valid)
     
     def standardize_position(self, position: Dict[str, Any]) -> Dict[str, Any]:
         """Standardize position data format with proper normalization"""
-        # Import here to avoid circular imports
-        from ..services.daily_scraping_service import normalize_company_name, normalize_manager_name
-        
         return {
             'manager_name': normalize_manager_name(str(position.get('manager_name', '')).strip()),
             'company_name': normalize_company_name(str(position.get('company_name', '')).strip()),
@@ -164,11 +164,7 @@ class BelgiumScraper(BaseScraper):
                     pos['change_date'] = working_df.iloc[i]['change_date']
         
         # Standardize and filter valid positions
-        standardized_positions = []
-        for pos in positions:
-            if self.validate_position(pos):
-                standardized_pos = self.standardize_position(pos)
-                standardized_positions.append(standardized_pos)
+        standardized_positions = [self.standardize_position(pos) for pos in self.validate_positions(positions)]
         
         self.logger.info(f"Extracted {len(standardized_positions)} total positions from Belgium data")
         return standardized_positions
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Shared headless-browser pool for the Selenium-based scrapers (DK, NO, FI, SE)
+
+Instead of every scraper launching its own Chrome per run, the pool keeps a
+bounded number of warm headless sessions and leases them out:
+
+- Each lease gets its own download directory (switched via CDP) and a clean
+  browser state (cookies wiped and extra windows closed on release).
+- Waits are condition based (WebDriverWait / download polling) rather than
+  fixed time.sleep() calls.
+- Each lease carries a deadline; waits are capped by the remaining time and
+  ScraperDeadlineExceeded is raised once it is spent.
+
+Usage:
+    with browser_pool.session(self.country_code) as browser:
+        browser.get(url, wait_for=(By.TAG_NAME, "table"))
+        path = browser.wait_for_download(('.xlsx',))
+"""
+
+import atexit
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+logger = logging.getLogger("scraper.browser_pool")
+
+# Pool configuration (environment overridable - scrapers also run standalone)
+BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", "2"))
+BROWSER_IDLE_TIMEOUT = float(os.environ.get("BROWSER_IDLE_TIMEOUT", "600"))  # seconds before an idle session is closed
+BROWSER_MAX_USES = int(os.environ.get("BROWSER_MAX_USES", "20"))  # recycle Chrome after this many leases
+SCRAPER_DEADLINE_SECONDS = float(os.environ.get("SCRAPER_DEADLINE_SECONDS", "300"))
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Files Chrome writes while a download is still in flight
+PARTIAL_DOWNLOAD_SUFFIXES = ('.crdownload', '.tmp', '.part')
+
+
+class ScraperDeadlineExceeded(TimeoutError):
+    """Raised when a scraper runs past the deadline of its browser lease"""
+
+
+class _PooledBrowser:
+    """One warm headless Chrome process owned by the pool"""
+
+    def __init__(self):
+        chrome_options = Options()
+        chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--window-size=1920,1080")
+        chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+        chrome_options.add_experimental_option("prefs", {
+            "download.prompt_for_download": False,
+            "download.directory_upgrade": True,
+            "safebrowsing.enabled": True
+        })
+
+        self.driver = webdriver.Chrome(options=chrome_options)
+        # Explicit waits only - an implicit wait turns every empty find_elements() into a 10s stall
+        self.driver.implicitly_wait(0)
+        self.uses = 0
+        self.last_used = time.monotonic()
+
+    def is_alive(self) -> bool:
+        try:
+            self.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def set_download_dir(self, download_dir: str):
+        params = {"behavior": "allow", "downloadPath": download_dir}
+        try:
+            self.driver.execute_cdp_cmd("Browser.setDownloadBehavior", params)
+        except WebDriverException:
+            # Older Chrome builds only support the page-level command
+            self.driver.execute_cdp_cmd("Page.setDownloadBehavior", params)
+
+    def reset(self):
+        """Wipe per-lease state so the next scraper starts from a clean browser"""
+        handles = self.driver.window_handles
+        for handle in handles[1:]:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        self.driver.switch_to.window(handles[0])
+        self.driver.get("about:blank")
+        # delete_all_cookies() only covers the current (blank) domain - clear them browser-wide
+        self.driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class BrowserLease:
+    """A pooled browser handed to one scraper, with its own download dir and deadline"""
+
+    def __init__(self, browser: _PooledBrowser, owner: str, deadline_seconds: float):
+        self._browser = browser
+        self.driver = browser.driver
+        self.owner = owner
+        self.download_dir = tempfile.mkdtemp(prefix=f"scraper_{owner.lower()}_")
+        self.deadline = time.monotonic() + deadline_seconds
+        browser.set_download_dir(self.download_dir)
+
+    # ------------------------------------------------------------------
+    # Deadline handling
+    # ------------------------------------------------------------------
+
+    def remaining(self) -> float:
+        """Seconds left before the lease deadline"""
+        return self.deadline - time.monotonic()
+
+    def check_deadline(self):
+        if self.remaining() <= 0:
+            raise ScraperDeadlineExceeded(f"{self.owner} scraper exceeded its browser deadline")
+
+    def _budget(self, timeout: float) -> float:
+        self.check_deadline()
+        return max(0.1, min(timeout, self.remaining()))
+
+    # ------------------------------------------------------------------
+    # Condition-based waits
+    # ------------------------------------------------------------------
+
+    def get(self, url: str, wait_for: Optional[Tuple[str, str]] = None, timeout: float = 30) -> bool:
+        """Navigate to url and optionally wait for a locator to be present.
+
+        Returns False (instead of raising) when the locator did not show up in time,
+        so callers can keep their existing 'log a warning and carry on' behaviour.
+        """
+        self.driver.set_page_load_timeout(self._budget(max(timeout, 60)))
+        self.driver.get(url)
+        if wait_for is None:
+            return True
+        return self.wait_for(EC.presence_of_element_located(wait_for), timeout)
+
+    def wait_for(self, condition: Callable, timeout: float = 10, poll: float = 0.2) -> bool:
+        """Wait until an expected condition holds; False on timeout"""
+        try:
+            WebDriverWait(self.driver, self._budget(timeout), poll_frequency=poll).until(condition)
+            return True
+        except TimeoutException:
+            self.check_deadline()
+            return False
+
+    def list_downloads(self, extensions: Iterable[str]) -> Set[str]:
+        """Completed downloads in the lease directory matching the given extensions"""
+        extensions = tuple(extensions)
+        return {
+            os.path.join(self.download_dir, name)
+            for name in os.listdir(self.download_dir)
+            if name.lower().endswith(extensions) and not name.endswith(PARTIAL_DOWNLOAD_SUFFIXES)
+        }
+
+    def wait_for_download(self, extensions: Iterable[str], timeout: float = 30,
+                          ignore: Optional[Set[str]] = None, poll: float = 0.25) -> Optional[str]:
+        """Poll the download directory until a new file has finished downloading.
+
+        A file counts as complete once no partial (.crdownload) files remain and its
+        size is stable across two polls. Returns the path, or None on timeout.
+        """
+        extensions = tuple(extensions)
+        ignore = set(ignore or ())
+        end = time.monotonic() + self._budget(timeout)
+        last_sizes = {}
+
+        while time.monotonic() < end:
+            names = os.listdir(self.download_dir)
+            in_flight = any(name.endswith(PARTIAL_DOWNLOAD_SUFFIXES) for name in names)
+            candidates = self.list_downloads(extensions) - ignore
+
+            if candidates and not in_flight:
+                newest = max(candidates, key=os.path.getmtime)
+                size = os.path.getsize(newest)
+                if size > 0 and last_sizes.get(newest) == size:
+                    return newest
+                last_sizes[newest] = size
+
+            time.sleep(poll)
+
+        self.check_deadline()
+        return None
+
+    def read_download(self, extensions: Iterable[str], timeout: float = 30,
+                      ignore: Optional[Set[str]] = None) -> Tuple[Optional[str], bytes]:
+        """wait_for_download() and return (path, content); (None, b'') on timeout"""
+        path = self.wait_for_download(extensions, timeout=timeout, ignore=ignore)
+        if not path:
+            return None, b''
+        with open(path, 'rb') as f:
+            return path, f.read()
+
+    def cleanup(self):
+        shutil.rmtree(self.download_dir, ignore_errors=True)
+
+
+class BrowserPool:
+    """Bounded pool of warm headless Chrome sessions"""
+
+    def __init__(self, max_sessions: int = BROWSER_POOL_SIZE, idle_timeout: float = BROWSER_IDLE_TIMEOUT,
+                 max_uses: int = BROWSER_MAX_USES, default_deadline: float = SCRAPER_DEADLINE_SECONDS):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_uses = max_uses
+        self.default_deadline = default_deadline
+
+        self._slots = threading.BoundedSemaphore(max_sessions)
+        self._idle: List[_PooledBrowser] = []
+        self._lock = threading.Lock()
+
+    def _reap_idle(self):
+        """Close sessions that have been idle too long (caller holds the lock)"""
+        now = time.monotonic()
+        keep = []
+        for browser in self._idle:
+            if now - browser.last_used > self.idle_timeout:
+                browser.quit()
+            else:
+                keep.append(browser)
+        self._idle = keep
+
+    def _acquire_browser(self) -> _PooledBrowser:
+        with self._lock:
+            self._reap_idle()
+            while self._idle:
+                browser = self._idle.pop()
+                if browser.is_alive():
+                    return browser
+                browser.quit()
+
+        logger.info("Starting new headless Chrome session")
+        return _PooledBrowser()
+
+    def _release_browser(self, browser: _PooledBrowser, healthy: bool):
+        browser.uses += 1
+        browser.last_used = time.monotonic()
+
+        if healthy and browser.uses < self.max_uses:
+            try:
+                browser.reset()
+            except Exception as e:
+                logger.warning(f"Could not reset browser session, discarding it: {e}")
+                healthy = False
+
+        if not healthy or browser.uses >= self.max_uses:
+            browser.quit()
+            return
+
+        with self._lock:
+            self._idle.append(browser)
+
+    @contextmanager
+    def session(self, owner: str, deadline: Optional[float] = None, acquire_timeout: Optional[float] = None):
+        """Lease a warm browser for one scraper run.
+
+        Args:
+            owner: Scraper identifier (country code), used for logs and the download dir name
+            deadline: Seconds the scraper may use the browser (defaults to SCRAPER_DEADLINE_SECONDS)
+            acquire_timeout: Max seconds to wait for a free slot (defaults to the deadline)
+        """
+        deadline = deadline or self.default_deadline
+        if not self._slots.acquire(timeout=acquire_timeout or deadline):
+            raise ScraperDeadlineExceeded(f"{owner} scraper timed out waiting for a browser session")
+
+        browser = None
+        lease = None
+        healthy = True
+        try:
+            browser = self._acquire_browser()
+            lease = BrowserLease(browser, owner, deadline)
+            yield lease
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            if lease:
+                lease.cleanup()
+            if browser:
+                self._release_browser(browser, healthy)
+            self._slots.release()
+
+    def shutdown(self):
+        """Quit all idle sessions (leased sessions are closed on release)"""
+        with self._lock:
+            for browser in self._idle:
+                browser.quit()
+            self._idle = []
+
+
+browser_pool = BrowserPool()
+atexit.register(browser_pool.shutdown)
@@ -6,15 +6,20 @@ from bs4 import BeautifulSoup
 import re
 import os
 import tempfile
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import time
 
 from .base_scraper import BaseScraper
+from .browser_pool import browser_pool, ScraperDeadlineExceeded
+
+DOWNLOAD_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet,application/vnd.ms-excel,*/*',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
 
 
 class DenmarkScraper(BaseScraper):
@@ -28,50 +33,28 @@ class DenmarkScraper(BaseScraper):
         """Get the main data URL"""
         return self.data_url
     
-    def _setup_driver(self):
-        """Setup Chrome WebDriver with appropriate options"""
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")  # Run in headless mode
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.implicitly_wait(10)
-        
-        return driver
-    
     def download_data(self) -> Dict[str, Any]:
         """Download Danish short-selling data from DFSA"""
         self.logger.info("Starting scrape for Denmark")
         self.logger.info("Downloading Denmark DFSA data")
         
-        driver = None
         try:
-            # Setup Selenium driver
-            driver = self._setup_driver()
-            
-            # Navigate to the main page
-            self.logger.info(f"Navigating to: {self.data_url}")
-            driver.get(self.data_url)
-            time.sleep(5)  # Wait for page to load
-            
-            # Find the download link for the Excel file
-            download_link = self._find_download_link(driver)
+            # Fetch the last known Excel URL directly; the browser is only started
+            # to rediscover the link when that URL stops serving an Excel file
+            response, download_link = self.download_with_cached_url(
+                'excel',
+                discover=self._discover_download_link,
+                is_valid=self.is_spreadsheet_response,
+                headers=DOWNLOAD_HEADERS
+            )
             
             if not download_link:
                 raise Exception("Could not find download link on the page")
             
-            self.logger.info(f"Found download link: {download_link}")
-            
-            # Download the Excel file
-            excel_content = self._download_excel_file(download_link)
-            
-            if not excel_content:
+            if response is None:
                 raise Exception("Failed to download Excel file")
             
+            excel_content = response.content
             self.logger.info(f"Successfully downloaded Excel file ({len(excel_content)} bytes)")
             
             return {
@@ -84,23 +67,31 @@ class DenmarkScraper(BaseScraper):
         except Exception as e:
             self.logger.error(f"Failed to download Denmark data: {e}")
             raise Exception(f"Denmark download failed: {e}")
-        finally:
-            if driver:
-                driver.quit()
     
-    def _find_download_link(self, driver) -> str:
+    def _discover_download_link(self) -> str:
+        """Load the DFSA page in a pooled browser and find the Excel link"""
+        with browser_pool.session(self.country_code) as browser:
+            self.logger.info(f"Navigating to: {self.data_url}")
+            browser.get(self.data_url)
+            download_link = self._find_download_link(browser)
+        
+        if download_link:
+            self.logger.info(f"Found download link: {download_link}")
+        return download_link
+    
+    def _find_download_link(self, browser) -> str:
         """Find the download link for the Excel file"""
         try:
             # Look for the specific text that contains the download link
             # The text should be something like "Here you will find the sum of net short positions at or above 0.5% of the issued share capital."
             
-            # Wait for the page to load
-            WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
+            # Wait for the Excel link itself rather than a fixed delay
+            excel_link_locator = (By.CSS_SELECTOR, "a[href*='.xlsx'], a[href*='SS%20over%200,5%20pct']")
+            if not browser.wait_for(EC.presence_of_element_located(excel_link_locator), timeout=30):
+                self.logger.warning("Timeout waiting for Excel link to render")
             
             # Look for links that contain Excel file patterns
-            links = driver.find_elements(By.TAG_NAME, "a")
+            links = browser.driver.find_elements(By.TAG_NAME, "a")
             
             for link in links:
                 href = link.get_attribute('href')
@@ -109,7 +100,7 @@ class DenmarkScraper(BaseScraper):
                     return href
             
             # If no direct link found, try to find the text and click it
-            page_source = driver.page_source
+            page_source = browser.driver.page_source
             soup = BeautifulSoup(page_source, 'html.parser')
             
             # Look for the specific text and find the associated link
@@ -126,34 +117,12 @@ class DenmarkScraper(BaseScraper):
             self.logger.warning("Could not find download link on page")
             return None
             
+        except ScraperDeadlineExceeded:
+            raise
         except Exception as e:
             self.logger.error(f"Error finding download link: {e}")
             return None
     
-    def _download_excel_file(self, download_url: str) -> bytes:
-        """Download the Excel file from the given URL"""
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet,application/vnd.ms-excel,*/*',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
-            
-            response = requests.get(download_url, headers=headers, timeout=60)
-            
-            if response.status_code == 200:
-                return response.content
-            else:
-                self.logger.error(f"Failed to download Excel file: HTTP {response.status_code}")
-                return None
-                
-        except Exception as e:
-            self.logger.error(f"Error downloading Excel file: {e}")
-            return None
-    
     def parse_data(self, data: Dict[str, Any]) -> pd.DataFrame:
         """Parse the downloaded data into a pandas DataFrame"""
         self.logger.info("Parsing Denmark data")
@@ -10,16 +10,26 @@ import logging
 from datetime import datetime
 from typing import Dict, Any, List
 from .base_scraper import BaseScraper
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from .browser_pool import browser_pool, ScraperDeadlineExceeded
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import time
 import io
 import os
 
+DOWNLOAD_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+
+# "Save as excel (.csv)" button, most specific selector first
+DOWNLOAD_BUTTON_SELECTORS = [
+    "//span[contains(text(), 'Save as excel (.csv)')]",
+    "//span[contains(text(), 'save as excel (.csv)')]",
+    "//*[contains(text(), 'Save as excel (.csv)')]",
+    "//*[contains(text(), 'save as excel (.csv)')]",
+    "//span[contains(text(), 'Save as excel')]",
+    "//span[contains(text(), 'save as excel')]",
+    "//*[contains(text(), 'Save as excel')]",
+    "//*[contains(text(), 'save as excel')]"
+]
+
 class FinlandSeleniumScraper(BaseScraper):
     """Selenium-based scraper for Finnish short-selling data from FIN-FSA"""
     
@@ -38,301 +48,26 @@ class FinlandSeleniumScraper(BaseScraper):
         """Get the historic net short positions URL"""
         return "https://www.finanssivalvonta.fi/en/financial-market-participants/capital-markets/issuers-and-investors/short-positions/Historic-net-short-positions/"
     
-    def _setup_driver(self):
-        """Setup Chrome WebDriver with appropriate options"""
-        import tempfile
-        
-        # Create temporary download directory
-        download_dir = tempfile.mkdtemp()
-        
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")  # Run in headless mode
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
-        # Set download directory
-        prefs = {
-            "download.default_directory": download_dir,
-            "download.prompt_for_download": False,
-            "download.directory_upgrade": True,
-            "safebrowsing.enabled": True
-        }
-        chrome_options.add_experimental_option("prefs", prefs)
-        
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.implicitly_wait(10)
-        
-        return driver, download_dir
-    
     def download_data(self) -> Dict[str, Any]:
         """Download Finnish short-selling data from FIN-FSA using Selenium"""
         self.logger.info("Starting Selenium scrape for Finland")
         self.logger.info("Downloading Finland FIN-FSA data with Selenium")
         
-        driver = None
-        download_dir = None
         try:
-            driver, download_dir = self._setup_driver()
-            
-            # Download current positions with Excel/CSV download
-            current_url = self.get_current_positions_url()
-            self.logger.info(f"Fetching current positions from: {current_url}")
-            
-            driver.get(current_url)
-            time.sleep(10)  # Wait longer for page to load
-            
-            # Wait for table to load
-            try:
-                WebDriverWait(driver, 30).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "table"))
-                )
-                self.logger.info("Current positions table loaded")
-            except TimeoutException:
-                self.logger.warning("Timeout waiting for current positions table")
-            
-            # Scroll down to trigger any lazy loading and make sure the button is visible
-            self.logger.info("Scrolling down to ensure all content is loaded...")
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(5)
-            driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(3)
-            
-            # Handle cookie consent banner if present
-            try:
-                cookie_buttons = driver.find_elements(By.XPATH, "//button[contains(text(), 'ACCEPT ALL') or contains(text(), 'Accept All') or contains(text(), 'Accept')]")
-                if cookie_buttons:
-                    self.logger.info("Found cookie consent banner, accepting cookies...")
-                    cookie_buttons[0].click()
-                    time.sleep(2)
-            except Exception as e:
-                self.logger.warning(f"Error handling cookie banner: {e}")
-            
-            # Look for and click the "Save as excel (.csv)" button for current positions
-            try:
-                # Look for the specific "Save as excel (.csv)" button
-                button_selectors = [
-                    "//span[contains(text(), 'Save as excel (.csv)')]",
-                    "//span[contains(text(), 'save as excel (.csv)')]",
-                    "//*[contains(text(), 'Save as excel (.csv)')]",
-                    "//*[contains(text(), 'save as excel (.csv)')]",
-                    "//span[contains(text(), 'Save as excel')]",
-                    "//span[contains(text(), 'save as excel')]",
-                    "//*[contains(text(), 'Save as excel')]",
-                    "//*[contains(text(), 'save as excel')]"
-                ]
+            with browser_pool.session(self.country_code) as browser:
+                # Download current positions with Excel/CSV download
+                current_url = self.get_current_positions_url()
+                self.logger.info(f"Fetching current positions from: {current_url}")
+                current_file_content, current_file = self._download_positions_file(browser, current_url, "current")
+                current_page_source = browser.driver.page_source
                 
-                download_button = None
-                for selector in button_selectors:
-                    try:
-                        # First try to find any element with the text, not necessarily clickable
-                        elements = driver.find_elements(By.XPATH, selector)
-                        if elements:
-                            for element in elements:
-                                try:
-                                    # Try to make it clickable by scrolling to it
-                                    driver.execute_script("arguments[0].scrollIntoView(true);", element)
-                                    time.sleep(1)
-                                    if element.is_enabled() and element.is_displayed():
-                                        download_button = element
-                                        self.logger.info(f"Found current positions download button with selector: {selector}")
-                                        break
-                                except:
-                                    continue
-                            if download_button:
-                                break
-                    except Exception as e:
-                        self.logger.warning(f"Error with selector {selector}: {e}")
-                        continue
-                
-                if download_button:
-                    self.logger.info("Clicking current positions download button...")
-                    try:
-                        # Try JavaScript click first to bypass element interception
-                        driver.execute_script("arguments[0].click();", download_button)
-                        self.logger.info("Current positions download button clicked with JavaScript")
-                    except Exception as js_error:
-                        self.logger.warning(f"JavaScript click failed: {js_error}")
-                        try:
-                            # Fallback to regular click
-                            download_button.click()
-                            self.logger.info("Current positions download button clicked with regular click")
-                        except Exception as click_error:
-                            self.logger.warning(f"Regular click also failed: {click_error}")
-                            # Try to click using ActionChains
-                            from selenium.webdriver.common.action_chains import ActionChains
-                            actions = ActionChains(driver)
-                            actions.move_to_element(download_button).click().perform()
-                            self.logger.info("Current positions download button clicked with ActionChains")
-                    
-                    time.sleep(10)  # Wait for download to complete
-                    self.logger.info("Current positions download button clicked successfully")
-                    
-                    # Check for downloaded files
-                    downloaded_files = []
-                    for filename in os.listdir(download_dir):
-                        if filename.endswith(('.csv', '.xlsx', '.xls')):
-                            file_path = os.path.join(download_dir, filename)
-                            downloaded_files.append(file_path)
-                            self.logger.info(f"Found current positions downloaded file: {filename}")
-                    
-                    if downloaded_files:
-                        # Read the downloaded file
-                        latest_file = max(downloaded_files, key=os.path.getctime)
-                        with open(latest_file, 'rb') as f:
-                            current_file_content = f.read()
-                        self.logger.info(f"Successfully read current positions downloaded file: {os.path.basename(latest_file)} ({len(current_file_content)} bytes)")
-                        
-                        # Rename the current file to prevent historic download from overwriting it
-                        current_renamed_file = os.path.join(download_dir, "current_positions.csv")
-                        os.rename(latest_file, current_renamed_file)
-                        self.logger.info(f"Renamed current file to: {os.path.basename(current_renamed_file)}")
-                    else:
-                        self.logger.warning("No current positions downloaded files found")
-                        current_file_content = b''
-                else:
-                    self.logger.warning("Could not find current positions download button")
-                    current_file_content = b''
-                    
-            except Exception as e:
-                self.logger.warning(f"Error clicking current positions download button: {e}")
-                current_file_content = b''
-            
-            current_page_source = driver.page_source
-            
-            # Download historic positions with Excel/CSV download
-            historic_url = self.get_historic_positions_url()
-            self.logger.info(f"Fetching historic positions from: {historic_url}")
-            
-            driver.get(historic_url)
-            time.sleep(10)  # Wait longer for page to load
-            
-            # Wait for table to load
-            try:
-                WebDriverWait(driver, 30).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "table"))
+                # Download historic positions with Excel/CSV download (ignoring the current file)
+                historic_url = self.get_historic_positions_url()
+                self.logger.info(f"Fetching historic positions from: {historic_url}")
+                historic_file_content, _ = self._download_positions_file(
+                    browser, historic_url, "historic", ignore={current_file} if current_file else None
                 )
-                self.logger.info("Historic positions table loaded")
-            except TimeoutException:
-                self.logger.warning("Timeout waiting for historic positions table")
-            
-            # Scroll down to trigger any lazy loading and make sure the button is visible
-            self.logger.info("Scrolling down to ensure all content is loaded...")
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(5)
-            driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(3)
-            
-            # Handle cookie consent banner if present
-            try:
-                cookie_buttons = driver.find_elements(By.XPATH, "//button[contains(text(), 'ACCEPT ALL') or contains(text(), 'Accept All') or contains(text(), 'Accept')]")
-                if cookie_buttons:
-                    self.logger.info("Found cookie consent banner, accepting cookies...")
-                    cookie_buttons[0].click()
-                    time.sleep(2)
-            except Exception as e:
-                self.logger.warning(f"Error handling cookie banner: {e}")
-            
-            # Look for and click the "Save as excel (.csv)" button for historic positions
-            try:
-                # Look for the specific "Save as excel (.csv)" button
-                button_selectors = [
-                    "//span[contains(text(), 'Save as excel (.csv)')]",
-                    "//span[contains(text(), 'save as excel (.csv)')]",
-                    "//*[contains(text(), 'Save as excel (.csv)')]",
-                    "//*[contains(text(), 'save as excel (.csv)')]",
-                    "//span[contains(text(), 'Save as excel')]",
-                    "//span[contains(text(), 'save as excel')]",
-                    "//*[contains(text(), 'Save as excel')]",
-                    "//*[contains(text(), 'save as excel')]"
-                ]
-                
-                download_button = None
-                for selector in button_selectors:
-                    try:
-                        # First try to find any element with the text, not necessarily clickable
-                        elements = driver.find_elements(By.XPATH, selector)
-                        if elements:
-                            for element in elements:
-                                try:
-                                    # Try to make it clickable by scrolling to it
-                                    driver.execute_script("arguments[0].scrollIntoView(true);", element)
-                                    time.sleep(1)
-                                    if element.is_enabled() and element.is_displayed():
-                                        download_button = element
-                                        self.logger.info(f"Found historic positions download button with selector: {selector}")
-                                        break
-                                except:
-                                    continue
-                            if download_button:
-                                break
-                    except Exception as e:
-                        self.logger.warning(f"Error with selector {selector}: {e}")
-                        continue
-                
-                if download_button:
-                    self.logger.info("Clicking historic positions download button...")
-                    try:
-                        # Try JavaScript click first to bypass element interception
-                        driver.execute_script("arguments[0].click();", download_button)
-                        self.logger.info("Historic positions download button clicked with JavaScript")
-                    except Exception as js_error:
-                        self.logger.warning(f"JavaScript click failed: {js_error}")
-                        try:
-                            # Fallback to regular click
-                            download_button.click()
-                            self.logger.info("Historic positions download button clicked with regular click")
-                        except Exception as click_error:
-                            self.logger.warning(f"Regular click also failed: {click_error}")
-                            # Try to click using ActionChains
-                            from selenium.webdriver.common.action_chains import ActionChains
-                            actions = ActionChains(driver)
-                            actions.move_to_element(download_button).click().perform()
-                            self.logger.info("Historic positions download button clicked with ActionChains")
-                    
-                    time.sleep(10)  # Wait for download to complete
-                    self.logger.info("Historic positions download button clicked successfully")
-                    
-                    # Check for downloaded files
-                    downloaded_files = []
-                    for filename in os.listdir(download_dir):
-                        if filename.endswith(('.csv', '.xlsx', '.xls')):
-                            file_path = os.path.join(download_dir, filename)
-                            downloaded_files.append(file_path)
-                            self.logger.info(f"Found historic positions downloaded file: {filename}")
-                    
-                    if downloaded_files:
-                        # Filter out the current positions file we renamed earlier
-                        historic_files = [f for f in downloaded_files if not f.endswith('current_positions.csv')]
-                        if historic_files:
-                            # Read the latest historic file
-                            latest_file = max(historic_files, key=os.path.getctime)
-                            with open(latest_file, 'rb') as f:
-                                historic_file_content = f.read()
-                            self.logger.info(f"Successfully read historic positions downloaded file: {os.path.basename(latest_file)} ({len(historic_file_content)} bytes)")
-                            
-                            # Rename for clarity
-                            historic_renamed_file = os.path.join(download_dir, "historic_positions.csv")
-                            if latest_file != historic_renamed_file:
-                                os.rename(latest_file, historic_renamed_file)
-                                self.logger.info(f"Renamed historic file to: {os.path.basename(historic_renamed_file)}")
-                        else:
-                            self.logger.warning("No new historic positions files found (excluding current file)")
-                            historic_file_content = b''
-                    else:
-                        self.logger.warning("No historic positions downloaded files found")
-                        historic_file_content = b''
-                else:
-                    self.logger.warning("Could not find historic positions download button")
-                    historic_file_content = b''
-                    
-            except Exception as e:
-                self.logger.warning(f"Error clicking historic positions download button: {e}")
-                historic_file_content = b''
-            
-            historic_page_source = driver.page_source
+                historic_page_source = browser.driver.page_source
             
             return {
                 'current_page': current_page_source.encode('utf-8'),
@@ -348,12 +83,98 @@ class FinlandSeleniumScraper(BaseScraper):
         except Exception as e:
             self.logger.error(f"Failed to download Finland data with Selenium: {e}")
             raise Exception(f"Finland Selenium download failed: {e}")
-        finally:
-            if driver:
-                driver.quit()
-            if download_dir and os.path.exists(download_dir):
-                import shutil
-                shutil.rmtree(download_dir)  # Clean up temp directory
+    
+    def _download_positions_file(self, browser, url: str, data_type: str, ignore=None):
+        """Open a positions page, click its "Save as excel (.csv)" button and return (content, file path)"""
+        # Wait for table to load
+        if browser.get(url, wait_for=(By.CSS_SELECTOR, "table tr td"), timeout=30):
+            self.logger.info(f"{data_type.capitalize()} positions table loaded")
+        else:
+            self.logger.warning(f"Timeout waiting for {data_type} positions table")
+        
+        # Scroll down to trigger any lazy loading, then wait for the download button to exist
+        self.logger.info("Scrolling down to ensure all content is loaded...")
+        driver = browser.driver
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        browser.wait_for(EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'Save as excel') or contains(text(), 'save as excel')]")), timeout=10)
+        driver.execute_script("window.scrollTo(0, 0);")
+        
+        # Handle cookie consent banner if present
+        try:
+            cookie_buttons = driver.find_elements(By.XPATH, "//button[contains(text(), 'ACCEPT ALL') or contains(text(), 'Accept All') or contains(text(), 'Accept')]")
+            if cookie_buttons:
+                self.logger.info("Found cookie consent banner, accepting cookies...")
+                cookie_buttons[0].click()
+                browser.wait_for(EC.invisibility_of_element(cookie_buttons[0]), timeout=5)
+        except Exception as e:
+            self.logger.warning(f"Error handling cookie banner: {e}")
+        
+        # Look for and click the "Save as excel (.csv)" button
+        try:
+            download_button = None
+            for selector in DOWNLOAD_BUTTON_SELECTORS:
+                try:
+                    # First try to find any element with the text, not necessarily clickable
+                    elements = driver.find_elements(By.XPATH, selector)
+                    for element in elements:
+                        try:
+                            # Try to make it clickable by scrolling to it
+                            driver.execute_script("arguments[0].scrollIntoView(true);", element)
+                            if browser.wait_for(EC.visibility_of(element), timeout=2) and element.is_enabled():
+                                download_button = element
+                                self.logger.info(f"Found {data_type} positions download button with selector: {selector}")
+                                break
+                        except ScraperDeadlineExceeded:
+                            raise
+                        except:
+                            continue
+                    if download_button:
+                        break
+                except ScraperDeadlineExceeded:
+                    raise
+                except Exception as e:
+                    self.logger.warning(f"Error with selector {selector}: {e}")
+                    continue
+            
+            if not download_button:
+                self.logger.warning(f"Could not find {data_type} positions download button")
+                return b'', None
+            
+            already_downloaded = browser.list_downloads(DOWNLOAD_EXTENSIONS) | set(ignore or ())
+            
+            self.logger.info(f"Clicking {data_type} positions download button...")
+            try:
+                # Try JavaScript click first to bypass element interception
+                driver.execute_script("arguments[0].click();", download_button)
+                self.logger.info(f"{data_type.capitalize()} positions download button clicked with JavaScript")
+            except Exception as js_error:
+                self.logger.warning(f"JavaScript click failed: {js_error}")
+                try:
+                    # Fallback to regular click
+                    download_button.click()
+                    self.logger.info(f"{data_type.capitalize()} positions download button clicked with regular click")
+                except Exception as click_error:
+                    self.logger.warning(f"Regular click also failed: {click_error}")
+                    # Try to click using ActionChains
+                    from selenium.webdriver.common.action_chains import ActionChains
+                    actions = ActionChains(driver)
+                    actions.move_to_element(download_button).click().perform()
+                    self.logger.info(f"{data_type.capitalize()} positions download button clicked with ActionChains")
+            
+            # Wait for download to complete
+            file_path, file_content = browser.read_download(DOWNLOAD_EXTENSIONS, timeout=30, ignore=already_downloaded)
+            if not file_path:
+                self.logger.warning(f"No {data_type} positions downloaded files found")
+                return b'', None
+            
+            self.logger.info(f"Successfully read {data_type} positions downloaded file: {os.path.basename(file_path)} ({len(file_content)} bytes)")
+            return file_content, file_path
+            
+        except ScraperDeadlineExceeded:
+            raise
+        except Exception as e:
+            self.logger.warning(f"Error clicking {data_type} positions download button: {e}")
+            return b'', None
     
     def parse_data(self, data: Dict[str, Any]) -> pd.DataFrame:
         """Parse the downloaded data files and HTML data"""
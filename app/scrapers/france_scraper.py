@@ -5,13 +5,37 @@ Fetches data from data.gouv.fr - AMF (Autorité des marchés financiers)
 """
 
 import requests
+import numpy as np
 import pandas as pd
 import io
 import logging
 import unicodedata  # NEW: for Unicode normalization (acentos + Arabic)
-from datetime import datetime
-from typing import Dict, Any, List
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
 from .base_scraper import BaseScraper
+from .scrape_state import ScrapeState
+from .active_state import apply_active_state, factorize_position_keys, ACTIVE_THRESHOLD
+
+# Rows per read_csv chunk - the history file is parsed incrementally
+FRANCE_CSV_CHUNKSIZE = 50_000
+
+# Re-read this many days before the watermark to catch same-day and late republications
+FRANCE_WATERMARK_OVERLAP_DAYS = 3
+
+WATERMARK_STATE = "watermark"
+
+FRANCE_ACTIVE_RULES = {
+    'date_col': 'sort_date',
+    'tiebreak': [('publication_end_date', True), ('position_size', False)],
+    'threshold': ACTIVE_THRESHOLD,
+    'end_date_col': 'publication_end_date',
+    'max_age_days': 730,  # 2 years
+    'transitions': True,
+}
+
+DATE_COLUMNS = ['Date de debut position',
+                'Date de debut de publication position',
+                'Date de fin de publication position']
 
 
 # NEW: encoding detector used by parse_data
@@ -48,8 +72,16 @@ def _detect_encoding(data: bytes) -> str:
 class FranceScraper(BaseScraper):
     """Scraper for French short-selling data from data.gouv.fr"""
     
-    def __init__(self, country_code: str = "FR", country_name: str = "France"):
+    def __init__(self, country_code: str = "FR", country_name: str = "France", full_history: bool = False):
+        """
+        Args:
+            full_history: Ignore the stored watermark and return every row since 2012
+                          (used by the re-import scripts)
+        """
         super().__init__(country_code, country_name)
+        self.full_history = full_history
+        self.state = ScrapeState(country_code)
+        self._pending_watermark: Optional[str] = None
         
     def get_data_url(self) -> str:
         """Get the main data source URL"""
@@ -59,32 +91,6 @@ class FranceScraper(BaseScraper):
         """Get the direct API URL for CSV download"""
         return "https://www.data.gouv.fr/api/1/datasets/r/c2539d1c-8531-4937-9cba-3bd8e9786cc5"
     
-    def _parse_position_size(self, value) -> float:
-        """Parse position size from French format"""
-        try:
-            if pd.isna(value):
-                return 0.0
-            
-            # Convert to string and clean
-            value_str = str(value).strip()
-            
-            # Remove any percentage signs and convert to float
-            value_str = value_str.replace('%', '').replace(',', '.')
-            
-            # Convert to float and ensure it's a percentage (0-100 range)
-            position_size = float(value_str)
-            
-            # Validate range
-            if position_size < 0 or position_size > 100:
-                self.logger.warning(f"Invalid position size: {position_size}%, setting to 0")
-                return 0.0
-            
-            return position_size
-            
-        except (ValueError, TypeError) as e:
-            self.logger.warning(f"Could not parse position size '{value}': {e}")
-            return 0.0
-    
     def download_data(self) -> Dict[str, Any]:
         """Download French short-selling data from data.gouv.fr"""
         self.logger.info("Starting scrape for France")
@@ -118,8 +124,49 @@ class FranceScraper(BaseScraper):
             self.logger.error(f"Failed to download France data: {e}")
             raise Exception(f"France download failed: {e}")
     
+    def _load_watermark(self) -> Optional[pd.Timestamp]:
+        """Publication date up to which the history has already been ingested"""
+        if self.full_history:
+            return None
+        stored = self.state.load(WATERMARK_STATE, {}).get('publication_date')
+        return pd.Timestamp(stored) if stored else None
+    
+    def mark_ingested(self):
+        """Advance the watermark once the positions of this run are stored"""
+        if self._pending_watermark:
+            self.state.save(WATERMARK_STATE, {'publication_date': self._pending_watermark})
+            self.logger.info(f"France watermark advanced to {self._pending_watermark}")
+            self._pending_watermark = None
+    
+    @staticmethod
+    def _nfc(series: pd.Series) -> pd.Series:
+        """NFC-normalize a text column, once per distinct value"""
+        values = series.dropna().unique()
+        mapping = {v: unicodedata.normalize('NFC', v) for v in values if isinstance(v, str)}
+        return series.map(lambda x: mapping.get(x, x) if isinstance(x, str) else x)
+    
+    @classmethod
+    def _position_keys(cls, df: pd.DataFrame) -> pd.Series:
+        """manager_company_key of raw CSV rows, as apply_active_state builds it in _apply_france_active_logic"""
+        def text(col):
+            return cls._nfc(df[col]).fillna('').astype(str).str.strip()
+        
+        key_codes, key_names = factorize_position_keys(pd.DataFrame({
+            'manager_name': text('Detenteur de la position courte nette'),
+            'isin': text('code ISIN').str.upper(),
+            'company_name': text('Emetteur / issuer'),
+        }))
+        return pd.Series(key_names[key_codes], index=df.index)
+    
     def parse_data(self, data: Dict[str, Any]) -> pd.DataFrame:
-        """Parse the downloaded CSV data"""
+        """
+        Parse the downloaded CSV data.
+        
+        The full history since 2012 is streamed in chunks; only rows published
+        after the stored watermark are kept, plus the open disclosures and the
+        last two earlier disclosures of each affected (manager, ISIN/company) so the
+        active state and transitions come out exactly as on the full file.
+        """
         self.logger.info("Parsing France CSV data")
         
         try:
@@ -130,24 +177,83 @@ class FranceScraper(BaseScraper):
             enc = _detect_encoding(csv_content)
             self.logger.info(f"Detected CSV encoding: {enc}")
             
+            watermark = self._load_watermark()
+            cutoff = watermark - timedelta(days=FRANCE_WATERMARK_OVERLAP_DAYS) if watermark is not None else None
+            if cutoff is not None:
+                self.logger.info(f"France watermark {watermark.date()}: keeping rows published since {cutoff.date()}")
+            
             # Parse CSV with detected encoding and semicolon separator
-            df = pd.read_csv(
+            reader = pd.read_csv(
                 io.BytesIO(csv_content),
                 encoding=enc,
                 sep=';',
                 quotechar='"',
                 thousands=',',
                 decimal='.',
-                parse_dates=['Date de debut position',
-                             'Date de debut de publication position',
-                             'Date de fin de publication position']
+                parse_dates=DATE_COLUMNS,
+                chunksize=FRANCE_CSV_CHUNKSIZE
             )
             
+            new_rows, open_rows, earlier_rows = [], [], []
+            total_rows = 0
+            latest_publication = None
+            
+            for chunk in reader:
+                total_rows += len(chunk)
+                
+                published = chunk['Date de debut de publication position'].fillna(chunk['Date de debut position'])
+                chunk_latest = published.max()
+                if pd.notna(chunk_latest) and (latest_publication is None or chunk_latest > latest_publication):
+                    latest_publication = chunk_latest
+                
+                if cutoff is None:
+                    new_rows.append(chunk)
+                    continue
+                
+                is_new = published.isna() | (published >= cutoff)
+                new_rows.append(chunk[is_new])
+                
+                older = chunk[~is_new]
+                open_rows.append(older[older['Date de fin de publication position'].isna()])
+                
+                # Keep every row tied for the two most recent dates per key, which
+                # is enough to rebuild recency ranks 1 and 2 after the new rows
+                older = older.assign(
+                    _key=self._position_keys(older),
+                    _sort_date=older['Date de debut position'].fillna(older['Date de debut de publication position'])
+                )
+                earlier_rows.append(older)
+                if len(earlier_rows) > 1:
+                    combined = pd.concat(earlier_rows)
+                    dense_rank = combined.groupby('_key')['_sort_date'].rank(method='dense', ascending=False)
+                    earlier_rows = [combined[dense_rank <= 2]]
+            
+            df = pd.concat(new_rows) if new_rows else pd.DataFrame()
+            
+            if cutoff is not None and not df.empty:
+                open_df = pd.concat(open_rows)
+                earlier = pd.concat(earlier_rows)
+                earlier = earlier[earlier.groupby('_key')['_sort_date'].rank(method='dense', ascending=False) <= 2]
+                
+                touched_keys = set(self._position_keys(pd.concat([df, open_df])))
+                context = earlier[earlier['_key'].isin(touched_keys)].drop(columns=['_key', '_sort_date'])
+                
+                # Indexes are global row numbers across chunks, so overlaps dedupe cleanly
+                df = pd.concat([df, open_df, context])
+                df = df[~df.index.duplicated()].sort_index()
+                self.logger.info(
+                    f"Kept {len(df)} of {total_rows} France rows "
+                    f"({len(open_df)} open positions, {len(context)} earlier disclosures for context)"
+                )
+            elif cutoff is not None:
+                self.logger.info(f"No France rows published since {cutoff.date()}")
+            
+            if latest_publication is not None:
+                self._pending_watermark = latest_publication.date().isoformat()
+            
             # NEW: normalize all text columns to NFC (preserve diacritics/Arabic)
             for col in df.select_dtypes(include=['object']).columns:
-                df[col] = df[col].map(
-                    lambda x: unicodedata.normalize('NFC', x) if isinstance(x, str) else x
-                )
+                df[col] = self._nfc(df[col])
 
             self.logger.info(f"Parsed {len(df)} rows from France CSV")
             self.logger.info(f"France CSV columns: {list(df.columns)}")
@@ -165,13 +271,32 @@ class FranceScraper(BaseScraper):
             self.logger.error(f"Failed to parse France data: {e}")
             raise Exception(f"France data parsing failed: {e}")
     
+    def _parse_position_sizes(self, values: pd.Series) -> pd.Series:
+        """Parse French position sizes (percent strings or floats) to 0..100; invalid values become 0"""
+        if pd.api.types.is_numeric_dtype(values):
+            sizes = values.astype(float)
+        else:
+            cleaned = values.astype(str).str.strip().str.replace('%', '', regex=False).str.replace(',', '.', regex=False)
+            sizes = pd.to_numeric(cleaned, errors='coerce')
+            unparseable = sizes.isna() & values.notna()
+            if unparseable.any():
+                self.logger.warning(f"Could not parse {int(unparseable.sum())} position sizes, setting to 0")
+        
+        out_of_range = (sizes < 0) | (sizes > 100)
+        if out_of_range.any():
+            self.logger.warning(f"{int(out_of_range.sum())} invalid position sizes outside 0-100%, setting to 0")
+        
+        return sizes.mask(out_of_range, 0.0).fillna(0.0)
+    
     def extract_positions(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
         """Extract short positions from parsed data"""
         self.logger.info("Extracting positions from France data")
         
-        positions = []
-        
         try:
+            if df.empty:
+                self.logger.info("Extracted 0 positions from France data")
+                return []
+            
             # Map French column names to our standard format
             column_mapping = {
                 'Detenteur de la position courte nette': 'manager_name',
@@ -186,53 +311,33 @@ class FranceScraper(BaseScraper):
             
             # Rename columns
             df = df.rename(columns=column_mapping)
+            for col in column_mapping.values():
+                if col not in df.columns:
+                    df[col] = '' if col == 'lei' else np.nan
             
-            # Extract all raw data first (no normalization beyond parse_data)
-            for _, row in df.iterrows():
-                try:
-                    # Parse position size (convert percentage to decimal)
-                    position_size = self._parse_position_size(row.get('position_size', 0))
-                    
-                    # Use position start date as the main date (Date de debut position)
-                    position_date = row.get('position_start_date')
-                    if pd.isna(position_date):
-                        # Fallback to publication start date if position start date is missing
-                        position_date = row.get('publication_start_date')
-                    
-                    if pd.isna(position_date):
-                        continue
-                    
-                    # Get raw data (already NFC-normalized in parse_data)
-                    company_name = str(row.get('company_name', ''))
-                    if not company_name or company_name == 'nan':
-                        continue
-                    
-                    manager_name = str(row.get('manager_name', ''))
-                    if not manager_name or manager_name == 'nan':
-                        continue
-                    
-                    isin = str(row.get('isin', ''))
-                    if not isin or isin == 'nan':
-                        continue
-                    
-                    position_data = {
-                        'manager_name': manager_name,
-                        'company_name': company_name,
-                        'isin': isin,
-                        'position_size': position_size,
-                        'date': position_date,
-                        'country_code': self.country_code,
-                        'lei': row.get('lei', ''),
-                        'position_start_date': row.get('position_start_date'),
-                        'publication_start_date': row.get('publication_start_date'),
-                        'publication_end_date': row.get('publication_end_date')
-                    }
-                    
-                    positions.append(position_data)
-                    
-                except Exception as e:
-                    self.logger.warning(f"Error processing row: {e}")
-                    continue
+            # Use position start date as the main date, publication start date as fallback
+            position_date = df['position_start_date'].fillna(df['publication_start_date'])
+            
+            # Rows need a date plus non-empty company, manager and ISIN
+            def present(col):
+                text = df[col].astype(str)
+                return df[col].notna() & (text != '') & (text != 'nan')
+            
+            keep = position_date.notna() & present('company_name') & present('manager_name') & present('isin')
+            df = df[keep]
+            
+            positions = pd.DataFrame({
+                'manager_name': df['manager_name'].astype(str),
+                'company_name': df['company_name'].astype(str),
+                'isin': df['isin'].astype(str),
+                'position_size': self._parse_position_sizes(df['position_size']),
+                'date': position_date[keep],
+                'country_code': self.country_code,
+                'lei': df['lei'],
+                'position_start_date': df['position_start_date'],
+                'publication_start_date': df['publication_start_date'],
+                'publication_end_date': df['publication_end_date']
+            }).reset_index(drop=True)
             
             # Apply France-specific is_active logic based on most recent position per (manager, company/ISIN)
             positions = self._apply_france_active_logic(positions)
@@ -244,7 +349,7 @@ class FranceScraper(BaseScraper):
             self.logger.error(f"Failed to extract France positions: {e}")
             raise Exception(f"France position extraction failed: {e}")
     
-    def _apply_france_active_logic(self, positions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _apply_france_active_logic(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
         """
         France logic:
           - One 'is_active=True' row per (manager, ISIN/company) — the most recent disclosure.
@@ -254,10 +359,10 @@ class FranceScraper(BaseScraper):
         """
         self.logger.info("Applying France-specific active logic...")
 
-        if not positions:
-            return positions
+        if df.empty:
+            return []
 
-        df = pd.DataFrame(positions).copy()
+        df = df.copy()
 
         # Choose the timeline anchor:
         # Use position_start_date as primary with publication_start_date as fallback
@@ -266,78 +371,18 @@ class FranceScraper(BaseScraper):
             df['position_start_date'].fillna(df['publication_start_date'])
         )
 
-        # Robust fallback if both are NaT
-        df['sort_date'] = pd.to_datetime(df['sort_date'])
-
         # Normalize identifiers ONCE (much faster than row by row)
         df['isin'] = df['isin'].fillna('').str.strip().str.upper()
         df['company_name'] = df['company_name'].fillna('').str.strip()
         df['manager_name'] = df['manager_name'].fillna('').str.strip()
 
-        # NOTE (requested): removed lossy encode/decode that dropped non-ASCII characters
-
-        # Create manager_company_key efficiently
-        df['manager_company_key'] = df['manager_name'] + '_' + df['isin'].fillna(df['company_name'])
-
-        # Sort newest first within each key; tie-break by publication_end_date presence and size
-        df = df.sort_values(
-            by=['manager_company_key', 'sort_date', 'publication_end_date', 'position_size'],
-            ascending=[True, False, True, False]
-        )
-
-        # Rank per key (1 = most recent)
-        df['recency_rank'] = df.groupby('manager_company_key')['sort_date'].rank(
-            method='first', ascending=False
-        )
-
-        # Exactly one active row per key
-        df['is_active'] = df['recency_rank'] == 1
+        # Newest disclosure per (manager, ISIN) is current; tie-break by
+        # publication_end_date presence and size. Active only if >= 0.5%, still
+        # published and within the last two years.
+        df = apply_active_state(df, **FRANCE_ACTIVE_RULES)
 
         # Historical truth at the time of each row (useful but optional)
-        df['was_active_at_row_time'] = df['position_size'] >= 0.5
-
-        # CORRECT LOGIC (as in your original script): keep your subsequent rules unchanged
-        from datetime import datetime as _dt, timedelta as _td
-        date_barrier = _dt.now() - _td(days=730)  # 2 years ago
-
-        df['is_active'] = False
-        current_mask = df['recency_rank'] == 1  # Use recency rank instead of is_active
-        size_mask = df['position_size'] >= 0.5
-        null_end_date_mask = pd.isna(df['publication_end_date'])
-        recent_mask = df['sort_date'] >= date_barrier
-
-        df.loc[current_mask & size_mask & null_end_date_mask & recent_mask, 'is_active'] = True
-
-        # Transition classification on current row only
-        cur = df[df['recency_rank'] == 1][['manager_company_key', 'position_size']].rename(
-            columns={'position_size': 'curr_size'}
-        )
-        prev = df[df['recency_rank'] == 2][['manager_company_key', 'position_size']].rename(
-            columns={'position_size': 'prev_size'}
-        )
-        trans = cur.merge(prev, on='manager_company_key', how='left')
-
-        def classify_transition(row):
-            curr = row['curr_size']
-            prev = row['prev_size']
-            curr_active = curr >= 0.5
-            prev_active = (prev >= 0.5) if pd.notna(prev) else None
-            if pd.isna(prev):
-                return 'entered' if curr_active else 'inactive_first'
-            if (not prev_active) and curr_active:
-                return 'entered'
-            if prev_active and (not curr_active):
-                return 'exited'
-            if prev_active and curr_active:
-                return 'active_size_change' if curr != prev else 'active_unchanged'
-            return 'inactive_unchanged'
-
-        trans['transition'] = trans.apply(classify_transition, axis=1)
-
-        # Initialize transition column and map onto current rows
-        df['transition'] = None
-        df.loc[df['recency_rank'] == 1, 'transition'] = df.loc[df['recency_rank'] == 1, 'manager_company_key'] \
-            .map(dict(zip(trans['manager_company_key'], trans['transition'])))
+        df['was_active_at_row_time'] = df['position_size'] >= ACTIVE_THRESHOLD
 
         # Optional: expose a clean 'timeline_date' used for ordering / charts
         df['timeline_date'] = df['sort_date']
@@ -346,7 +391,7 @@ class FranceScraper(BaseScraper):
         out = df.drop(columns=['sort_date']).to_dict(orient='records')
 
         # Stats
-        active_count = sum(1 for p in out if p.get('is_active'))
+        active_count = int(df['is_active'].sum())
         total_keys = df['manager_company_key'].nunique()
 
         self.logger.info(f"France logic applied: {active_count}/{total_keys} current positions active (≥0.5%).")
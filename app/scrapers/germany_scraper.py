@@ -31,27 +31,30 @@ class GermanyScraper(BaseScraper):
                 'Accept-Language': 'en-US,en;q=0.9,de;q=0.8',
             })
             
-            # First, get the main page to understand the structure
             main_url = self.get_data_url()
-            self.logger.info(f"Accessing main page: {main_url}")
+            main_page = {}
             
-            response = session.get(main_url, timeout=30)
-            if response.status_code != 200:
-                raise Exception(f"Failed to access main page: {response.status_code}")
+            def discover_csv_url():
+                main_page['soup'] = self._load_main_page(session, main_url)
+                return self._find_csv_download_url(main_page['soup'], main_url)
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Look for the CSV download link
-            csv_download_url = self._find_csv_download_url(soup, main_url)
+            # Try the last known CSV export URL before crawling the main page for it
+            response, csv_download_url = self.download_with_cached_url(
+                'current_csv', discover_csv_url, session=session, timeout=30
+            )
             if not csv_download_url:
                 raise Exception("Could not find CSV download URL")
             
             self.logger.info(f"Found CSV download URL: {csv_download_url}")
             
             # Download current data using session
-            current_data = self._download_csv_data_with_session(session, csv_download_url, "current")
+            if response is not None:
+                current_data = self._parse_csv_response(response, "current")
+            else:
+                current_data = self._download_csv_data_with_session(session, csv_download_url, "current")
             
-            # Try to get historical data using session
+            # Historical data still goes through the filter form on the main page
+            soup = main_page['soup'] if 'soup' in main_page else self._load_main_page(session, main_url)
             historical_data = self._download_historical_data_with_session(session, soup, main_url)
             
             return {
@@ -65,6 +68,16 @@ class GermanyScraper(BaseScraper):
             self.logger.error(f"Failed to download Bundesanzeiger data: {e}")
             raise Exception(f"Bundesanzeiger download failed: {e}")
     
+    def _load_main_page(self, session: requests.Session, main_url: str) -> BeautifulSoup:
+        """Fetch and parse the main Bundesanzeiger page"""
+        self.logger.info(f"Accessing main page: {main_url}")
+        
+        response = session.get(main_url, timeout=30)
+        if response.status_code != 200:
+            raise Exception(f"Failed to access main page: {response.status_code}")
+        
+        return BeautifulSoup(response.content, 'html.parser')
+    
     def _find_csv_download_url(self, soup: BeautifulSoup, base_url: str) -> str:
         """Find the CSV download URL from the page"""
         self.logger.info("Looking for CSV download link...")
@@ -268,32 +281,7 @@ class GermanyScraper(BaseScraper):
             response = session.get(csv_url, timeout=30)
             
             if response.status_code == 200:
-                # Try to parse as CSV
-                try:
-                    from io import BytesIO
-                    # Handle BOM character and clean column names with proper encoding
-                    df = pd.read_csv(BytesIO(response.content), encoding='utf-8')
-                    
-                    # Clean column names (remove BOM and quotes)
-                    df.columns = df.columns.str.replace('ï»¿', '').str.replace('"', '').str.strip()
-                    
-                    self.logger.info(f"✅ Successfully downloaded {data_type} data: {len(df)} rows")
-                    return df
-                except Exception as e:
-                    self.logger.warning(f"Failed to parse as CSV: {e}")
-                    
-                    # Try to parse as HTML table
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    tables = soup.find_all('table')
-                    if tables:
-                        df = pd.read_html(str(tables[0]))[0]
-                        self.logger.info(f"✅ Successfully parsed {data_type} data as HTML table: {len(df)} rows")
-                        return df
-                    else:
-                        # The response might be HTML but not contain tables
-                        # Let's try to extract data from the HTML content
-                        self.logger.info("Trying to extract data from HTML content...")
-                        return self._extract_data_from_html(soup, data_type)
+                return self._parse_csv_response(response, data_type)
             else:
                 raise Exception(f"CSV download failed with status {response.status_code}")
                 
@@ -301,6 +289,38 @@ class GermanyScraper(BaseScraper):
             self.logger.error(f"Failed to download {data_type} CSV data: {e}")
             return pd.DataFrame()
     
+    def _parse_csv_response(self, response: requests.Response, data_type: str) -> pd.DataFrame:
+        """Parse a CSV export response, falling back to HTML tables"""
+        try:
+            from io import BytesIO
+            # Handle BOM character and clean column names with proper encoding
+            df = pd.read_csv(BytesIO(response.content), encoding='utf-8')
+            
+            # Clean column names (remove BOM and quotes)
+            df.columns = df.columns.str.replace('ï»¿', '').str.replace('"', '').str.strip()
+            
+            self.logger.info(f"✅ Successfully downloaded {data_type} data: {len(df)} rows")
+            return df
+        except Exception as e:
+            self.logger.warning(f"Failed to parse as CSV: {e}")
+            
+            try:
+                # Try to parse as HTML table
+                soup = BeautifulSoup(response.content, 'html.parser')
+                tables = soup.find_all('table')
+                if tables:
+                    df = pd.read_html(str(tables[0]))[0]
+                    self.logger.info(f"✅ Successfully parsed {data_type} data as HTML table: {len(df)} rows")
+                    return df
+                else:
+                    # The response might be HTML but not contain tables
+                    # Let's try to extract data from the HTML content
+                    self.logger.info("Trying to extract data from HTML content...")
+                    return self._extract_data_from_html(soup, data_type)
+            except Exception as e:
+                self.logger.error(f"Failed to parse {data_type} CSV data: {e}")
+                return pd.DataFrame()
+    
     def _download_historical_data_with_session(self, session: requests.Session, soup: BeautifulSoup, base_url: str) -> pd.DataFrame:
         """Try to download historical data using a session to maintain state"""
         self.logger.info("Attempting to download historical data with session...")
@@ -503,7 +523,7 @@ class GermanyScraper(BaseScraper):
                     sheet_positions = working_df[['manager_name', 'company_name', 'isin', 'position_size', 'date', 'is_active']].to_dict('records')
                     
                     # Filter valid positions
-                    valid_positions = [pos for pos in sheet_positions if self.validate_position(pos)]
+                    valid_positions = self.validate_positions(sheet_positions)
                     positions.extend(valid_positions)
                     
                     self.logger.info(f"Extracted {len(valid_positions)} valid positions from {sheet_name}")
@@ -186,7 +186,7 @@ class IrelandScraper(BaseScraper):
         positions = working_df[['manager_name', 'company_name', 'isin', 'position_size', 'date', 'country_code', 'is_active']].to_dict('records')
         
         # Filter valid positions
-        valid_positions = [pos for pos in positions if self.validate_position(pos)]
+        valid_positions = self.validate_positions(positions)
         
         self.logger.info(f"Extracted {len(valid_positions)} total positions from Ireland data")
         return valid_positions
@@ -8,6 +8,9 @@ from bs4 import BeautifulSoup
 from typing import List, Dict, Any
 from .base_scraper import BaseScraper
 
+# Known file URL (from the page JavaScript), used until discovery finds a newer one
+CONSOB_DOWNLOAD_URL = "https://www.consob.it/documents/11973/395154/PncPubl.xlsx/fbefe0a2-795b-bad3-9369-beccbeb14f27"
+
 class ItalyScraper(BaseScraper):
     """Scraper for Italy short-selling data from CONSOB"""
     
@@ -19,34 +22,42 @@ class ItalyScraper(BaseScraper):
         self.logger.info("Starting scrape for Italy")
         self.logger.info("Downloading Italy CONSOB data")
         
-        # Use the actual working URL found in JavaScript
         import time
         import random
         
-        base_url = "https://www.consob.it/documents/11973/395154/PncPubl.xlsx/fbefe0a2-795b-bad3-9369-beccbeb14f27"
-        
         # Add a random timestamp as the JavaScript does
         rand = int(time.time() * 1000) + random.randint(1000, 9999)
-        download_url = f"{base_url}?t={rand}"
         
-        self.logger.info(f"Downloading from actual CONSOB URL: {download_url}")
+        # Try the last known good URL (the one found in the page JavaScript on the
+        # first run) and only crawl the CONSOB page when it stops serving the file
+        response, base_url = self.download_with_cached_url(
+            'excel',
+            discover=self._discover_download_url,
+            is_valid=self.is_spreadsheet_response,
+            default_url=CONSOB_DOWNLOAD_URL,
+            params={'t': rand}
+        )
         
+        if response is None:
+            self.logger.error(f"Failed to download CONSOB file from {base_url or self.get_data_url()}")
+            raise Exception("CONSOB download failed: downloaded file is not a valid Excel file")
+        
+        download_url = response.url
+        self.logger.info(f"✅ Successfully downloaded CONSOB file ({len(response.content):,} bytes)")
+        return {
+            'excel_content': response.content,
+            'source_url': download_url
+        }
+    
+    def _discover_download_url(self) -> str:
+        """Load the CONSOB page and look for the current file URL"""
+        self.logger.info(f"Looking for download URL on {self.get_data_url()}")
         try:
-            response = self.download_with_retry(download_url)
-            
-            # Check if we got a valid Excel file
-            if b'PK' in response.content[:100]:  # Excel file signature
-                self.logger.info(f"✅ Successfully downloaded CONSOB file ({len(response.content):,} bytes)")
-                return {
-                    'excel_content': response.content,
-                    'source_url': download_url
-                }
-            else:
-                raise Exception("Downloaded file is not a valid Excel file")
-                
-        except Exception as e:
-            self.logger.error(f"Failed to download CONSOB file: {e}")
-            raise Exception(f"CONSOB download failed: {e}")
+            response = self.download_with_retry(self.get_data_url())
+        except requests.RequestException as e:
+            self.logger.warning(f"Could not load CONSOB page: {e}")
+            return None
+        return self._find_actual_download_url(BeautifulSoup(response.content, 'html.parser'))
     
     def _find_actual_download_url(self, soup: BeautifulSoup) -> str:
         """Try to find the actual download URL from the page"""
@@ -169,7 +180,7 @@ class ItalyScraper(BaseScraper):
                     sheet_positions = working_df[['manager_name', 'company_name', 'isin', 'position_size', 'date', 'is_active']].to_dict('records')
                     
                     # Filter valid positions
-                    valid_positions = [pos for pos in sheet_positions if self.validate_position(pos)]
+                    valid_positions = self.validate_positions(sheet_positions)
                     positions.extend(valid_positions)
                     
                     self.logger.info(f"Extracted {len(valid_positions)} valid positions from {sheet_name}")
@@ -8,6 +8,7 @@ import random
 from bs4 import BeautifulSoup
 from typing import List, Dict, Any
 from .base_scraper import BaseScraper
+from .active_state import apply_active_state
 from urllib.parse import urljoin, urlparse, parse_qs
 import re
 
@@ -63,45 +64,38 @@ class NetherlandsScraper(BaseScraper):
     
     def _download_current_data(self, session: requests.Session) -> pd.DataFrame:
         """Download current positions data from the current positions page"""
-        current_url = self.get_current_data_url()
-        self.logger.info(f"Accessing current positions page: {current_url}")
-        
-        response = session.get(current_url, timeout=30)
-        if response.status_code != 200:
-            raise Exception(f"Failed to access current positions page: {response.status_code}")
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Find the CSV download link
-        csv_url = self._find_csv_download_url(soup, current_url)
-        if not csv_url:
-            raise Exception("Could not find CSV download URL on current positions page")
-        
-        self.logger.info(f"Found current CSV download URL: {csv_url}")
-        
-        # Download the CSV data
-        return self._download_csv_data_with_session(session, csv_url, "current")
+        return self._download_page_csv(session, self.get_current_data_url(), "current")
     
     def _download_historical_data(self, session: requests.Session) -> pd.DataFrame:
         """Download historical positions data from the historical positions page"""
-        historical_url = self.get_historical_data_url()
-        self.logger.info(f"Accessing historical positions page: {historical_url}")
-        
-        response = session.get(historical_url, timeout=30)
-        if response.status_code != 200:
-            raise Exception(f"Failed to access historical positions page: {response.status_code}")
+        return self._download_page_csv(session, self.get_historical_data_url(), "historical")
+    
+    def _download_page_csv(self, session: requests.Session, page_url: str, data_type: str) -> pd.DataFrame:
+        """Download the CSV export of a positions page, reusing the last known export URL"""
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        def discover_csv_url():
+            self.logger.info(f"Accessing {data_type} positions page: {page_url}")
+            
+            response = session.get(page_url, timeout=30)
+            if response.status_code != 200:
+                raise Exception(f"Failed to access {data_type} positions page: {response.status_code}")
+            
+            soup = BeautifulSoup(response.content, 'html.parser')
+            return self._find_csv_download_url(soup, page_url)
         
-        # Find the CSV download link
-        csv_url = self._find_csv_download_url(soup, historical_url)
+        response, csv_url = self.download_with_cached_url(
+            f'{data_type}_csv', discover_csv_url, session=session, timeout=30
+        )
         if not csv_url:
-            raise Exception("Could not find CSV download URL on historical positions page")
+            raise Exception(f"Could not find CSV download URL on {data_type} positions page")
         
-        self.logger.info(f"Found historical CSV download URL: {csv_url}")
+        self.logger.info(f"Found {data_type} CSV download URL: {csv_url}")
         
-        # Download the CSV data
-        return self._download_csv_data_with_session(session, csv_url, "historical")
+        if response is not None:
+            return self._parse_csv_response(response, data_type)
+        
+        # Discovered link did not look like a CSV - keep the HTML fallbacks
+        return self._download_csv_data_with_session(session, csv_url, data_type)
     
     def _find_csv_download_url(self, soup: BeautifulSoup, base_url: str) -> str:
         """Find the CSV download URL from the page"""
@@ -145,40 +139,7 @@ class NetherlandsScraper(BaseScraper):
             response = session.get(csv_url, timeout=30)
             
             if response.status_code == 200:
-                # Try to parse as CSV
-                try:
-                    from io import StringIO
-                    # Handle BOM character and clean column names
-                    df = pd.read_csv(StringIO(response.text), sep=';', encoding='utf-8')
-                    
-                    # Clean column names (remove BOM and quotes)
-                    df.columns = df.columns.str.replace('ï»¿', '').str.replace('"', '').str.strip()
-                    
-                    self.logger.info(f"✅ Successfully downloaded {data_type} data: {len(df)} rows")
-                    return df
-                except Exception as e:
-                    self.logger.warning(f"Failed to parse as CSV with semicolon separator: {e}")
-                    
-                    # Try with comma separator
-                    try:
-                        df = pd.read_csv(StringIO(response.text), sep=',', encoding='utf-8')
-                        df.columns = df.columns.str.replace('ï»¿', '').str.replace('"', '').str.strip()
-                        self.logger.info(f"✅ Successfully downloaded {data_type} data with comma separator: {len(df)} rows")
-                        return df
-                    except Exception as e2:
-                        self.logger.warning(f"Failed to parse as CSV with comma separator: {e2}")
-                        
-                        # Try to parse as HTML table
-                        soup = BeautifulSoup(response.content, 'html.parser')
-                        tables = soup.find_all('table')
-                        if tables:
-                            df = pd.read_html(str(tables[0]))[0]
-                            self.logger.info(f"✅ Successfully parsed {data_type} data as HTML table: {len(df)} rows")
-                            return df
-                        else:
-                            # The response might be HTML but not contain tables
-                            self.logger.info("Trying to extract data from HTML content...")
-                            return self._extract_data_from_html(soup, data_type)
+                return self._parse_csv_response(response, data_type)
             else:
                 raise Exception(f"CSV download failed with status {response.status_code}")
                 
@@ -186,7 +147,45 @@ class NetherlandsScraper(BaseScraper):
             self.logger.error(f"Failed to download {data_type} CSV data: {e}")
             return pd.DataFrame()
     
-
+    def _parse_csv_response(self, response: requests.Response, data_type: str) -> pd.DataFrame:
+        """Parse a CSV export response (semicolon, then comma separated, then HTML tables)"""
+        from io import StringIO
+        try:
+            # Handle BOM character and clean column names
+            df = pd.read_csv(StringIO(response.text), sep=';', encoding='utf-8')
+            
+            # Clean column names (remove BOM and quotes)
+            df.columns = df.columns.str.replace('ï»¿', '').str.replace('"', '').str.strip()
+            
+            self.logger.info(f"✅ Successfully downloaded {data_type} data: {len(df)} rows")
+            return df
+        except Exception as e:
+            self.logger.warning(f"Failed to parse as CSV with semicolon separator: {e}")
+        
+        # Try with comma separator
+        try:
+            df = pd.read_csv(StringIO(response.text), sep=',', encoding='utf-8')
+            df.columns = df.columns.str.replace('ï»¿', '').str.replace('"', '').str.strip()
+            self.logger.info(f"✅ Successfully downloaded {data_type} data with comma separator: {len(df)} rows")
+            return df
+        except Exception as e2:
+            self.logger.warning(f"Failed to parse as CSV with comma separator: {e2}")
+        
+        try:
+            # Try to parse as HTML table
+            soup = BeautifulSoup(response.content, 'html.parser')
+            tables = soup.find_all('table')
+            if tables:
+                df = pd.read_html(str(tables[0]))[0]
+                self.logger.info(f"✅ Successfully parsed {data_type} data as HTML table: {len(df)} rows")
+                return df
+            else:
+                # The response might be HTML but not contain tables
+                self.logger.info("Trying to extract data from HTML content...")
+                return self._extract_data_from_html(soup, data_type)
+        except Exception as e:
+            self.logger.error(f"Failed to parse {data_type} CSV data: {e}")
+            return pd.DataFrame()
     
     def _extract_data_from_html(self, soup: BeautifulSoup, data_type: str) -> pd.DataFrame:
         """Extract data from HTML content when no tables are found"""
@@ -286,8 +285,7 @@ class NetherlandsScraper(BaseScraper):
                 working_df = df.copy()
                 
                 # Remove header and empty rows
-                working_df = working_df[~working_df.apply(self._is_header_row, axis=1)]
-                working_df = working_df[~working_df.apply(self._is_empty_row, axis=1)]
+                working_df = working_df[~self._header_row_mask(working_df) & ~self._empty_row_mask(working_df)]
                 
                 if not working_df.empty:
                     # Basic cleaning only - let DailyScrapingService handle normalization
@@ -297,10 +295,12 @@ class NetherlandsScraper(BaseScraper):
                     working_df['isin'] = working_df['isin'].replace('', None)
                     
                     # Vectorized position size parsing
-                    working_df['position_size'] = working_df[column_mapping.get('position_size', 0)].apply(self._parse_position_size)
+                    working_df['position_size'] = self._parse_position_sizes(working_df[column_mapping.get('position_size', 0)])
                     
-                    # Vectorized date parsing
-                    working_df['date'] = working_df[column_mapping.get('date', '')].apply(self._parse_date)
+                    # Dates are parsed once per distinct value
+                    dates = working_df[column_mapping.get('date', '')]
+                    parsed_dates = {value: self._parse_date(value) for value in dates.dropna().unique()}
+                    working_df['date'] = dates.map(parsed_dates)
                     
                     # Add sheet source for later processing
                     working_df['source_sheet'] = sheet_name
@@ -309,7 +309,7 @@ class NetherlandsScraper(BaseScraper):
                     sheet_positions = working_df[['manager_name', 'company_name', 'isin', 'position_size', 'date', 'source_sheet']].to_dict('records')
                     
                     # Filter valid positions
-                    valid_positions = [pos for pos in sheet_positions if self.validate_position(pos)]
+                    valid_positions = self.validate_positions(sheet_positions)
                     all_positions.extend(valid_positions)
                     
                     self.logger.info(f"Extracted {len(valid_positions)} valid positions from {sheet_name}")
@@ -333,7 +333,6 @@ class NetherlandsScraper(BaseScraper):
         if not positions:
             return positions
         
-        import pandas as pd
         df = pd.DataFrame(positions)
         
         # Basic cleaning only - let DailyScrapingService handle normalization
@@ -341,45 +340,24 @@ class NetherlandsScraper(BaseScraper):
         df['company_name'] = df['company_name'].fillna('').astype(str).str.strip()
         df['manager_name'] = df['manager_name'].fillna('').astype(str).str.strip()
         
-        # Create unique key for each (manager, company/ISIN) combination
-        df['manager_company_key'] = df.apply(
-            lambda row: f"{row['manager_name']}_{row['isin'] if row['isin'] else row['company_name']}",
-            axis=1
-        )
-        
         # Convert dates to datetime for proper sorting
         df['date'] = pd.to_datetime(df['date'])
         
-        # Sort by manager_company_key, then by date (newest first)
-        df = df.sort_values(['manager_company_key', 'date'], ascending=[True, False])
-        
-        # Initialize is_active to False for all positions
-        df['is_active'] = False
+        # Only rows from the current sheet compete for the active flag; the most
+        # recent one per (manager, company/ISIN) wins, with no size threshold
+        sheet = df['source_sheet'].str.lower()
+        df = apply_active_state(df, date_col='date', eligible=sheet == 'current')
         
-        # Process by source sheet
-        for sheet_name in df['source_sheet'].unique():
-            sheet_df = df[df['source_sheet'] == sheet_name]
-            
+        for sheet_name, sheet_df in df.groupby('source_sheet', sort=False):
             if sheet_name.lower() == 'historical':
-                # Historical sheet: All positions remain is_active=False
                 self.logger.info(f"Historical sheet: All {len(sheet_df)} positions set to is_active=False")
-                
             elif sheet_name.lower() == 'current':
-                # Current sheet: Only most recent per (manager, company) is active
-                # Get the most recent position for each manager_company_key
-                most_recent_indices = sheet_df.groupby('manager_company_key')['date'].idxmax()
-                
-                # Set is_active=True only for the most recent positions
-                df.loc[most_recent_indices, 'is_active'] = True
-                
-                active_count = len(most_recent_indices)
-                total_count = len(sheet_df)
-                self.logger.info(f"Current sheet: {active_count}/{total_count} positions set to is_active=True (most recent per manager/company)")
+                self.logger.info(f"Current sheet: {int(sheet_df['is_active'].sum())}/{len(sheet_df)} positions set to is_active=True (most recent per manager/company)")
         
         # Convert back to list of dictionaries
-        result = df.drop(columns=['manager_company_key', 'source_sheet']).to_dict('records')
+        result = df.drop(columns=['manager_company_key', 'source_sheet', 'recency_rank']).to_dict('records')
         
-        total_active = sum(1 for p in result if p['is_active'])
+        total_active = int(df['is_active'].sum())
         self.logger.info(f"Netherlands active logic applied: {total_active}/{len(result)} positions marked as active")
         
         return result
@@ -416,22 +394,10 @@ class NetherlandsScraper(BaseScraper):
         
         return column_mapping
     
-    def _parse_position_size(self, value) -> float:
-        """Parse position size value, handling different formats"""
-        try:
-            if pd.isna(value):
-                return 0.0
-            
-            # Convert to string and clean
-            value_str = str(value).strip()
-            
-            # Remove percentage signs and convert comma to dot
-            value_str = value_str.replace('%', '').replace(',', '.')
-            
-            # Convert to float
-            return float(value_str)
-        except:
-            return 0.0
+    def _parse_position_sizes(self, values: pd.Series) -> pd.Series:
+        """Parse position size values ('0,52%', '0.52', 0.52), unparseable values become 0"""
+        cleaned = values.astype(str).str.strip().str.replace('%', '', regex=False).str.replace(',', '.', regex=False)
+        return pd.to_numeric(cleaned, errors='coerce').fillna(0.0)
     
     def _parse_date(self, value) -> pd.Timestamp:
         """Parse date value"""
@@ -444,15 +410,15 @@ class NetherlandsScraper(BaseScraper):
         except:
             return None
     
-    def _is_header_row(self, row) -> bool:
-        """Check if row is a header row"""
-        if len(row) == 0:
-            return True
+    def _header_row_mask(self, df: pd.DataFrame) -> pd.Series:
+        """Rows whose first value looks like a repeated header"""
+        if len(df.columns) == 0:
+            return pd.Series(True, index=df.index)
         
-        first_value = str(row.iloc[0]).lower()
+        first_value = df.iloc[:, 0].astype(str).str.lower()
         header_keywords = ['position holder', 'issuer', 'isin', 'position', 'date', 'owner', 'manager']
-        return any(keyword in first_value for keyword in header_keywords)
+        return first_value.str.contains('|'.join(header_keywords), regex=True)
     
-    def _is_empty_row(self, row) -> bool:
-        """Check if row is empty"""
-        return row.isna().all() or (row == '').all()
+    def _empty_row_mask(self, df: pd.DataFrame) -> pd.Series:
+        """Rows that are entirely empty"""
+        return df.isna().all(axis=1) | (df == '').all(axis=1)
@@ -20,81 +20,59 @@ sys.path.append('..')
 import pandas as pd
 import logging
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
 import requests
 from bs4 import BeautifulSoup
-import time
 import re
 import json
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from .base_scraper import BaseScraper
+from .browser_pool import browser_pool, ScraperDeadlineExceeded
+from .scrape_state import ScrapeState
+
+# Persisted per-issuer detail page cache (summary fingerprint + parsed positions)
+DETAIL_CACHE_NAME = "detail_cache"
+DETAIL_FETCH_WORKERS = 4
 
 class NorwayScraper(BaseScraper):
     """Scraper for Norwegian short-selling data from Finanstilsynet"""
     
     def __init__(self, country_code: str = "NO", country_name: str = "Norway"):
         super().__init__(country_code, country_name)
+        self.state = ScrapeState(country_code)
         
     def get_data_url(self) -> str:
         """Get the main data source URL"""
         return "https://ssr.finanstilsynet.no/"
     
     
-    def _setup_driver(self):
-        """Setup Chrome WebDriver with appropriate options"""
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.implicitly_wait(10)
-        
-        return driver
-    
     def download_data(self) -> Dict[str, Any]:
         """Download comprehensive historical data from Norway using Selenium web scraping"""
         self.logger.info("Starting comprehensive Norway historical data collection")
         self.logger.info("Using Selenium web scraping for complete dataset (not limited API)")
         
-        driver = None
         try:
-            # Setup Selenium driver
-            driver = self._setup_driver()
-            
-            # Get the main page to find current positions
-            main_url = self.get_data_url()
-            self.logger.info(f"Navigating to: {main_url}")
-            
-            driver.get(main_url)
-            time.sleep(5)  # Wait for page to load
-            
-            # Wait for the table to load with data
-            try:
-                WebDriverWait(driver, 30).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "table"))
-                )
-                self.logger.info("Main table loaded successfully")
-            except TimeoutException:
-                self.logger.warning("Timeout waiting for main table to load")
-            
-            # Get the page source after JavaScript has loaded
-            page_source = driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            # Extract current positions from the main table
-            current_positions = self._extract_current_positions(soup)
-            
-            # Get comprehensive historical data for each stock (this is the key part!)
-            detailed_data = self._get_detailed_historical_data(current_positions, driver)
+            with browser_pool.session(self.country_code) as browser:
+                # Get the main page to find current positions
+                main_url = self.get_data_url()
+                self.logger.info(f"Navigating to: {main_url}")
+                
+                # Wait for the table to load with data
+                if browser.get(main_url, wait_for=(By.CSS_SELECTOR, "table tr td"), timeout=30):
+                    self.logger.info("Main table loaded successfully")
+                else:
+                    self.logger.warning("Timeout waiting for main table to load")
+                
+                # Get the page source after JavaScript has loaded
+                page_source = browser.driver.page_source
+                soup = BeautifulSoup(page_source, 'html.parser')
+                
+                # Extract current positions from the main table
+                current_positions = self._extract_current_positions(soup)
+                
+                # Get comprehensive historical data for each stock (this is the key part!)
+                detailed_data = self._get_detailed_historical_data(current_positions, browser)
             
             return {
                 'current_positions': current_positions,
@@ -107,9 +85,6 @@ class NorwayScraper(BaseScraper):
         except Exception as e:
             self.logger.error(f"Error in comprehensive scraping: {e}")
             raise
-        finally:
-            if driver:
-                driver.quit()
     
     def _extract_current_positions(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
         """Extract current positions from the main page table"""
@@ -171,50 +146,123 @@ class NorwayScraper(BaseScraper):
             return []
     
     
-    def _get_detailed_historical_data(self, current_positions: List[Dict[str, Any]], driver) -> List[Dict[str, Any]]:
-        """Get detailed historical data for each stock"""
+    def _summary_fingerprint(self, position: Dict[str, Any]) -> str:
+        """Fingerprint of an issuer's summary row - any change means its detail page changed"""
+        return '|'.join(str(position.get(key, '')) for key in (
+            'company_name', 'sum_short_num', 'sum_short_percent', 'latest_position', 'detail_url'
+        ))
+    
+    def _get_detailed_historical_data(self, current_positions: List[Dict[str, Any]], browser) -> List[Dict[str, Any]]:
+        """Get detailed historical data for each stock.
+        
+        Only issuers whose summary row changed since the last run are re-crawled;
+        everything else is served from the persisted per-issuer detail cache.
+        """
         self.logger.info("Getting detailed historical data...")
         
+        cache = self.state.load(DETAIL_CACHE_NAME, {})
+        positions_by_isin = {}
+        changed = []
+        
+        for position in current_positions:
+            if not position.get('detail_url'):
+                continue
+            entry = cache.get(position['isin'])
+            if entry and entry.get('summary') == self._summary_fingerprint(position):
+                positions_by_isin[position['isin']] = self._positions_from_cache(entry['positions'])
+            else:
+                changed.append(position)
+        
+        self.logger.info(f"{len(positions_by_isin)} issuers unchanged (served from cache), {len(changed)} to crawl")
+        
+        if changed:
+            for position, detail_positions in self._fetch_detail_pages(changed, browser):
+                positions_by_isin[position['isin']] = detail_positions
+                cache[position['isin']] = {
+                    'summary': self._summary_fingerprint(position),
+                    'positions': self._positions_to_cache(detail_positions)
+                }
+        
+        # Forget issuers that are no longer in the summary table
+        current_isins = {position['isin'] for position in current_positions}
+        stale_isins = [isin for isin in cache if isin not in current_isins]
+        for isin in stale_isins:
+            del cache[isin]
+        
+        if changed or stale_isins:
+            self.state.save(DETAIL_CACHE_NAME, cache)
+        
+        # Keep the summary table order
         detailed_data = []
+        for position in current_positions:
+            detailed_data.extend(positions_by_isin.get(position['isin'], []))
+        
+        self.logger.info(f"Extracted {len(detailed_data)} detailed positions")
+        return detailed_data
+    
+    def _fetch_detail_pages(self, positions: List[Dict[str, Any]], browser) -> List[tuple]:
+        """Fetch detail pages for the given issuers, returning (position, detail_positions) pairs.
+        
+        Plain HTTP is tried first (concurrently) when the detail page is server-rendered;
+        anything HTTP can't serve falls back to the leased browser.
+        """
+        results = {}
         
-        for i, position in enumerate(current_positions):
+        # Probe one page over HTTP before fanning out - a JS-rendered page yields no table rows
+        probe = positions[0]
+        probe_positions = self._fetch_detail_http(probe)
+        if probe_positions is not None:
+            results[probe['isin']] = probe_positions
+            remaining = positions[1:]
+            with ThreadPoolExecutor(max_workers=DETAIL_FETCH_WORKERS) as executor:
+                for position, detail_positions in zip(remaining, executor.map(self._fetch_detail_http, remaining)):
+                    if detail_positions is not None:
+                        results[position['isin']] = detail_positions
+            self.logger.info(f"Fetched {len(results)}/{len(positions)} detail pages over HTTP")
+        else:
+            self.logger.info("Detail pages need JavaScript rendering, using browser")
+        
+        pending = [position for position in positions if position['isin'] not in results]
+        for i, position in enumerate(pending):
             try:
-                detail_url = position.get('detail_url')
-                if not detail_url:
-                    continue
-                
-                self.logger.info(f"Processing {i+1}/{len(current_positions)}: {position.get('company_name', 'Unknown')}")
+                self.logger.info(f"Processing {i+1}/{len(pending)}: {position.get('company_name', 'Unknown')}")
                 
-                # Navigate to detail page
-                driver.get(detail_url)
-                time.sleep(3)
-                
-                # Wait for detail table
-                try:
-                    WebDriverWait(driver, 20).until(
-                        EC.presence_of_element_located((By.TAG_NAME, "table"))
-                    )
-                except TimeoutException:
+                # Navigate to detail page and wait for its table rows
+                if not browser.get(position['detail_url'], wait_for=(By.CSS_SELECTOR, "table tr td"), timeout=20):
                     self.logger.warning(f"Timeout waiting for detail table: {position.get('company_name')}")
                     continue
                 
                 # Parse detail page
-                page_source = driver.page_source
-                soup = BeautifulSoup(page_source, 'html.parser')
-                
-                # Extract positions from detail table
-                detail_positions = self._extract_detail_positions(soup, position)
-                detailed_data.extend(detail_positions)
-                
-                # Small delay to be respectful
-                time.sleep(1)
+                soup = BeautifulSoup(browser.driver.page_source, 'html.parser')
+                results[position['isin']] = self._extract_detail_positions(soup, position)
                 
+            except ScraperDeadlineExceeded:
+                raise
             except Exception as e:
                 self.logger.error(f"Error processing {position.get('company_name')}: {e}")
                 continue
         
-        self.logger.info(f"Extracted {len(detailed_data)} detailed positions")
-        return detailed_data
+        return [(position, results[position['isin']]) for position in positions if position['isin'] in results]
+    
+    def _fetch_detail_http(self, position: Dict[str, Any]):
+        """Fetch and parse a detail page without a browser; None if the page needs JavaScript"""
+        try:
+            response = self.session.get(position['detail_url'], timeout=30)
+            if response.status_code != 200:
+                return None
+            soup = BeautifulSoup(response.text, 'html.parser')
+            if not soup.select('table tr td'):
+                return None
+            return self._extract_detail_positions(soup, position)
+        except requests.RequestException as e:
+            self.logger.debug(f"HTTP fetch failed for {position.get('company_name')}: {e}")
+            return None
+    
+    def _positions_to_cache(self, positions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [{**pos, 'date': pos['date'].isoformat()} for pos in positions]
+    
+    def _positions_from_cache(self, positions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [{**pos, 'date': datetime.fromisoformat(pos['date']).date()} for pos in positions]
     
     def _extract_detail_positions(self, soup: BeautifulSoup, position: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Extract positions from detail page - handles Active and Historical sections separately"""
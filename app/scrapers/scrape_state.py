@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Small persisted key/value state for scrapers
+
+Scrapers run without a database session, so anything they want to remember
+between runs (page caches, last seen summaries, resolved download URLs) is
+kept as JSON files under SCRAPER_STATE_DIR/<country_code>/<name>.json.
+Writes are atomic (temp file + rename) so a crashed run never leaves a
+half-written state file behind.
+"""
+
+import json
+import logging
+import os
+import tempfile
+from typing import Any
+
+SCRAPER_STATE_DIR = os.environ.get("SCRAPER_STATE_DIR", os.path.join("data", "scraper_state"))
+
+logger = logging.getLogger("scraper.state")
+
+
+class ScrapeState:
+    """JSON-file backed state for one country's scraper"""
+
+    def __init__(self, country_code: str, base_dir: str = None):
+        self.country_code = country_code
+        self.state_dir = os.path.join(base_dir or SCRAPER_STATE_DIR, country_code.upper())
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.state_dir, f"{name}.json")
+
+    def load(self, name: str, default: Any = None) -> Any:
+        """Load a state entry, returning default if it is missing or unreadable"""
+        path = self._path(name)
+        if not os.path.exists(path):
+            return default
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable scraper state {path}: {e}")
+            return default
+
+    def save(self, name: str, data: Any):
+        """Atomically write a state entry"""
+        os.makedirs(self.state_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, default=str)
+            os.replace(tmp_path, self._path(name))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def clear(self, name: str):
+        """Forget a state entry (forces a full refresh on the next run)"""
+        path = self._path(name)
+        if os.path.exists(path):
+            os.unlink(path)
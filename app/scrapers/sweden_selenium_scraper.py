@@ -10,16 +10,15 @@ import logging
 from datetime import datetime
 from typing import Dict, Any, List
 from .base_scraper import BaseScraper
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from ..utils.spreadsheet import detect_file_format, read_ods
+from .browser_pool import browser_pool, ScraperDeadlineExceeded
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import time
 import io
 import os
 
+DOWNLOAD_EXTENSIONS = ('.xlsx', '.xls', '.ods')
+
 class SwedenSeleniumScraper(BaseScraper):
     """Selenium-based scraper for Swedish short-selling data from Finansinspektionen"""
     
@@ -30,199 +29,103 @@ class SwedenSeleniumScraper(BaseScraper):
         """Get the main data source URL"""
         return "https://www.fi.se/en/our-registers/net-short-positions"
     
-    def _setup_driver(self):
-        """Setup Chrome WebDriver with appropriate options"""
-        import tempfile
-        
-        # Create temporary download directory
-        download_dir = tempfile.mkdtemp()
-        
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")  # Run in headless mode
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        
-        # Set download directory
-        prefs = {
-            "download.default_directory": download_dir,
-            "download.prompt_for_download": False,
-            "download.directory_upgrade": True,
-            "safebrowsing.enabled": True
-        }
-        chrome_options.add_experimental_option("prefs", prefs)
-        
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.implicitly_wait(10)
-        
-        return driver, download_dir
-    
     def download_data(self) -> Dict[str, Any]:
         """Download Swedish short-selling data from Finansinspektionen using Selenium"""
         self.logger.info("Starting Selenium scrape for Sweden")
         self.logger.info("Downloading Sweden Finansinspektionen data with Selenium")
         
-        driver = None
-        download_dir = None
         try:
-            driver, download_dir = self._setup_driver()
-            
-            # Navigate to the main page
-            main_url = self.get_data_url()
-            self.logger.info(f"Navigating to: {main_url}")
-            
-            driver.get(main_url)
-            time.sleep(5)  # Wait for page to load
-            
-            # Handle cookie consent banner if present
-            try:
-                cookie_buttons = driver.find_elements(By.XPATH, "//button[contains(text(), 'ACCEPT ALL') or contains(text(), 'Accept All') or contains(text(), 'Accept') or contains(text(), 'Godkänn')]")
-                if cookie_buttons:
-                    self.logger.info("Found cookie consent banner, accepting cookies...")
-                    cookie_buttons[0].click()
-                    time.sleep(2)
-            except Exception as e:
-                self.logger.warning(f"Error handling cookie banner: {e}")
-            
-            # Download current positions
-            current_file_content = self._download_current_positions(driver, download_dir)
-            
-            # Download historic positions
-            historic_file_content = self._download_historic_positions(driver, download_dir)
-            
-            # Get page source for potential fallback
-            page_source = driver.page_source
-            
-            return {
-                'current_file': current_file_content,
-                'historic_file': historic_file_content,
-                'page_source': page_source.encode('utf-8'),
-                'source_url': main_url,
-                'download_date': datetime.now().isoformat()
-            }
-            
-        except Exception as e:
-            self.logger.error(f"Failed to download Sweden data with Selenium: {e}")
-            raise Exception(f"Sweden Selenium download failed: {e}")
-        finally:
-            if driver:
-                driver.quit()
-            if download_dir and os.path.exists(download_dir):
-                import shutil
-                shutil.rmtree(download_dir)  # Clean up temp directory
-    
-    def _download_current_positions(self, driver, download_dir) -> bytes:
-        """Download current positions Excel file"""
-        self.logger.info("Downloading current positions...")
-        
-        try:
-            # Try to extract the actual download URL from JavaScript
-            current_url = self._extract_download_url(driver, "Current positions")
-            if current_url:
-                self.logger.info(f"Extracted current positions URL: {current_url}")
+            with browser_pool.session(self.country_code) as browser:
+                # Navigate to the main page and wait for the download links to render
+                main_url = self.get_data_url()
+                self.logger.info(f"Navigating to: {main_url}")
                 
-                # Download using requests
-                import requests
-                response = requests.get(current_url, timeout=60)
-                if response.status_code == 200:
-                    self.logger.info(f"Successfully downloaded current positions file ({len(response.content)} bytes)")
-                    return response.content
-                else:
-                    self.logger.warning(f"Failed to download current positions: {response.status_code}")
-            
-            # Fallback: Try clicking the link
-            try:
-                current_link = driver.find_element(By.XPATH, "//a[contains(text(), 'Current positions')]")
-                self.logger.info("Found current positions link, trying click...")
+                if not browser.get(main_url, wait_for=(By.XPATH, "//a[contains(text(), 'positions')]")):
+                    self.logger.warning("Timeout waiting for download links to load")
                 
-                # Click the link to trigger JavaScript download
-                current_link.click()
-                self.logger.info("Clicked current positions link")
+                # Handle cookie consent banner if present
+                try:
+                    cookie_buttons = browser.driver.find_elements(By.XPATH, "//button[contains(text(), 'ACCEPT ALL') or contains(text(), 'Accept All') or contains(text(), 'Accept') or contains(text(), 'Godkänn')]")
+                    if cookie_buttons:
+                        self.logger.info("Found cookie consent banner, accepting cookies...")
+                        cookie_buttons[0].click()
+                        browser.wait_for(EC.invisibility_of_element(cookie_buttons[0]), timeout=5)
+                except Exception as e:
+                    self.logger.warning(f"Error handling cookie banner: {e}")
                 
-                # Wait for download to complete
-                time.sleep(10)
+                # Download current positions
+                current_file_content = self._download_current_positions(browser)
                 
-                # Check for downloaded files
-                downloaded_files = []
-                for filename in os.listdir(download_dir):
-                    if filename.endswith(('.xlsx', '.xls')):
-                        file_path = os.path.join(download_dir, filename)
-                        downloaded_files.append(file_path)
-                        self.logger.info(f"Found current positions downloaded file: {filename}")
+                # Download historic positions
+                historic_file_content = self._download_historic_positions(browser)
                 
-                if downloaded_files:
-                    # Read the downloaded file
-                    latest_file = max(downloaded_files, key=os.path.getctime)
-                    with open(latest_file, 'rb') as f:
-                        file_content = f.read()
-                    self.logger.info(f"Successfully read current positions file: {os.path.basename(latest_file)} ({len(file_content)} bytes)")
-                    return file_content
-            except Exception as click_error:
-                self.logger.warning(f"Error clicking current positions link: {click_error}")
-            
-            self.logger.warning("No current positions downloaded files found")
-            return b''
+                # Get page source for potential fallback
+                page_source = browser.driver.page_source
                 
+                return {
+                    'current_file': current_file_content,
+                    'historic_file': historic_file_content,
+                    'page_source': page_source.encode('utf-8'),
+                    'source_url': main_url,
+                    'download_date': datetime.now().isoformat()
+                }
+            
         except Exception as e:
-            self.logger.warning(f"Error downloading current positions: {e}")
-            return b''
+            self.logger.error(f"Failed to download Sweden data with Selenium: {e}")
+            raise Exception(f"Sweden Selenium download failed: {e}")
+    
+    def _download_current_positions(self, browser) -> bytes:
+        """Download current positions Excel file"""
+        self.logger.info("Downloading current positions...")
+        return self._download_positions_file(browser, "Current positions", "current")
     
-    def _download_historic_positions(self, driver, download_dir) -> bytes:
+    def _download_historic_positions(self, browser) -> bytes:
         """Download historic positions Excel file"""
         self.logger.info("Downloading historic positions...")
-        
+        return self._download_positions_file(browser, "Historic positions", "historic")
+    
+    def _download_positions_file(self, browser, link_text: str, data_type: str) -> bytes:
+        """Download one positions file: direct URL first, clicking the JavaScript link as fallback"""
         try:
             # Try to extract the actual download URL from JavaScript
-            historic_url = self._extract_download_url(driver, "Historic positions")
-            if historic_url:
-                self.logger.info(f"Extracted historic positions URL: {historic_url}")
+            file_url = self._extract_download_url(browser.driver, link_text)
+            if file_url:
+                self.logger.info(f"Extracted {data_type} positions URL: {file_url}")
                 
                 # Download using requests
-                import requests
-                response = requests.get(historic_url, timeout=60)
+                response = self.session.get(file_url, timeout=60)
                 if response.status_code == 200:
-                    self.logger.info(f"Successfully downloaded historic positions file ({len(response.content)} bytes)")
+                    self.logger.info(f"Successfully downloaded {data_type} positions file ({len(response.content)} bytes)")
                     return response.content
                 else:
-                    self.logger.warning(f"Failed to download historic positions: {response.status_code}")
+                    self.logger.warning(f"Failed to download {data_type} positions: {response.status_code}")
             
             # Fallback: Try clicking the link
             try:
-                historic_link = driver.find_element(By.XPATH, "//a[contains(text(), 'Historic positions')]")
-                self.logger.info("Found historic positions link, trying click...")
+                link = browser.driver.find_element(By.XPATH, f"//a[contains(text(), '{link_text}')]")
+                self.logger.info(f"Found {data_type} positions link, trying click...")
                 
-                # Click the link to trigger JavaScript download
-                historic_link.click()
-                self.logger.info("Clicked historic positions link")
+                already_downloaded = browser.list_downloads(DOWNLOAD_EXTENSIONS)
                 
-                # Wait for download to complete
-                time.sleep(10)
-                
-                # Check for downloaded files
-                downloaded_files = []
-                for filename in os.listdir(download_dir):
-                    if filename.endswith(('.xlsx', '.xls')):
-                        file_path = os.path.join(download_dir, filename)
-                        downloaded_files.append(file_path)
-                        self.logger.info(f"Found historic positions downloaded file: {filename}")
+                # Click the link to trigger JavaScript download
+                link.click()
+                self.logger.info(f"Clicked {data_type} positions link")
                 
-                if downloaded_files:
-                    # Read the downloaded file
-                    latest_file = max(downloaded_files, key=os.path.getctime)
-                    with open(latest_file, 'rb') as f:
-                        file_content = f.read()
-                    self.logger.info(f"Successfully read historic positions file: {os.path.basename(latest_file)} ({len(file_content)} bytes)")
+                # Wait for the download to complete
+                file_path, file_content = browser.read_download(DOWNLOAD_EXTENSIONS, timeout=30, ignore=already_downloaded)
+                if file_path:
+                    self.logger.info(f"Successfully read {data_type} positions file: {os.path.basename(file_path)} ({len(file_content)} bytes)")
                     return file_content
             except Exception as click_error:
-                self.logger.warning(f"Error clicking historic positions link: {click_error}")
+                self.logger.warning(f"Error clicking {data_type} positions link: {click_error}")
             
-            self.logger.warning("No historic positions downloaded files found")
+            self.logger.warning(f"No {data_type} positions downloaded files found")
             return b''
                 
+        except ScraperDeadlineExceeded:
+            raise
         except Exception as e:
-            self.logger.warning(f"Error downloading historic positions: {e}")
+            self.logger.warning(f"Error downloading {data_type} positions: {e}")
             return b''
     
     def parse_data(self, data: Dict[str, Any]) -> pd.DataFrame:
@@ -269,61 +172,60 @@ class SwedenSeleniumScraper(BaseScraper):
             raise Exception(f"Sweden data parsing failed: {e}")
     
     def _parse_excel_file(self, file_content: bytes, data_type: str) -> pd.DataFrame:
-        """Parse Excel file content"""
+        """Parse downloaded file content, dispatching on its sniffed format"""
         try:
-            import io
+            file_format = detect_file_format(file_content)
+            self.logger.info(f"Detected {data_type} file format: {file_format}")
             
-            # Try to parse as Excel file first
-            try:
-                excel_file = io.BytesIO(file_content)
-                df = pd.read_excel(excel_file, engine='openpyxl')
+            if file_format == 'ods':
+                # FI publishes OpenDocument spreadsheets - use the streaming reader
+                df = read_ods(file_content)
+                self.logger.info(f"Successfully parsed {data_type} ODS file with {len(df)} rows")
+                return df
+            
+            if file_format == 'xlsx':
+                df = pd.read_excel(io.BytesIO(file_content), engine='openpyxl')
                 self.logger.info(f"Successfully parsed {data_type} Excel file with {len(df)} rows")
                 return df
-            except Exception as excel_error:
-                self.logger.info(f"Not an Excel file, trying ODS: {excel_error}")
-                
-                # Try to parse as ODS file (OpenDocument Spreadsheet)
+            
+            if file_format == 'xls':
+                df = pd.read_excel(io.BytesIO(file_content), engine='xlrd')
+                self.logger.info(f"Successfully parsed {data_type} XLS file with {len(df)} rows")
+                return df
+            
+            # Plain text - try CSV with different encodings and delimiters
+            encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+            delimiters = [',', ';', '\t']
+            
+            for encoding in encodings:
                 try:
-                    ods_file = io.BytesIO(file_content)
-                    df = pd.read_excel(ods_file, engine='odf')
-                    self.logger.info(f"Successfully parsed {data_type} ODS file with {len(df)} rows")
-                    return df
-                except Exception as ods_error:
-                    self.logger.info(f"Not an ODS file, trying CSV: {ods_error}")
-                
-                # Try to parse as CSV file with different encodings
-                encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-                delimiters = [',', ';', '\t']
-                
-                for encoding in encodings:
-                    try:
-                        csv_content = file_content.decode(encoding, errors='ignore')
-                        # Clean NULL bytes
-                        csv_content = csv_content.replace('\x00', '')
-                        
-                        # Try different delimiters
-                        for delimiter in delimiters:
-                            try:
-                                df = pd.read_csv(io.StringIO(csv_content), delimiter=delimiter, engine='c')
-                                self.logger.info(f"Successfully parsed {data_type} CSV file with encoding '{encoding}', delimiter '{delimiter}' and {len(df)} rows")
-                                return df
-                            except:
-                                continue
-                        
-                        # If all delimiters fail, try with engine='python' which can auto-detect
+                    csv_content = file_content.decode(encoding, errors='ignore')
+                    # Clean NULL bytes
+                    csv_content = csv_content.replace('\x00', '')
+                    
+                    # Try different delimiters
+                    for delimiter in delimiters:
                         try:
-                            df = pd.read_csv(io.StringIO(csv_content), engine='python')
-                            self.logger.info(f"Successfully parsed {data_type} CSV file with encoding '{encoding}' and python engine and {len(df)} rows")
+                            df = pd.read_csv(io.StringIO(csv_content), delimiter=delimiter, engine='c')
+                            self.logger.info(f"Successfully parsed {data_type} CSV file with encoding '{encoding}', delimiter '{delimiter}' and {len(df)} rows")
                             return df
                         except:
                             continue
-                            
-                    except Exception as encoding_error:
-                        self.logger.warning(f"Failed to parse {data_type} file with encoding '{encoding}': {encoding_error}")
+                    
+                    # If all delimiters fail, try with engine='python' which can auto-detect
+                    try:
+                        df = pd.read_csv(io.StringIO(csv_content), engine='python')
+                        self.logger.info(f"Successfully parsed {data_type} CSV file with encoding '{encoding}' and python engine and {len(df)} rows")
+                        return df
+                    except:
                         continue
-                
-                self.logger.error(f"Failed to parse {data_type} file with all encodings and delimiters")
-                return pd.DataFrame()
+                        
+                except Exception as encoding_error:
+                    self.logger.warning(f"Failed to parse {data_type} file with encoding '{encoding}': {encoding_error}")
+                    continue
+            
+            self.logger.error(f"Failed to parse {data_type} file with all encodings and delimiters")
+            return pd.DataFrame()
             
         except Exception as e:
             self.logger.error(f"Error parsing {data_type} file: {e}")
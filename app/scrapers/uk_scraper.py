@@ -133,7 +133,7 @@ class UKScraper(BaseScraper):
                 sheet_positions = working_df[['manager_name', 'company_name', 'isin', 'position_size', 'date', 'is_active']].to_dict('records')
                 
                 # Filter valid positions
-                valid_positions = [pos for pos in sheet_positions if self.validate_position(pos)]
+                valid_positions = self.validate_positions(sheet_positions)
                 all_positions.extend(valid_positions)
                 
                 self.logger.info(f"Extracted {len(valid_positions)} valid positions from {sheet_name}")
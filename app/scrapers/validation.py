@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Vectorized validation of scraped positions
+
+Checks a whole batch at once with boolean masks instead of one
+validate_position() call (and one pd.to_datetime / datetime.now()) per row.
+Every failing row gets a reason code so it can be quarantined in the
+rejected_positions table rather than silently dropped:
+
+    valid, rejected = split_positions(positions)
+    # rejected[i]['reject_reason'] == 'future_date'
+
+Rules (same as the old per-row check):
+- manager_name and company_name must be non-empty
+- date must parse and must not be in the future
+- position_size must be numeric and 0 <= size <= 100 (zero is valid)
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Reason codes, in the order the checks are applied (first failure wins)
+REJECT_MISSING_MANAGER = 'missing_manager'
+REJECT_MISSING_COMPANY = 'missing_company'
+REJECT_MISSING_DATE = 'missing_date'
+REJECT_INVALID_DATE = 'invalid_date'
+REJECT_FUTURE_DATE = 'future_date'
+REJECT_MISSING_SIZE = 'missing_size'
+REJECT_INVALID_SIZE = 'invalid_size'
+REJECT_SIZE_OUT_OF_RANGE = 'size_out_of_range'
+# Set by the ingestion stage when the database refuses an otherwise valid row
+REJECT_DB_ERROR = 'db_error'
+
+MIN_POSITION_SIZE = 0.0
+MAX_POSITION_SIZE = 100.0
+
+# Key under which split_positions() stores the reason on rejected rows
+REASON_KEY = 'reject_reason'
+
+
+def _blank(values: pd.Series) -> np.ndarray:
+    """Missing, empty or whitespace-only values"""
+    text = values.astype(object).where(values.notna(), '')
+    return (text.astype(str).str.strip() == '').to_numpy()
+
+
+def _parse_dates(values: pd.Series) -> pd.Series:
+    """Parse a mixed column of dates/strings, once per distinct value"""
+    uniques = pd.unique(values.to_numpy(dtype=object))
+    parsed = {}
+    for value in uniques:
+        try:
+            timestamp = pd.Timestamp(pd.to_datetime(value))
+            parsed[value] = timestamp.tz_localize(None) if timestamp.tzinfo else timestamp
+        except Exception:
+            parsed[value] = pd.NaT
+    return pd.to_datetime(values.map(parsed), errors='coerce')
+
+
+def rejection_reasons(df: pd.DataFrame, now: Optional[datetime] = None) -> pd.Series:
+    """
+    Reason code per row of a positions frame (None for valid rows).
+
+    Expects manager_name / company_name / date / position_size columns;
+    a missing column fails every row with the matching 'missing_*' reason.
+    """
+    n = len(df)
+    now = now or datetime.now()
+
+    def column(name: str) -> pd.Series:
+        if name in df.columns:
+            return df[name]
+        return pd.Series([None] * n, index=df.index, dtype=object)
+
+    dates = column('date')
+    missing_date = _blank(dates) | (dates.isna().to_numpy())
+    # Datetime columns are already parsed; anything else is parsed per distinct value
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        parsed = dates
+        if parsed.dt.tz is not None:
+            parsed = parsed.dt.tz_localize(None)
+    else:
+        parsed = _parse_dates(dates.where(~missing_date))
+    invalid_date = ~missing_date & parsed.isna().to_numpy()
+    future_date = ~missing_date & ~invalid_date & (parsed > pd.Timestamp(now)).to_numpy()
+
+    sizes = column('position_size')
+    missing_size = np.full(n, 'position_size' not in df.columns)
+    numeric = pd.to_numeric(sizes, errors='coerce').to_numpy(dtype=float)
+    invalid_size = ~missing_size & np.isnan(numeric)
+    out_of_range = ~missing_size & ~invalid_size & ((numeric < MIN_POSITION_SIZE) | (numeric > MAX_POSITION_SIZE))
+
+    conditions = [
+        _blank(column('manager_name')),
+        _blank(column('company_name')),
+        missing_date,
+        invalid_date,
+        future_date,
+        missing_size,
+        invalid_size,
+        out_of_range,
+    ]
+    choices = [
+        REJECT_MISSING_MANAGER,
+        REJECT_MISSING_COMPANY,
+        REJECT_MISSING_DATE,
+        REJECT_INVALID_DATE,
+        REJECT_FUTURE_DATE,
+        REJECT_MISSING_SIZE,
+        REJECT_INVALID_SIZE,
+        REJECT_SIZE_OUT_OF_RANGE,
+    ]
+    reasons = np.select(conditions, np.array(choices, dtype=object), default=None)
+    return pd.Series(reasons, index=df.index, dtype=object)
+
+
+def split_positions(positions: List[Dict[str, Any]],
+                    now: Optional[datetime] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Split position dicts into (valid, rejected).
+
+    Valid rows are returned untouched; rejected rows are copies carrying
+    their reason code under REASON_KEY.
+    """
+    if not positions:
+        return [], []
+
+    reasons = rejection_reasons(pd.DataFrame(positions), now=now).to_numpy()
+
+    valid, rejected = [], []
+    for position, reason in zip(positions, reasons):
+        if reason is None:
+            valid.append(position)
+        else:
+            rejected.append({**position, REASON_KEY: reason})
+    return valid, rejected
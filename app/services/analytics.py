@@ -3,121 +3,27 @@ from __future__ import annotations
 
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc, and_
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
 import json
 
-from app.db.models import Country, Company, Manager, ShortPosition, AnalyticsCache
+from app.db.models import (
+    Country, Company, Manager, ShortPosition, AnalyticsCache, Issuer, CountryDailyStats, CompanyDailyStats,
+)
+from app.utils.name_normalization import name_key
+from app.services import duckdb_analytics
+from app.services.position_store import USE_POSITION_STORE, get_store
+from app.services.position_validity import ACTIVE_THRESHOLD, positions_as_of_subq
+from app.services.timeline_pyramid import DEFAULT_MAX_POINTS, company_timeline
+from app.services.trading_calendar import get_calendar
 
-ACTIVE_THRESHOLD = 0.5  # percent points
+HISTORY_PAGE_SIZE = 50  # Historical positions per page in manager analytics
 
 
 # -------------------------------
 # Helpers
 # -------------------------------
 
-def reconstruct_active_positions_timeline(all_positions, cutoff_date: datetime, days_range: int, country_code: str = None):
-    """
-    Reconstruct the active positions timeline for a company with continuous business days.
-    
-    Logic:
-    - A manager is active if their most recent position ≥ 0.5%
-    - A manager remains active from disclosure date until they drop below 0.5%
-    - Show continuous timeline for all business days (Mon-Fri, excluding holidays)
-    - Carry forward positions on days without changes
-    """
-    from collections import defaultdict
-    import holidays
-    
-    # Group positions by manager
-    manager_positions = defaultdict(list)
-    for pos in all_positions:
-        manager_positions[pos.manager_name].append({
-            'date': pos.date,
-            'position_size': float(pos.position_size or 0.0)
-        })
-    
-    # Sort each manager's positions by date
-    for manager in manager_positions:
-        manager_positions[manager].sort(key=lambda x: x['date'])
-    
-    # Define date range
-    end_date = datetime.now().date()
-    start_date = max(cutoff_date.date(), end_date - timedelta(days=days_range))
-    
-    # Get holiday calendar based on company's country
-    country_holidays = set()
-    if country_code:
-        try:
-            # Map country codes to holiday country names
-            country_mapping = {
-                'FR': 'France',
-                'DE': 'Germany', 
-                'GB': 'UnitedKingdom',
-                'IT': 'Italy',
-                'ES': 'Spain',
-                'NL': 'Netherlands',
-                'BE': 'Belgium',
-                'AT': 'Austria',
-                'IE': 'Ireland',
-                'PT': 'Portugal',
-                'SE': 'Sweden',
-                'DK': 'Denmark',
-                'NO': 'Norway',
-                'FI': 'Finland'
-            }
-            
-            if country_code in country_mapping:
-                country_holidays = holidays.country_holidays(country_mapping[country_code])
-            else:
-                # Default to no holidays for unknown countries
-                country_holidays = set()
-        except:
-            # Fallback to no holidays if library fails
-            country_holidays = set()
-    
-    # Generate all business days in the range
-    business_days = []
-    current = start_date
-    while current <= end_date:
-        # Monday = 0, Sunday = 6
-        if current.weekday() < 5 and current not in country_holidays:  # Monday to Friday, not a holiday
-            business_days.append(current)
-        current += timedelta(days=1)
-    
-    timeline = []
-    
-    for current_date in business_days:
-        daily_positions = []
-        total_position = 0.0
-        
-        for manager_name, positions in manager_positions.items():
-            # Find the most recent position as of current_date
-            active_position = None
-            for pos in positions:
-                if pos['date'].date() <= current_date:
-                    active_position = pos
-                else:
-                    break
-            
-            # Include manager if their most recent position is ≥ 0.5%
-            if active_position and active_position['position_size'] >= ACTIVE_THRESHOLD:
-                daily_positions.append({
-                    "manager_name": manager_name,
-                    "position_size": active_position['position_size']
-                })
-                total_position += active_position['position_size']
-        
-        # Add entry for every business day, even if no positions (will show 0)
-        timeline.append({
-            "date": current_date.strftime("%Y-%m-%d"),
-            "total_position": total_position,
-            "manager_positions": daily_positions
-        })
-    
-    return timeline
-
-
 def _get_country_code(db: Session, country_id: int) -> Optional[str]:
     row = db.query(Country.code).filter(Country.id == country_id).first()
     return row.code if row else None
@@ -187,8 +93,14 @@ def active_positions_subq(
     Get active positions for ALL countries:
     Use rows flagged in DB with is_active = True.
     This is now used for all countries (GB and non-GB) for consistent logic.
-    Optionally limit by country_id/as_of.
+    Optionally limit by country_id.
+
+    With as_of, is_active (which only describes today) doesn't apply: the positions
+    in force on that date come from their valid_from/valid_to intervals instead.
     """
+    if as_of is not None:
+        return positions_as_of_subq(db, as_of, country_id=country_id)
+
     sp = ShortPosition
     q = db.query(
         sp.id.label("sp_id"),
@@ -201,8 +113,6 @@ def active_positions_subq(
 
     if country_id is not None:
         q = q.filter(sp.country_id == country_id)
-    if as_of is not None:
-        q = q.filter(sp.date <= as_of)
 
     return q.subquery("active_positions")
 
@@ -238,6 +148,25 @@ async def get_country_analytics(db: Session, country_id: int) -> Dict[str, Any]:
 # -------------------------------
 # Most shorted companies (by country)
 # -------------------------------
+def _week_deltas(db: Session, country_id: int) -> Dict[int, float]:
+    """
+    Change of each company's short total over the last week.
+    Both ends come from the validity intervals (is_active only describes today),
+    so a position that didn't change during the week adds nothing.
+    """
+    now = datetime.now()
+    deltas: Dict[int, float] = {}
+    for sign, moment in ((1.0, now), (-1.0, now - timedelta(days=7))):
+        in_force = active_positions_subq(db, as_of=moment, country_id=country_id)
+        totals = db.query(
+            in_force.c.company_id,
+            func.sum(in_force.c.position_size).label("total"),
+        ).group_by(in_force.c.company_id).all()
+        for row in totals:
+            deltas[row.company_id] = deltas.get(row.company_id, 0.0) + sign * float(row.total or 0.0)
+    return deltas
+
+
 async def get_most_shorted_companies(
     db: Session, country_id: int, date: Optional[datetime] = None
 ) -> List[Dict[str, Any]]:
@@ -249,6 +178,9 @@ async def get_most_shorted_companies(
     country = db.query(Country).filter(Country.id == country_id).first()
     is_ireland = country and country.code == 'IE'
     
+    if not is_ireland and duckdb_analytics.use_duckdb("most_shorted_companies"):
+        return duckdb_analytics.most_shorted_companies(country_id)
+    
     if is_ireland:
         # COMPLETE REWRITE FOR IRELAND: Direct query bypassing active_positions_subq
         print(f"🔍 Using COMPLETE REWRITE for Ireland (country_id: {country_id})")
@@ -275,25 +207,6 @@ async def get_most_shorted_companies(
         print(f"🔍 Ireland DIRECT query returned {len(companies_now)} companies")
         for comp in companies_now:
             print(f"  - {comp.company_name}: {comp.total_short_exposure}% ({comp.position_count} positions)")
-        
-        # Previous week active positions for comparison
-        one_week_ago = datetime.now() - timedelta(days=7)
-        companies_prev = db.query(
-            Company.id.label("company_id"),
-            func.sum(ShortPosition.position_size).label("previous_total"),
-        ).join(
-            ShortPosition, ShortPosition.company_id == Company.id
-        ).filter(
-            and_(
-                ShortPosition.country_id == country_id,
-                ShortPosition.is_active == True,
-                ShortPosition.date <= one_week_ago
-            )
-        ).group_by(
-            Company.id
-        ).all()
-
-        prev_map = {row.company_id: float(row.previous_total or 0.0) for row in companies_prev}
     else:
         # Standard logic for other countries
         # Current active positions for this country
@@ -311,31 +224,18 @@ async def get_most_shorted_companies(
             Company.id, Company.name
         ).all()
 
-        # Previous week active positions for comparison
-        one_week_ago = datetime.now() - timedelta(days=7)
-        active_prev = active_positions_subq(db, as_of=one_week_ago, country_id=country_id)
-        companies_prev = db.query(
-            Company.id.label("company_id"),
-            func.sum(active_prev.c.position_size).label("previous_total"),
-        ).join(
-            active_prev, active_prev.c.company_id == Company.id
-        ).group_by(
-            Company.id
-        ).all()
-
-        prev_map = {row.company_id: float(row.previous_total or 0.0) for row in companies_prev}
+    week_deltas = _week_deltas(db, country_id)
 
     results: List[Dict[str, Any]] = []
     for row in companies_now:
         current_total = float(row.total_short_exposure or 0.0)
-        previous_total = prev_map.get(row.company_id, 0.0)
         results.append({
             "company_name": row.company_name,
             "company_id": row.company_id,
             "total_short_positions": current_total,
             "average_position_size": float(row.average_position_size or 0.0),
             "position_count": int(row.position_count or 0),
-            "week_delta": current_total - previous_total,
+            "week_delta": week_deltas.get(row.company_id, 0.0),
             "most_recent_position_date": row.most_recent_position_date,
         })
 
@@ -350,6 +250,12 @@ async def get_top_managers(
     db: Session, country_id: int, date: Optional[datetime] = None
 ) -> List[Dict[str, Any]]:
     """Top managers by sum of CURRENT active positions using unified logic."""
+    store = get_store() if USE_POSITION_STORE else None
+    if store is not None:
+        return store.top_managers(country_id, order_by="exposure")
+    if duckdb_analytics.use_duckdb("top_managers"):
+        return duckdb_analytics.top_managers(country_id, order_by="exposure")
+
     # Use unified active positions logic for all countries
     active_snap = active_positions_subq(db, country_id=country_id)
 
@@ -380,96 +286,75 @@ async def get_top_managers(
 # -------------------------------
 # Global top companies
 # -------------------------------
+def company_identity_col():
+    """Global company identity: the ISIN issuer, or the company itself (negated id) without one"""
+    return func.coalesce(Company.issuer_id, -Company.id)
+
+
 async def get_global_top_companies(db: Session) -> List[Dict[str, Any]]:
     """
-    Global ranking: Use unified active positions logic for all countries
-    """
-    # Get all countries to process each separately 
-    countries = db.query(Country.id, Country.code).all()
-    
-    all_companies = {}
-    
-    for country_id, country_code in countries:
-        # Use unified active positions logic for all countries
-        active_snap = active_positions_subq(db, country_id=country_id)
-        companies = db.query(
-            Company.id.label("company_id"),
-            Company.name.label("company_name"),
-            func.sum(active_snap.c.position_size).label("total_short_exposure"),
-            func.count(active_snap.c.sp_id).label("position_count"),
-            func.max(active_snap.c.date).label("most_recent_position_date"),
-        ).join(
-            active_snap, active_snap.c.company_id == Company.id
-        ).group_by(
-            Company.id, Company.name
-        ).all()
-        
-        # Aggregate results across countries
-        for company in companies:
-            key = company.company_id
-            if key not in all_companies:
-                all_companies[key] = {
-                    "company_id": company.company_id,
-                    "company_name": company.company_name,
-                    "total_short_exposure": float(company.total_short_exposure or 0.0),
-                    "position_count": int(company.position_count or 0),
-                    "most_recent_position_date": company.most_recent_position_date,
-                }
-            else:
-                all_companies[key]["total_short_exposure"] += float(company.total_short_exposure or 0.0)
-                all_companies[key]["position_count"] += int(company.position_count or 0)
-                # Keep the most recent date across all countries for this company
-                if company.most_recent_position_date and (
-                    not all_companies[key]["most_recent_position_date"] or 
-                    company.most_recent_position_date > all_companies[key]["most_recent_position_date"]
-                ):
-                    all_companies[key]["most_recent_position_date"] = company.most_recent_position_date
-    
-    current_companies = list(all_companies.values())
+    Global ranking from the company daily rollups (latest rolled-up day).
 
-    # Previous week: Same unified logic but as of one week ago
-    one_week_ago = datetime.now() - timedelta(days=7)
-    all_companies_prev = {}
-    
-    for country_id, country_code in countries:
-        # Use unified active positions logic as of one week ago
-        active_snap_prev = active_positions_subq(db, as_of=one_week_ago, country_id=country_id)
-        companies_prev = db.query(
-            Company.id.label("company_id"),
-            func.sum(active_snap_prev.c.position_size).label("total_short_exposure"),
-        ).join(
-            active_snap_prev, active_snap_prev.c.company_id == Company.id
-        ).group_by(
-            Company.id
-        ).all()
-        
-        # Aggregate previous week results
-        for company in companies_prev:
-            key = company.company_id
-            if key not in all_companies_prev:
-                all_companies_prev[key] = float(company.total_short_exposure or 0.0)
-            else:
-                all_companies_prev[key] += float(company.total_short_exposure or 0.0)
+    Companies sharing an ISIN issuer are aggregated across countries in SQL;
+    company_id is the lowest company id of the group (for links).
+    """
+    stats = CompanyDailyStats
+    latest_day = db.query(func.max(stats.date)).scalar()
+    if latest_day is None:
+        return []
+
+    identity = company_identity_col()
+    current_companies = db.query(
+        identity.label("identity"),
+        func.min(Company.id).label("company_id"),
+        func.coalesce(func.min(Issuer.name), func.min(Company.name)).label("company_name"),
+        func.min(Issuer.isin).label("isin"),
+        func.sum(stats.total_short_interest).label("total_short_exposure"),
+        func.sum(stats.active_positions).label("position_count"),
+        func.max(stats.latest_disclosure).label("most_recent_position_date"),
+    ).select_from(stats).join(
+        Company, stats.company_id == Company.id
+    ).outerjoin(
+        Issuer, Issuer.id == Company.issuer_id
+    ).filter(
+        stats.date == latest_day,
+        stats.active_positions > 0,
+    ).group_by(
+        identity
+    ).order_by(
+        desc("total_short_exposure")
+    ).limit(10).all()
 
-    # Build previous week map (already aggregated)
-    prev_map: Dict[int, float] = all_companies_prev
+    # Previous week: the rollup a week earlier, for the same identities
+    prev_map: Dict[int, float] = dict(db.query(
+        identity,
+        func.sum(stats.total_short_interest),
+    ).select_from(stats).join(
+        Company, stats.company_id == Company.id
+    ).filter(
+        stats.date == latest_day - timedelta(days=7),
+        identity.in_([c.identity for c in current_companies])
+    ).group_by(
+        identity
+    ).all())
 
     # Build results
     results: List[Dict[str, Any]] = []
     for company in current_companies:
-        previous_total = prev_map.get(company["company_id"], 0.0)
+        total = float(company.total_short_exposure or 0.0)
+        count = int(company.position_count or 0)
         results.append({
-            "company_name": company["company_name"],
-            "company_id": company["company_id"],
-            "total_short_positions": company["total_short_exposure"],
-            "average_position_size": company["total_short_exposure"] / max(company["position_count"], 1),
-            "position_count": company["position_count"],
-            "week_delta": company["total_short_exposure"] - previous_total,
-            "most_recent_position_date": company["most_recent_position_date"],
+            "company_name": company.company_name,
+            "company_id": company.company_id,
+            "isin": company.isin,
+            "total_short_positions": total,
+            "average_position_size": total / max(count, 1),
+            "position_count": count,
+            "week_delta": total - float(prev_map.get(company.identity) or 0.0),
+            "most_recent_position_date": company.most_recent_position_date,
         })
 
-    results.sort(key=lambda x: x["total_short_positions"], reverse=True)
-    return results[:10]
+    return results
 
 
 # -------------------------------
@@ -479,6 +364,12 @@ async def get_global_top_managers(db: Session) -> List[Dict[str, Any]]:
     """
     Global managers: Use unified active positions logic for all countries
     """
+    store = get_store() if USE_POSITION_STORE else None
+    if store is not None:
+        return store.top_managers(order_by="count")
+    if duckdb_analytics.use_duckdb("global_top_managers"):
+        return duckdb_analytics.top_managers(order_by="count")
+
     # Use unified active positions logic across all countries
     active_snap = active_positions_subq(db, country_id=None)
     rows = db.query(
@@ -508,9 +399,20 @@ async def get_global_top_managers(db: Session) -> List[Dict[str, Any]]:
 # -------------------------------
 # Company & Manager analytics (kept simple)
 # -------------------------------
-async def get_company_analytics(db: Session, company_id: int, timeframe: str = "3m") -> Dict[str, Any]:
+async def get_company_analytics(
+    db: Session,
+    company_id: int,
+    timeframe: str = "3m",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    max_points: int = DEFAULT_MAX_POINTS,
+) -> Dict[str, Any]:
     """
-    Get company analytics with positions over time for frontend consumption
+    Get company analytics with positions over time for frontend consumption.
+
+    timeframe is 1w..1y or "all"; start/end (either one) select a custom range instead.
+    The series comes from the precomputed timeline at the finest resolution that
+    fits in max_points.
     """
     # First get company info
     company_row = db.query(
@@ -537,40 +439,11 @@ async def get_company_analytics(db: Session, company_id: int, timeframe: str = "
         "6m": 180,
         "1y": 365
     }
-    days = timeframe_map.get(timeframe.lower(), 90)
-    cutoff_date = datetime.now() - timedelta(days=days)
+    if start is None and end is None and timeframe.lower() != "all":
+        days = timeframe_map.get(timeframe.lower(), 90)
+        start = datetime.now().date() - timedelta(days=days)
     
-    # Get ALL positions for this company (not just within timeframe) to reconstruct active state
-    # Apply data integrity filters to exclude invalid active positions
-    query = db.query(
-        ShortPosition.date,
-        ShortPosition.position_size,
-        Manager.name.label("manager_name")
-    ).join(
-        Manager, Manager.id == ShortPosition.manager_id
-    ).filter(
-        ShortPosition.company_id == company_id
-    )
-
-    # For France, exclude positions older than 2 years (data integrity protection)
-    if company_row.code == "FR":
-        date_barrier = datetime.now() - timedelta(days=730)  # 2 years ago
-        query = query.filter(
-            ShortPosition.date >= date_barrier  # Only recent positions
-        )
-    else:
-        # For non-France countries, still apply the 2-year date barrier for data integrity
-        date_barrier = datetime.now() - timedelta(days=730)  # 2 years ago
-        query = query.filter(ShortPosition.date >= date_barrier)
-
-    all_positions = query.order_by(
-        Manager.id, ShortPosition.date
-    ).all()
-    
-    # Reconstruct active positions timeline
-    positions_over_time = reconstruct_active_positions_timeline(
-        all_positions, cutoff_date, timeframe_map.get(timeframe.lower(), 90), company_row.code
-    )
+    timeline = company_timeline(db, company_id, company_row.code, start, end, max_points)
     
     return {
         "company": {
@@ -583,27 +456,43 @@ async def get_company_analytics(db: Session, company_id: int, timeframe: str = "
                 "flag": company_row.flag
             }
         },
-        "positions_over_time": positions_over_time
+        "positions_over_time": timeline["points"],
+        "resolution": timeline["resolution"],  # daily, weekly or monthly
+        "downsampled": timeline["downsampled"]  # True if LTTB thinned the monthly series
     }
 
 
-async def get_company_analytics_by_name(db: Session, company_name: str, timeframe: str = "3m") -> Dict[str, Any]:
+async def get_company_analytics_by_name(
+    db: Session,
+    company_name: str,
+    timeframe: str = "3m",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    max_points: int = DEFAULT_MAX_POINTS,
+) -> Dict[str, Any]:
     """
-    Get company analytics by company name (case-insensitive)
+    Get company analytics by company name (case- and accent-insensitive)
     """
-    # Find company by name (case-insensitive)
+    # Find company by its indexed lookup key
     company_row = db.query(Company.id).filter(
-        func.upper(Company.name) == func.upper(company_name)
+        Company.name_key == name_key(company_name)
     ).first()
     
     if not company_row:
         raise ValueError(f"Company '{company_name}' not found")
     
     # Use the existing function with the company ID
-    return await get_company_analytics(db, company_row.id, timeframe)
+    return await get_company_analytics(db, company_row.id, timeframe, start, end, max_points)
 
 
-async def get_manager_analytics_by_slug(db: Session, manager_slug: str, timeframe: str = "3m") -> Dict[str, Any]:
+async def get_manager_analytics_by_slug(
+    db: Session,
+    manager_slug: str,
+    timeframe: str = "3m",
+    country_code: Optional[str] = None,
+    cursor: Optional[Tuple[datetime, int]] = None,
+    limit: int = HISTORY_PAGE_SIZE,
+) -> Dict[str, Any]:
     """
     Get manager analytics by manager slug
     """
@@ -613,108 +502,115 @@ async def get_manager_analytics_by_slug(db: Session, manager_slug: str, timefram
     if not manager:
         raise ValueError(f"Manager with slug '{manager_slug}' not found")
     
-    return await get_manager_analytics(db, manager.id, timeframe)
+    return await get_manager_analytics(db, manager.id, timeframe, country_code, cursor, limit)
+
+
+def encode_history_cursor(exit_date: datetime, position_id: int) -> str:
+    """Opaque cursor for the historical positions page after (exit_date, position_id)"""
+    return f"{exit_date.isoformat()}|{position_id}"
 
 
-async def get_manager_analytics(db: Session, manager_id: int, timeframe: str = "3m") -> Dict[str, Any]:
+def decode_history_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_history_cursor; raises ValueError on anything else"""
+    exit_date, _, position_id = cursor.partition("|")
+    return datetime.fromisoformat(exit_date), int(position_id)
+
+
+async def get_manager_analytics(
+    db: Session,
+    manager_id: int,
+    timeframe: str = "3m",
+    country_code: Optional[str] = None,
+    cursor: Optional[Tuple[datetime, int]] = None,
+    limit: int = HISTORY_PAGE_SIZE,
+) -> Dict[str, Any]:
     """
-    Get comprehensive manager analytics with active and historical positions by country
+    Get comprehensive manager analytics with active and historical positions by country.
+
+    Computed in SQL over the manager's disclosures, per company, newest first:
+    ROW_NUMBER() = 1 is the current position (active if >= 0.5%), and every other
+    disclosure >= 0.5% is historical, exited on the next disclosure's date (LAG()).
+    History is ordered by exit date and paged with a cursor (next_cursor).
     """
     # Get manager info
     manager = db.query(Manager).filter(Manager.id == manager_id).first()
     if not manager:
         raise ValueError(f"Manager with ID {manager_id} not found")
     
-    # Parse timeframe
-    timeframe_map = {
-        "1w": 7,
-        "1m": 30,
-        "3m": 90,
-        "6m": 180,
-        "1y": 365
-    }
-    days = timeframe_map.get(timeframe.lower(), 90)
-    cutoff_date = datetime.now() - timedelta(days=days)
+    sp = ShortPosition
+    newest_first = (sp.date.desc(), sp.id.desc())
+    q = db.query(
+        sp.id.label("sp_id"),
+        sp.company_id.label("company_id"),
+        sp.date.label("date"),
+        sp.position_size.label("position_size"),
+        func.row_number().over(partition_by=sp.company_id, order_by=newest_first).label("rn"),
+        func.lag(sp.date, type_=sp.date.type).over(partition_by=sp.company_id, order_by=newest_first).label("exit_date"),
+    ).filter(
+        sp.manager_id == manager_id
+    )
+    if country_code:
+        q = q.join(Country, Country.id == sp.country_id).filter(Country.code == country_code.upper())
+    ranked = q.subquery("manager_positions")
     
-    # Get all positions for this manager to determine current active and historical
-    all_positions = db.query(
-        ShortPosition.id,
-        ShortPosition.date,
-        ShortPosition.position_size,
+    def with_names(query):
+        return query.join(
+            Company, Company.id == ranked.c.company_id
+        ).join(
+            Country, Country.id == Company.country_id
+        )
+    
+    current_rows = with_names(db.query(
+        ranked.c.date,
+        ranked.c.position_size,
         Company.name.label("company_name"),
-        Company.id.label("company_id"),
         Country.name.label("country_name"),
         Country.flag.label("country_flag"),
-        Country.code.label("country_code")
-    ).join(
-        Company, Company.id == ShortPosition.company_id
-    ).join(
-        Country, Country.id == Company.country_id
-    ).filter(
-        ShortPosition.manager_id == manager_id
+        Country.code.label("country_code"),
+    )).filter(
+        ranked.c.rn == 1,
+        ranked.c.position_size >= ACTIVE_THRESHOLD
     ).order_by(
-        Company.id, ShortPosition.date.desc()
+        ranked.c.company_id
     ).all()
     
-    # Group positions by company to determine current state
-    from collections import defaultdict
-    positions_by_company = defaultdict(list)
-    for pos in all_positions:
-        positions_by_company[pos.company_id].append(pos)
-    
-    current_active_positions = []
-    historical_positions = []
-    
-    for company_id, company_positions in positions_by_company.items():
-        # Sort by date descending (most recent first)
-        company_positions.sort(key=lambda x: x.date, reverse=True)
-        
-        # Get the most recent position for this company
-        most_recent = company_positions[0]
-        
-        if most_recent.position_size >= ACTIVE_THRESHOLD:
-            # Currently active
-            current_active_positions.append({
-                "company_name": most_recent.company_name,
-                "country_name": most_recent.country_name,
-                "country_flag": most_recent.country_flag,
-                "country_code": most_recent.country_code,
-                "position_size": float(most_recent.position_size),
-                "disclosure_date": most_recent.date.strftime("%Y-%m-%d")
-            })
-        
-        # Add historical positions (positions that were active but are now inactive or closed)
-        for i, pos in enumerate(company_positions):
-            # Skip the current active position
-            if i == 0 and pos.position_size >= ACTIVE_THRESHOLD:
-                continue
-            
-            # Add positions that were once active
-            if pos.position_size >= ACTIVE_THRESHOLD:
-                # Find when this position ended (next position date or now)
-                exit_date = company_positions[i-1].date if i > 0 else datetime.now().date()
-                
-                historical_positions.append({
-                    "company_name": pos.company_name,
-                    "country_name": pos.country_name,
-                    "country_flag": pos.country_flag,
-                    "country_code": pos.country_code,
-                    "position_size": float(pos.position_size),
-                    "disclosure_date": pos.date.strftime("%Y-%m-%d"),
-                    "exit_date": exit_date.strftime("%Y-%m-%d")
-                })
-    
-    # Sort historical positions by exit date (most recent first)
-    historical_positions.sort(key=lambda x: x["exit_date"], reverse=True)
+    history_query = with_names(db.query(
+        ranked.c.sp_id,
+        ranked.c.date,
+        ranked.c.exit_date,
+        ranked.c.position_size,
+        Company.name.label("company_name"),
+        Country.name.label("country_name"),
+        Country.flag.label("country_flag"),
+        Country.code.label("country_code"),
+    )).filter(
+        ranked.c.rn > 1,
+        ranked.c.position_size >= ACTIVE_THRESHOLD
+    )
+    if cursor is not None:
+        cursor_date, cursor_id = cursor
+        history_query = history_query.filter(
+            (ranked.c.exit_date < cursor_date)
+            | and_(ranked.c.exit_date == cursor_date, ranked.c.sp_id < cursor_id)
+        )
+    history_rows = history_query.order_by(
+        ranked.c.exit_date.desc(), ranked.c.sp_id.desc()
+    ).limit(limit + 1).all()
     
-    # Get all unique countries from both active and historical positions
-    all_countries = set()
-    for pos in current_active_positions:
-        all_countries.add(pos["country_name"])
-    for pos in historical_positions:
-        all_countries.add(pos["country_name"])
+    next_cursor = None
+    if len(history_rows) > limit:
+        history_rows = history_rows[:limit]
+        next_cursor = encode_history_cursor(history_rows[-1].exit_date, history_rows[-1].sp_id)
     
-    countries_list = sorted(list(all_countries))
+    # Every country the manager ever held a position >= 0.5% in (for the filter, whatever is selected)
+    countries_list = [row.name for row in db.query(Country.name).join(
+        Company, Company.country_id == Country.id
+    ).join(
+        sp, sp.company_id == Company.id
+    ).filter(
+        sp.manager_id == manager_id,
+        sp.position_size >= ACTIVE_THRESHOLD
+    ).distinct().order_by(Country.name).all()]
     
     return {
         "manager": {
@@ -722,8 +618,30 @@ async def get_manager_analytics(db: Session, manager_id: int, timeframe: str = "
             "name": manager.name,
             "slug": manager.slug
         },
-        "current_active_positions": current_active_positions,
-        "historical_positions": historical_positions[:50],  # Increased limit
+        "current_active_positions": [
+            {
+                "company_name": row.company_name,
+                "country_name": row.country_name,
+                "country_flag": row.country_flag,
+                "country_code": row.country_code,
+                "position_size": float(row.position_size),
+                "disclosure_date": row.date.strftime("%Y-%m-%d")
+            }
+            for row in current_rows
+        ],
+        "historical_positions": [
+            {
+                "company_name": row.company_name,
+                "country_name": row.country_name,
+                "country_flag": row.country_flag,
+                "country_code": row.country_code,
+                "position_size": float(row.position_size),
+                "disclosure_date": row.date.strftime("%Y-%m-%d"),
+                "exit_date": row.exit_date.strftime("%Y-%m-%d")
+            }
+            for row in history_rows
+        ],
+        "next_cursor": next_cursor,  # Pass back as ?cursor= for the next page of history
         "countries": countries_list  # List of all countries for filtering
     }
 
@@ -773,43 +691,23 @@ async def get_global_analytics(db: Session, timeframe: str = "3m") -> Dict[str,
         "1y": 365
     }
     days = timeframe_map.get(timeframe.lower(), 90)
-    cutoff_date = datetime.now() - timedelta(days=days)
-    
-    # Summary statistics using active positions only
-    total_active_positions = db.query(func.count(ShortPosition.id)).filter(
-        and_(
-            ShortPosition.date >= cutoff_date,
-            ShortPosition.is_active == True
-        )
-    ).scalar() or 0
-    
-    total_countries = db.query(func.count(func.distinct(Country.id))).join(
-        Company, Company.country_id == Country.id
-    ).join(
-        ShortPosition, ShortPosition.company_id == Company.id
-    ).filter(
-        and_(
-            ShortPosition.date >= cutoff_date,
-            ShortPosition.is_active == True
-        )
-    ).scalar() or 0
-    
-    total_companies = db.query(func.count(func.distinct(Company.id))).join(
-        ShortPosition, ShortPosition.company_id == Company.id
-    ).filter(
-        and_(
-            ShortPosition.date >= cutoff_date,
-            ShortPosition.is_active == True
-        )
-    ).scalar() or 0
-    
-    total_managers = db.query(func.count(func.distinct(Manager.id))).join(
-        ShortPosition, ShortPosition.manager_id == Manager.id
-    ).filter(
-        and_(
-            ShortPosition.date >= cutoff_date,
-            ShortPosition.is_active == True
-        )
+    cutoff_day = (datetime.now() - timedelta(days=days)).date()
+    
+    # Summary statistics from the daily rollups (latest rolled-up day)
+    stats = CountryDailyStats
+    latest_day = db.query(func.max(stats.date)).filter(stats.country_id.is_(None)).scalar()
+    global_row = db.query(stats).filter(
+        stats.country_id.is_(None), stats.date == latest_day
+    ).first() if latest_day else None
+    
+    total_active_positions = global_row.active_positions if global_row else 0
+    total_companies = global_row.companies if global_row else 0  # Issuers in several countries count once
+    total_managers = global_row.managers if global_row else 0
+    
+    total_countries = db.query(func.count(stats.id)).filter(
+        stats.country_id.isnot(None),
+        stats.date == latest_day,
+        stats.active_positions > 0
     ).scalar() or 0
     
     latest_data_date = db.query(func.max(ShortPosition.date)).scalar()
@@ -818,63 +716,69 @@ async def get_global_analytics(db: Session, timeframe: str = "3m") -> Dict[str,
     top_countries = db.query(
         Country.name.label("country_name"),
         Country.flag.label("country_flag"),
-        func.count(ShortPosition.id).label("active_positions"),
-        func.sum(ShortPosition.position_size).label("total_value")
-    ).join(
-        Company, Company.country_id == Country.id
+        stats.active_positions.label("active_positions"),
+        stats.total_short_interest.label("total_value")
     ).join(
-        ShortPosition, ShortPosition.company_id == Company.id
+        Country, Country.id == stats.country_id
     ).filter(
-        and_(
-            ShortPosition.date >= cutoff_date,
-            ShortPosition.is_active == True
-        )
-    ).group_by(
-        Country.id, Country.name, Country.flag
+        stats.date == latest_day,
+        stats.active_positions > 0
     ).order_by(
-        func.count(ShortPosition.id).desc()
+        stats.active_positions.desc()
     ).limit(10).all()
     
     # Get top managers by active positions count using unified logic
-    active_snap = active_positions_subq(db, country_id=None)
-    manager_rows = db.query(
-        Manager.name,
-        Manager.slug,
-        func.sum(active_snap.c.position_size).label("total_value"),
-        func.count(active_snap.c.sp_id).label("active_positions"),
-    ).join(
-        active_snap, active_snap.c.manager_id == Manager.id
-    ).group_by(
-        Manager.id, Manager.name, Manager.slug
-    ).order_by(
-        func.count(active_snap.c.sp_id).desc()  # Order by active positions count
-    ).limit(10).all()
+    store = get_store() if USE_POSITION_STORE else None
+    if store is not None:
+        top_managers = [
+            {
+                "manager_name": m["name"],
+                "active_positions": m["active_positions"],
+                "total_value": m["total_exposure"],
+            }
+            for m in store.top_managers(order_by="count")
+        ]
+    else:
+        active_snap = active_positions_subq(db, country_id=None)
+        manager_rows = db.query(
+            Manager.name,
+            Manager.slug,
+            func.sum(active_snap.c.position_size).label("total_value"),
+            func.count(active_snap.c.sp_id).label("active_positions"),
+        ).join(
+            active_snap, active_snap.c.manager_id == Manager.id
+        ).group_by(
+            Manager.id, Manager.name, Manager.slug
+        ).order_by(
+            func.count(active_snap.c.sp_id).desc()  # Order by active positions count
+        ).limit(10).all()
 
-    top_managers = [
-        {
-            "manager_name": row.name,
-            "active_positions": int(row.active_positions or 0),
-            "total_value": float(row.total_value or 0.0),
-        }
-        for row in manager_rows
-    ]
+        top_managers = [
+            {
+                "manager_name": row.name,
+                "active_positions": int(row.active_positions or 0),
+                "total_value": float(row.total_value or 0.0),
+            }
+            for row in manager_rows
+        ]
     
-    # Get positions trend over time using active positions only
+    # Positions trend: one global rollup row per business day
     positions_trend = db.query(
-        func.date(ShortPosition.date).label("date"),
-        func.count(ShortPosition.id).label("active_positions"),
-        func.sum(ShortPosition.position_size).label("total_value")
+        stats.date.label("date"),
+        stats.active_positions.label("active_positions"),
+        stats.total_short_interest.label("total_value")
     ).filter(
-        and_(
-            ShortPosition.date >= cutoff_date,
-            ShortPosition.is_active == True
-        )
-    ).group_by(
-        func.date(ShortPosition.date)
+        stats.country_id.is_(None),
+        stats.date >= cutoff_day
     ).order_by(
-        func.date(ShortPosition.date)
+        stats.date
     ).all()
     
+    # Weekends and holidays only repeat the previous day
+    if positions_trend:
+        business = get_calendar(None).is_busday([row.date for row in positions_trend])
+        positions_trend = [row for row, keep in zip(positions_trend, business) if keep]
+    
     return {
         "total_active_positions": total_active_positions,
         "total_countries": total_countries,
@@ -3,118 +3,54 @@
 Daily Scraping Service for ShortSelling.eu
 Automatically updates database with fresh data from all countries.
 
-UPDATED INGESTION LOGIC (important):
-- We always re-ingest a recent rolling window (default 30 days) from the regulator.
-- This avoids missing closures (including 0.00) that might be older than the country's max date for another issuer.
-- Duplicates are avoided by an exact-match check before insert (you can also add a unique index for full idempotency).
+INGESTION LOGIC (important):
+- Each country has an `ingestion_state` row with its high-water mark (latest disclosure
+  date ingested), the fingerprints of the rows in the trailing window before it and a
+  hash of the last scraped dataset.
+- A run only processes rows newer than the mark, plus rows inside the trailing window
+  whose fingerprint was not seen before (late disclosures and closures, including 0.00).
+- An unchanged dataset is skipped outright; a country without state (or with a backfill
+  requested via scripts/request_backfill.py) imports everything once.
+- Duplicates are still avoided by an exact-match check before insert.
+- Rows failing validation (see app/scrapers/validation.py) or refused by the database
+  are stored in `rejected_positions` with a reason code, once per distinct row (full-history
+  sources send the same bad rows every day); each insert runs in its own savepoint so a
+  bad row never rolls back the good rows of its batch.
 """
 
 import logging
 import asyncio
+import hashlib
+import json
 import re
-from datetime import datetime, timedelta
+import uuid
+import pandas as pd
+from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional, Any
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, func
 
 from app.db.database import get_db
-from app.db.models import Country, Company, Manager, ShortPosition, ScrapingLog
+from app.db.models import Country, Company, Manager, ShortPosition, ScrapingLog, IngestionState, RejectedPosition
+from app.db.partitioning import ensure_country_partition
 from app.scrapers.scraper_factory import ScraperFactory
+from app.scrapers.browser_pool import browser_pool
+from app.scrapers.validation import split_positions, REASON_KEY, REJECT_DB_ERROR
+from app.utils.name_normalization import normalize_manager_name, normalize_company_name, name_key
+from app.services.entity_resolution import AliasResolver
+from app.services.issuer_identity import IssuerIndex
+from app.services import duckdb_analytics
+from app.services.position_store import USE_POSITION_STORE, publish_snapshot
+from app.services.position_payloads import payload_row, write_payloads
+from app.services.position_validity import link_position_validity
+from app.services.rollups import update_rollups
+from app.services.timeline_pyramid import rebuild_company_timelines
 
 
 # ========================================
 # CENTRALIZED MANAGER NORMALIZATION LOGIC
 # ========================================
 
-def normalize_manager_name(raw_name: str) -> str:
-    """
-    Normalize manager name to prevent duplicates across ALL scrapers.
-    
-    Rules:
-    1. Strip whitespace
-    2. Convert to Title Case (Marshall Wace Llp)
-    3. Handle common abbreviations correctly
-    4. Clean up spacing
-    5. Transliterate non-Latin scripts for WIN1252 compatibility
-    
-    Args:
-        raw_name: Raw manager name from any scraper
-        
-    Returns:
-        Normalized manager name
-    """
-    if not raw_name or not raw_name.strip():
-        return ""
-    
-    # Strip and basic cleanup
-    name = raw_name.strip()
-    
-    # Transliterate Arabic text only for database compatibility
-    try:
-        # Check if it contains Arabic characters specifically
-        if any(0x0600 <= ord(char) <= 0x06FF for char in name):  # Arabic Unicode block
-            # Simple Arabic to Latin transliteration for key names
-            arabic_to_latin = {
-                'ميلينيوم كابيتال (دي اي اف سي) ليميتد': 'Millennium Capital (DIFC) Limited',
-                'شركة': 'Company',
-                'كابيتال': 'Capital',
-                'ليميتد': 'Limited',
-                'ميلينيوم': 'Millennium'
-            }
-            for arabic, latin in arabic_to_latin.items():
-                if arabic in name:
-                    name = name.replace(arabic, latin)
-                    break
-            # If still has Arabic characters, use unidecode as fallback
-            if any(0x0600 <= ord(char) <= 0x06FF for char in name):
-                try:
-                    import unidecode
-                    name = unidecode.unidecode(name)
-                except ImportError:
-                    # Final fallback: remove Arabic characters only
-                    name = ''.join(char for char in name if not (0x0600 <= ord(char) <= 0x06FF))
-    except Exception:
-        pass
-    
-    
-    # Convert to Title Case (Unicode-aware with proper accent handling)
-    def unicode_title_case(text):
-        """Custom title case that properly handles accented characters"""
-        return ''.join(char.upper() if i == 0 or text[i-1].isspace() 
-                      else char.lower() for i, char in enumerate(text))
-    
-    name = unicode_title_case(name)
-    
-    # Fix common abbreviations that shouldn't be title-cased
-    abbreviations = {
-        'Llc': 'LLC',
-        'Llp': 'LLP', 
-        'Lp': 'LP',
-        'Ltd': 'Ltd',
-        'Inc': 'Inc',
-        'Corp': 'Corp',
-        'Plc': 'PLC',
-        'As': 'AS',  # Norwegian companies
-        'Asa': 'ASA',  # Norwegian companies
-        'Gmbh': 'GmbH',  # German companies
-        'Sa': 'SA',  # French/Spanish companies
-        'Sas': 'SAS',  # French companies
-        'Bv': 'BV',  # Dutch companies
-        'Nv': 'NV',  # Dutch companies
-        'Ab': 'AB',  # Swedish companies
-        'Oy': 'OY',  # Finnish companies
-    }
-    
-    for wrong, correct in abbreviations.items():
-        # Match word boundaries to avoid partial replacements
-        name = re.sub(r'\b' + re.escape(wrong) + r'\b', correct, name)
-    
-    # Clean up extra spaces
-    name = ' '.join(name.split())
-    
-    return name
-
-
 def generate_manager_slug(normalized_name: str) -> str:
     """Generate a clean URL slug for the manager."""
     if not normalized_name:
@@ -131,7 +67,7 @@ def find_existing_manager(db: Session, normalized_name: str) -> Optional[Manager
     
     Strategies:
     1. Exact match on normalized name
-    2. Case-insensitive match  
+    2. Case/accent-insensitive match (name_key)
     3. Slug-based match
     """
     if not normalized_name:
@@ -142,9 +78,9 @@ def find_existing_manager(db: Session, normalized_name: str) -> Optional[Manager
     if manager:
         return manager
     
-    # Strategy 2: Case-insensitive match
+    # Strategy 2: Case/accent-insensitive match on the indexed lookup key
     manager = db.query(Manager).filter(
-        func.upper(Manager.name) == func.upper(normalized_name)
+        Manager.name_key == name_key(normalized_name)
     ).first()
     if manager:
         return manager
@@ -224,66 +160,13 @@ def get_or_create_normalized_manager(db: Session, raw_manager_name: str, logger=
         return None
 
 
-def normalize_company_name(raw_name: str) -> str:
-    """Normalize company name to prevent duplicates across ALL scrapers."""
-    if not raw_name or not raw_name.strip():
-        return ""
-    
-    # Basic cleanup
-    name = raw_name.strip()
-    
-    
-    # Convert to Title Case for consistency (Unicode-aware with proper accent handling)
-    def unicode_title_case(text):
-        """Custom title case that properly handles accented characters"""
-        return ''.join(char.upper() if i == 0 or text[i-1].isspace() 
-                      else char.lower() for i, char in enumerate(text))
-    
-    name = unicode_title_case(name)
-    
-    # Fix common company abbreviations that get messed up by title case
-    company_abbreviations = {
-        'Ab': 'AB',           # Swedish: Aktiebolag
-        'Asa': 'ASA',         # Norwegian: Allmennaksjeselskap  
-        'As': 'AS',           # Norwegian: Aksjeselskap
-        'Plc': 'PLC',         # Public Limited Company
-        'Ltd': 'Ltd',         # Limited
-        'Llc': 'LLC',         # Limited Liability Company
-        'Inc': 'Inc',         # Incorporated
-        'Corp': 'Corp',       # Corporation
-        'Co': 'Co',           # Company
-        'Sa': 'SA',           # Société Anonyme
-        'Spa': 'SpA',         # Società per Azioni
-        'Srl': 'SRL',         # Società a Responsabilità Limitata
-        'Nv': 'NV',           # Naamloze Vennootschap
-        'Bv': 'BV',           # Besloten Vennootschap
-        'Gmbh': 'GmbH',       # Gesellschaft mit beschränkter Haftung
-        'Ag': 'AG',           # Aktiengesellschaft
-        'Se': 'SE',           # Societas Europaea
-        'Oy': 'OY',           # Finnish: Osakeyhtiö
-        'Oyj': 'OYJ',         # Finnish: Julkinen osakeyhtiö
-        'A/s': 'A/S',         # Danish: Aktieselskab
-        'Publ': '(publ)',     # Swedish: publicly traded indicator
-        'Public': '(publ)',   # English equivalent
-    }
-    
-    for wrong, correct in company_abbreviations.items():
-        # Use word boundary regex to avoid partial replacements
-        name = re.sub(r'\b' + re.escape(wrong) + r'\b', correct, name)
-    
-    # Remove extra whitespace
-    name = ' '.join(name.split())
-    
-    return name
-
-
 def find_existing_company(db: Session, normalized_name: str, country_id: int) -> Optional[Company]:
     """
     Find existing company using multiple lookup strategies to avoid duplicates.
     
     Strategies:
     1. Exact match on normalized name + country
-    2. Case-insensitive match + country
+    2. Case/accent-insensitive match (name_key) + country
     3. ISIN-based match (if available)
     """
     if not normalized_name:
@@ -297,9 +180,9 @@ def find_existing_company(db: Session, normalized_name: str, country_id: int) ->
     if company:
         return company
     
-    # Strategy 2: Case-insensitive match + country
+    # Strategy 2: Case/accent-insensitive match on the indexed lookup key + country
     company = db.query(Company).filter(
-        func.upper(Company.name) == func.upper(normalized_name),
+        Company.name_key == name_key(normalized_name),
         Company.country_id == country_id
     ).first()
     if company:
@@ -373,6 +256,80 @@ def get_or_create_normalized_company(db: Session, raw_company_name: str, country
         return None
 
 
+# ========================================
+# INGESTION WATERMARKS
+# ========================================
+
+# Days before the high-water mark in which new (late) rows are still looked for
+INGESTION_WINDOW_DAYS = 30
+
+
+def position_fingerprint(position: Dict[str, Any]) -> str:
+    """Stable short hash identifying a scraped row"""
+    raw = "|".join([
+        str(position.get('manager_name') or '').strip(),
+        str(position.get('company_name') or '').strip(),
+        str(position.get('isin') or '').strip(),
+        str(position.get('date')),
+        f"{float(position.get('position_size') or 0):.6f}",
+    ])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def _clip(value, limit: int) -> Optional[str]:
+    """Text as stored in rejected_positions (None for missing values)"""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    return str(value)[:limit]
+
+
+def rejected_fingerprint(row: Dict[str, Any]) -> str:
+    """Stable short hash of a quarantined row: its reason and stored raw fields.
+
+    Works on a scraped position (with REASON_KEY) and on a rejected_positions row alike,
+    so existing rows can be backfilled (scripts/migrate_rejected_fingerprints.py)."""
+    raw = "|".join(str(value) if value is not None else '' for value in (
+        row.get(REASON_KEY) or row.get('reason'),
+        _clip(row.get('manager_name'), 500),
+        _clip(row.get('company_name'), 500),
+        _clip(row.get('isin'), 50),
+        _clip(row['raw_date'] if 'raw_date' in row else row.get('date'), 100),
+        _clip(row['raw_position_size'] if 'raw_position_size' in row else row.get('position_size'), 100),
+    ))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def dataset_hash(fingerprints: List[str]) -> str:
+    """Order-independent hash of a whole scraped dataset"""
+    digest = hashlib.sha256()
+    for fingerprint in sorted(fingerprints):
+        digest.update(fingerprint.encode('ascii'))
+    return digest.hexdigest()
+
+
+def select_new_positions(positions: List[Dict], fingerprints: List[str],
+                         state: Optional[IngestionState]) -> List[int]:
+    """
+    Indexes of scraped positions that still need ingesting, given the country's state.
+
+    Everything when there is no state or a backfill was requested; otherwise rows
+    after the high-water mark plus unseen rows inside the trailing window.
+    """
+    if state is None or state.backfill_requested or state.max_date is None:
+        return list(range(len(positions)))
+
+    seen = set(json.loads(state.window_fingerprints or '[]'))
+    window_start = state.max_date - timedelta(days=INGESTION_WINDOW_DAYS)
+
+    selected = []
+    for i, (pos, fingerprint) in enumerate(zip(positions, fingerprints)):
+        if pos['date'] > state.max_date:
+            selected.append(i)
+        elif pos['date'] >= window_start and fingerprint not in seen:
+            selected.append(i)
+    return selected
+
+
 class DailyScrapingService:
     """Service for daily scraping and database updates"""
     
@@ -384,12 +341,23 @@ class DailyScrapingService:
         self.manager_cache: Dict[str, Manager] = {}
         self.company_cache: Dict[str, Company] = {}
         self.country_cache: Dict[str, Country] = {}
+        # Duplicate manager/company rows -> canonical ids (loaded on first use)
+        self.alias_resolver: Optional[AliasResolver] = None
+        # ISIN -> issuer id (loaded on first use)
+        self.issuer_index: Optional[IssuerIndex] = None
+        # Earliest disclosure date added this run: rollups are recomputed from there
+        self.rollup_since: Optional[date] = None
+        # Companies with new disclosures this run: their timelines are rebuilt
+        self.timeline_companies: set = set()
+        # Tags the position payloads stored by a run
+        self.run_id: Optional[str] = None
         
         # Statistics
         self.stats: Dict[str, Any] = {
             'total_positions_found': 0,
             'total_positions_added': 0,
             'total_errors': 0,
+            'total_rejected': 0,
             'countries_processed': 0,
             'countries_failed': 0
         }
@@ -404,10 +372,15 @@ class DailyScrapingService:
             'total_positions_found': 0,
             'total_positions_added': 0,
             'total_errors': 0,
+            'total_rejected': 0,
             'countries_processed': 0,
             'countries_failed': 0
         }
         
+        self.rollup_since = None
+        self.timeline_companies = set()
+        self.run_id = uuid.uuid4().hex
+        
         # Get list of countries to scrape
         countries = self._get_countries_to_scrape()
         
@@ -423,6 +396,16 @@ class DailyScrapingService:
                 self.stats['countries_failed'] += 1
                 await self._log_scraping_error(country.code, str(e))
         
+        # Close the warm Selenium sessions shared by DK/NO/FI/SE
+        browser_pool.shutdown()
+        
+        # Daily rollups for the dashboards
+        self._update_rollups()
+        
+        # Columnar snapshot for the API workers
+        if self.stats['countries_processed']:
+            self._publish_snapshot()
+        
         # Calculate duration
         duration = datetime.now() - start_time
         
@@ -476,8 +459,10 @@ class DailyScrapingService:
             self.logger.info(f"Found {len(positions)} positions for {country.name}")
             
             # Update database
-            added_count = await self._update_database(country, positions)
+            added_count = await self._update_database(country, positions, scraper.rejected_positions,
+                                                      source_url=self._get_source_url(scraper))
             self.logger.info(f"Added {added_count} new positions for {country.name}")
+            scraper.mark_ingested()
             
             # Log success
             await self._log_scraping_success(country.code, len(positions), added_count)
@@ -487,116 +472,124 @@ class DailyScrapingService:
             await self._log_scraping_error(country.code, str(e))
             self.stats['total_errors'] += 1
     
-    async def _update_database(self, country: Country, positions: List[Dict]) -> int:
-        """Update database with new positions using a rolling time window, 
-        with optional full backfill for specific countries (e.g. UK)."""
+    async def _update_database(self, country: Country, positions: List[Dict],
+                               rejected: Optional[List[Dict]] = None, source_url: Optional[str] = None) -> int:
+        """Update database with the positions past the country's ingestion watermark
+        (everything on the first run or after a requested backfill).
+
+        Invalid rows (plus any the scraper already rejected) go to rejected_positions;
+        a row the database refuses is quarantined on its own, without losing its batch.
+        Each new position's scraped record goes to position_payloads with its batch."""
         db = next(get_db())
         added_count = 0
 
         try:
-            # Get the most recent date we have for this country (for logging only now)
-            latest_date = db.query(func.max(ShortPosition.date)).filter(
-                ShortPosition.country_id == country.id
-            ).scalar()
+            # Partitioned short_positions: the load only touches this country's partition
+            if ensure_country_partition(db.get_bind(), country.id, country.code):
+                self.logger.info(f"🧩 Created the short_positions partition for {country.name}")
 
-            # Get existing count for this country
-            existing_count = db.query(ShortPosition).filter(
-                ShortPosition.country_id == country.id
-            ).count()
-
-            self.logger.info(f"Latest date in database for {country.name}: {latest_date}")
-            self.logger.info(f"Existing positions for {country.name}: {existing_count}")
+            state = db.query(IngestionState).filter(IngestionState.country_id == country.id).first()
 
             # Update statistics
             self.stats['total_positions_found'] += len(positions)
 
-            # --- BEGIN BACKFILL/ROLLING WINDOW LOGIC ---
-            # One-off full backfill for UK (GB), otherwise rolling window.
-            FORCE_FULL_BACKFILL = {'GB': False}  # set to False/remove after UK backfill is done
-            ROLLING_DAYS = 30
+            # Validate the whole batch up front
+            positions, invalid = split_positions(positions)
+            self._quarantine_positions(db, country, list(rejected or []) + invalid)
 
-            if positions:
-                # Normalize scraped dates to `date` objects
-                for pos in positions:
-                    if hasattr(pos['date'], 'date'):
-                        pos['date'] = pos['date'].date()
+            # Normalize scraped dates to `date` objects
+            for pos in positions:
+                if hasattr(pos['date'], 'date'):
+                    pos['date'] = pos['date'].date()
+                else:
+                    pos['date'] = pd.Timestamp(pos['date']).date()
+
+            fingerprints = [position_fingerprint(pos) for pos in positions]
+            source_hash = dataset_hash(fingerprints)
 
-                if FORCE_FULL_BACKFILL.get(country.code, False):
-                    filtered_positions = positions  # take *all* FCA rows, including 2020 zeros
+            if not positions:
+                filtered_positions = []
+                self.logger.info("No positions found in scraped data")
+            elif state is not None and not state.backfill_requested and state.source_hash == source_hash:
+                filtered_positions = []
+                self.logger.info(f"Scraped data for {country.name} unchanged since last run, nothing to ingest")
+            else:
+                selected = select_new_positions(positions, fingerprints, state)
+                filtered_positions = [positions[i] for i in selected]
+                if state is None or state.backfill_requested or state.max_date is None:
                     self.logger.info(
-                        f"[Backfill] Forcing FULL import for {country.code}: "
-                        f"{len(filtered_positions)} rows"
+                        f"[Backfill] Full import for {country.code}: {len(filtered_positions)} rows"
                     )
                 else:
-                    most_recent_scraped = max(pos['date'] for pos in positions)
-                    cutoff_date = most_recent_scraped - timedelta(days=ROLLING_DAYS)
-
-                    if existing_count < 100:
-                        filtered_positions = positions
-                        self.logger.info(
-                            f"Very little existing data ({existing_count}), "
-                            f"keeping ALL {len(filtered_positions)} rows for {country.name}"
-                        )
-                    else:
-                        filtered_positions = [
-                            pos for pos in positions if pos['date'] >= cutoff_date
-                        ]
-                        self.logger.info(
-                            f"Rolling window: keeping {len(filtered_positions)} rows "
-                            f"from {cutoff_date} to {most_recent_scraped} for {country.name}"
-                        )
-            else:
-                filtered_positions = []
-                self.logger.info("No positions found in scraped data")
-            # --- END BACKFILL/ROLLING WINDOW LOGIC ---
+                    self.logger.info(
+                        f"Watermark {state.max_date}: {len(filtered_positions)} of {len(positions)} "
+                        f"rows are new for {country.name}"
+                    )
+
+            failed_fingerprints = set()
 
             batch_size = 100  # Commit every 100 positions for better performance
             batch_count = 0
             
+            db_rejected = []
+            payloads = []
+
             for position_data in filtered_positions:
                 try:
-                    # Get or create manager and company
-                    manager = self._get_or_create_manager(
-                        db,
-                        position_data['manager_name']
-                    )
-                    company = self._get_or_create_company(
-                        db,
-                        position_data['company_name'],
-                        position_data.get('isin'),
-                        country.name
-                    )
-                    
-                    # Check if position already exists (exact match)
-                    existing = db.query(ShortPosition).filter(
-                        and_(
-                            ShortPosition.date == position_data['date'],
-                            ShortPosition.position_size == position_data['position_size'],
-                            ShortPosition.company_id == company.id,
-                            ShortPosition.manager_id == manager.id,
-                            ShortPosition.country_id == country.id,
+                    # A savepoint per row: a failure only undoes this row, not the pending batch
+                    with db.begin_nested():
+                        # Get or create manager and company
+                        manager = self._get_or_create_manager(
+                            db,
+                            position_data['manager_name']
                         )
-                    ).first()
-
-                    if existing:
-                        continue  # Position already exists
-
-                    # Create new position
-                    new_position = ShortPosition(
-                        date=position_data['date'],
-                        company_id=company.id,
-                        manager_id=manager.id,
-                        country_id=country.id,
-                        position_size=position_data['position_size'],
-                        is_active=position_data.get('is_active', True)
-                    )
+                        company = self._get_or_create_company(
+                            db,
+                            position_data['company_name'],
+                            position_data.get('isin'),
+                            country.name
+                        )
+
+                        # Check if position already exists (exact match)
+                        existing = db.query(ShortPosition).filter(
+                            and_(
+                                ShortPosition.date == position_data['date'],
+                                ShortPosition.position_size == position_data['position_size'],
+                                ShortPosition.company_id == company.id,
+                                ShortPosition.manager_id == manager.id,
+                                ShortPosition.country_id == country.id,
+                            )
+                        ).first()
+
+                        if existing:
+                            continue  # Position already exists
+
+                        # Create new position
+                        new_position = ShortPosition(
+                            date=position_data['date'],
+                            company_id=company.id,
+                            manager_id=manager.id,
+                            country_id=country.id,
+                            position_size=position_data['position_size'],
+                            is_active=position_data.get('is_active', True)
+                        )
+
+                        db.add(new_position)
+                        db.flush()
+                        link_position_validity(db, new_position)
+
+                    payloads.append(payload_row(new_position.id, position_data, source_url, self.run_id))
+                    if self.rollup_since is None or position_data['date'] < self.rollup_since:
+                        self.rollup_since = position_data['date']
+                    self.timeline_companies.add(company.id)
 
-                    db.add(new_position)
                     added_count += 1
                     batch_count += 1
                     
                     # Commit in batches for better performance
                     if batch_count >= batch_size:
+                        write_payloads(db, payloads)
+                        payloads = []
                         db.commit()
                         batch_count = 0
                         if added_count % 1000 == 0:  # Log progress every 1000 positions
@@ -605,14 +598,25 @@ class DailyScrapingService:
                 except Exception as e:
                     self.logger.warning(f"Error processing position: {e}")
                     self.stats['total_errors'] += 1
-                    db.rollback()  # Rollback failed transaction
-                    batch_count = 0  # Reset batch count after rollback
+                    # Companies/issuers created inside the rolled back savepoint are gone
+                    self.company_cache.clear()
+                    self.issuer_index = None
+                    # Don't mark the row as seen, so the next run retries it
+                    failed_fingerprints.add(position_fingerprint(position_data))
+                    db_rejected.append({**position_data, REASON_KEY: REJECT_DB_ERROR, 'details': str(e)})
                     continue
             
             # Commit any remaining positions in the final batch
             if batch_count > 0:
+                write_payloads(db, payloads)
                 db.commit()
 
+            self._quarantine_positions(db, country, db_rejected)
+
+            if positions:
+                self._save_ingestion_state(db, country, positions, fingerprints, failed_fingerprints,
+                                           source_hash, added_count)
+
             # Update statistics
             self.stats['total_positions_added'] += added_count
 
@@ -627,6 +631,95 @@ class DailyScrapingService:
 
         return added_count
 
+    def _quarantine_positions(self, db: Session, country: Country, rejected: List[Dict]):
+        """Store rejected rows (with their reason code) in rejected_positions.
+
+        Rows already quarantined for the country (same rejected_fingerprint) are skipped."""
+        if not rejected:
+            return
+
+        new_rows = {}
+        for pos in rejected:
+            new_rows.setdefault(rejected_fingerprint(pos), pos)
+
+        fingerprints = list(new_rows)
+        for start in range(0, len(fingerprints), 500):  # Stay under SQLite's bound parameter limit
+            chunk = fingerprints[start:start + 500]
+            for (fingerprint,) in db.query(RejectedPosition.fingerprint).filter(
+                RejectedPosition.country_id == country.id,
+                RejectedPosition.fingerprint.in_(chunk),
+            ):
+                new_rows.pop(fingerprint, None)
+
+        if new_rows:
+            db.bulk_insert_mappings(RejectedPosition, [
+                {
+                    'country_id': country.id,
+                    'reason': pos[REASON_KEY],
+                    'manager_name': _clip(pos.get('manager_name'), 500),
+                    'company_name': _clip(pos.get('company_name'), 500),
+                    'isin': _clip(pos.get('isin'), 50),
+                    'raw_date': _clip(pos.get('date'), 100),
+                    'raw_position_size': _clip(pos.get('position_size'), 100),
+                    'details': _clip(pos.get('details'), 2000),
+                    'fingerprint': fingerprint,
+                }
+                for fingerprint, pos in new_rows.items()
+            ])
+            db.commit()
+
+        self.stats['total_rejected'] += len(rejected)
+        reasons = pd.Series([pos[REASON_KEY] for pos in rejected]).value_counts().to_dict()
+        self.logger.warning(f"Rejected {len(rejected)} rows for {country.name}: {reasons} "
+                            f"({len(new_rows)} newly quarantined)")
+
+    def _save_ingestion_state(self, db: Session, country: Country, positions: List[Dict],
+                              fingerprints: List[str], failed_fingerprints: set,
+                              source_hash: str, added_count: int):
+        """Advance the country's high-water mark after a run"""
+        # Re-query: a rollback inside the insert loop expires loaded objects
+        state = db.query(IngestionState).filter(IngestionState.country_id == country.id).first()
+        if state is None:
+            state = IngestionState(country_id=country.id, rows_ingested=0)
+            db.add(state)
+
+        max_date = max(pos['date'] for pos in positions)
+        if state.max_date and not state.backfill_requested:
+            max_date = max(max_date, state.max_date)
+        window_start = max_date - timedelta(days=INGESTION_WINDOW_DAYS)
+
+        window = {
+            fingerprint for pos, fingerprint in zip(positions, fingerprints)
+            if pos['date'] >= window_start and fingerprint not in failed_fingerprints
+        }
+
+        state.max_date = max_date
+        state.window_fingerprints = json.dumps(sorted(window))
+        # A partially failed run must not look "unchanged" next time
+        state.source_hash = None if failed_fingerprints else source_hash
+        state.rows_ingested = (state.rows_ingested or 0) + added_count
+        state.backfill_requested = False
+        state.last_run_at = datetime.now()
+        db.commit()
+
+        self.logger.info(f"Ingestion watermark for {country.name}: {max_date} ({len(window)} rows in window)")
+
+    def request_backfill(self, codes: List[str]) -> List[str]:
+        """Make the next run for these countries import every scraped row"""
+        db = next(get_db())
+        try:
+            countries = db.query(Country).filter(Country.code.in_(codes)).all()
+            for country in countries:
+                state = db.query(IngestionState).filter(IngestionState.country_id == country.id).first()
+                if state is None:
+                    state = IngestionState(country_id=country.id, rows_ingested=0)
+                    db.add(state)
+                state.backfill_requested = True
+            db.commit()
+            return [country.code for country in countries]
+        finally:
+            db.close()
+
     async def run_for_country_codes(self, codes: list[str]) -> dict:
         """Run scraping only for the provided country codes (e.g., ['GB'] or ['GB','DE'])."""
         start_time = datetime.now()
@@ -634,10 +727,15 @@ class DailyScrapingService:
             'total_positions_found': 0,
             'total_positions_added': 0,
             'total_errors': 0,
+            'total_rejected': 0,
             'countries_processed': 0,
             'countries_failed': 0
         }
 
+        self.rollup_since = None
+        self.timeline_companies = set()
+        self.run_id = uuid.uuid4().hex
+
         # fetch only requested countries
         db = next(get_db())
         try:
@@ -654,6 +752,11 @@ class DailyScrapingService:
                 self.stats['countries_failed'] += 1
                 await self._log_scraping_error(country.code, str(e))
 
+        browser_pool.shutdown()
+        self._update_rollups()
+        if self.stats['countries_processed']:
+            self._publish_snapshot()
+
         duration = datetime.now() - start_time
         return {
             'success': True,
@@ -665,10 +768,81 @@ class DailyScrapingService:
 
 
     
+    def _update_rollups(self):
+        """Extend the daily rollups to today, redoing the days this run's disclosures changed,
+        and rebuild the timelines of the companies that got new disclosures"""
+        db = next(get_db())
+        try:
+            result = update_rollups(db, self.rollup_since)
+            self.logger.info(f"📊 Daily rollups updated: {result}")
+        except Exception as e:
+            db.rollback()
+            self.logger.error(f"❌ Failed to update daily rollups: {e}")
+
+        try:
+            built = rebuild_company_timelines(db, self.timeline_companies)
+            self.logger.info(f"📈 Rebuilt timelines for {built} companies")
+        except Exception as e:
+            db.rollback()
+            self.logger.error(f"❌ Failed to rebuild company timelines: {e}")
+        finally:
+            db.close()
+
+    def _publish_snapshot(self):
+        """Publish a new position store version for the API workers to map when they read it
+        (USE_POSITION_STORE), and the Parquet snapshot when queries are routed to DuckDB"""
+        db = next(get_db())
+        try:
+            if USE_POSITION_STORE:
+                version = publish_snapshot(db)
+                self.logger.info(f"🗂️ Published position snapshot {version}")
+        except Exception as e:
+            self.logger.error(f"❌ Failed to publish position snapshot: {e}")
+
+        try:
+            if duckdb_analytics.DUCKDB_QUERIES:
+                version = duckdb_analytics.export_parquet(db)
+                self.logger.info(f"🦆 Exported Parquet snapshot {version}")
+        except Exception as e:
+            self.logger.error(f"❌ Failed to export Parquet snapshot: {e}")
+        finally:
+            db.close()
+
+    def _get_source_url(self, scraper) -> Optional[str]:
+        """Where the scraper's data came from, stored with each new position's payload"""
+        try:
+            return scraper.get_data_url()
+        except Exception as e:
+            self.logger.warning(f"No source URL for {scraper.country_code}: {e}")
+            return None
+
+    def _get_alias_resolver(self, db: Session) -> AliasResolver:
+        """Entity aliases written by scripts/resolve_entities.py, loaded once per service"""
+        if self.alias_resolver is None:
+            self.alias_resolver = AliasResolver.load(db)
+            if len(self.alias_resolver):
+                self.logger.info(f"Loaded {len(self.alias_resolver)} entity aliases")
+        return self.alias_resolver
+
+    def _get_issuer_index(self, db: Session) -> IssuerIndex:
+        """In-memory ISIN -> issuer id index, loaded once per service"""
+        if self.issuer_index is None:
+            self.issuer_index = IssuerIndex.load(db)
+        return self.issuer_index
+
     def _get_or_create_manager(self, db: Session, manager_name: str) -> Manager:
         """Get or create a manager using centralized normalization logic"""
-        # Use the centralized normalization function
-        manager = get_or_create_normalized_manager(db, manager_name, self.logger)
+        aliases = self._get_alias_resolver(db)
+
+        # Known alias spellings go straight to their canonical manager
+        canonical_id = aliases.manager_id_for_name(manager_name)
+        manager = db.get(Manager, canonical_id) if canonical_id else None
+
+        if manager is None:
+            # Use the centralized normalization function
+            manager = get_or_create_normalized_manager(db, manager_name, self.logger)
+            if manager and manager.id in aliases.manager_ids:
+                manager = db.get(Manager, aliases.canonical_manager_id(manager.id)) or manager
         
         if not manager:
             raise Exception(f"Failed to create or find manager: '{manager_name}'")
@@ -705,18 +879,30 @@ class DailyScrapingService:
         
         country = self.country_cache[country_name]
         
-        # Use the centralized normalized company function
-        company = get_or_create_normalized_company(
-            db=db,
-            raw_company_name=cleaned_company_name,
-            country_id=country.id,
-            isin=isin,
-            logger=self.logger
-        )
+        aliases = self._get_alias_resolver(db)
+
+        # Known alias spellings go straight to their canonical company
+        canonical_id = aliases.company_id_for_name(cleaned_company_name, country.id)
+        company = db.get(Company, canonical_id) if canonical_id else None
+
+        if company is None:
+            # Use the centralized normalized company function
+            company = get_or_create_normalized_company(
+                db=db,
+                raw_company_name=cleaned_company_name,
+                country_id=country.id,
+                isin=isin,
+                logger=self.logger
+            )
+            if company and company.id in aliases.company_ids:
+                company = db.get(Company, aliases.canonical_company_id(company.id)) or company
         
         if not company:
             self.logger.error(f"Failed to create or find company '{cleaned_company_name}' in country '{country_name}'")
             raise Exception(f"Could not create company: {cleaned_company_name}")
+
+        # Same ISIN in another country -> same issuer
+        self._get_issuer_index(db).link_company(db, company, isin)
         
         self.company_cache[cache_key] = company
         return company
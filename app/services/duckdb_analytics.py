@@ -0,0 +1,215 @@
+# app/services/duckdb_analytics.py
+"""
+Optional DuckDB backend for the heavy analytics queries
+
+export_parquet() materializes the positions dataset (short_positions plus the
+company, manager and country dimensions) as Parquet into a new versioned
+directory after each ingestion run (app/services/snapshot_versions.py):
+
+    <ANALYTICS_PARQUET_DIR>/v<version>/{positions/part-*.parquet,companies,...}.parquet
+    <ANALYTICS_PARQUET_DIR>/CURRENT     -> "v<version>", replaced atomically
+
+The queries listed in DUCKDB_QUERIES (comma separated, or "all") are then run
+by embedded DuckDB over those files instead of the OLTP database:
+
+    most_shorted_companies   analytics.get_most_shorted_companies (except IE)
+    top_managers             analytics.get_top_managers
+    global_top_managers      analytics.get_global_top_managers
+
+Each function mirrors its SQLAlchemy counterpart's output; if duckdb isn't
+installed (it is not in requirements.txt: pip install duckdb==0.9.2) or nothing
+has been exported yet, use_duckdb() is False and the SQLAlchemy implementation
+runs. Results reflect the last export.
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.db.models import Company, Country, Manager, ShortPosition
+from app.services.position_validity import ACTIVE_THRESHOLD
+from app.services.snapshot_versions import current_version, publish_version
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_PARQUET_DIR = os.environ.get("ANALYTICS_PARQUET_DIR", os.path.join("data", "parquet"))
+DUCKDB_QUERIES = {q.strip() for q in os.environ.get("DUCKDB_QUERIES", "").split(",") if q.strip()}
+QUERIES = ('most_shorted_companies', 'top_managers', 'global_top_managers')
+EXPORT_BATCH = 500000  # Positions per Parquet part
+
+try:
+    import duckdb
+except ImportError:  # Optional dependency: the SQLAlchemy queries are used instead
+    duckdb = None
+
+
+def _timestamp(value) -> Optional[str]:
+    # As text: pandas can't hold the open-ended 9999-12-31 valid_to; DuckDB casts it back
+    return value.isoformat(sep=' ') if value is not None else None
+
+
+def _quote(path: str) -> str:
+    return "'" + path.replace("'", "''") + "'"
+
+
+def _copy(con, frame: pd.DataFrame, select: str, path: str):
+    con.register('frame', frame)
+    con.execute(f"COPY (SELECT {select} FROM frame) TO {_quote(path)} (FORMAT PARQUET)")
+    con.unregister('frame')
+
+
+def export_parquet(db: Session, directory: str = ANALYTICS_PARQUET_DIR) -> str:
+    """Export the positions dataset as a new Parquet version and point CURRENT at it; returns the version"""
+    if duckdb is None:
+        raise RuntimeError("duckdb is not installed")
+
+    total = 0
+
+    def write(staging: str):
+        nonlocal total
+        os.makedirs(os.path.join(staging, 'positions'))
+        con = duckdb.connect()
+        try:
+            position_columns = ['id', 'date', 'valid_from', 'valid_to', 'company_id', 'manager_id',
+                                'country_id', 'position_size', 'is_active']
+            select = ("id, CAST(date AS TIMESTAMP) AS date, CAST(valid_from AS TIMESTAMP) AS valid_from, "
+                      "CAST(valid_to AS TIMESTAMP) AS valid_to, company_id, manager_id, country_id, "
+                      "CAST(position_size AS DOUBLE) AS position_size, CAST(is_active AS BOOLEAN) AS is_active")
+            query = db.query(
+                ShortPosition.id, ShortPosition.date, ShortPosition.valid_from, ShortPosition.valid_to,
+                ShortPosition.company_id, ShortPosition.manager_id, ShortPosition.country_id,
+                ShortPosition.position_size, ShortPosition.is_active,
+            ).order_by(ShortPosition.id).yield_per(EXPORT_BATCH)
+
+            part = []
+            for row in query:
+                part.append((row.id, _timestamp(row.date), _timestamp(row.valid_from), _timestamp(row.valid_to),
+                             row.company_id, row.manager_id, row.country_id, row.position_size, bool(row.is_active)))
+                if len(part) == EXPORT_BATCH:
+                    _copy(con, pd.DataFrame(part, columns=position_columns), select,
+                          os.path.join(staging, 'positions', f"part-{total // EXPORT_BATCH:05d}.parquet"))
+                    total += len(part)
+                    part = []
+            # Always at least one part, so the glob matches even with no positions
+            if part or total == 0:
+                _copy(con, pd.DataFrame(part, columns=position_columns), select,
+                      os.path.join(staging, 'positions', f"part-{total // EXPORT_BATCH:05d}.parquet"))
+                total += len(part)
+
+            dimensions = {
+                'companies': (db.query(Company.id, Company.name, Company.country_id, Company.issuer_id),
+                              ['id', 'name', 'country_id', 'issuer_id']),
+                'managers': (db.query(Manager.id, Manager.name, Manager.slug), ['id', 'name', 'slug']),
+                'countries': (db.query(Country.id, Country.code, Country.name), ['id', 'code', 'name']),
+            }
+            for name, (dimension_query, columns) in dimensions.items():
+                _copy(con, pd.DataFrame([tuple(r) for r in dimension_query], columns=columns),
+                      '*', os.path.join(staging, f"{name}.parquet"))
+        finally:
+            con.close()
+
+    version = publish_version(directory, write)
+    logger.info(f"Exported Parquet snapshot {version} ({total} positions)")
+    return version
+
+
+def use_duckdb(query: str, directory: str = ANALYTICS_PARQUET_DIR) -> bool:
+    """Whether a query is configured for DuckDB and can run (duckdb installed, a snapshot exported)"""
+    if query not in DUCKDB_QUERIES and 'all' not in DUCKDB_QUERIES:
+        return False
+    return duckdb is not None and current_version(directory) is not None
+
+
+def _connect(directory: str = ANALYTICS_PARQUET_DIR):
+    """In-memory DuckDB connection with views over the current Parquet snapshot"""
+    path = os.path.join(directory, current_version(directory))
+    con = duckdb.connect()
+    con.execute(f"CREATE VIEW positions AS SELECT * FROM read_parquet({_quote(os.path.join(path, 'positions', '*.parquet'))})")
+    for name in ('companies', 'managers', 'countries'):
+        con.execute(f"CREATE VIEW {name} AS SELECT * FROM read_parquet({_quote(os.path.join(path, name + '.parquet'))})")
+    return con
+
+
+def _rows(sql: str, params: list, directory: str = ANALYTICS_PARQUET_DIR) -> List[Dict[str, Any]]:
+    con = _connect(directory)
+    try:
+        cursor = con.execute(sql, params)
+        columns = [d[0] for d in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    finally:
+        con.close()
+
+
+def most_shorted_companies(country_id: int, as_of: Optional[datetime] = None, limit: int = 10) -> List[Dict[str, Any]]:
+    """Companies by sum of active positions in a country, with the change since a week earlier
+
+    The change compares the positions in force (validity intervals) at both ends,
+    as analytics.get_most_shorted_companies does."""
+    now = as_of or datetime.now()
+    week_ago = now - timedelta(days=7)
+    rows = _rows(
+        """
+        WITH active AS (
+            SELECT company_id, sum(position_size) AS total, avg(position_size) AS average,
+                   count(*) AS positions, max(date) AS latest
+            FROM positions WHERE is_active AND country_id = ?
+            GROUP BY company_id
+        ), in_force AS (
+            SELECT company_id,
+                   sum(CASE WHEN valid_to > ? AND valid_from <= ? THEN position_size ELSE 0 END)
+                 - sum(CASE WHEN valid_to > ? AND valid_from <= ? THEN position_size ELSE 0 END) AS delta
+            FROM positions
+            WHERE country_id = ? AND position_size >= ?
+            GROUP BY company_id
+        )
+        SELECT c.id AS company_id, c.name AS company_name, active.total, active.average, active.positions,
+               active.latest, coalesce(in_force.delta, 0) AS week_delta
+        FROM active
+        JOIN companies c ON c.id = active.company_id
+        LEFT JOIN in_force ON in_force.company_id = active.company_id
+        ORDER BY active.total DESC
+        LIMIT ?
+        """,
+        [country_id, now, now, week_ago, week_ago, country_id, ACTIVE_THRESHOLD, limit],
+    )
+    return [
+        {
+            "company_name": r["company_name"],
+            "company_id": r["company_id"],
+            "total_short_positions": float(r["total"] or 0.0),
+            "average_position_size": float(r["average"] or 0.0),
+            "position_count": int(r["positions"] or 0),
+            "week_delta": float(r["week_delta"] or 0.0),
+            "most_recent_position_date": r["latest"],
+        }
+        for r in rows
+    ]
+
+
+def top_managers(country_id: Optional[int] = None, order_by: str = "exposure", limit: int = 10) -> List[Dict[str, Any]]:
+    """Managers by sum (order_by='exposure') or count ('count') of their active positions"""
+    rows = _rows(
+        f"""
+        SELECT m.name, m.slug, sum(p.position_size) AS total_exposure, count(*) AS active_positions
+        FROM positions p
+        JOIN managers m ON m.id = p.manager_id
+        WHERE p.is_active AND (CAST(? AS INTEGER) IS NULL OR p.country_id = ?)
+        GROUP BY m.id, m.name, m.slug
+        ORDER BY {'total_exposure' if order_by == 'exposure' else 'active_positions'} DESC
+        LIMIT ?
+        """,
+        [country_id, country_id, limit],
+    )
+    return [
+        {
+            "name": r["name"],
+            "slug": r["slug"],
+            "active_positions": int(r["active_positions"] or 0),
+            "total_exposure": float(r["total_exposure"] or 0.0),
+        }
+        for r in rows
+    ]
@@ -0,0 +1,369 @@
+# app/services/entity_resolution.py
+"""
+Offline duplicate detection for managers and companies
+
+Normalization keeps exact spellings together, but regulators still spell the
+same fund differently ("Marshall Wace LLP" / "Marshall Wace L.L.P.",
+"Citadel Advisors Limited" / "Citadel Advisors Ltd", accents and
+transliterations). resolve_entities() finds those duplicates and records them
+in the entity_aliases table; ingestion then resolves every name through an
+in-memory AliasResolver in O(1).
+
+Matching runs in three passes, none of them O(n^2):
+
+1. match_key(): accent-folded, punctuation-free, legal-suffix-canonical key -
+   names with the same key are duplicates (score 1.0)
+2. companies only: same ISIN within a country (score 1.0)
+3. fuzzy: candidates only come from shared blocks (the two rarest tokens and
+   a key prefix); large blocks are compared within a sorted window. Pairs are
+   scored by character-trigram Dice similarity (frozenset intersections).
+
+Duplicates are clustered with union-find. The member with the most positions
+(then the lowest id) is canonical; each other member gets one alias row.
+"""
+
+import logging
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db.models import Company, CompanyTimeline, EntityAlias, Manager, ShortPosition
+from app.services import duckdb_analytics
+from app.services.position_store import USE_POSITION_STORE, publish_snapshot
+from app.services.position_validity import OPEN_VALID_TO, rebuild_position_validity
+from app.services.rollups import refresh_rollups
+from app.utils.name_normalization import fold_accents
+
+logger = logging.getLogger(__name__)
+
+# Minimum trigram Dice similarity for a fuzzy match
+FUZZY_THRESHOLD = 0.88
+# Blocks up to this size are compared pairwise; larger ones within a sorted window
+MAX_BLOCK_SIZE = 40
+BLOCK_WINDOW = 8
+# Tokens that appear in more than this share of names are too common to block on
+COMMON_TOKEN_SHARE = 0.01
+
+ENTITY_MANAGER = 'manager'
+ENTITY_COMPANY = 'company'
+
+# Legal-form spellings mapped to one canonical token (applied after punctuation removal)
+LEGAL_FORMS = {
+    'LIMITED': 'LTD',
+    'INCORPORATED': 'INC',
+    'CORPORATION': 'CORP',
+    'COMPANY': 'CO',
+    'LIMITEDCOMPANY': 'LTD',
+    'LIMITEDPARTNERSHIP': 'LP',
+    'LIMITEDLIABILITYPARTNERSHIP': 'LLP',
+    'LIMITEDLIABILITYCOMPANY': 'LLC',
+    'AKTIENGESELLSCHAFT': 'AG',
+    'AKTIEBOLAG': 'AB',
+    'AKTIEBOLAGET': 'AB',
+    'AKTIESELSKAB': 'AS',
+    'AKSJESELSKAP': 'AS',
+    'SOCIETEANONYME': 'SA',
+    'PUBLICLIMITEDCOMPANY': 'PLC',
+    'PUBLLIMITEDCOMPANY': 'PLC',  # name normalization turns "Public" into "(publ)"
+}
+# Tokens ignored for blocking (they say nothing about which entity it is)
+NOISE_TOKENS = {'THE', 'AND', 'OF', 'DE', 'LA', 'LE', 'DU', 'DES', 'VAN', 'DER',
+                'LTD', 'INC', 'CORP', 'CO', 'LP', 'LLP', 'LLC', 'AG', 'AB', 'AS', 'ASA', 'SA',
+                'SAS', 'PLC', 'NV', 'BV', 'GMBH', 'SE', 'SPA', 'SRL', 'OY', 'OYJ', 'PUBL'}
+
+_PHRASE_RE = re.compile(r'\b(LIMITED (LIABILITY )?(PARTNERSHIP|COMPANY)|PUBL(?:IC)? LIMITED COMPANY|SOCIETE ANONYME)\b')
+_DOTTED_RE = re.compile(r'\b(?:[A-Z]\.){2,}')
+_NON_ALNUM_RE = re.compile(r'[^A-Z0-9]+')
+
+
+@lru_cache(maxsize=65536)
+def match_key(name: Optional[str]) -> str:
+    """Aggressive comparison key: 'Marshall Wace L.L.P.' and 'MARSHALL WACE LLP' give the same key"""
+    if not name:
+        return ''
+    text = fold_accents(str(name)).upper().replace('&', ' AND ')
+    # "L.L.P." -> "LLP" before punctuation turns it into single letters
+    text = _DOTTED_RE.sub(lambda m: m.group(0).replace('.', ''), text)
+    text = _PHRASE_RE.sub(lambda m: m.group(0).replace(' ', ''), text.replace('(PUBL)', 'PUBL'))
+    tokens = [LEGAL_FORMS.get(token, token) for token in _NON_ALNUM_RE.split(text) if token]
+    if tokens and tokens[0] == 'THE':
+        tokens = tokens[1:]
+    return ' '.join(tokens)
+
+
+def _trigrams(key: str) -> frozenset:
+    padded = f'  {key} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: frozenset, b: frozenset) -> float:
+    """Dice coefficient of two trigram sets"""
+    if not a or not b:
+        return 0.0
+    return 2.0 * len(a & b) / (len(a) + len(b))
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int) -> bool:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return False
+        self.parent[max(ra, rb)] = min(ra, rb)
+        return True
+
+
+def _candidate_pairs(keys: Sequence[str], groups: Sequence) -> Iterable[Tuple[int, int]]:
+    """Pairs of indexes sharing a block (within the same group, e.g. country)"""
+    token_counts = Counter(token for key in set(keys) for token in set(key.split()))
+    common = max(2, int(len(keys) * COMMON_TOKEN_SHARE))
+
+    blocks = defaultdict(list)
+    for i, key in enumerate(keys):
+        if not key:
+            continue
+        tokens = sorted({t for t in key.split() if t not in NOISE_TOKENS and len(t) > 1},
+                        key=lambda t: (token_counts[t], t))
+        rare = [t for t in tokens if token_counts[t] <= common][:2] or tokens[:1]
+        for token in rare:
+            blocks[(groups[i], 'tok', token)].append(i)
+        blocks[(groups[i], 'pre', key.replace(' ', '')[:6])].append(i)
+
+    seen = set()
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        if len(members) <= MAX_BLOCK_SIZE:
+            pairs = ((a, b) for n, a in enumerate(members) for b in members[n + 1:])
+        else:
+            # Sorted neighbourhood: only compare names that sort close together
+            ordered = sorted(members, key=lambda i: keys[i])
+            pairs = ((a, b) for n, a in enumerate(ordered) for b in ordered[n + 1:n + 1 + BLOCK_WINDOW])
+        for a, b in pairs:
+            pair = (a, b) if a < b else (b, a)
+            if pair not in seen:
+                seen.add(pair)
+                yield pair
+
+
+def find_duplicates(names: Sequence[str], groups: Optional[Sequence] = None,
+                    isins: Optional[Sequence[Optional[str]]] = None,
+                    threshold: float = FUZZY_THRESHOLD) -> List[Tuple[int, int, float, str]]:
+    """
+    Duplicate links between names as (i, j, score, method) index tuples.
+
+    groups: optional block partition (e.g. country_id) - names in different
+            groups are never linked
+    isins:  optional identifiers; equal non-empty values in a group link names
+    """
+    groups = groups if groups is not None else [None] * len(names)
+    keys = [match_key(name) for name in names]
+    uf = _UnionFind(len(names))
+    links = []
+
+    def link(a, b, score, method):
+        if uf.union(a, b):
+            links.append((a, b, score, method))
+
+    by_key = {}
+    for i, key in enumerate(keys):
+        if not key:
+            continue
+        first = by_key.setdefault((groups[i], key), i)
+        if first != i:
+            link(first, i, 1.0, 'exact_key')
+
+    if isins is not None:
+        by_isin = {}
+        for i, isin in enumerate(isins):
+            isin = (isin or '').strip().upper()
+            if len(isin) == 12:
+                first = by_isin.setdefault((groups[i], isin), i)
+                if first != i:
+                    link(first, i, 1.0, 'isin')
+
+    # Fuzzy pass over one representative per distinct (group, key)
+    reps = sorted(set(by_key.values()))
+    rep_keys = [keys[i] for i in reps]
+    trigrams = [_trigrams(key) for key in rep_keys]
+    sizes = [len(t) for t in trigrams]
+    for a, b in _candidate_pairs(rep_keys, [groups[i] for i in reps]):
+        # Size filter: Dice can't reach the threshold if the sets differ too much in size
+        if 2 * min(sizes[a], sizes[b]) < threshold * (sizes[a] + sizes[b]):
+            continue
+        score = similarity(trigrams[a], trigrams[b])
+        if score >= threshold:
+            link(reps[a], reps[b], round(score, 4), 'fuzzy')
+
+    return links
+
+
+def _clusters(size: int, links: List[Tuple[int, int, float, str]]) -> Dict[int, List[Tuple[int, float, str]]]:
+    """root -> [(member, score, method)] for every linked member"""
+    uf = _UnionFind(size)
+    best = {}
+    for a, b, score, method in links:
+        uf.union(a, b)
+        for i in (a, b):
+            if i not in best or score < best[i][0]:
+                best[i] = (score, method)
+    clusters = defaultdict(list)
+    for i, (score, method) in best.items():
+        clusters[uf.find(i)].append((i, score, method))
+    return clusters
+
+
+def _alias_rows(entity_type: str, rows: List, links, position_counts: Dict[int, int]) -> List[Dict]:
+    aliases = []
+    for members in _clusters(len(rows), links).values():
+        # Canonical = most positions, then oldest id
+        canonical = min(members, key=lambda m: (-position_counts.get(rows[m[0]].id, 0), rows[m[0]].id))[0]
+        for member, score, method in members:
+            if member == canonical:
+                continue
+            row = rows[member]
+            aliases.append({
+                'entity_type': entity_type,
+                'alias_id': row.id,
+                'canonical_id': rows[canonical].id,
+                'alias_name': row.name,
+                'alias_key': match_key(row.name),
+                'country_id': getattr(row, 'country_id', None) if entity_type == ENTITY_COMPANY else None,
+                'score': score,
+                'method': method,
+            })
+    return aliases
+
+
+def resolve_entities(db: Session, threshold: float = FUZZY_THRESHOLD, dry_run: bool = False,
+                     merge_positions: bool = False) -> Dict[str, List[Dict]]:
+    """
+    Rebuild the entity_aliases table from the current managers and companies.
+
+    With merge_positions, short_positions pointing at an alias are moved to its
+    canonical row as well (the alias rows themselves are kept so old links work).
+    Everything derived from the positions is then rebuilt: validity intervals,
+    is_active (only the latest disclosure of a merged holding stays current),
+    daily rollups, and the position store / Parquet snapshots when enabled; the
+    stored company timelines are dropped.
+    """
+    managers = db.query(Manager.id, Manager.name).order_by(Manager.id).all()
+    companies = db.query(Company.id, Company.name, Company.country_id, Company.isin).order_by(Company.id).all()
+    manager_counts = dict(db.query(ShortPosition.manager_id, func.count(ShortPosition.id))
+                          .group_by(ShortPosition.manager_id).all())
+    company_counts = dict(db.query(ShortPosition.company_id, func.count(ShortPosition.id))
+                          .group_by(ShortPosition.company_id).all())
+
+    manager_links = find_duplicates([m.name for m in managers], threshold=threshold)
+    company_links = find_duplicates([c.name for c in companies], groups=[c.country_id for c in companies],
+                                    isins=[c.isin for c in companies], threshold=threshold)
+
+    result = {
+        ENTITY_MANAGER: _alias_rows(ENTITY_MANAGER, managers, manager_links, manager_counts),
+        ENTITY_COMPANY: _alias_rows(ENTITY_COMPANY, companies, company_links, company_counts),
+    }
+    logger.info(f"Found {len(result[ENTITY_MANAGER])} manager and {len(result[ENTITY_COMPANY])} company aliases")
+
+    if dry_run:
+        return result
+
+    db.query(EntityAlias).delete()
+    db.bulk_insert_mappings(EntityAlias, result[ENTITY_MANAGER] + result[ENTITY_COMPANY])
+
+    if merge_positions:
+        for alias in result[ENTITY_MANAGER]:
+            db.query(ShortPosition).filter(ShortPosition.manager_id == alias['alias_id']) \
+                .update({ShortPosition.manager_id: alias['canonical_id']}, synchronize_session=False)
+        for alias in result[ENTITY_COMPANY]:
+            db.query(ShortPosition).filter(ShortPosition.company_id == alias['alias_id']) \
+                .update({ShortPosition.company_id: alias['canonical_id']}, synchronize_session=False)
+
+    db.commit()
+
+    if merge_positions and (result[ENTITY_MANAGER] or result[ENTITY_COMPANY]):
+        # Merged histories interleave, so their validity intervals have to be recomputed
+        rebuild_position_validity(db)
+        # ...and a merged holding has one current disclosure: the rows it superseded aren't
+        for column, entity_type in ((ShortPosition.manager_id, ENTITY_MANAGER),
+                                    (ShortPosition.company_id, ENTITY_COMPANY)):
+            for canonical_id in {alias['canonical_id'] for alias in result[entity_type]}:
+                db.query(ShortPosition).filter(
+                    column == canonical_id,
+                    ShortPosition.is_active == True,
+                    ShortPosition.valid_to < OPEN_VALID_TO,
+                ).update({ShortPosition.is_active: False}, synchronize_session=False)
+        # ...and the stored timelines are stale (rebuilt on next request)
+        db.query(CompanyTimeline).delete(synchronize_session=False)
+        db.commit()
+        # The rollups hold rows and distinct counts for the merged-away ids on every day
+        refresh_rollups(db)
+        # Published snapshots still carry the alias ids
+        if USE_POSITION_STORE:
+            logger.info(f"Published position snapshot {publish_snapshot(db)}")
+        if duckdb_analytics.DUCKDB_QUERIES:
+            logger.info(f"Exported Parquet snapshot {duckdb_analytics.export_parquet(db)}")
+
+    return result
+
+
+class AliasResolver:
+    """
+    In-memory view of entity_aliases for ingestion.
+
+    Maps alias ids and alias match keys to canonical ids, so every lookup is a
+    dict hit instead of a query.
+    """
+
+    def __init__(self):
+        self.manager_ids: Dict[int, int] = {}
+        self.company_ids: Dict[int, int] = {}
+        self.manager_keys: Dict[str, int] = {}
+        self.company_keys: Dict[Tuple[int, str], int] = {}
+
+    @classmethod
+    def load(cls, db: Session) -> 'AliasResolver':
+        resolver = cls()
+        try:
+            aliases = db.query(EntityAlias.entity_type, EntityAlias.alias_id, EntityAlias.canonical_id,
+                               EntityAlias.alias_key, EntityAlias.country_id).all()
+        except Exception as e:
+            # Table not created yet - resolve nothing
+            db.rollback()
+            logger.warning(f"Entity aliases unavailable: {e}")
+            return resolver
+
+        for entity_type, alias_id, canonical_id, alias_key, country_id in aliases:
+            if entity_type == ENTITY_MANAGER:
+                resolver.manager_ids[alias_id] = canonical_id
+                resolver.manager_keys[alias_key] = canonical_id
+            else:
+                resolver.company_ids[alias_id] = canonical_id
+                resolver.company_keys[(country_id, alias_key)] = canonical_id
+        return resolver
+
+    def __len__(self):
+        return len(self.manager_ids) + len(self.company_ids)
+
+    def manager_id_for_name(self, name: str) -> Optional[int]:
+        return self.manager_keys.get(match_key(name)) if self.manager_keys else None
+
+    def company_id_for_name(self, name: str, country_id: int) -> Optional[int]:
+        return self.company_keys.get((country_id, match_key(name))) if self.company_keys else None
+
+    def canonical_manager_id(self, manager_id: int) -> int:
+        return self.manager_ids.get(manager_id, manager_id)
+
+    def canonical_company_id(self, company_id: int) -> int:
+        return self.company_ids.get(company_id, company_id)
@@ -0,0 +1,68 @@
+# app/services/issuer_identity.py
+"""
+Global issuer identity by ISIN
+
+Companies are stored per (name, country), so a security disclosed in two
+jurisdictions is two Company rows. Each ISIN gets one Issuer row, and
+companies point at it through companies.issuer_id. Cross-country analytics
+group on that id; companies without an ISIN stay on their own.
+
+During ingestion IssuerIndex keeps isin -> issuer_id in memory, so linking a
+company costs a dict lookup (plus one insert the first time an ISIN is seen).
+"""
+
+import logging
+import re
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.db.models import Company, Issuer
+
+logger = logging.getLogger(__name__)
+
+_ISIN_RE = re.compile(r'^[A-Z]{2}[A-Z0-9]{9}[0-9]$')
+
+
+def normalize_isin(isin: Optional[str]) -> Optional[str]:
+    """Upper-cased ISIN, or None if the value isn't one"""
+    if not isin:
+        return None
+    value = str(isin).strip().upper()
+    return value if _ISIN_RE.match(value) else None
+
+
+class IssuerIndex:
+    """In-memory isin -> issuer_id map, creating issuers on first sight"""
+
+    def __init__(self, ids: Optional[Dict[str, int]] = None):
+        self.ids: Dict[str, int] = ids or {}
+
+    @classmethod
+    def load(cls, db: Session) -> 'IssuerIndex':
+        return cls(dict(db.query(Issuer.isin, Issuer.id).all()))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def issuer_id(self, db: Session, isin: Optional[str], name: str) -> Optional[int]:
+        """Issuer id for an ISIN (None if it isn't a valid ISIN)"""
+        isin = normalize_isin(isin)
+        if isin is None:
+            return None
+
+        issuer_id = self.ids.get(isin)
+        if issuer_id is None:
+            issuer = Issuer(isin=isin, name=name)
+            db.add(issuer)
+            db.flush()  # Get the ID
+            issuer_id = self.ids[isin] = issuer.id
+        return issuer_id
+
+    def link_company(self, db: Session, company: Company, isin: Optional[str] = None):
+        """Point a company at its issuer, if it has (or is given) an ISIN and isn't linked yet"""
+        if company.issuer_id is not None:
+            return
+        issuer_id = self.issuer_id(db, isin or company.isin, company.name)
+        if issuer_id is not None:
+            company.issuer_id = issuer_id
@@ -0,0 +1,49 @@
+# app/services/position_payloads.py
+"""
+Cold per-position data in position_payloads
+
+short_positions only holds what the analytics read. The scraped record
+behind each disclosure (zlib-compressed JSON), its source URL and the ingest
+run that stored it are kept in position_payloads, keyed by position id. The
+ingestion service writes them in one bulk INSERT per committed batch.
+"""
+
+import json
+import zlib
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import PositionPayload
+
+COMPRESSION_LEVEL = 6
+
+
+def compress_record(record: Any) -> Optional[bytes]:
+    """zlib-compressed JSON of a scraped record (dates and other values as strings)"""
+    if record is None:
+        return None
+    return zlib.compress(json.dumps(record, default=str, ensure_ascii=False).encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def decompress_record(data: Optional[bytes]) -> Any:
+    if data is None:
+        return None
+    return json.loads(zlib.decompress(data).decode('utf-8'))
+
+
+def payload_row(position_id: int, record: Any, source_url: Optional[str], run_id: Optional[str]) -> Dict[str, Any]:
+    return {
+        "position_id": position_id,
+        "raw_data": compress_record(record),
+        "source_url": source_url[:500] if source_url else None,
+        "ingest_run_id": run_id,
+    }
+
+
+def write_payloads(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """Insert payload rows (from payload_row) in one statement; the caller commits"""
+    if rows:
+        db.execute(insert(PositionPayload), rows)
+    return len(rows)
@@ -0,0 +1,199 @@
+# app/services/position_store.py
+"""
+Memory-mapped columnar snapshot of short_positions
+
+After each ingestion run publish_snapshot() exports the positions as one .npy
+file per column (int32 day numbers and ids, float32 sizes) plus offset indexes
+sorted by company and by manager, into a new versioned directory (app/services/snapshot_versions.py):
+
+    <POSITION_STORE_DIR>/v<version>/{date,valid_to,company_id,...}.npy
+    <POSITION_STORE_DIR>/CURRENT        -> "v<version>", replaced atomically
+
+API workers open the columns with mmap_mode='r', so every worker shares the same
+page cache instead of holding its own copy, and get_store() swaps to a new
+version when CURRENT changes (checked at most every STORE_CHECK_SECONDS).
+Older versions are deleted once a newer one is published; workers still
+mapping them keep reading the unlinked files until they swap.
+
+Set USE_POSITION_STORE=true to publish it after each run and answer the
+top-manager rankings from it with no database round trip.
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.models import Company, Manager, ShortPosition
+from app.services.position_validity import ACTIVE_THRESHOLD
+from app.services.snapshot_versions import current_version, publish_version
+
+logger = logging.getLogger(__name__)
+
+POSITION_STORE_DIR = os.environ.get("POSITION_STORE_DIR", os.path.join("data", "position_store"))
+USE_POSITION_STORE = os.environ.get("USE_POSITION_STORE", "false").lower() == "true"
+STORE_CHECK_SECONDS = 30
+
+OPEN_DAY = np.iinfo(np.int32).max  # valid_to of the latest disclosure
+COLUMNS = ('id', 'date', 'valid_to', 'company_id', 'manager_id', 'country_id', 'size', 'is_active')
+DTYPES = {column: np.int32 for column in COLUMNS} | {'size': np.float32, 'is_active': np.bool_}
+EXPORT_BATCH = 50000
+
+_EPOCH = date(1970, 1, 1)
+
+
+def _day(value) -> int:
+    if isinstance(value, datetime):
+        value = value.date()
+    return (value - _EPOCH).days
+
+
+def _day_numbers(values, count: int) -> np.ndarray:
+    """Dates/datetimes -> days since 1970-01-01 (toordinal(): numpy parses date objects far slower)"""
+    return np.fromiter((value.toordinal() for value in values), np.int64, count) - _EPOCH.toordinal()
+
+
+def _group_index(keys: np.ndarray, dates: np.ndarray):
+    """Row order grouped by key (by date within a key), the distinct keys and their offsets"""
+    order = np.lexsort((dates, keys)).astype(np.int32)
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]) if len(keys) else np.array([], int)
+    offsets = np.r_[starts, len(keys)].astype(np.int64)
+    return order, sorted_keys[starts].astype(np.int32), offsets
+
+
+class PositionStore:
+    """Read-only view of one snapshot version (columns are np.memmap)"""
+
+    def __init__(self, path: str, version: str):
+        self.path = path
+        self.version = version
+        for column in COLUMNS + ('by_company', 'company_keys', 'company_offsets',
+                                 'by_manager', 'manager_keys', 'manager_offsets'):
+            setattr(self, column, np.load(os.path.join(path, f"{column}.npy"), mmap_mode='r'))
+        with open(os.path.join(path, 'names.json'), encoding='utf-8') as f:
+            names = json.load(f)
+        self.managers: Dict[int, Dict] = {int(k): v for k, v in names['managers'].items()}
+        self.companies: Dict[int, str] = {int(k): v for k, v in names['companies'].items()}
+
+    def __len__(self):
+        return len(self.id)
+
+    def _rows(self, order, keys, offsets, key: int) -> np.ndarray:
+        i = np.searchsorted(keys, key)
+        if i == len(keys) or keys[i] != key:
+            return np.array([], dtype=np.int32)
+        return order[offsets[i]:offsets[i + 1]]
+
+    def company_rows(self, company_id: int) -> np.ndarray:
+        """Row numbers of a company's disclosures, oldest first"""
+        return self._rows(self.by_company, self.company_keys, self.company_offsets, company_id)
+
+    def manager_rows(self, manager_id: int) -> np.ndarray:
+        """Row numbers of a manager's disclosures, oldest first"""
+        return self._rows(self.by_manager, self.manager_keys, self.manager_offsets, manager_id)
+
+    def active_mask(self, as_of: Optional[date] = None, country_id: Optional[int] = None) -> np.ndarray:
+        """Rows flagged is_active (or, with as_of, in force on that day and >= 0.5%)"""
+        if as_of is None:
+            mask = np.asarray(self.is_active, dtype=bool)
+        else:
+            day = _day(as_of)
+            mask = (self.date <= day) & (self.valid_to > day) & (self.size >= ACTIVE_THRESHOLD)
+        if country_id is not None:
+            mask = mask & (self.country_id == country_id)
+        return mask
+
+    def top_managers(self, country_id: Optional[int] = None, order_by: str = "exposure", limit: int = 10) -> List[Dict]:
+        """Managers ranked by the sum (order_by='exposure') or count ('count') of their active positions"""
+        mask = self.active_mask(country_id=country_id)
+        managers = self.manager_id[mask]
+        exposure = np.bincount(managers, weights=self.size[mask])
+        count = np.bincount(managers)
+        ranking = exposure if order_by == "exposure" else count
+        held = np.flatnonzero(count)
+        top = held[np.argsort(-ranking[held], kind='stable')][:limit]
+        return [
+            {
+                "name": self.managers.get(int(m), {}).get("name"),
+                "slug": self.managers.get(int(m), {}).get("slug"),
+                "active_positions": int(count[m]),
+                "total_exposure": round(float(exposure[m]), 6),  # Summed in float64 from float32 sizes
+            }
+            for m in top
+        ]
+
+
+def publish_snapshot(db: Session, directory: str = POSITION_STORE_DIR) -> str:
+    """Export short_positions as a new snapshot version and point CURRENT at it; returns the version"""
+    sp = ShortPosition
+    # Rows inserted while exporting are left for the next snapshot
+    total, last_id = db.query(func.count(sp.id), func.max(sp.id)).one()
+    arrays = {column: np.empty(total, dtype=DTYPES[column]) for column in COLUMNS}
+
+    query = select(
+        sp.id, sp.date, sp.valid_to, sp.company_id, sp.manager_id, sp.country_id, sp.position_size, sp.is_active,
+    ).where(sp.id <= (last_id or 0)).order_by(sp.id).execution_options(yield_per=EXPORT_BATCH)
+    filled = 0
+    for batch in db.execute(query).partitions():
+        columns = dict(zip(COLUMNS, zip(*batch)))
+        rows = slice(filled, filled + len(batch))
+        arrays['date'][rows] = _day_numbers(columns['date'], len(batch))
+        # No interval yet (not migrated): never in force for as-of lookups
+        valid_to = (end or start for start, end in zip(columns['date'], columns['valid_to']))
+        arrays['valid_to'][rows] = np.minimum(_day_numbers(valid_to, len(batch)), OPEN_DAY)
+        arrays['is_active'][rows] = np.array(columns['is_active'], dtype=bool)  # NULL: not active
+        for column in ('id', 'company_id', 'manager_id', 'country_id', 'size'):
+            arrays[column][rows] = columns[column]
+        filled += len(batch)
+    arrays = {column: values[:filled] for column, values in arrays.items()}  # Rows deleted meanwhile
+
+    for name, key in (('company', 'company_id'), ('manager', 'manager_id')):
+        order, keys, offsets = _group_index(arrays[key], arrays['date'])
+        arrays[f'by_{name}'], arrays[f'{name}_keys'], arrays[f'{name}_offsets'] = order, keys, offsets
+
+    names = {
+        'managers': {m.id: {'name': m.name, 'slug': m.slug} for m in db.query(Manager.id, Manager.name, Manager.slug)},
+        'companies': {c.id: c.name for c in db.query(Company.id, Company.name)},
+    }
+
+    def write(staging: str):
+        for column, values in arrays.items():
+            np.save(os.path.join(staging, f"{column}.npy"), values)
+        with open(os.path.join(staging, 'names.json'), 'w', encoding='utf-8') as f:
+            json.dump(names, f)
+
+    version = publish_version(directory, write)
+    logger.info(f"Published position snapshot {version} ({len(arrays['id'])} positions)")
+    return version
+
+
+_store: Optional[PositionStore] = None
+_checked_at = 0.0
+
+
+def get_store(directory: str = POSITION_STORE_DIR) -> Optional[PositionStore]:
+    """This worker's mapped snapshot, swapped to the published version when CURRENT changes"""
+    global _store, _checked_at
+    now = time.monotonic()
+    if _store is not None and now - _checked_at < STORE_CHECK_SECONDS:
+        return _store
+    _checked_at = now
+
+    version = current_version(directory)
+    if version is None:
+        return _store
+
+    if _store is None or _store.version != version:
+        try:
+            _store = PositionStore(os.path.join(directory, version), version)
+            logger.info(f"Mapped position snapshot {version} ({len(_store)} positions)")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not map position snapshot {version}: {e}")
+    return _store
@@ -0,0 +1,148 @@
+# app/services/position_validity.py
+"""
+Point-in-time validity of short position disclosures
+
+A disclosure is the manager's position in an issuer from its own date until the
+manager's next disclosure for that issuer. short_positions stores that interval
+as [valid_from, valid_to): valid_from is the disclosure date, valid_to the date
+of the next disclosure for the same (company, manager), or OPEN_VALID_TO while it
+is still the latest one. A latest disclosure the regulator already lists as
+historic (is_active False: the historical tab/file) has ended without a successor;
+its interval closes the day after its date (HISTORIC_VALIDITY), so the interval
+readers agree with is_active about today. A far-future sentinel instead of NULL keeps
+"in force on D" a single range condition (valid_to > D AND valid_from <= D),
+which idx_position_validity answers with one index range scan.
+
+Ingestion keeps the intervals up to date row by row (link_position_validity);
+rebuild_position_validity recomputes them from scratch with a window function,
+for existing databases (scripts/migrate_position_validity.py) or after merges.
+"""
+
+from datetime import date as date_type, datetime, time, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.db.models import ShortPosition
+
+OPEN_VALID_TO = datetime(9999, 12, 31)  # valid_to of a disclosure that hasn't been superseded
+ACTIVE_THRESHOLD = 0.5  # percent points
+HISTORIC_VALIDITY = timedelta(days=1)  # In force on its own day only, when reported historic without a successor
+
+
+def _as_datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date_type):
+        return datetime.combine(value, time.min)
+    raise TypeError(f"Expected a date or datetime, got {value!r}")
+
+
+def latest_valid_to(position_date, is_active: Optional[bool]) -> datetime:
+    """valid_to of a (company, manager)'s latest disclosure: open while the regulator reports it as current"""
+    if is_active is not None and not is_active:
+        return _as_datetime(position_date) + HISTORIC_VALIDITY
+    return OPEN_VALID_TO
+
+
+def link_position_validity(db: Session, position: ShortPosition):
+    """Give a freshly inserted (and flushed) position its interval and end the one it supersedes.
+
+    Disclosures can arrive out of order: the new row ends the latest disclosure of
+    the same (company, manager) dated on or before it, and ends itself where the
+    earliest later disclosure begins - like rebuild_position_validity's LEAD().
+    """
+    sp = ShortPosition
+    moment = _as_datetime(position.date)
+
+    # country_id is implied by the company, but lets a partitioned table prune to one partition
+    same_key = (
+        sp.country_id == position.country_id,
+        sp.company_id == position.company_id,
+        sp.manager_id == position.manager_id,
+        sp.id != position.id,
+    )
+    previous = db.query(sp).filter(*same_key, sp.valid_from <= moment).order_by(
+        sp.valid_from.desc(), sp.id.desc()
+    ).first()
+    if previous is not None:
+        previous.valid_to = moment
+
+    next_from = db.query(func.min(sp.valid_from)).filter(*same_key, sp.valid_from > moment).scalar()
+
+    position.valid_from = moment
+    position.valid_to = next_from or latest_valid_to(moment, position.is_active)
+
+
+def rebuild_position_validity(db: Session, country_id: Optional[int] = None) -> int:
+    """Recompute valid_from/valid_to for every position (or one country's) with LEAD(); returns rows updated"""
+    sp = ShortPosition
+    next_date = func.lead(sp.date).over(
+        partition_by=(sp.company_id, sp.manager_id),
+        order_by=(sp.date, sp.id),
+    )
+    ranked = select(sp.id.label("sp_id"), next_date.label("next_date"))
+    target = update(sp)
+    if country_id is not None:
+        ranked = ranked.where(sp.country_id == country_id)
+        target = target.where(sp.country_id == country_id)
+    ranked = ranked.subquery("validity")
+
+    result = db.execute(
+        target
+        .where(sp.id == ranked.c.sp_id)
+        .values(
+            valid_from=sp.date,
+            valid_to=func.coalesce(ranked.c.next_date, OPEN_VALID_TO),
+            updated_at=sp.updated_at,  # Derived columns only, the disclosure itself didn't change
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    # Latest disclosures reported historic end on their own (no portable SQL for date + 1 day)
+    historic = db.query(sp.id, sp.date, sp.updated_at).filter(
+        sp.valid_to == OPEN_VALID_TO,
+        sp.is_active == False,
+    )
+    if country_id is not None:
+        historic = historic.filter(sp.country_id == country_id)
+    closed = [
+        {"id": pos_id, "valid_to": latest_valid_to(pos_date, False), "updated_at": updated_at}
+        for pos_id, pos_date, updated_at in historic
+    ]
+    if closed:
+        db.execute(update(sp), closed)
+    db.commit()
+    return result.rowcount
+
+
+def positions_as_of_subq(
+    db: Session,
+    as_of: datetime,
+    country_id: Optional[int] = None,
+    threshold: float = ACTIVE_THRESHOLD,
+):
+    """
+    Positions in force on 'as_of': the disclosure whose interval contains the date,
+    kept only if it is >= threshold. Same columns as analytics.active_positions_subq.
+    """
+    sp = ShortPosition
+    moment = _as_datetime(as_of)
+    q = db.query(
+        sp.id.label("sp_id"),
+        sp.company_id.label("company_id"),
+        sp.manager_id.label("manager_id"),
+        sp.country_id.label("country_id"),
+        sp.position_size.label("position_size"),
+        sp.date.label("date"),
+    ).filter(
+        sp.valid_to > moment,
+        sp.valid_from <= moment,
+        sp.position_size >= threshold,
+    )
+
+    if country_id is not None:
+        q = q.filter(sp.country_id == country_id)
+
+    return q.subquery("positions_as_of")
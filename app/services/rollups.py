@@ -0,0 +1,243 @@
+# app/services/rollups.py
+"""
+Daily rollups of the positions in force
+
+country_daily_stats (per country, plus one country_id NULL row per day for all
+countries together) and company_daily_stats hold, for every day: the active
+position count, total short interest, distinct managers (and companies), and
+the entries/exits - positions that crossed above or fell below the threshold.
+Dashboards read these rows instead of aggregating short_positions, so a chart
+costs one small row per day whatever the timeframe.
+
+Everything is derived from the valid_from/valid_to intervals (position_validity):
+refresh_rollups(db, since) rebuilds the days from 'since' to today with one
+sweep over the intervals overlapping them. Ingestion calls update_rollups with
+the earliest date its new disclosures touched; scripts/backfill_rollups.py
+rebuilds the whole history.
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db.models import Company, CompanyDailyStats, CountryDailyStats, ShortPosition
+from app.services.position_validity import ACTIVE_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+CHUNK_DAYS = 366  # Days computed per sweep (bounds memory on a full rebuild)
+GLOBAL_SCOPE = 0  # Group id of the all-countries rows while computing (stored with country_id NULL)
+
+# A position is a (company, manager) pair; country and issuer identity follow from the company
+KEY_COLUMNS = ['company_id', 'manager_id', 'country_id', 'identity']
+DELTA_COLUMNS = ['d', 'dsize', 'entries', 'exits']
+
+_EPOCH = date(1970, 1, 1)
+
+
+def _day(value: date) -> int:
+    return (value - _EPOCH).days
+
+
+def _day_numbers(values) -> np.ndarray:
+    """Dates/datetimes (the 9999-12-31 sentinel included) -> days since 1970-01-01"""
+    return np.array(list(values), dtype='datetime64[D]').astype(np.int64)
+
+
+def _to_dates(days: pd.Series) -> List[date]:
+    return [_EPOCH + timedelta(days=int(day)) for day in days]
+
+
+def _load_intervals(db: Session, first_day: date, last_day: date) -> pd.DataFrame:
+    """Every position whose interval overlaps [first_day, last_day] (any size)"""
+    sp = ShortPosition
+    rows = db.query(
+        sp.company_id,
+        sp.manager_id,
+        sp.country_id,
+        func.coalesce(Company.issuer_id, -Company.id).label("identity"),
+        sp.position_size,
+        sp.valid_from,
+        sp.valid_to,
+    ).join(
+        Company, Company.id == sp.company_id
+    ).filter(
+        sp.valid_to > datetime.combine(first_day, time.min),
+        sp.valid_from <= datetime.combine(last_day, time.min),
+    ).all()
+
+    return pd.DataFrame(rows, columns=KEY_COLUMNS + ['position_size', 'valid_from', 'valid_to'])
+
+
+def _distinct_deltas(keys: pd.DataFrame, by: List[str], member: str) -> pd.Series:
+    """Per (group, day): change in the number of distinct members holding at least one position"""
+    per = keys.groupby(by + [member, 'day'], as_index=False)['d'].sum().sort_values(by + [member, 'day'])
+    held = per.groupby(by + [member])['d'].cumsum()
+    before = held - per['d']
+    per['delta'] = ((before <= 0) & (held > 0)).astype(int) - ((before > 0) & (held <= 0)).astype(int)
+    return per.groupby(by + ['day'])['delta'].sum()
+
+
+def _daily_series(keys: pd.DataFrame, by: List[str], members: Dict[str, str], base: int, end: int) -> pd.DataFrame:
+    """Dense per-group, per-day running values for the days base..end"""
+    deltas = keys.groupby(by + ['day'])[DELTA_COLUMNS].sum()
+    for name, member in members.items():
+        deltas[name] = _distinct_deltas(keys, by, member)
+    deltas = deltas.fillna(0).reset_index()
+
+    groups = keys[by].drop_duplicates()
+    dense = groups.merge(pd.DataFrame({'day': np.arange(base, end + 1)}), how='cross')
+    dense = dense.merge(deltas, on=by + ['day'], how='left').fillna(0).sort_values(by + ['day'])
+
+    running = dense.groupby(by)[['d', 'dsize'] + list(members)].cumsum()
+    dense['active_positions'] = running['d'].astype(int)
+    # Running float sums leave dust behind when everything has exited
+    dense['total_short_interest'] = running['dsize'].where(dense['active_positions'] > 0, 0.0).round(6)
+    for name in members:
+        dense[name] = running[name].astype(int)
+    dense['entries'] = dense['entries'].astype(int)
+    dense['exits'] = dense['exits'].astype(int)
+    return dense
+
+
+def compute_rollups(intervals: pd.DataFrame, since: date, until: date) -> Tuple[List[Dict], List[Dict]]:
+    """Country (incl. global) and company rollup rows for since..until from the overlapping intervals"""
+    base = _day(since) - 1  # The day before is the baseline for entries/exits
+    end = _day(until)
+    if intervals.empty:
+        return [], []
+
+    valid_from = _day_numbers(intervals['valid_from'])
+    valid_to = _day_numbers(intervals['valid_to'])
+    active = (intervals['position_size'] >= ACTIVE_THRESHOLD).to_numpy()
+
+    # +1 where an active interval starts (clipped to the baseline), -1 where it ends inside the window
+    held = intervals.loc[active, KEY_COLUMNS].assign(size=intervals.loc[active, 'position_size'])
+    ending = valid_to[active] <= end
+    events = pd.concat([
+        held.assign(day=np.maximum(valid_from[active], base), d=1),
+        held[ending].assign(day=valid_to[active][ending], d=-1),
+    ])
+    events['dsize'] = events['size'] * events['d']
+
+    # Net change per position and day: a re-disclosure above the threshold is -1 +1 = no entry/exit
+    keys = events.groupby(KEY_COLUMNS + ['day'], as_index=False)[['d', 'dsize']].sum()
+    keys['entries'] = (keys['d'] > 0).astype(int)
+    keys['exits'] = (keys['d'] < 0).astype(int)
+    keys['scope'] = GLOBAL_SCOPE
+
+    distinct = {'managers': 'manager_id', 'companies': 'identity'}
+    countries = _daily_series(keys, ['country_id'], distinct, base, end)
+    everywhere = _daily_series(keys, ['scope'], distinct, base, end)
+    companies = _daily_series(keys, ['company_id', 'country_id'], {}, base, end)
+
+    # Latest disclosure per company (any size), carried forward
+    disclosures = pd.DataFrame({
+        'company_id': intervals['company_id'],
+        'day': np.maximum(valid_from, base),
+        'latest_disclosure': valid_from,
+    }).groupby(['company_id', 'day'], as_index=False)['latest_disclosure'].max()
+    companies = companies.merge(disclosures, on=['company_id', 'day'], how='left')
+    companies['latest_disclosure'] = companies.groupby('company_id')['latest_disclosure'].ffill()
+
+    countries = countries[countries['day'] > base]
+    everywhere = everywhere[everywhere['day'] > base]
+    companies = companies[(companies['day'] > base) & (
+        (companies['active_positions'] > 0) | (companies['entries'] > 0) | (companies['exits'] > 0)
+    )]
+
+    country_rows = []
+    for frame, country_ids in ((countries, countries['country_id'].astype(int).tolist()),
+                               (everywhere, [None] * len(everywhere))):
+        country_rows.extend(
+            {
+                'country_id': country_id,
+                'date': day,
+                'active_positions': active_positions,
+                'total_short_interest': total,
+                'managers': managers,
+                'companies': company_count,
+                'entries': entries,
+                'exits': exits,
+            }
+            for country_id, day, active_positions, total, managers, company_count, entries, exits in zip(
+                country_ids, _to_dates(frame['day']), frame['active_positions'].tolist(),
+                frame['total_short_interest'].tolist(), frame['managers'].tolist(), frame['companies'].tolist(),
+                frame['entries'].tolist(), frame['exits'].tolist(),
+            )
+        )
+
+    company_rows = [
+        {
+            'company_id': company_id,
+            'country_id': country_id,
+            'date': day,
+            'active_positions': active_positions,
+            'total_short_interest': total,
+            'managers': active_positions,  # One position per manager and company
+            'entries': entries,
+            'exits': exits,
+            'latest_disclosure': latest,
+        }
+        for company_id, country_id, day, active_positions, total, entries, exits, latest in zip(
+            companies['company_id'].astype(int).tolist(), companies['country_id'].astype(int).tolist(),
+            _to_dates(companies['day']), companies['active_positions'].tolist(),
+            companies['total_short_interest'].tolist(), companies['entries'].tolist(),
+            companies['exits'].tolist(), _to_dates(companies['latest_disclosure']),
+        )
+    ]
+    return country_rows, company_rows
+
+
+def refresh_rollups(db: Session, since: Optional[date] = None, until: Optional[date] = None) -> Dict[str, int]:
+    """Rebuild the rollup rows for since..until (default: the first disclosure..today)"""
+    until = until or date.today()
+    if since is None:
+        first = db.query(func.min(ShortPosition.valid_from)).scalar()
+        if first is None:
+            return {'days': 0, 'country_rows': 0, 'company_rows': 0}
+        since = first.date()
+
+    result = {'days': 0, 'country_rows': 0, 'company_rows': 0}
+    start = since
+    while start <= until:
+        stop = min(start + timedelta(days=CHUNK_DAYS - 1), until)
+        intervals = _load_intervals(db, start - timedelta(days=1), stop)
+        country_rows, company_rows = compute_rollups(intervals, start, stop)
+
+        db.query(CountryDailyStats).filter(
+            CountryDailyStats.date >= start, CountryDailyStats.date <= stop
+        ).delete(synchronize_session=False)
+        db.query(CompanyDailyStats).filter(
+            CompanyDailyStats.date >= start, CompanyDailyStats.date <= stop
+        ).delete(synchronize_session=False)
+        db.bulk_insert_mappings(CountryDailyStats, country_rows)
+        db.bulk_insert_mappings(CompanyDailyStats, company_rows)
+        db.commit()
+
+        result['days'] += (stop - start).days + 1
+        result['country_rows'] += len(country_rows)
+        result['company_rows'] += len(company_rows)
+        start = stop + timedelta(days=1)
+
+    logger.info(f"Rollups rebuilt for {since}..{until}: {result}")
+    return result
+
+
+def update_rollups(db: Session, changed_since: Optional[date] = None) -> Dict[str, int]:
+    """Bring the rollups up to today, redoing every day from 'changed_since' (the earliest new disclosure)"""
+    last_day = db.query(func.max(CountryDailyStats.date)).filter(CountryDailyStats.country_id.is_(None)).scalar()
+    if last_day is None:
+        return refresh_rollups(db)  # Nothing rolled up yet
+
+    since = last_day + timedelta(days=1)
+    if changed_since is not None:
+        since = min(since, changed_since)
+    if since > date.today():
+        return {'days': 0, 'country_rows': 0, 'company_rows': 0}
+    return refresh_rollups(db, since)
@@ -0,0 +1,63 @@
+# app/services/snapshot_versions.py
+"""
+Versioned snapshot directories, published atomically
+
+Used by the position store (.npy columns) and the DuckDB backend (Parquet):
+
+    <directory>/v<version>/...       one complete snapshot per version
+    <directory>/CURRENT              -> "v<version>", replaced atomically
+
+A version is written into a hidden staging directory and renamed into place
+before CURRENT is swapped, so readers only ever see complete versions. Older
+versions are deleted once a newer one is published; files a reader still has
+open or mapped stay readable until it lets go of them.
+"""
+
+import os
+import shutil
+import time
+from typing import Callable, Optional
+
+KEEP_VERSIONS = 2
+
+
+def _new_version() -> str:
+    now = time.time()
+    return f"v{time.strftime('%Y%m%d%H%M%S', time.localtime(now))}{int(now * 1000) % 1000:03d}"
+
+
+def publish_version(directory: str, write: Callable[[str], None], keep: int = KEEP_VERSIONS) -> str:
+    """Call write(staging_path) to fill a new version, then point CURRENT at it; returns the version"""
+    os.makedirs(directory, exist_ok=True)
+    version = _new_version()
+    while os.path.exists(os.path.join(directory, version)):  # Published within the same millisecond
+        time.sleep(0.001)
+        version = _new_version()
+    staging = os.path.join(directory, f".{version}.tmp")
+    os.makedirs(staging)
+    try:
+        write(staging)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    os.rename(staging, os.path.join(directory, version))
+
+    pointer = os.path.join(directory, '.CURRENT.tmp')
+    with open(pointer, 'w') as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(directory, 'CURRENT'))
+
+    # Keep the newest versions only
+    versions = sorted(v for v in os.listdir(directory) if v.startswith('v'))
+    for old in versions[:-keep]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+    return version
+
+
+def current_version(directory: str) -> Optional[str]:
+    """The version CURRENT points at (None before the first publish)"""
+    try:
+        with open(os.path.join(directory, 'CURRENT')) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,226 @@
+# app/services/timeline_pyramid.py
+"""
+Multi-resolution company timelines
+
+For every company, company_timelines holds its per-manager position series at
+three resolutions - daily (each business day of its country), weekly and
+monthly (last business day of each period) - from its first disclosure to the
+day it was built. Each level is a float32 matrix (points x managers) plus the
+day numbers, stored as a compressed npz blob, so a whole history is a few KB.
+
+company_timeline() serves any range: it picks the finest level that fits in
+max_points (LTTB-downsampling the monthly level if even that is too long), so
+the payload stays bounded however long the range is. Days after the build date
+carry the last point forward. Ingestion rebuilds the companies it touched;
+missing timelines are built (and stored, outside read-only sessions) on first request.
+
+A disclosure that hasn't been updated for STALE_POSITION_DAYS stops counting,
+as the old fixed two-year barrier did for the recent timeframes.
+"""
+
+import io
+import json
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.db.models import Company, CompanyTimeline, Country, Manager, ShortPosition
+from app.services.position_validity import ACTIVE_THRESHOLD
+from app.services.trading_calendar import busday_range
+from app.utils.downsampling import lttb_indices
+
+logger = logging.getLogger(__name__)
+
+RESOLUTIONS = ('daily', 'weekly', 'monthly')  # Finest first
+STALE_POSITION_DAYS = 730  # Data integrity: positions not re-disclosed for two years are dropped
+DEFAULT_MAX_POINTS = 800
+
+
+def _period_ends(days: np.ndarray, resolution: str) -> np.ndarray:
+    """Indices of the last business day of each period (the running period ends on its last day)"""
+    if resolution == 'daily' or len(days) == 0:
+        return np.arange(len(days))
+    if resolution == 'weekly':
+        period = (days.astype(np.int64) + 3) // 7  # 1970-01-01 was a Thursday: weeks start on Monday
+    else:
+        period = days.astype('datetime64[M]').astype(np.int64)
+    return np.flatnonzero(np.append(np.diff(period) != 0, True))
+
+
+def _pack(days: np.ndarray, sizes: np.ndarray, last_disclosed: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        days=days.astype(np.int64).astype(np.int32),
+        sizes=sizes.astype(np.float32),
+        last=last_disclosed.astype(np.int64).astype(np.int32),
+    )
+    return buffer.getvalue()
+
+
+def _unpack(row: CompanyTimeline):
+    with np.load(io.BytesIO(row.data)) as arrays:
+        return (
+            arrays['days'].astype('datetime64[D]'),
+            arrays['sizes'],
+            arrays['last'].astype('datetime64[D]'),
+        )
+
+
+def build_company_timeline(db: Session, company_id: int) -> Dict[str, CompanyTimeline]:
+    """(Re)build a company's timeline levels up to today; returns them by resolution (not committed)"""
+    company = db.query(Company.id, Country.code).join(
+        Country, Country.id == Company.country_id
+    ).filter(Company.id == company_id).first()
+    existing = {row.resolution: row for row in db.query(CompanyTimeline).filter(
+        CompanyTimeline.company_id == company_id
+    )}
+
+    positions = db.query(
+        Manager.name.label("manager_name"),
+        ShortPosition.date,
+        ShortPosition.position_size,
+    ).join(
+        Manager, Manager.id == ShortPosition.manager_id
+    ).filter(
+        ShortPosition.company_id == company_id
+    ).order_by(
+        ShortPosition.date, ShortPosition.id
+    ).all()
+
+    days = busday_range(company.code, positions[0].date, date.today()) if company and positions else np.array([], 'datetime64[D]')
+    if len(days) == 0:
+        for row in existing.values():
+            db.delete(row)
+        return {}
+
+    by_manager = defaultdict(list)
+    for pos in positions:
+        by_manager[pos.manager_name].append((pos.date, float(pos.position_size or 0.0)))
+
+    # One column per manager: the size in force each business day (0 when inactive or stale)
+    names: List[str] = []
+    columns = []
+    last_disclosed = []
+    for manager_name, disclosures in by_manager.items():
+        dates = np.array([d.date() if isinstance(d, datetime) else d for d, _ in disclosures], dtype='datetime64[D]')
+        sizes = np.array([size for _, size in disclosures])
+        latest = np.searchsorted(dates, days, side='right') - 1
+        held = latest >= 0
+        latest = np.maximum(latest, 0)
+        fresh = (days - dates[latest]).astype(np.int64) <= STALE_POSITION_DAYS
+        column = np.where(held & fresh & (sizes[latest] >= ACTIVE_THRESHOLD), sizes[latest], 0.0)
+        if column.any():
+            names.append(manager_name)
+            columns.append(column)
+            last_disclosed.append(dates[-1])
+
+    matrix = np.column_stack(columns) if columns else np.zeros((len(days), 0))
+    last_disclosed = np.array(last_disclosed, dtype='datetime64[D]')
+
+    levels = {}
+    for resolution in RESOLUTIONS:
+        picked = _period_ends(days, resolution)
+        row = existing.get(resolution) or CompanyTimeline(company_id=company_id, resolution=resolution)
+        row.start_date = days[0].item()
+        row.end_date = days[-1].item()
+        row.points = len(picked)
+        row.managers = json.dumps(names)
+        row.data = _pack(days[picked], matrix[picked], last_disclosed)
+        row.built_at = datetime.now()
+        db.add(row)
+        levels[resolution] = row
+    return levels
+
+
+def rebuild_company_timelines(db: Session, company_ids: Iterable[int], batch_size: int = 200) -> int:
+    """Rebuild and commit the timelines of the given companies; returns how many were built"""
+    built = 0
+    for i, company_id in enumerate(sorted(set(company_ids)), start=1):
+        built += bool(build_company_timeline(db, company_id))
+        if i % batch_size == 0:
+            db.commit()
+    db.commit()
+    return built
+
+
+def _values_at(level: CompanyTimeline, grid: np.ndarray) -> np.ndarray:
+    """Per-manager sizes at each grid day: the level's last point on or before it (zeros before the first)"""
+    days, sizes, last_disclosed = _unpack(level)
+    at = np.searchsorted(days, grid, side='right') - 1
+    values = sizes[np.maximum(at, 0)].astype(float)
+    values[at < 0] = 0.0
+    # Past the build date nothing was re-disclosed: positions still go stale
+    later = grid > np.datetime64(level.end_date, 'D')
+    if later.any() and len(last_disclosed):
+        stale = (grid[later, None] - last_disclosed[None, :]).astype(np.int64) > STALE_POSITION_DAYS
+        values[later] = np.where(stale, 0.0, values[later])
+    return values
+
+
+def company_timeline(
+    db: Session,
+    company_id: int,
+    country_code: Optional[str],
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    max_points: int = DEFAULT_MAX_POINTS,
+) -> Dict[str, Any]:
+    """Company positions over [start, end] (default: whole history..today) in at most max_points points"""
+    empty = {"resolution": "daily", "downsampled": False, "points": []}
+    levels = {row.resolution: row for row in db.query(CompanyTimeline).filter(
+        CompanyTimeline.company_id == company_id
+    )}
+    if len(levels) < len(RESOLUTIONS):
+        # Companies without disclosures have no timeline to build: don't retry on every request
+        if not db.query(ShortPosition.id).filter(ShortPosition.company_id == company_id).first():
+            return empty
+        levels = build_company_timeline(db, company_id)
+        # Read-only sessions serve it without storing it (the next ingestion run does)
+        if not db.info.get("read_only"):
+            db.commit()
+
+    end = end or date.today()
+    if start is None:
+        start = levels['daily'].start_date if levels else end
+    days = busday_range(country_code, start, end)
+
+    resolution, grid = RESOLUTIONS[-1], days[_period_ends(days, RESOLUTIONS[-1])]
+    for candidate in RESOLUTIONS:
+        candidate_grid = days[_period_ends(days, candidate)]
+        if len(candidate_grid) <= max_points:
+            resolution, grid = candidate, candidate_grid
+            break
+
+    if not levels or len(grid) == 0:
+        return empty
+
+    names = json.loads(levels[resolution].managers)
+    values = _values_at(levels[resolution], grid)
+    if resolution != 'daily' and grid[-1] < np.datetime64(levels['daily'].end_date, 'D'):
+        # A range ending mid-period: its last point isn't on the coarser level
+        values[-1] = _values_at(levels['daily'], grid[-1:])[0]
+    totals = values.sum(axis=1)
+
+    downsampled = len(grid) > max_points
+    if downsampled:
+        keep = lttb_indices(grid.astype(np.int64), totals, max_points)
+        grid, values, totals = grid[keep], values[keep], totals[keep]
+
+    points = []
+    for day, row, total in zip(grid.tolist(), values, totals.tolist()):
+        held = np.flatnonzero(row >= ACTIVE_THRESHOLD)
+        points.append({
+            "date": day.strftime("%Y-%m-%d"),
+            "total_position": round(total, 4),
+            "manager_positions": [
+                {"manager_name": names[i], "position_size": round(float(row[i]), 4)}
+                for i in held
+            ],
+        })
+
+    return {"resolution": resolution, "downsampled": downsampled, "points": points}
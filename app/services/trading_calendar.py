@@ -0,0 +1,105 @@
+# app/services/trading_calendar.py
+"""
+Business-day calendars for the covered countries
+
+One NumPy busdaycalendar per country (Mon-Fri minus the national holidays of
+the `holidays` package), plus the sorted array of its business days over
+CALENDAR_START..CALENDAR_END, built once - warm_calendars() runs at startup.
+Range and offset helpers are vectorized over those arrays, so building a
+timeline is a binary search instead of a day-by-day loop with holiday lookups.
+
+Unknown country codes (or None) get a weekends-only calendar.
+"""
+
+import logging
+from datetime import date
+from typing import Dict, Iterable, Optional, Union
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_START = date(2010, 1, 1)  # Oldest disclosures (France) go back to 2012
+CALENDAR_END = date(date.today().year + 2, 12, 31)
+WEEKMASK = '1111100'
+
+DateLike = Union[date, np.datetime64, str]
+
+_SPAN_START = np.datetime64(CALENDAR_START, 'D')
+_SPAN_END = np.datetime64(CALENDAR_END, 'D')
+
+
+class TradingCalendar:
+    """Business days of one country: a busdaycalendar and its precomputed days"""
+
+    def __init__(self, code: Optional[str], holidays: Iterable[date] = ()):
+        self.code = code
+        self.calendar = np.busdaycalendar(weekmask=WEEKMASK, holidays=np.array(sorted(holidays), dtype='datetime64[D]'))
+        all_days = np.arange(_SPAN_START, _SPAN_END + 1)
+        self.days = all_days[np.is_busday(all_days, busdaycal=self.calendar)]
+
+    def __len__(self):
+        return len(self.days)
+
+    def busday_range(self, start: DateLike, end: DateLike) -> np.ndarray:
+        """Business days in [start, end] (datetime64[D], ascending)"""
+        start, end = np.datetime64(start, 'D'), np.datetime64(end, 'D')
+        if start >= _SPAN_START and end <= _SPAN_END:
+            lo = np.searchsorted(self.days, start, side='left')
+            hi = np.searchsorted(self.days, end, side='right')
+            return self.days[lo:hi]
+        # Outside the precomputed span: let NumPy work it out
+        days = np.arange(start, end + 1)
+        return days[np.is_busday(days, busdaycal=self.calendar)]
+
+    def busday_offset(self, dates, offsets, roll: str = 'forward') -> np.ndarray:
+        """np.busday_offset on this calendar (dates/offsets may be arrays)"""
+        return np.busday_offset(np.asarray(dates, dtype='datetime64[D]'), offsets, roll=roll, busdaycal=self.calendar)
+
+    def is_busday(self, dates) -> np.ndarray:
+        return np.is_busday(np.asarray(dates, dtype='datetime64[D]'), busdaycal=self.calendar)
+
+
+_calendars: Dict[Optional[str], TradingCalendar] = {}
+
+
+def _build_calendar(code: Optional[str]) -> TradingCalendar:
+    if code is None:
+        return TradingCalendar(None)
+    try:
+        import holidays
+        country_holidays = holidays.country_holidays(code, years=range(CALENDAR_START.year, CALENDAR_END.year + 1))
+        return TradingCalendar(code, country_holidays.keys())
+    except Exception as e:
+        # Unsupported by the holidays package (or not installed): weekends only
+        logger.warning(f"No holiday calendar for {code}, using weekends only: {e}")
+        return TradingCalendar(code)
+
+
+def get_calendar(country_code: Optional[str] = None) -> TradingCalendar:
+    """Calendar of a country (built on first use if warm_calendars didn't already)"""
+    code = country_code.upper() if country_code else None
+    calendar = _calendars.get(code)
+    if calendar is None:
+        calendar = _calendars[code] = _build_calendar(code)
+    return calendar
+
+
+def warm_calendars(codes: Optional[Iterable[str]] = None) -> int:
+    """Build the calendars of every configured country up front; returns how many are loaded"""
+    for code in codes or [country["code"] for country in settings.countries]:
+        get_calendar(code)
+    get_calendar(None)
+    return len(_calendars)
+
+
+def busday_range(country_code: Optional[str], start: DateLike, end: DateLike) -> np.ndarray:
+    """Business days of a country in [start, end]"""
+    return get_calendar(country_code).busday_range(start, end)
+
+
+def busday_offset(country_code: Optional[str], dates, offsets, roll: str = 'forward') -> np.ndarray:
+    """Shift dates by business days of a country (vectorized)"""
+    return get_calendar(country_code).busday_offset(dates, offsets, roll=roll)
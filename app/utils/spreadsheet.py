@@ -0,0 +1,209 @@
+"""
+Spreadsheet helpers for regulator downloads
+
+- detect_file_format: identify xlsx / ods / xls / csv content by its magic bytes
+- looks_like_html: spot error/landing pages served instead of a data file
+- read_ods: streaming OpenDocument spreadsheet reader (no odfpy dependency)
+
+read_ods walks content.xml with iterparse instead of building the full ODF DOM
+like pd.read_excel(engine='odf') does, but produces the same DataFrame
+(first sheet, first row as header, same cell typing and padding rules).
+"""
+
+import io
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import List, Any
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+# Magic bytes
+ZIP_MAGIC = b'PK\x03\x04'
+OLE2_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'  # legacy .xls (BIFF in OLE2 container)
+
+ODS_MIMETYPE = b'application/vnd.oasis.opendocument.spreadsheet'
+
+# OpenDocument namespaces
+TABLE_NS = 'urn:oasis:names:tc:opendocument:xmlns:table:1.0'
+OFFICE_NS = 'urn:oasis:names:tc:opendocument:xmlns:office:1.0'
+TEXT_NS = 'urn:oasis:names:tc:opendocument:xmlns:text:1.0'
+
+TABLE_TAG = f'{{{TABLE_NS}}}table'
+ROW_TAG = f'{{{TABLE_NS}}}table-row'
+CELL_TAG = f'{{{TABLE_NS}}}table-cell'
+COVERED_CELL_TAG = f'{{{TABLE_NS}}}covered-table-cell'
+SPACE_TAG = f'{{{TEXT_NS}}}s'
+
+ROWS_REPEATED = f'{{{TABLE_NS}}}number-rows-repeated'
+COLUMNS_REPEATED = f'{{{TABLE_NS}}}number-columns-repeated'
+VALUE_TYPE = f'{{{OFFICE_NS}}}value-type'
+VALUE = f'{{{OFFICE_NS}}}value'
+DATE_VALUE = f'{{{OFFICE_NS}}}date-value'
+SPACE_COUNT = f'{{{TEXT_NS}}}c'
+
+EMPTY_VALUE = ''
+
+
+def detect_file_format(content: bytes) -> str:
+    """
+    Sniff the format of downloaded file content.
+
+    Returns one of 'xlsx', 'ods', 'xls' or 'csv' (anything that is not a
+    known binary container is treated as delimited text).
+    """
+    if content.startswith(OLE2_MAGIC):
+        return 'xls'
+
+    if content.startswith(ZIP_MAGIC):
+        # ODF stores an uncompressed 'mimetype' member first; fall back to the
+        # directory listing for writers that don't
+        if content[30:38] == b'mimetype' and ODS_MIMETYPE in content[38:38 + 100]:
+            return 'ods'
+        try:
+            with zipfile.ZipFile(io.BytesIO(content)) as archive:
+                names = set(archive.namelist())
+                if 'xl/workbook.xml' in names:
+                    return 'xlsx'
+                if 'mimetype' in names and archive.read('mimetype').strip() == ODS_MIMETYPE:
+                    return 'ods'
+                if 'content.xml' in names:
+                    return 'ods'
+        except zipfile.BadZipFile:
+            pass
+        return 'xlsx'
+
+    return 'csv'
+
+
+def is_spreadsheet(content: bytes) -> bool:
+    """True for binary spreadsheet containers (xlsx / ods / xls)"""
+    return content.startswith(ZIP_MAGIC) or content.startswith(OLE2_MAGIC)
+
+
+def looks_like_html(content: bytes) -> bool:
+    """True if content is an HTML page rather than a data file"""
+    head = content[:512].lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+    return head.startswith((b'<!doctype html', b'<html', b'<head', b'<body'))
+
+
+def _cell_string_value(element) -> str:
+    """Rebuild cell text, expanding run-length encoded <text:s> spaces"""
+    value = []
+    if element.text:
+        value.append(element.text.strip('\n'))
+    for child in element:
+        if child.tag == SPACE_TAG:
+            value.append(' ' * int(child.get(SPACE_COUNT, 1)))
+        else:
+            value.append(_cell_string_value(child))
+        if child.tail:
+            value.append(child.tail.strip('\n'))
+    return ''.join(value)
+
+
+def _cell_value(cell) -> Any:
+    """Convert a <table:table-cell> into a Python value (same rules as pandas' odf engine)"""
+    text = ''.join(cell.itertext())
+    if text == '#N/A':
+        return np.nan
+
+    cell_type = cell.get(VALUE_TYPE)
+    if cell_type is None:
+        return EMPTY_VALUE
+    if cell_type == 'boolean':
+        return text == 'TRUE'
+    if cell_type == 'float':
+        cell_value = float(cell.get(VALUE))
+        val = int(cell_value)
+        return val if val == cell_value else cell_value
+    if cell_type in ('percentage', 'currency'):
+        return float(cell.get(VALUE))
+    if cell_type == 'string':
+        return _cell_string_value(cell)
+    if cell_type == 'date':
+        return pd.Timestamp(cell.get(DATE_VALUE))
+    if cell_type == 'time':
+        return pd.Timestamp(text).time()
+    raise ValueError(f"Unrecognized ODS cell type {cell_type}")
+
+
+def read_ods_rows(content: bytes, sheet_index: int = 0) -> List[List[Any]]:
+    """
+    Stream one sheet of an ODS file into a square list of rows.
+
+    Repeated rows/columns are expanded, trailing empty cells and rows are
+    dropped, and parsing stops as soon as the requested sheet is complete.
+    """
+    table: List[List[Any]] = []
+    max_row_len = 0
+    empty_rows = 0
+
+    current_sheet = -1
+    row: List[Any] = []
+    empty_cells = 0
+    row_has_content = False
+
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        with archive.open('content.xml') as stream:
+            for event, element in ET.iterparse(stream, events=('start', 'end')):
+                tag = element.tag
+
+                if event == 'start':
+                    if tag == TABLE_TAG:
+                        current_sheet += 1
+                    elif tag == ROW_TAG and current_sheet == sheet_index:
+                        row = []
+                        empty_cells = 0
+                        row_has_content = False
+                    continue
+
+                if current_sheet != sheet_index:
+                    if tag in (ROW_TAG, CELL_TAG, COVERED_CELL_TAG):
+                        element.clear()
+                    continue
+
+                if tag in (CELL_TAG, COVERED_CELL_TAG):
+                    # pandas keeps a row if any cell has a child node: an element or text
+                    if len(element) or element.text:
+                        row_has_content = True
+                    value = _cell_value(element) if tag == CELL_TAG else EMPTY_VALUE
+                    column_repeat = int(element.get(COLUMNS_REPEATED, 1))
+
+                    # Queue up empty values, writing only if content succeeds them
+                    if isinstance(value, str) and value == EMPTY_VALUE:
+                        empty_cells += column_repeat
+                    else:
+                        row.extend([EMPTY_VALUE] * empty_cells)
+                        empty_cells = 0
+                        row.extend([value] * column_repeat)
+                    element.clear()
+
+                elif tag == ROW_TAG:
+                    max_row_len = max(max_row_len, len(row))
+                    row_repeat = int(element.get(ROWS_REPEATED, 1))
+                    if not row_has_content:
+                        empty_rows += row_repeat
+                    else:
+                        table.extend([[EMPTY_VALUE]] * empty_rows)
+                        empty_rows = 0
+                        table.extend(row for _ in range(row_repeat))
+                    element.clear()
+
+                elif tag == TABLE_TAG:
+                    break
+
+    if current_sheet < sheet_index:
+        raise ValueError(f"Worksheet index {sheet_index} is invalid, {current_sheet + 1} worksheets found")
+
+    # Make the table square (copies, since repeated rows share one list)
+    return [r + [EMPTY_VALUE] * (max_row_len - len(r)) for r in table]
+
+
+def read_ods(content: bytes, sheet_index: int = 0, header: int = 0) -> pd.DataFrame:
+    """Read an ODS sheet into a DataFrame, equivalent to pd.read_excel(..., engine='odf')"""
+    rows = read_ods_rows(content, sheet_index)
+    if not rows:
+        return pd.DataFrame()
+    return TextParser(rows, header=header).read()
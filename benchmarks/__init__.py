@@ -0,0 +1,6 @@
+"""
+Performance tooling: synthetic data and the checks/benchmarks that run on it
+
+Nothing in here talks to a regulator or to the production database: every
+run seeds its own scratch database from benchmarks.synthetic.
+"""
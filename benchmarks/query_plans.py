@@ -0,0 +1,400 @@
+"""
+Query-plan capture and baseline comparison
+
+Records every SQL statement the analytics functions, the read API and the
+ingestion issue on a seeded database (QueryRecorder, per scenario), captures
+its plan (EXPLAIN QUERY PLAN on SQLite, EXPLAIN (FORMAT JSON) on Postgres) and
+compares the plans with the per-dialect baseline in query_plans.json.
+
+Used by scripts/check_query_plans.py (reports, index suggestions, baseline
+updates) and tests/test_query_plans.py. Like benchmarks.scenarios, the
+capture imports the app: configure the environment first.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+from benchmarks.scenarios import API_REQUESTS, pick_samples, synthetic_scrape
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'query_plans.json')
+MIN_ROWS = 5000  # Tables at least this big must not lose index usage
+THRESHOLD = 0.25  # Allowed estimated cost growth (Postgres)
+INGEST_ROWS = 200
+EXPLAINED_PREFIXES = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+_PARAM = re.compile(r'%\(\w+\)s|\$\d+|:\w+')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_FUNCTIONS = re.compile(r'\b(upper|lower|date|trim|coalesce|substr|strftime|cast)\(\s*(\w+)\.(\w+)', re.IGNORECASE)
+
+
+def normalize_sql(statement: str) -> str:
+    """Statement text with placeholders unified and IN lists collapsed (stable across runs)"""
+    sql = _PARAM.sub('?', ' '.join(statement.split()))
+    return _IN_LIST.sub('(?)', sql)
+
+
+class QueryRecorder:
+    """before_cursor_execute listener keeping the first execution of each distinct statement per scenario"""
+
+    def __init__(self):
+        self.current = None
+        self.queries = {}
+
+    @contextmanager
+    def scenario(self, name: str):
+        self.current = name
+        try:
+            yield
+        finally:
+            self.current = None
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.current is None or executemany:
+            return
+        if not statement.lstrip().upper().startswith(EXPLAINED_PREFIXES):
+            return
+        normalized = normalize_sql(statement)
+        key = f"{self.current} #{hashlib.sha1(normalized.encode()).hexdigest()[:10]}"
+        if key not in self.queries:
+            self.queries[key] = {
+                'scenario': self.current,
+                'statement': statement,
+                'parameters': parameters,
+                'sql': normalized,
+            }
+
+
+# ----------------------------------------------------------------------
+# Plans
+# ----------------------------------------------------------------------
+
+def table_aliases(sql: str, tables) -> dict:
+    """alias -> table for the tables a statement names (a table is its own alias)"""
+    aliases = {table: table for table in tables}
+    for table, alias in re.findall(r'\b(\w+) AS (\w+)\b', sql):
+        if table in tables:
+            aliases[alias] = table
+    return aliases
+
+
+def sqlite_plan(conn, query, aliases) -> dict:
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {query['statement']}", query['parameters']).fetchall()
+    plan = {'full_scans': set(), 'ordered_scans': set(), 'searches': set(), 'indexes': set(), 'temp_btrees': 0,
+            'cost': None, 'detail': [row[3] for row in rows]}
+    for detail in plan['detail']:
+        match = re.match(r'(SCAN|SEARCH) (\w+)(.*)', detail)
+        if match:
+            operation, name, rest = match.groups()
+            table = aliases.get(name)
+            if table is None:
+                continue  # Subquery / CTE
+            index = re.search(r'USING (?:COVERING )?INDEX (\w+)', rest)
+            if index:
+                plan['indexes'].add(index.group(1))
+            if 'PRIMARY KEY' in rest:
+                plan['indexes'].add(f"{table}.pk")
+            if operation == 'SCAN' or 'AUTOMATIC' in rest:
+                # A SCAN reads every row (in index order with USING INDEX); an automatic
+                # index is built from a full scan on every execution
+                plan['full_scans'].add(table)
+                if operation == 'SCAN' and index:
+                    plan['ordered_scans'].add(table)
+            else:
+                plan['searches'].add(table)
+        elif detail.startswith('USE TEMP B-TREE'):
+            plan['temp_btrees'] += 1
+    return plan
+
+
+def postgres_plan(conn, query, tables) -> dict:
+    result = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {query['statement']}", query['parameters']).scalar()
+    root = (json.loads(result) if isinstance(result, str) else result)[0]['Plan']
+    plan = {'full_scans': set(), 'ordered_scans': set(), 'searches': set(), 'indexes': set(), 'temp_btrees': 0,
+            'cost': root['Total Cost'], 'detail': []}
+
+    def base_table(relation):
+        if relation in tables:
+            return relation
+        # Partitions (short_positions_fr, ...) count as their parent
+        return next((t for t in tables if relation.startswith(f"{t}_")), None)
+
+    def walk(node):
+        kind = node['Node Type']
+        relation = base_table(node.get('Relation Name', ''))
+        plan['detail'].append(f"{kind} {node.get('Relation Name', '')} {node.get('Index Name', '')}".strip())
+        if 'Index Name' in node:
+            plan['indexes'].add(node['Index Name'])
+        if relation:
+            if kind == 'Seq Scan':
+                plan['full_scans'].add(relation)
+            elif kind in ('Index Scan', 'Index Only Scan') and 'Index Cond' not in node:
+                plan['full_scans'].add(relation)
+                plan['ordered_scans'].add(relation)
+            else:
+                plan['searches'].add(relation)
+        if kind == 'Sort':
+            plan['temp_btrees'] += 1
+        for child in node.get('Plans', []):
+            walk(child)
+
+    walk(root)
+    return plan
+
+
+def explain_all(engine, queries, tables) -> dict:
+    plans = {}
+    with engine.connect() as conn:
+        for key, query in sorted(queries.items()):
+            aliases = table_aliases(query['statement'], tables)
+            try:
+                if engine.dialect.name == 'postgresql':
+                    plan = postgres_plan(conn, query, tables)
+                else:
+                    plan = sqlite_plan(conn, query, aliases)
+            except Exception as e:
+                conn.rollback()
+                print(f"⚠️  Could not explain {key}: {e}")
+                continue
+            plan.update({
+                'scenario': query['scenario'],
+                'sql': query['sql'],
+                'aliases': aliases,
+                'full_scans': sorted(plan['full_scans']),
+                'ordered_scans': sorted(plan['ordered_scans']),
+                'searches': sorted(plan['searches']),
+                'indexes': sorted(plan['indexes']),
+            })
+            plans[key] = plan
+    return plans
+
+
+# ----------------------------------------------------------------------
+# Index suggestions
+# ----------------------------------------------------------------------
+
+def predicate_columns(sql: str, aliases: dict, table: str, joins: bool):
+    """Columns of `table` the statement compares with values (and, with joins, with other columns):
+    (equality, range), in order of appearance"""
+    names = '|'.join(re.escape(alias) for alias, target in aliases.items() if target == table)
+    value = r"(?:\?|\(|NULL\b|'|-?\d)"
+    patterns = [rf'\b(?:{names})\.(?P<column>\w+)\s*(?P<op>=|IN\b|IS\b|>=|<=|>|<|BETWEEN\b)\s*{value}']
+    if joins:
+        patterns += [rf'\b(?:{names})\.(?P<column>\w+)\s*(?P<op>=)\s*\w+\.\w+',
+                     rf'\w+\.\w+\s*(?P<op>=)\s*\b(?:{names})\.(?P<column>\w+)']
+    found = sorted(
+        (match.start(), match.group('column'), match.group('op').upper())
+        for pattern in patterns for match in re.finditer(pattern, sql, re.IGNORECASE)
+    )
+    equality, ranges = [], []
+    for _, column, operator in found:
+        if column not in equality and column not in ranges:
+            (equality if operator in ('=', 'IN', 'IS') else ranges).append(column)
+    return equality, ranges
+
+
+def suggest_indexes(plans: dict, large: dict, existing: dict):
+    """(table, columns) -> query keys, for scanned large tables with no index leading on those columns;
+    plus (key, table.column, function) for function-wrapped columns"""
+    suggestions = defaultdict(list)
+    wrapped = []
+    for key, plan in plans.items():
+        for table in plan['full_scans']:
+            if table not in large:
+                continue
+            if table in plan['ordered_scans'] and re.search(r'\bLIMIT\b', plan['sql'], re.IGNORECASE):
+                continue  # Top-N read in index order: stops after LIMIT rows
+            automatic = any(f"{alias} USING AUTOMATIC" in detail for detail in plan['detail']
+                            for alias, target in plan['aliases'].items() if target == table)
+            equality, ranges = predicate_columns(plan['sql'], plan['aliases'], table, joins=automatic)
+            columns = tuple((equality + ranges[:1])[:3])
+            if columns and not any(index[:len(columns)] == columns for index in existing.get(table, [])):
+                suggestions[(table, columns)].append(key)
+            for function, alias, column in _FUNCTIONS.findall(plan['sql']):
+                if plan['aliases'].get(alias) == table and function.lower() != 'coalesce':
+                    wrapped.append((key, f"{table}.{column}", function.lower()))
+    return suggestions, sorted(set(wrapped))
+
+
+# ----------------------------------------------------------------------
+# Baseline comparison
+# ----------------------------------------------------------------------
+
+def compare(plans: dict, baseline: dict, large: dict, threshold: float):
+    """Failures and warnings against the baseline, plus the baseline queries not issued any more.
+
+    Queries are matched by scenario and statement text. An edited statement gets a new key, so
+    scans are also counted per scenario: a scenario scanning a large table in more queries than
+    its baseline fails, whichever statement changed."""
+    failures, warnings = [], []
+
+    def scan_counts(entries):
+        counts = defaultdict(int)
+        for entry in entries.values():
+            for table in entry['full_scans']:
+                if table in large:
+                    counts[(entry['scenario'], table)] += 1
+        return counts
+
+    for key, plan in sorted(plans.items()):
+        base = baseline.get(key)
+        if base is None:
+            continue
+        lost = [t for t in plan['full_scans'] if t in large and t not in base['full_scans']]
+        if lost:
+            failures.append(f"{key}: now scans {', '.join(lost)} "
+                            f"(baseline used {', '.join(base['indexes']) or 'no index'}; now {', '.join(plan['indexes']) or 'none'})")
+        if plan['cost'] is not None and base.get('cost'):
+            if plan['cost'] > base['cost'] * (1 + threshold):
+                failures.append(f"{key}: estimated cost {plan['cost']:.0f} vs baseline {base['cost']:.0f} "
+                                f"(+{(plan['cost'] / base['cost'] - 1) * 100:.0f}%)")
+        if plan['temp_btrees'] > base.get('temp_btrees', 0):
+            warnings.append(f"{key}: {plan['temp_btrees']} sorts (baseline {base.get('temp_btrees', 0)})")
+
+    baseline_scans = scan_counts(baseline)
+    for (scenario, table), count in sorted(scan_counts(plans).items()):
+        if count > baseline_scans.get((scenario, table), 0):
+            new = [key for key, plan in sorted(plans.items())
+                   if key not in baseline and plan['scenario'] == scenario and table in plan['full_scans']]
+            if new:
+                failures.append(f"{scenario}: scans {table} in {count} queries (baseline "
+                                f"{baseline_scans.get((scenario, table), 0)}); new or changed: {', '.join(new)}")
+    known = {entry['scenario'] for entry in baseline.values()}
+    for key, plan in sorted(plans.items()):
+        scanned = [t for t in plan['full_scans'] if t in large]
+        if plan['scenario'] not in known and scanned:
+            warnings.append(f"{key} (scenario not in the baseline) scans {', '.join(scanned)}")
+    gone = sorted(set(baseline) - set(plans))
+    return failures, warnings, gone
+
+
+def baseline_entry(plan: dict) -> dict:
+    return {
+        'scenario': plan['scenario'],
+        'sql': plan['sql'][:300],
+        'full_scans': plan['full_scans'],
+        'indexes': plan['indexes'],
+        'temp_btrees': plan['temp_btrees'],
+        'cost': plan['cost'],
+    }
+
+
+# ----------------------------------------------------------------------
+# Scenarios
+# ----------------------------------------------------------------------
+
+def run_analytics(recorder, db, samples):
+    from app.services import analytics
+
+    country_id = samples['country'].id
+    calls = [
+        ("get_country_analytics", lambda: analytics.get_country_analytics(db, country_id)),
+        ("get_most_shorted_companies", lambda: analytics.get_most_shorted_companies(db, country_id)),
+        ("get_top_managers", lambda: analytics.get_top_managers(db, country_id)),
+        ("get_global_top_companies", lambda: analytics.get_global_top_companies(db)),
+        ("get_global_top_managers", lambda: analytics.get_global_top_managers(db)),
+        ("get_company_analytics", lambda: analytics.get_company_analytics(db, samples['company_id'], "1y")),
+        ("get_company_analytics[all]", lambda: analytics.get_company_analytics(db, samples['company_id'], "all")),
+        ("get_company_analytics_by_name", lambda: analytics.get_company_analytics_by_name(db, samples['company_name'])),
+        ("get_manager_analytics_by_slug", lambda: analytics.get_manager_analytics_by_slug(db, samples['manager_slug'])),
+        ("get_manager_analytics[country,cursor]", lambda: analytics.get_manager_analytics(
+            db, samples['manager_id'], country_code=samples['country_code'], cursor=(datetime(2024, 1, 1), 10 ** 9))),
+        ("get_global_analytics", lambda: analytics.get_global_analytics(db, "1y")),
+        ("set_cached_analytics", lambda: analytics.set_cached_analytics("query_plans", {"ok": True}, db)),
+        ("get_cached_analytics", lambda: analytics.get_cached_analytics("query_plans", db)),
+    ]
+    if samples['ireland'] is not None:
+        ireland_id = samples['ireland'].id
+        calls.append(("get_most_shorted_companies[IE]", lambda: analytics.get_most_shorted_companies(db, ireland_id)))
+
+    for name, call in calls:
+        with recorder.scenario(f"analytics.{name}"):
+            result = call()
+            if asyncio.iscoroutine(result):
+                asyncio.run(result)
+
+
+def run_api(recorder, samples):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        for template in API_REQUESTS:
+            with recorder.scenario(f"GET {template}"):
+                response = client.get(template.format(**samples))
+            if response.status_code != 200:
+                print(f"⚠️  GET {template}: {response.status_code}")
+
+
+def run_ingest(recorder, db, samples, rows: int):
+    from app.services.daily_scraping_service import DailyScrapingService
+
+    service = DailyScrapingService()
+    country = samples['country']
+    scrape = synthetic_scrape(db, country, rows)
+    # The service opens its own session: release this one's connection (a single writer on SQLite)
+    # without expiring the country it is given
+    db.expunge(country)
+    db.rollback()
+    with recorder.scenario("ingest._update_database"):
+        asyncio.run(service._update_database(country, scrape, source_url="synthetic://query-plans"))
+    with recorder.scenario("ingest._update_rollups"):
+        service._update_rollups()
+
+
+# ----------------------------------------------------------------------
+# Capture
+# ----------------------------------------------------------------------
+
+def capture(engine, ingest_rows: int = INGEST_ROWS, min_rows: int = MIN_ROWS) -> dict:
+    """Run every scenario on the seeded database and explain what it issued.
+
+    Returns the plans by key, the row count of every table, the large ones
+    (min_rows and up) and the existing index columns per table."""
+    from sqlalchemy import event, inspect, text
+    from sqlalchemy.engine import Engine
+    from app.db.database import SessionLocal
+    from app.db.models import Base
+
+    tables = set(Base.metadata.tables)
+    with engine.connect() as conn:
+        rows = {table: conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar() for table in sorted(tables)}
+    inspector = inspect(engine)
+    existing = {
+        table: [columns for columns in [tuple(index['column_names']) for index in inspector.get_indexes(table)]
+                + [tuple(inspector.get_pk_constraint(table)['constrained_columns'])] if columns]
+        for table in tables
+    }
+
+    recorder = QueryRecorder()
+    event.listen(Engine, "before_cursor_execute", recorder)
+    db = SessionLocal()
+    try:
+        samples = pick_samples(db)
+        run_analytics(recorder, db, samples)
+        db.rollback()
+        run_api(recorder, samples)
+        run_ingest(recorder, db, samples, ingest_rows)
+    finally:
+        db.close()
+        event.remove(Engine, "before_cursor_execute", recorder)
+
+    return {
+        'plans': explain_all(engine, recorder.queries, tables),
+        'rows': rows,
+        'large': {table: count for table, count in rows.items() if count >= min_rows},
+        'existing': existing,
+    }
+
+
+def load_baselines(path: str = BASELINE_PATH) -> dict:
+    """Baselines by dialect ({'positions', 'seed', 'queries'}), empty without a file"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,346 @@
+"""
+Synthetic regulator files for the scraper benchmarks
+
+render(code, disclosures) lays one country's synthetic disclosures out the
+way its regulator publishes them (sheet names, header rows, column titles,
+date and decimal formats) and returns what the scraper's download_data()
+would: a dict of file contents. parse(scraper, files) then runs the scraper
+from those files to its parse_data() output, including the file parsing the
+Germany and Netherlands scrapers do while downloading and the detail-page
+parsing of the Norway scraper.
+"""
+
+import io
+from datetime import datetime
+from typing import Any, Dict
+
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+
+from app.services.position_validity import ACTIVE_THRESHOLD
+
+SOURCE_URL = "synthetic://regulator"
+
+
+def disclosures(data: Dict[str, pd.DataFrame], code: str) -> pd.DataFrame:
+    """One country's disclosures from benchmarks.synthetic.generate(), with names, in date order.
+
+    is_active marks each holding's latest disclosure at >= 0.5%; next_date is
+    the date of the holding's next disclosure (NaT for the latest)."""
+    country_id = data['countries'].loc[data['countries']['code'] == code, 'id']
+    if country_id.empty:
+        raise ValueError(f"No synthetic country {code}: generate() with more countries")
+    positions = data['short_positions']
+    frame = positions[positions['country_id'] == country_id.iloc[0]].merge(
+        data['companies'][['id', 'name', 'isin']].rename(columns={'id': 'company_id', 'name': 'company_name'}),
+        on='company_id'
+    ).merge(
+        data['managers'][['id', 'name']].rename(columns={'id': 'manager_id', 'name': 'manager_name'}),
+        on='manager_id'
+    ).sort_values(['date', 'id'], kind='stable').reset_index(drop=True)
+    frame['next_date'] = frame['valid_to']
+    frame['is_active'] = frame['next_date'].isna() & (frame['position_size'] >= ACTIVE_THRESHOLD)
+    return frame[['date', 'manager_id', 'manager_name', 'company_name', 'isin', 'position_size',
+                  'next_date', 'is_active']]
+
+
+def _lei(manager_ids: pd.Series) -> pd.Series:
+    return 'SYNTH' + manager_ids.astype(str).str.zfill(13) + '00'
+
+
+def _excel(sheets: Dict[str, pd.DataFrame], engine: str = 'openpyxl', header: bool = True) -> bytes:
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine=engine) as writer:
+        for sheet_name, frame in sheets.items():
+            frame.to_excel(writer, sheet_name=sheet_name, index=False, header=header)
+    return buffer.getvalue()
+
+
+def _with_title_rows(frame: pd.DataFrame, *titles: str) -> pd.DataFrame:
+    """The frame below title rows and its own header row, for sheets written without a header"""
+    rows = [[title] + [None] * (len(frame.columns) - 1) for title in titles]
+    rows.append(list(frame.columns))
+    return pd.concat([pd.DataFrame(rows), pd.DataFrame(frame.to_numpy())], ignore_index=True)
+
+
+def _decimal_comma(sizes: pd.Series) -> pd.Series:
+    return sizes.map(lambda size: f"{size:.2f}".replace('.', ','))
+
+
+def _split(frame: pd.DataFrame):
+    return frame[frame['is_active']], frame[~frame['is_active']]
+
+
+# ----------------------------------------------------------------------
+# One renderer per regulator
+# ----------------------------------------------------------------------
+
+def render_uk(frame: pd.DataFrame) -> Dict[str, Any]:
+    """FCA: one workbook, current and historic disclosure sheets"""
+    def sheet(rows):
+        return pd.DataFrame({
+            'Position Holder': rows['manager_name'],
+            'Name of Share Issuer': rows['company_name'],
+            'ISIN': rows['isin'],
+            'Net Short Position (%)': rows['position_size'],
+            'Position Date': rows['date'],
+        })
+    current, historic = _split(frame)
+    return {'excel_content': _excel({'Current Disclosures': sheet(current), 'Historic Disclosures': sheet(historic)}),
+            'source_url': SOURCE_URL}
+
+
+def render_germany(frame: pd.DataFrame) -> Dict[str, Any]:
+    """Bundesanzeiger: current and historical CSV exports, German decimals"""
+    def csv(rows):
+        return pd.DataFrame({
+            'Positionsinhaber': rows['manager_name'],
+            'Emittent': rows['company_name'],
+            'ISIN': rows['isin'],
+            'Position': _decimal_comma(rows['position_size']),
+            'Datum': rows['date'].dt.strftime('%Y-%m-%d'),
+        }).to_csv(index=False).encode('utf-8-sig')
+    current, historic = _split(frame)
+    return {'current_csv': csv(current), 'historical_csv': csv(historic), 'source_url': SOURCE_URL}
+
+
+def render_spain(frame: pd.DataFrame) -> Dict[str, Any]:
+    """CNMV: latest positions, the series of open holdings and earlier positions, below title rows"""
+    def sheet(rows, title):
+        return _with_title_rows(pd.DataFrame({
+            'LEI': _lei(rows['manager_id']),
+            'Tenedor de la Posición / Position holder': rows['manager_name'],
+            'Emisor / Issuer': rows['company_name'],
+            'ISIN': rows['isin'],
+            'Posición corta (%) / Net short position (%)': rows['position_size'],
+            'Fecha posición / Position date': rows['date'],
+        }), title, '')
+    open_holdings = frame.loc[frame['is_active'], ['manager_name', 'isin']].drop_duplicates()
+    in_series = frame.merge(open_holdings, on=['manager_name', 'isin'], how='left', indicator=True)['_merge'] == 'both'
+    sheets = {
+        'Última': sheet(frame[frame['is_active']], 'Posiciones cortas netas en vigor'),
+        'Serie': sheet(frame[in_series.to_numpy()], 'Serie histórica de posiciones en vigor'),
+        'Anteriores': sheet(frame[~in_series.to_numpy()], 'Posiciones anteriores'),
+    }
+    return {'excel_content': _excel(sheets, header=False), 'source_url': SOURCE_URL}
+
+
+def render_belgium(frame: pd.DataFrame) -> Dict[str, Any]:
+    """FSMA: current and historical CSVs, dd/mm/yyyy dates"""
+    def csv(rows):
+        return pd.DataFrame({
+            'Position holder': rows['manager_name'],
+            'Issuer': rows['company_name'],
+            'ISIN': rows['isin'],
+            'Net short position': _decimal_comma(rows['position_size']),
+            'Position date': rows['date'].dt.strftime('%d/%m/%Y'),
+            'Change Position Date': rows['date'].dt.strftime('%d/%m/%Y'),
+        }).to_csv(index=False).encode('utf-8')
+    current, historic = _split(frame)
+    return {'current_csv': csv(current), 'historical_csv': csv(historic), 'source_url': SOURCE_URL}
+
+
+def render_ireland(frame: pd.DataFrame) -> Dict[str, Any]:
+    """Central Bank: current and historic sheets, sizes as fractions"""
+    def sheet(rows):
+        return pd.DataFrame({
+            'Position Holder:': rows['manager_name'],
+            'Name of the Issuer:': rows['company_name'],
+            'ISIN:': rows['isin'],
+            'Net short position %:': rows['position_size'] / 100,
+            'Position Date:': rows['date'],
+        })
+    current, historic = _split(frame)
+    return {'excel_content': _excel({'Current Positions': sheet(current), 'Historic Positions': sheet(historic)}),
+            'source_url': SOURCE_URL}
+
+
+def render_italy(frame: pd.DataFrame) -> Dict[str, Any]:
+    """CONSOB: current and historical sheets plus the publication date sheet"""
+    def sheet(rows):
+        return pd.DataFrame({
+            'Detentore': rows['manager_name'],
+            'Emittente': rows['company_name'],
+            'ISIN': rows['isin'],
+            'Perc. posizione netta corta': rows['position_size'],
+            'Data della posizione': rows['date'].dt.strftime('%d/%m/%Y'),
+        })
+    current, historic = _split(frame)
+    published = pd.DataFrame({'Data pubblicazione': [frame['date'].max().strftime('%d/%m/%Y')]})
+    return {'excel_content': _excel({'Pubb. Data': published, 'Posizioni correnti': sheet(current),
+                                     'Posizioni storiche': sheet(historic)}),
+            'source_url': SOURCE_URL}
+
+
+def render_netherlands(frame: pd.DataFrame) -> Dict[str, Any]:
+    """AFM: semicolon CSVs; the current register also lists each holding's earlier disclosures"""
+    def csv(rows):
+        return pd.DataFrame({
+            'Position holder': rows['manager_name'],
+            'Name of the issuer': rows['company_name'],
+            'ISIN': rows['isin'],
+            'Net short position': _decimal_comma(rows['position_size']),
+            'Position date': rows['date'].dt.strftime('%Y-%m-%d'),
+        }).to_csv(index=False, sep=';').encode('utf-8')
+    recent = frame['date'] >= frame['date'].max() - pd.Timedelta(days=730)
+    return {'current_csv': csv(frame[recent]), 'historical_csv': csv(frame[~recent]), 'source_url': SOURCE_URL}
+
+
+def render_france(frame: pd.DataFrame) -> Dict[str, Any]:
+    """AMF on data.gouv.fr: the full history in one semicolon CSV with publication windows"""
+    csv = pd.DataFrame({
+        'Detenteur de la position courte nette': frame['manager_name'],
+        'Legal Entity Identifier detenteur': _lei(frame['manager_id']),
+        'Emetteur / issuer': frame['company_name'],
+        'Ratio': frame['position_size'],
+        'code ISIN': frame['isin'],
+        'Date de debut position': frame['date'].dt.strftime('%Y-%m-%d'),
+        'Date de debut de publication position': (frame['date'] + pd.offsets.BDay(1)).dt.strftime('%Y-%m-%d'),
+        'Date de fin de publication position': (frame['next_date'] + pd.offsets.BDay(1)).dt.strftime('%Y-%m-%d'),
+    }).to_csv(index=False, sep=';').encode('utf-8')
+    return {'csv_data': csv, 'source_url': SOURCE_URL, 'download_date': datetime.now().isoformat()}
+
+
+def render_finland(frame: pd.DataFrame) -> Dict[str, Any]:
+    """FIN-FSA: the "Save as excel (.csv)" exports of the current and historic pages"""
+    def csv(rows):
+        return pd.DataFrame({
+            'Position holder': rows['manager_name'],
+            'Name of the issuer': rows['company_name'],
+            'ISIN': rows['isin'],
+            'Net short position (%)': _decimal_comma(rows['position_size']),
+            'Date': rows['date'].dt.strftime('%Y-%m-%d'),
+        }).to_csv(index=False, sep=';').encode('utf-8')
+    current, historic = _split(frame)
+    return {'current_file': csv(current), 'historic_file': csv(historic), 'current_page': b'', 'historic_page': b'',
+            'source_url': SOURCE_URL, 'download_date': datetime.now().isoformat()}
+
+
+def render_sweden(frame: pd.DataFrame) -> Dict[str, Any]:
+    """Finansinspektionen: ODS files with title rows and a bilingual header row"""
+    def ods(rows, title):
+        sheet = _with_title_rows(pd.DataFrame({
+            'Innehavare av positionen / Position holder': rows['manager_name'],
+            'Namn på emittent / Name of the issuer': rows['company_name'],
+            'ISIN': rows['isin'],
+            'Position i procent / Position in per cent': rows['position_size'],
+            'Datum för positionen / Position date': rows['date'].dt.strftime('%Y-%m-%d'),
+        }), 'Betydande korta nettopositioner', title)
+        return _excel({'Blad1': sheet}, engine='odf', header=False)
+    current, historic = _split(frame)
+    return {'current_file': ods(current, 'Aktuella positioner'), 'historic_file': ods(historic, 'Historiska positioner'),
+            'source_url': SOURCE_URL, 'download_date': datetime.now().isoformat()}
+
+
+def render_norway(frame: pd.DataFrame) -> Dict[str, Any]:
+    """Finanstilsynet: one detail page per issuer with an active and a historical positions table"""
+    def table(rows, total: bool):
+        cells = ''.join(
+            f"<tr><td>{manager}</td><td>{int(size * 10000)}</td><td>{percent}</td><td>{day:%d.%m.%Y}</td></tr>"
+            for manager, size, percent, day in zip(rows['manager_name'], rows['position_size'],
+                                                   _decimal_comma(rows['position_size']), rows['date'])
+        )
+        if total:
+            cells += f"<tr><td>SUM</td><td></td><td>{rows['position_size'].sum():.2f}</td><td></td></tr>"
+        return ("<table><tr><th>Position holder</th><th>Short position</th><th>Short percent</th>"
+                f"<th>Date</th></tr>{cells}</table>")
+
+    pages = []
+    for (isin, company), rows in frame.groupby(['isin', 'company_name'], sort=False):
+        active, historical = _split(rows.sort_values('date', ascending=False, kind='stable'))
+        html = f"<html><body><h1>{company}</h1>"
+        if not active.empty:
+            html += f"<div>Active positions</div>{table(active, total=True)}"
+        if not historical.empty:
+            html += f"<div>Historical positions</div>{table(historical, total=False)}"
+        pages.append(({'isin': isin, 'company_name': company}, (html + "</body></html>").encode('utf-8')))
+    return {'detail_pages': pages, 'source_url': SOURCE_URL, 'download_date': datetime.now().isoformat()}
+
+
+def render_denmark(frame: pd.DataFrame) -> Dict[str, Any]:
+    """DFSA: one workbook, Danish and English sheets with an Active/Historical column"""
+    english = pd.DataFrame({
+        'Name of the issuer': frame['company_name'],
+        'ISIN': frame['isin'],
+        'Position holder': frame['manager_name'],
+        'Net short position (%)': _decimal_comma(frame['position_size']),
+        'Date, where position was created, changed or ceased to be held (dd-mm-yyyy)': frame['date'].dt.strftime('%d-%m-%Y'),
+        'Active/Historical': frame['is_active'].map({True: 'Active', False: 'Historical'}),
+    })
+    return {'excel_content': _excel({'Dansk': english.head(0), 'English': english}), 'source_url': SOURCE_URL,
+            'download_date': datetime.now().isoformat()}
+
+
+RENDERERS = {
+    'GB': render_uk,
+    'DE': render_germany,
+    'ES': render_spain,
+    'BE': render_belgium,
+    'IE': render_ireland,
+    'IT': render_italy,
+    'NL': render_netherlands,
+    'FR': render_france,
+    'FI': render_finland,
+    'SE': render_sweden,
+    'NO': render_norway,
+    'DK': render_denmark,
+}
+
+
+def render(code: str, frame: pd.DataFrame) -> Dict[str, Any]:
+    """The files of one regulator for the disclosures in frame (see disclosures())"""
+    return RENDERERS[code](frame)
+
+
+def file_bytes(files: Dict[str, Any]) -> int:
+    """Total size of the rendered files and pages"""
+    total = 0
+    for value in files.values():
+        if isinstance(value, bytes):
+            total += len(value)
+        elif isinstance(value, list):
+            total += sum(len(page) for _, page in value)
+    return total
+
+
+# ----------------------------------------------------------------------
+# Files -> parse_data()
+# ----------------------------------------------------------------------
+
+def _response(content: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = content
+    response.encoding = 'utf-8'
+    return response
+
+
+def _csv_exports(scraper, files: Dict[str, Any]) -> Dict[str, Any]:
+    """What download_data() returns after parsing the CSV exports (Germany, Netherlands)"""
+    return {
+        'current_data': scraper._parse_csv_response(_response(files['current_csv']), 'current'),
+        'historical_data': scraper._parse_csv_response(_response(files['historical_csv']), 'historical'),
+        'source_url': files['source_url'],
+    }
+
+
+def _detail_pages(scraper, files: Dict[str, Any]) -> Dict[str, Any]:
+    """What download_data() returns after parsing the issuer detail pages (Norway)"""
+    detailed = []
+    for issuer, page in files['detail_pages']:
+        detailed.extend(scraper._extract_detail_positions(BeautifulSoup(page, 'html.parser'), issuer))
+    return {'detailed_data': detailed, 'source_url': files['source_url'], 'download_date': files['download_date']}
+
+
+DOWNLOAD_PARSERS = {
+    'DE': _csv_exports,
+    'NL': _csv_exports,
+    'NO': _detail_pages,
+}
+
+
+def parse(scraper, files: Dict[str, Any]):
+    """scraper.parse_data() on rendered files, after any parsing its download_data() does"""
+    download_parser = DOWNLOAD_PARSERS.get(scraper.country_code)
+    return scraper.parse_data(download_parser(scraper, files) if download_parser else files)
@@ -0,0 +1,177 @@
+"""
+Workloads shared by the query-plan check, the benchmark suites and the tests
+
+The app reads its configuration when it is imported, so nothing here imports
+it at module level: call configure_environment() first, then use the rest.
+"""
+
+import os
+import tempfile
+from datetime import date, timedelta
+
+# Read endpoints, formatted with the sample entities; the unformatted template names the benchmark
+API_REQUESTS = [
+    "/api/countries/",
+    "/api/countries/{country_code}",
+    "/api/countries/{country_code}/analytics",
+    "/api/countries/{country_code}/most-shorted",
+    "/api/countries/{country_code}/top-managers",
+    "/api/companies/",
+    "/api/companies/?country_code={country_code}",
+    "/api/companies/{company_id}",
+    "/api/managers/",
+    "/api/managers/{manager_id}",
+    "/api/managers/slug/{manager_slug}",
+    "/api/positions/?country_code={country_code}&is_active=true",
+    "/api/positions/?company_id={company_id}",
+    "/api/positions/?manager_id={manager_id}&is_active=true",
+    "/api/positions/latest",
+    "/api/positions/latest?country_code={country_code}",
+    "/api/positions/as-of?date={as_of}&country_code={country_code}",
+    "/api/analytics/global/top-companies",
+    "/api/analytics/global/top-managers",
+    "/api/analytics/global?timeframe=1y",
+    "/api/analytics/countries/{country_code}/most-shorted",
+    "/api/analytics/countries/{country_code}/top-managers",
+    "/api/analytics/countries/{country_code}/analytics",
+    "/api/analytics/companies/{company_id}?timeframe=1y",
+    "/api/analytics/companies/by-name/{company_name}",
+    "/api/analytics/managers/{manager_slug}?country_code={country_code}",
+    "/api/search?q={search_term}",
+]
+
+
+def configure_environment(database_url: str = None, name: str = "scratch") -> str:
+    """Point the app at a scratch database before it is imported.
+
+    Without database_url, a fresh SQLite file <name>.db in the temp dir. Read
+    replicas, the position store and DuckDB are switched off so every query
+    runs on that database; scraper state and snapshot exports go to the temp dir."""
+    if database_url:
+        url = database_url
+    else:
+        path = os.path.join(tempfile.gettempdir(), f"{name}.db")
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        url = f"sqlite:///{path}"
+    os.environ['DATABASE_URL'] = url
+    os.environ['DATABASE_READ_URLS'] = ''
+    os.environ['DATABASE_READ_URL'] = ''
+    os.environ['USE_POSITION_STORE'] = 'false'
+    os.environ['DUCKDB_QUERIES'] = ''
+    os.environ['SCRAPER_STATE_DIR'] = os.path.join(tempfile.gettempdir(), f"{name}_scraper_state")
+    os.environ['POSITION_STORE_DIR'] = os.path.join(tempfile.gettempdir(), f"{name}_position_store")
+    os.environ['ANALYTICS_PARQUET_DIR'] = os.path.join(tempfile.gettempdir(), f"{name}_parquet")
+    return url
+
+
+def pick_samples(db) -> dict:
+    """The busiest country, company and manager of the seeded data (deterministic)"""
+    from sqlalchemy import func
+    from app.db.models import Company, Country, Manager, ShortPosition
+
+    def busiest(column):
+        return db.query(column, func.count(ShortPosition.id)).group_by(column).order_by(
+            func.count(ShortPosition.id).desc(), column
+        ).first()[0]
+
+    country = db.get(Country, busiest(ShortPosition.country_id))
+    company = db.get(Company, busiest(ShortPosition.company_id))
+    manager = db.get(Manager, busiest(ShortPosition.manager_id))
+    ireland = db.query(Country).filter(Country.code == 'IE').first()
+    named = db.query(Company.name).join(ShortPosition, ShortPosition.company_id == Company.id).filter(
+        ~Company.name.contains('/')  # A/S: the slash would split the by-name path
+    ).group_by(Company.id, Company.name).order_by(func.count(ShortPosition.id).desc(), Company.id).first()
+    return {
+        'country': country,
+        'country_id': country.id,
+        'country_code': country.code,
+        'ireland': ireland,
+        'company_id': company.id,
+        'company_name': named.name,
+        'manager_id': manager.id,
+        'manager_slug': manager.slug,
+        'search_term': company.name.split()[0].lower(),
+        'as_of': date(2024, 6, 28).isoformat(),
+    }
+
+
+def synthetic_scrape(db, country, rows: int) -> list:
+    """A scrape of the country: its latest disclosures again (dedupe hits) plus new ones after them"""
+    from app.db.models import Company, Manager, ShortPosition
+
+    latest = db.query(ShortPosition.date, ShortPosition.position_size, Company.name, Company.isin, Manager.name).join(
+        Company, Company.id == ShortPosition.company_id
+    ).join(
+        Manager, Manager.id == ShortPosition.manager_id
+    ).filter(
+        ShortPosition.country_id == country.id
+    ).order_by(ShortPosition.date.desc(), ShortPosition.id.desc()).limit(rows).all()
+
+    scrape = []
+    for i, (day, size, company, isin, manager) in enumerate(latest):
+        scrape.append({'date': day, 'manager_name': manager, 'company_name': company, 'isin': isin,
+                       'position_size': size, 'is_active': size >= 0.5})
+        scrape.append({'date': day + timedelta(days=1 + i % 5), 'manager_name': manager, 'company_name': company,
+                       'isin': isin, 'position_size': round(size + 0.07, 2), 'is_active': True})
+    scrape.append({'date': latest[0][0] + timedelta(days=1), 'manager_name': 'Plan Check Capital LLP',
+                   'company_name': 'Plan Check Holdings', 'isin': None, 'position_size': 0.61, 'is_active': True})
+    return scrape
+
+
+def duckdb_parity_cases(db, country_codes: list = None) -> list:
+    """(query, label, SQLAlchemy call, DuckDB call, ranking key, entity key) for every query DuckDB serves.
+
+    The SQLAlchemy side must not be routed to DuckDB or the position store itself
+    (configure_environment() switches both off)."""
+    import asyncio
+    from app.db.models import Country
+    from app.services import analytics, duckdb_analytics
+
+    countries = db.query(Country).order_by(Country.code)
+    if country_codes:
+        countries = countries.filter(Country.code.in_([code.upper() for code in country_codes]))
+
+    cases = []
+    for country in countries:
+        if country.code != 'IE':  # Ireland keeps its own SQL path
+            cases.append((
+                'most_shorted_companies', f"{country.code} most shorted",
+                lambda c=country.id: asyncio.run(analytics.get_most_shorted_companies(db, c)),
+                lambda c=country.id: duckdb_analytics.most_shorted_companies(c),
+                "total_short_positions", "company_id",
+            ))
+        cases.append((
+            'top_managers', f"{country.code} top managers",
+            lambda c=country.id: asyncio.run(analytics.get_top_managers(db, c)),
+            lambda c=country.id: duckdb_analytics.top_managers(c, order_by="exposure"),
+            "total_exposure", "slug",
+        ))
+    cases.append((
+        'global_top_managers', "global top managers",
+        lambda: asyncio.run(analytics.get_global_top_managers(db)),
+        lambda: duckdb_analytics.top_managers(order_by="count"),
+        "active_positions", "slug",
+    ))
+    return cases
+
+
+def _close(x, y, tolerance: float) -> bool:
+    if isinstance(x, float) or isinstance(y, float):
+        return abs(float(x or 0) - float(y or 0)) <= tolerance
+    return x == y
+
+
+def same_ranking(expected: list, got: list, sort_key: str, id_key: str, tolerance: float = 1e-6) -> bool:
+    """Same ranking values, and identical rows for every entity both return (ties may order differently)"""
+    if len(expected) != len(got):
+        return False
+    if not all(_close(a[sort_key], b[sort_key], tolerance) for a, b in zip(expected, got)):
+        return False
+    got_by_id = {row[id_key]: row for row in got}
+    return all(
+        _close(value, got_by_id[row[id_key]][key], tolerance)
+        for row in expected if row[id_key] in got_by_id
+        for key, value in row.items()
+    )
@@ -0,0 +1,284 @@
+# benchmarks/synthetic.py
+"""
+Deterministic synthetic short-selling data
+
+generate() builds countries x companies x managers x disclosures as pandas
+frames from a seed: the same arguments always give the same rows. Each
+(manager, company) holding is a run of disclosures that enters at >= 0.5%,
+drifts up and down, now and then drops below the threshold (an exit) and
+comes back; holdings not re-disclosed for two years end on an exit, the way
+the registers show them, and a few end on a disclosure the register lists
+only as historic (no exit filed). A few companies and managers carry most of the
+activity (power-law weights), like the real data.
+
+populate() bulk-loads the frames into an empty database and derives what the
+daily ingest would have: validity intervals, rollups, company timelines and
+planner statistics.
+"""
+
+import logging
+import time
+from datetime import date
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Base, Company, Country, Issuer, Manager, ShortPosition
+from app.services.position_validity import ACTIVE_THRESHOLD, HISTORIC_VALIDITY, OPEN_VALID_TO
+from app.services.rollups import refresh_rollups
+from app.services.timeline_pyramid import rebuild_company_timelines
+from app.utils.name_normalization import name_key
+
+logger = logging.getLogger(__name__)
+
+START_DATE = date(2012, 1, 1)
+END_DATE = date(2025, 6, 30)  # Fixed, so a seed means the same data whenever it runs
+DISCLOSURES_PER_HOLDING = 8  # Mean disclosures per (manager, company)
+GAP_DAYS = 21  # Mean days between a holding's disclosures
+EXIT_RATE = 0.1  # Share of follow-up disclosures that drop below the threshold
+STALE_DAYS = 730
+HISTORIC_RATE = 0.05  # Share of holdings still >= 0.5% whose last disclosure is only in the historical tab
+CROSS_LISTED = 0.05  # Share of companies reusing another country's ISIN
+MAX_COMPANIES_PER_COUNTRY = 1500  # Past this, bigger runs mean more disclosures per company, as in the registers
+MAX_MANAGERS = 5000
+INSERT_CHUNK = 10000
+
+_COMPANY_WORDS = [
+    'Nordic', 'Atlas', 'Vesta', 'Orion', 'Helio', 'Boreal', 'Cobalt', 'Delta', 'Ember', 'Fjord',
+    'Granite', 'Harbor', 'Iris', 'Juniper', 'Kestrel', 'Lumen', 'Meridian', 'Nova', 'Opal', 'Polar',
+    'Quartz', 'Riviera', 'Summit', 'Tundra', 'Umbra', 'Vertex', 'Willow', 'Zenith', 'Alpine', 'Baltic',
+]
+_COMPANY_KINDS = [
+    'Energy', 'Pharma', 'Bank', 'Telecom', 'Retail', 'Mining', 'Logistics', 'Foods', 'Motors', 'Media',
+    'Properties', 'Shipping', 'Steel', 'Biotech', 'Insurance', 'Software', 'Airlines', 'Chemicals',
+]
+_COMPANY_SUFFIXES = {'GB': 'PLC', 'DE': 'AG', 'FR': 'SA', 'ES': 'SA', 'IT': 'SpA', 'NL': 'NV', 'BE': 'NV',
+                     'SE': 'AB', 'DK': 'A/S', 'NO': 'ASA', 'FI': 'Oyj', 'IE': 'PLC'}
+_MANAGER_WORDS = [
+    'Blackwater', 'Silverline', 'Redwood', 'Northgate', 'Eastbridge', 'Highland', 'Crescent', 'Ironbark',
+    'Lakeview', 'Marlin', 'Oakmont', 'Pinecrest', 'Quayside', 'Ravenscar', 'Stonebrook', 'Thornfield',
+    'Westport', 'Ashgrove', 'Bramble', 'Citadel', 'Driftwood', 'Elmstead', 'Foxglove', 'Greystone',
+]
+_MANAGER_KINDS = ['Capital Management LP', 'Asset Management Ltd', 'Partners LLP', 'Investments LLC',
+                  'Advisors LP', 'Fund Management Ltd']
+
+
+def _power_weights(rng: np.random.Generator, count: int, exponent: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def _names(words, kinds, count: int, suffix: str = '') -> list:
+    """Distinct readable names: word x kind combinations, then numbered"""
+    names = []
+    for i in range(count):
+        word, kind = words[i % len(words)], kinds[(i // len(words)) % len(kinds)]
+        series = i // (len(words) * len(kinds))
+        names.append(f"{word} {kind}{f' {series + 1}' if series else ''}{f' {suffix}' if suffix else ''}")
+    return names
+
+
+def generate(
+    positions: int,
+    countries: int = 6,
+    companies_per_country: Optional[int] = None,
+    managers: Optional[int] = None,
+    seed: int = 0,
+    start: date = START_DATE,
+    end: date = END_DATE,
+) -> Dict[str, pd.DataFrame]:
+    """Frames for countries, issuers, companies, managers and short_positions (ids from 1).
+
+    About `positions` disclosures: a holding's disclosures landing on the same
+    business day are merged."""
+    rng = np.random.default_rng(seed)
+    country_rows = settings.countries[:countries]
+    countries = len(country_rows)
+    if companies_per_country is None:
+        companies_per_country = min(MAX_COMPANIES_PER_COUNTRY, max(20, positions // 150 // countries))
+    if managers is None:
+        managers = min(MAX_MANAGERS, max(20, positions // 500))
+
+    # Countries
+    country_frame = pd.DataFrame(country_rows)
+    country_frame['id'] = np.arange(1, countries + 1)
+    country_frame['is_active'] = True
+    codes = country_frame['code'].tolist()
+
+    # Companies: ISIN per company, a few cross-listed under another country's ISIN
+    company_count = countries * companies_per_country
+    company_country = np.repeat(np.arange(countries), companies_per_country)
+    names = []
+    for index, code in enumerate(codes):
+        names += _names(_COMPANY_WORDS, _COMPANY_KINDS, companies_per_country, _COMPANY_SUFFIXES.get(code, 'SA'))
+    isins = np.array([f"{codes[c]}{i:010d}" for i, c in enumerate(company_country)], dtype=object)
+    if countries > 1:
+        cross = np.flatnonzero(rng.random(company_count) < CROSS_LISTED)
+        other = (company_country[cross] + rng.integers(1, countries, len(cross))) % countries
+        source = other * companies_per_country + rng.integers(0, companies_per_country, len(cross))
+        isins[cross] = isins[source]
+    issuer_isins, issuer_index = np.unique(isins, return_inverse=True)
+    first_company = pd.Series(np.arange(company_count)).groupby(issuer_index).min().to_numpy()
+
+    issuer_frame = pd.DataFrame({
+        'id': np.arange(1, len(issuer_isins) + 1),
+        'isin': issuer_isins,
+        'name': [names[i] for i in first_company],
+    })
+    company_frame = pd.DataFrame({
+        'id': np.arange(1, company_count + 1),
+        'name': names,
+        'name_key': [name_key(name) for name in names],
+        'isin': isins,
+        'country_id': company_country + 1,
+        'issuer_id': issuer_index + 1,
+    })
+
+    # Managers
+    manager_names = _names(_MANAGER_WORDS, _MANAGER_KINDS, managers)
+    manager_frame = pd.DataFrame({
+        'id': np.arange(1, managers + 1),
+        'name': manager_names,
+        'name_key': [name_key(name) for name in manager_names],
+        'slug': [name_key(name).lower().replace(' ', '-') for name in manager_names],
+    })
+
+    # Holdings: distinct (company, manager) pairs drawn by activity weight
+    wanted = max(1, positions // DISCLOSURES_PER_HOLDING)
+    wanted = min(wanted, company_count * managers // 2 or 1)
+    pair_company = rng.choice(company_count, wanted * 2, p=_power_weights(rng, company_count, 0.9))
+    pair_manager = rng.choice(managers, wanted * 2, p=_power_weights(rng, managers, 1.1))
+    keys = pd.unique(pair_company.astype(np.int64) * managers + pair_manager)[:wanted]
+    pair_company, pair_manager = keys // managers, keys % managers
+    holdings = len(keys)
+
+    # Disclosures per holding, summing to exactly `positions`
+    lengths = rng.geometric(1 / DISCLOSURES_PER_HOLDING, holdings)
+    lengths = np.maximum(1, np.round(lengths * positions / lengths.sum())).astype(np.int64)
+    shortfall = positions - lengths.sum()
+    if shortfall > 0:
+        np.add.at(lengths, rng.integers(0, holdings, shortfall), 1)
+    elif shortfall < 0:
+        excess = -shortfall
+        while excess:
+            trimmable = np.flatnonzero(lengths > 1)
+            take = rng.choice(trimmable, min(excess, len(trimmable)), replace=False)
+            lengths[take] -= 1
+            excess -= len(take)
+    holding = np.repeat(np.arange(holdings), lengths)
+    firsts = np.cumsum(lengths) - lengths
+    is_first = np.zeros(positions, dtype=bool)
+    is_first[firsts] = True
+    is_last = np.zeros(positions, dtype=bool)
+    is_last[firsts + lengths - 1] = True
+
+    def running_sum(values):
+        totals = np.cumsum(values)
+        return totals - np.repeat(totals[firsts] - values[firsts], lengths)
+
+    # Dates: geometric gaps from a random start, squeezed into start..end, on business days
+    span_days = (end - start).days
+    offsets = running_sum(np.where(is_first, 0, rng.geometric(1 / GAP_DAYS, positions)))
+    spans = offsets[firsts + lengths - 1]
+    scale = np.minimum(1.0, span_days / np.maximum(spans, 1))
+    offsets = np.floor(offsets * scale[holding]).astype(np.int64)
+    begin = np.floor(rng.random(holdings) * (span_days - np.minimum(spans, span_days) + 1)).astype(np.int64)
+    days = np.datetime64(start, 'D') + begin[holding] + offsets
+    days = np.minimum(np.busday_offset(days, 0, roll='forward'), np.datetime64(end, 'D'))
+
+    # Sizes: a random walk above the threshold, with exits below it
+    walk = rng.uniform(0.5, 1.5, holdings)[holding] + running_sum(np.where(is_first, 0.0, rng.normal(0, 0.12, positions)))
+    sizes = np.clip(walk, ACTIVE_THRESHOLD, 4.0)
+    stale = is_last & (days < np.datetime64(end, 'D') - STALE_DAYS)
+    exits = (~is_first & (rng.random(positions) < EXIT_RATE)) | stale
+    exit_sizes = np.where(rng.random(positions) < 0.3, 0.0, rng.uniform(0.3, 0.49, positions))
+    sizes = np.round(np.where(exits, exit_sizes, sizes), 2)
+
+    company_ids = pair_company[holding] + 1
+    frame = pd.DataFrame({
+        'date': days.astype('datetime64[ns]'),
+        'company_id': company_ids,
+        'manager_id': pair_manager[holding] + 1,
+        'country_id': company_country[company_ids - 1] + 1,
+        'position_size': sizes,
+    })
+    frame = frame.drop_duplicates(['date', 'company_id', 'manager_id'], keep='last')
+
+    # Derived as the ingest would: validity intervals and the current-holding flag
+    frame = frame.sort_values(['company_id', 'manager_id', 'date'], kind='stable')
+    key_change = frame[['company_id', 'manager_id']].ne(frame[['company_id', 'manager_id']].shift(-1)).any(axis=1)
+    frame['is_active'] = (key_change & (frame['position_size'] >= ACTIVE_THRESHOLD)
+                          & (rng.random(len(frame)) >= HISTORIC_RATE))
+    frame['valid_from'] = frame['date']
+    # NaT: open (OPEN_VALID_TO is past datetime64[ns]); a latest disclosure reported historic ends the next day
+    frame['valid_to'] = frame['date'].shift(-1).where(
+        ~key_change, (frame['date'] + HISTORIC_VALIDITY).where(~frame['is_active']))
+
+    # Ids in ingestion (date) order
+    frame = frame.sort_values(['date', 'country_id', 'company_id', 'manager_id'], kind='stable').reset_index(drop=True)
+    frame.insert(0, 'id', np.arange(1, len(frame) + 1))
+
+    return {
+        'countries': country_frame,
+        'issuers': issuer_frame,
+        'companies': company_frame,
+        'managers': manager_frame,
+        'short_positions': frame,
+    }
+
+
+def _records(frame: pd.DataFrame, start: int, stop: int) -> list:
+    """Rows start..stop as dicts of plain Python values, converted column by column"""
+    chunk = frame.iloc[start:stop]
+    columns = []
+    for name in chunk.columns:
+        values = chunk[name]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            default = OPEN_VALID_TO if name == 'valid_to' else None
+            columns.append([value.to_pydatetime() if value is not pd.NaT else default for value in values])
+        else:
+            columns.append(values.astype(object).where(values.notna(), None).tolist())
+    return [dict(zip(chunk.columns, row)) for row in zip(*columns)]
+
+
+def populate(engine, data: Dict[str, pd.DataFrame], derived: bool = True) -> Dict[str, int]:
+    """Create the schema and load generate()'s frames into an empty database.
+
+    With derived, also builds the rollups and company timelines and refreshes
+    the planner statistics (what queries see after a real ingest)."""
+    Base.metadata.create_all(bind=engine)
+    tables = [(Country, 'countries'), (Issuer, 'issuers'), (Company, 'companies'),
+              (Manager, 'managers'), (ShortPosition, 'short_positions')]
+    counts = {}
+    with engine.begin() as conn:
+        for model, name in tables:
+            frame = data[name]
+            columns = [column.name for column in model.__table__.columns]
+            frame = frame[[column for column in frame.columns if column in columns]]
+            start = time.perf_counter()
+            for offset in range(0, len(frame), INSERT_CHUNK):
+                conn.execute(insert(model), _records(frame, offset, offset + INSERT_CHUNK))
+            counts[name] = len(frame)
+            logger.info(f"Loaded {len(frame)} {name} in {time.perf_counter() - start:.1f}s")
+        if engine.dialect.name == 'postgresql':
+            # Explicit ids: move the sequences past them
+            for _, name in tables:
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), (SELECT COALESCE(MAX(id), 1) FROM {name}))"
+                ))
+
+    if derived:
+        db = Session(bind=engine)
+        try:
+            counts.update(refresh_rollups(db))
+            counts['timelines'] = rebuild_company_timelines(db, data['companies']['id'].tolist())
+        finally:
+            db.close()
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+    return counts
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Backfill the daily rollup tables (country_daily_stats, company_daily_stats)
+
+Rebuilds every day from the first disclosure (or --since) to today from the
+position validity intervals, so run scripts/migrate_position_validity.py first
+on databases that predate them. Daily ingestion keeps the rollups current
+afterwards; re-running this is always safe.
+
+Usage:
+    python scripts/backfill_rollups.py                     # full history
+    python scripts/backfill_rollups.py --since 2024-01-01  # from a date on
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.database import SessionLocal, ensure_db_ready, init_db
+from app.db.models import ShortPosition
+from app.services.rollups import refresh_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--since', type=date.fromisoformat, help='first day to rebuild (YYYY-MM-DD)')
+    parser.add_argument('--until', type=date.fromisoformat, help='last day to rebuild (default: today)')
+    args = parser.parse_args()
+
+    print("📊 Daily rollup backfill")
+    print("=" * 50)
+
+    ensure_db_ready()
+    init_db()
+
+    db = SessionLocal()
+    try:
+        missing = db.query(ShortPosition.id).filter(ShortPosition.valid_from.is_(None)).count()
+        if missing:
+            print(f"⚠️  {missing} positions have no validity interval yet and are left out - "
+                  f"run scripts/migrate_position_validity.py first")
+
+        start = time.perf_counter()
+        result = refresh_rollups(db, since=args.since, until=args.until)
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+
+    print(f"✅ {result['days']} days rebuilt: {result['country_rows']} country rows, "
+          f"{result['company_rows']} company rows ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
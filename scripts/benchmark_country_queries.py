@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark country-scoped queries and ingestion (before/after partitioning)
+
+Run it before and after scripts/migrate_partition_positions.py, on the same
+data, and compare. For each country it times:
+
+    most shorted    analytics.get_most_shorted_companies
+    top managers    analytics.get_top_managers
+    as-of           positions in force a year ago (validity intervals)
+    ingest          the per-row ingestion path (dedupe probe, insert, validity
+                    link) for --rows synthetic disclosures, rolled back afterwards
+
+On Postgres it also reports how many short_positions partitions each query plan
+touches (EXPLAIN). --json saves the results for comparison.
+
+Usage:
+    python scripts/benchmark_country_queries.py --label before --json before.json
+    python scripts/migrate_partition_positions.py
+    python scripts/benchmark_country_queries.py --label after --json after.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import and_, func, text
+
+from app.db.database import SessionLocal, engine, ensure_db_ready
+from app.db.models import Company, Country, Manager, ShortPosition
+from app.db.partitioning import PARENT, is_partitioned
+from app.services import analytics
+from app.services.position_validity import link_position_validity, positions_as_of_subq
+
+
+def _timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def partitions_touched(db, query) -> int:
+    """Distinct short_positions partitions (or the table itself) scanned by a query's plan"""
+    statement = query.statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    plan = "\n".join(row[0] for row in db.execute(text(f"EXPLAIN {statement}")))
+    return len(set(re.findall(rf"on ({PARENT}\w*)", plan)))
+
+
+def ingest(db, country, rows: int) -> float:
+    """Per-row ingestion work for synthetic disclosures in one transaction, rolled back; ms per row"""
+    companies = [c.id for c in db.query(Company.id).filter(Company.country_id == country.id).limit(200)]
+    managers = [m.id for m in db.query(Manager.id).limit(200)]
+    if not companies or not managers:
+        return 0.0
+    day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+    start = time.perf_counter()
+    try:
+        for _ in range(rows):
+            company_id, manager_id = random.choice(companies), random.choice(managers)
+            size = round(random.uniform(0.5, 3.0), 2)
+            existing = db.query(ShortPosition).filter(and_(
+                ShortPosition.date == day,
+                ShortPosition.position_size == size,
+                ShortPosition.company_id == company_id,
+                ShortPosition.manager_id == manager_id,
+                ShortPosition.country_id == country.id,
+            )).first()
+            if existing:
+                continue
+            position = ShortPosition(date=day, company_id=company_id, manager_id=manager_id,
+                                     country_id=country.id, position_size=size, is_active=True)
+            db.add(position)
+            db.flush()
+            link_position_validity(db, position)
+        return (time.perf_counter() - start) / rows * 1000
+    finally:
+        db.rollback()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--country', action='append', default=[], help='country code (repeatable, default all)')
+    parser.add_argument('--repeat', type=int, default=5, help='repetitions per query')
+    parser.add_argument('--rows', type=int, default=200, help='synthetic disclosures per country for the ingest timing')
+    parser.add_argument('--label', default='', help='label stored with the results')
+    parser.add_argument('--json', help='save the results to this file')
+    args = parser.parse_args()
+
+    print("🧩 Country-scoped query benchmark")
+    print("=" * 50)
+
+    ensure_db_ready()
+    partitioned = is_partitioned(engine)
+    explain = engine.dialect.name == 'postgresql'
+    print(f"📋 {engine.dialect.name}, short_positions {'partitioned' if partitioned else 'not partitioned'}")
+
+    # Only the SQL implementations are measured
+    analytics.USE_POSITION_STORE = False
+    analytics.duckdb_analytics.DUCKDB_QUERIES = set()
+
+    db = SessionLocal()
+    results = {"label": args.label, "dialect": engine.dialect.name, "partitioned": partitioned,
+               "timestamp": datetime.now().isoformat(), "countries": {}}
+    try:
+        countries = db.query(Country).order_by(Country.code)
+        if args.country:
+            countries = countries.filter(Country.code.in_([c.upper() for c in args.country]))
+        year_ago = datetime.now() - timedelta(days=365)
+
+        for country in countries.all():
+            count = db.query(func.count(ShortPosition.id)).filter(ShortPosition.country_id == country.id).scalar()
+            if not count:
+                continue
+            as_of = positions_as_of_subq(db, year_ago, country_id=country.id)
+            as_of_query = db.query(func.count()).select_from(as_of)
+            timings = {
+                "most_shorted_ms": _timed(lambda: asyncio.run(analytics.get_most_shorted_companies(db, country.id)), args.repeat),
+                "top_managers_ms": _timed(lambda: asyncio.run(analytics.get_top_managers(db, country.id)), args.repeat),
+                "as_of_ms": _timed(lambda: as_of_query.scalar(), args.repeat),
+                "ingest_ms_per_row": ingest(db, country, args.rows),
+            }
+            touched = f"   partitions scanned {partitions_touched(db, as_of_query)}" if explain else ""
+            results["countries"][country.code] = {"positions": count, **timings}
+            print(f"{country.code}: {count:>8} positions   most shorted {timings['most_shorted_ms']:8.2f} ms   "
+                  f"top managers {timings['top_managers_ms']:8.2f} ms   as-of {timings['as_of_ms']:8.2f} ms   "
+                  f"ingest {timings['ingest_ms_per_row']:6.2f} ms/row{touched}")
+    finally:
+        db.close()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark and equivalence check for app/utils/name_normalization.py
+
+Loads every name from the managers and companies tables, checks the new
+normalizers give exactly the same output as the original per-character /
+per-abbreviation implementation, then times:
+
+- legacy: the original functions, once per name
+- cold:   the new functions with an empty memo
+- warm:   the new functions again (memo hits)
+- batch:  normalize_*_names over a Series with every name repeated
+          --repeat times, as in a scraped file
+
+Usage:
+    python scripts/benchmark_name_normalization.py [--repeat 20]
+    python scripts/benchmark_name_normalization.py --synthetic 50000   # without a database
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import name_normalization as nn
+
+
+# ----------------------------------------------------------------------
+# Reference implementation (as it was in daily_scraping_service.py)
+# ----------------------------------------------------------------------
+
+def legacy_title_case(text):
+    return ''.join(char.upper() if i == 0 or text[i-1].isspace()
+                   else char.lower() for i, char in enumerate(text))
+
+
+def legacy_normalize_manager_name(raw_name):
+    if not raw_name or not raw_name.strip():
+        return ""
+    name = raw_name.strip()
+    if any(0x0600 <= ord(char) <= 0x06FF for char in name):
+        name = nn.transliterate_arabic(name)
+    name = legacy_title_case(name)
+    for wrong, correct in nn.MANAGER_ABBREVIATIONS.items():
+        name = re.sub(r'\b' + re.escape(wrong) + r'\b', correct, name)
+    return ' '.join(name.split())
+
+
+def legacy_normalize_company_name(raw_name):
+    if not raw_name or not raw_name.strip():
+        return ""
+    name = legacy_title_case(raw_name.strip())
+    for wrong, correct in nn.COMPANY_ABBREVIATIONS.items():
+        name = re.sub(r'\b' + re.escape(wrong) + r'\b', correct, name)
+    return ' '.join(name.split())
+
+
+# ----------------------------------------------------------------------
+# Inputs
+# ----------------------------------------------------------------------
+
+def load_names_from_db():
+    from app.db.database import SessionLocal
+    from app.db.models import Manager, Company
+
+    db = SessionLocal()
+    try:
+        managers = [name for (name,) in db.query(Manager.name).all()]
+        companies = [name for (name,) in db.query(Company.name).all()]
+    finally:
+        db.close()
+    return managers, companies
+
+
+def synthetic_names(count, seed=0):
+    rng = random.Random(seed)
+    words = ['marshall', 'WACE', 'capital', 'Asset', 'management', 'llp', 'LTD', 'gmbh', 'sa', 'as', 'asa',
+             'ab', 'publ', 'A/S', 'nv', 'bv', 'oyj', 'spa', 'Société', 'générale', 'ΣΟΦΟΣ', 'Øresund', 'co']
+    return [
+        ' '.join(rng.choice(words) for _ in range(rng.randint(1, 5))) + rng.choice(['', ' ', '  ltd'])
+        for _ in range(count)
+    ]
+
+
+# ----------------------------------------------------------------------
+# Checks and timings
+# ----------------------------------------------------------------------
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"   {label:<8} {elapsed * 1000:9.1f} ms")
+    return result, elapsed
+
+
+def benchmark(kind, names, legacy, new, batch, repeat):
+    print(f"\n📊 {kind}: {len(names):,} names")
+    if not names:
+        print("   (table is empty)")
+        return True
+
+    new.cache_clear()
+    expected, legacy_time = timed('legacy', lambda: [legacy(n) for n in names])
+    actual, cold_time = timed('cold', lambda: [new(n) for n in names])
+    _, warm_time = timed('warm', lambda: [new(n) for n in names])
+
+    series = pd.Series(names * repeat)
+    new.cache_clear()
+    _, legacy_batch_time = timed(f'legacy x{repeat}', lambda: series.map(legacy))
+    batch_result, batch_time = timed(f'batch x{repeat}', lambda: batch(series))
+
+    mismatches = [(n, e, a) for n, e, a in zip(names, expected, actual) if e != a]
+    batch_ok = batch_result.tolist() == expected * repeat
+    for name, e, a in mismatches[:10]:
+        print(f"   ❌ {name!r}: legacy {e!r} != new {a!r}")
+
+    print(f"   speedup: cold {legacy_time / max(cold_time, 1e-9):.1f}x, "
+          f"warm {legacy_time / max(warm_time, 1e-9):.1f}x, "
+          f"batch {legacy_batch_time / max(batch_time, 1e-9):.1f}x")
+    ok = not mismatches and batch_ok
+    print(f"   {'✅ identical output' if ok else '❌ output differs'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20, help='times each name appears in the batch run')
+    parser.add_argument('--synthetic', type=int, default=0, help='use N generated names instead of the database')
+    args = parser.parse_args()
+
+    print("🧪 Name normalization benchmark")
+    print("=" * 50)
+
+    if args.synthetic:
+        managers = synthetic_names(args.synthetic, seed=1)
+        companies = synthetic_names(args.synthetic, seed=2)
+    else:
+        managers, companies = load_names_from_db()
+
+    ok = benchmark('Managers', managers, legacy_normalize_manager_name,
+                   nn.normalize_manager_name, nn.normalize_manager_names, args.repeat)
+    ok &= benchmark('Companies', companies, legacy_normalize_company_name,
+                    nn.normalize_company_name, nn.normalize_company_names, args.repeat)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
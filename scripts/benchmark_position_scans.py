@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Scan benchmark for short_positions (before/after moving the payload columns out)
+
+Run it before and after scripts/migrate_position_payloads.py on the same data.
+It reports the table's on-disk size and times the full-table scans the
+analytics do:
+
+    select *        every column of every row (what a wide row costs)
+    sum by country  SUM(position_size) per country
+    active count    active positions per company
+    history         all rows of the (company, manager) pairs, ordered by date
+
+--json saves the results for comparison.
+
+Usage:
+    python scripts/benchmark_position_scans.py --label before --json before.json
+    python scripts/migrate_position_payloads.py --vacuum
+    python scripts/benchmark_position_scans.py --label after --json after.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app.db.database import engine, ensure_db_ready
+
+SCANS = {
+    "select_all": "SELECT * FROM short_positions",
+    "sum_by_country": "SELECT country_id, SUM(position_size) FROM short_positions GROUP BY country_id",
+    "active_count": "SELECT company_id, COUNT(*) FROM short_positions WHERE is_active = :active GROUP BY company_id",
+    "history": "SELECT company_id, manager_id, date, position_size FROM short_positions "
+               "ORDER BY company_id, manager_id, date",
+}
+
+
+def table_size(conn) -> dict:
+    """Bytes used by short_positions (heap, and with indexes where the database reports it)"""
+    if engine.dialect.name == 'postgresql':
+        heap, total = conn.execute(text(
+            "SELECT pg_relation_size('short_positions'), pg_total_relation_size('short_positions')"
+        )).one()
+        return {"heap_bytes": heap, "total_bytes": total}
+    if engine.dialect.name == 'sqlite':
+        try:
+            heap = conn.execute(text("SELECT SUM(pgsize) FROM dbstat WHERE name = 'short_positions'")).scalar()
+            return {"heap_bytes": heap}
+        except Exception:
+            pass  # SQLite built without dbstat
+        pages = conn.execute(text("PRAGMA page_count")).scalar() * conn.execute(text("PRAGMA page_size")).scalar()
+        return {"database_bytes": pages}
+    return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='repetitions per scan')
+    parser.add_argument('--label', default='', help='label stored with the results')
+    parser.add_argument('--json', help='save the results to this file')
+    args = parser.parse_args()
+
+    print("📏 short_positions scan benchmark")
+    print("=" * 50)
+
+    ensure_db_ready()
+    columns = [column['name'] for column in inspect(engine).get_columns('short_positions')]
+    results = {"label": args.label, "dialect": engine.dialect.name, "timestamp": datetime.now().isoformat(),
+               "columns": columns, "scans_ms": {}}
+
+    with engine.connect() as conn:
+        results["rows"] = conn.execute(text("SELECT COUNT(*) FROM short_positions")).scalar()
+        results.update(table_size(conn))
+        print(f"📋 {results['rows']} rows, {len(columns)} columns"
+              + "".join(f", {key.replace('_bytes', '')} {value / 1024 / 1024:.1f} MB"
+                        for key, value in results.items() if key.endswith('_bytes') and value))
+
+        for name, sql in SCANS.items():
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                conn.execute(text(sql), {"active": True}).fetchall()
+            elapsed = (time.perf_counter() - start) / args.repeat * 1000
+            results["scans_ms"][name] = elapsed
+            print(f"⏱️  {name:<16} {elapsed:10.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
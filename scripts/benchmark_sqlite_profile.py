@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent reads during a simulated ingest: default SQLite vs the WAL profile
+
+Copies a SQLite database twice and, on each copy, runs reader threads issuing
+the country analytics queries while a writer inserts disclosures in
+transactions (like _update_database does per country):
+
+    default   one engine, rollback journal, default pragmas (the old setup)
+    profile   create_sqlite_engines(): WAL, synchronous=NORMAL, mmap, cache,
+              temp_store, one writer connection and a query_only reader pool
+
+Reports reads/s, read latency percentiles, "database is locked" errors and
+write throughput for each.
+
+Usage:
+    DATABASE_URL=sqlite:///database.db python scripts/benchmark_sqlite_profile.py
+    DATABASE_URL=sqlite:///database.db python scripts/benchmark_sqlite_profile.py --readers 16 --seconds 20
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import DATABASE_URL, create_sqlite_engines
+from app.db.models import ShortPosition
+
+READ_QUERIES = (
+    # Most shorted companies of a country
+    """SELECT company_id, SUM(position_size), COUNT(*), MAX(date) FROM short_positions
+       WHERE is_active = 1 AND country_id = :country GROUP BY company_id ORDER BY 2 DESC LIMIT 10""",
+    # Top managers of a country
+    """SELECT manager_id, SUM(position_size) FROM short_positions
+       WHERE is_active = 1 AND country_id = :country GROUP BY manager_id ORDER BY 2 DESC LIMIT 10""",
+    # Latest disclosures
+    """SELECT id, company_id, manager_id, position_size, date FROM short_positions
+       WHERE country_id = :country ORDER BY date DESC LIMIT 50""",
+)
+
+
+def _reader(engine, countries, stop, latencies, errors):
+    while not stop.is_set():
+        sql = random.choice(READ_QUERIES)
+        start = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                conn.execute(text(sql), {"country": random.choice(countries)}).fetchall()
+            latencies.append(time.perf_counter() - start)
+        except OperationalError:
+            errors.append(1)
+
+
+def _writer(engine, stop, batch, counters):
+    """Insert batches of disclosures, one transaction per batch, until stopped"""
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with engine.connect() as conn:
+        company_country = dict(conn.execute(text("SELECT id, country_id FROM companies")).fetchall())
+        managers = [r[0] for r in conn.execute(text("SELECT id FROM managers")).fetchall()]
+    day = datetime(2030, 1, 1)
+    while not stop.is_set():
+        try:
+            db = Session()
+            for _ in range(batch):
+                company_id = random.choice(list(company_country))
+                db.add(ShortPosition(
+                    company_id=company_id, manager_id=random.choice(managers),
+                    country_id=company_country[company_id], date=day,
+                    position_size=round(random.uniform(0.5, 3.0), 2), is_active=False,
+                ))
+                db.flush()  # _update_database flushes each disclosure to link its validity interval
+            db.commit()
+            counters['rows'] += batch
+            counters['transactions'] += 1
+        except OperationalError:
+            db.rollback()
+            counters['errors'] += 1
+        finally:
+            db.close()
+        day += timedelta(days=1)
+
+
+def run(label, writer_engine, reader_engine, countries, args):
+    stop = threading.Event()
+    latencies, errors = [], []
+    counters = {'rows': 0, 'transactions': 0, 'errors': 0}
+
+    threads = [threading.Thread(target=_reader, args=(reader_engine, countries, stop, latencies, errors))
+               for _ in range(args.readers)]
+    if not args.no_writer:
+        threads.append(threading.Thread(target=_writer, args=(writer_engine, stop, args.batch, counters)))
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    print(f"📊 {label:<8} reads {len(latencies) / args.seconds:8.1f}/s   "
+          f"p50 {np.percentile(ms, 50):7.2f} ms   p95 {np.percentile(ms, 95):7.2f} ms   "
+          f"p99 {np.percentile(ms, 99):7.2f} ms   read errors {len(errors)}   "
+          f"writes {counters['rows'] / args.seconds:7.1f} rows/s ({counters['errors']} failed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=8, help='reader threads')
+    parser.add_argument('--seconds', type=float, default=10, help='duration of each run')
+    parser.add_argument('--batch', type=int, default=500, help='rows per write transaction')
+    parser.add_argument('--no-writer', action='store_true', help='reads only (no simulated ingest)')
+    args = parser.parse_args()
+
+    print("🗄️ SQLite profile benchmark")
+    print("=" * 50)
+
+    source = make_url(DATABASE_URL)
+    if source.get_backend_name() != "sqlite" or not source.database or not os.path.exists(source.database):
+        print(f"❌ Needs a SQLite database file, got {DATABASE_URL}")
+        sys.exit(1)
+
+    workdir = tempfile.mkdtemp(prefix="sqlite_bench_")
+    try:
+        copies = {}
+        for label in ("default", "profile"):
+            copies[label] = os.path.join(workdir, f"{label}.db")
+            shutil.copy(source.database, copies[label])
+            # The copy must start in rollback-journal mode even if the source uses WAL
+            with create_engine(f"sqlite:///{copies[label]}").connect() as conn:
+                conn.exec_driver_sql("PRAGMA journal_mode=DELETE")
+
+        # As app/db/database.py created it before the profile
+        default_engine = create_engine(f"sqlite:///{copies['default']}", pool_pre_ping=True)
+        with default_engine.connect() as conn:
+            countries = [r[0] for r in conn.execute(text("SELECT DISTINCT country_id FROM short_positions"))]
+            total = conn.execute(text("SELECT COUNT(*) FROM short_positions")).scalar()
+        print(f"📋 {total} positions, {len(countries)} countries, {args.readers} readers, "
+              f"{'no writer' if args.no_writer else f'writer batches of {args.batch}'}, {args.seconds:.0f}s per run")
+
+        run("default", default_engine, default_engine, countries, args)
+        default_engine.dispose()
+
+        writer, reader = create_sqlite_engines(f"sqlite:///{copies['profile']}", readers=args.readers)
+        run("profile", writer, reader, countries, args)
+        writer.dispose()
+        reader.dispose()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Build the multi-resolution company timelines (company_timelines)
+
+Daily ingestion rebuilds the companies it adds disclosures for, and a missing
+timeline is built on first request; this fills the table up front (after an
+import, or to rebuild everything). Safe to re-run.
+
+Usage:
+    python scripts/build_company_timelines.py                 # every company with positions
+    python scripts/build_company_timelines.py --company 42    # one company (repeatable)
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func
+
+from app.db.database import SessionLocal, ensure_db_ready, init_db
+from app.db.models import CompanyTimeline, ShortPosition
+from app.services.timeline_pyramid import rebuild_company_timelines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--company', type=int, action='append', default=[], help='company id (repeatable)')
+    parser.add_argument('--batch-size', type=int, default=200, help='companies per commit')
+    args = parser.parse_args()
+
+    print("📈 Company timeline build")
+    print("=" * 50)
+
+    ensure_db_ready()
+    init_db()
+
+    db = SessionLocal()
+    try:
+        company_ids = args.company or [row.company_id for row in db.query(ShortPosition.company_id).distinct()]
+        print(f"🏢 {len(company_ids)} companies")
+
+        start = time.perf_counter()
+        built = rebuild_company_timelines(db, company_ids, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - start
+
+        stored = db.query(func.count(CompanyTimeline.id), func.sum(func.length(CompanyTimeline.data))).one()
+    finally:
+        db.close()
+
+    print(f"✅ {built} timelines built in {elapsed:.2f}s "
+          f"({stored[0]} levels stored, {(stored[1] or 0) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
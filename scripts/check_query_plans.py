@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression check for the analytics, API and ingestion SQL
+
+Seeds a scratch database with synthetic data (benchmarks/synthetic.py), runs
+the application's queries against it, records every SQL statement they issue,
+and captures its plan (EXPLAIN QUERY PLAN on SQLite, EXPLAIN (FORMAT JSON) on
+Postgres). The queries come from three places:
+
+    analytics   the functions of app/services/analytics.py
+    api         the GET endpoints of the countries, companies, managers, positions,
+                analytics and search routers (through FastAPI's TestClient)
+    ingest      DailyScrapingService._update_database on a synthetic scrape
+                (dedupe probe, get-or-create lookups, validity links), then
+                the rollup/timeline refresh
+
+Each plan is compared with the baseline for the dialect in
+benchmarks/query_plans.json (the capture and comparison live in
+benchmarks/query_plans.py; tests/test_query_plans.py runs the same check in
+pytest). The check fails (exit 1) when a query:
+
+- now scans a large table (--min-rows) it used to reach through an index
+- (Postgres) has an estimated cost more than --threshold above the baseline
+
+It also lists full scans of large tables, with a composite index built from
+the query's predicates on that table where no existing index covers them,
+and flags functions wrapped around columns (upper(), date(), ...), which
+keep an index on that column from being used.
+
+The scratch database is a fresh SQLite file by default. A Postgres URL must
+point at an empty database (--reset drops the app's tables first).
+
+Usage:
+    python scripts/check_query_plans.py
+    python scripts/check_query_plans.py --positions 500000 --json plans.json
+    python scripts/check_query_plans.py --database-url postgresql://localhost/plans_scratch --reset
+    python scripts/check_query_plans.py --update-baseline   # accept the current plans
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.query_plans import (
+    BASELINE_PATH, INGEST_ROWS, MIN_ROWS, THRESHOLD, baseline_entry, capture, compare, load_baselines,
+    suggest_indexes,
+)
+from benchmarks.scenarios import configure_environment
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', help='scratch database (default: a fresh SQLite file in the temp dir)')
+    parser.add_argument('--reset', action='store_true', help="drop the app's tables in --database-url first")
+    parser.add_argument('--positions', type=int, default=100000, help='synthetic disclosures to seed')
+    parser.add_argument('--seed', type=int, default=0, help='generator seed')
+    parser.add_argument('--ingest-rows', type=int, default=INGEST_ROWS, help='re-scraped disclosures in the ingest scenario')
+    parser.add_argument('--min-rows', type=int, default=MIN_ROWS, help='tables at least this big must not lose index usage')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help='allowed estimated cost growth (Postgres)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline file')
+    parser.add_argument('--update-baseline', action='store_true', help="store this run's plans as the baseline")
+    parser.add_argument('--json', help='save every captured query and plan to this file')
+    args = parser.parse_args()
+
+    print("🔬 Query-plan regression check")
+    print("=" * 50)
+    url = configure_environment(args.database_url, f"query_plans_{args.positions}_{args.seed}")
+
+    from sqlalchemy import inspect, text
+    from benchmarks.synthetic import generate, populate
+    from app.core.config import settings
+    from app.db.database import engine
+    from app.db.models import Base
+
+    dialect = engine.dialect.name
+    if args.database_url:
+        existing_tables = set(inspect(engine).get_table_names())
+        if args.reset:
+            Base.metadata.drop_all(bind=engine)
+        elif 'short_positions' in existing_tables:
+            with engine.connect() as conn:
+                if conn.execute(text("SELECT COUNT(*) FROM short_positions")).scalar():
+                    print(f"❌ {url.split('@')[-1]} already has positions: use an empty scratch database or --reset")
+                    sys.exit(1)
+
+    start = time.perf_counter()
+    data = generate(args.positions, countries=len(settings.countries), seed=args.seed)
+    counts = populate(engine, data)
+    print(f"🌱 Seeded {dialect} in {time.perf_counter() - start:.0f}s: {counts}")
+
+    captured = capture(engine, args.ingest_rows, args.min_rows)
+    plans, rows, large, existing = captured['plans'], captured['rows'], captured['large'], captured['existing']
+    by_scenario = defaultdict(list)
+    for key, plan in plans.items():
+        by_scenario[plan['scenario']].append(plan)
+    print(f"\n📋 {len(plans)} distinct statements in {len(by_scenario)} scenarios "
+          f"(large tables: {', '.join(f'{t} {n}' for t, n in large.items())})")
+    for scenario, scenario_plans in sorted(by_scenario.items()):
+        scans = sorted({t for plan in scenario_plans for t in plan['full_scans'] if t in large})
+        print(f"   {scenario:<75} {len(scenario_plans):>3} queries"
+              + (f"   scans {', '.join(scans)}" if scans else ""))
+
+    suggestions, wrapped = suggest_indexes(plans, large, existing)
+    if suggestions:
+        print("\n💡 Composite indexes for scanned large tables:")
+        for (table, columns), keys in sorted(suggestions.items(), key=lambda item: -len(item[1])):
+            print(f"   CREATE INDEX idx_{table}_{'_'.join(columns)} ON {table} ({', '.join(columns)});"
+                  f"   -- {len(keys)} quer{'y' if len(keys) == 1 else 'ies'}, e.g. {keys[0]}")
+    if wrapped:
+        print("\n💡 Functions on columns of scanned large tables (no plain index can serve them):")
+        for key, column, function in wrapped:
+            print(f"   {function}({column})   in {key}")
+
+    baselines = load_baselines(args.baseline)
+    baseline = baselines.get(dialect, {}).get('queries', {})
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'dialect': dialect, 'positions': args.positions, 'seed': args.seed, 'rows': rows,
+                       'timestamp': datetime.now().isoformat(), 'queries': plans}, f, indent=2, default=str)
+        print(f"\n💾 Plans saved to {args.json}")
+
+    if args.update_baseline:
+        baselines[dialect] = {'positions': args.positions, 'seed': args.seed,
+                              'queries': {key: baseline_entry(plan) for key, plan in sorted(plans.items())}}
+        with open(args.baseline, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\n💾 Baseline for {dialect} updated: {args.baseline}")
+        return
+
+    if not baseline:
+        print(f"\n⚠️  No {dialect} baseline in {args.baseline}: run with --update-baseline to create it")
+        return
+    if baselines[dialect].get('positions') != args.positions or baselines[dialect].get('seed') != args.seed:
+        print(f"\n⚠️  Baseline was captured with {baselines[dialect].get('positions')} positions, "
+              f"seed {baselines[dialect].get('seed')}: plans may differ for that reason alone")
+
+    failures, warnings, gone = compare(plans, baseline, large, args.threshold)
+    for warning in warnings:
+        print(f"⚠️  {warning}")
+    if gone:
+        print(f"ℹ️  {len(gone)} baseline queries were not issued this run (changed or removed)")
+    if failures:
+        print(f"\n❌ {len(failures)} plan regressions:")
+        for failure in failures:
+            print(f"   {failure}")
+        sys.exit(1)
+    print(f"\n✅ No plan regressions against the {dialect} baseline ({len(baseline)} queries)")
+
+
+if __name__ == "__main__":
+    main()
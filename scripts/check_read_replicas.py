@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Show the read-replica routing: each replica's ingest watermark against the primary's
+
+Reads DATABASE_URL and DATABASE_READ_URL(S) like the API does. To try it
+locally with two SQLite files:
+
+    cp database.db replica.db
+    DATABASE_URL=sqlite:///database.db DATABASE_READ_URL=sqlite:///replica.db \\
+        python scripts/check_read_replicas.py
+
+After an ingest on the primary the replica is reported as behind and reads go
+to the primary until it is refreshed (e.g. with sqlite3 .backup).
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import replicas
+from app.db.database import ReadSessionLocal, ensure_db_ready, replica_router
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    print("🔀 Read replica routing")
+    print("=" * 50)
+
+    ensure_db_ready()
+
+    if replica_router is None:
+        print("ℹ️ No DATABASE_READ_URL(S) set: read-only endpoints use the primary")
+        return
+
+    primary_mark = replicas.ingest_watermark(replica_router.primary)
+    print(f"📌 Primary watermark: {primary_mark}")
+    for replica in replica_router.replicas:
+        name = replica.url.host or replica.url.database
+        try:
+            mark = replicas.ingest_watermark(replica)
+        except Exception as e:
+            print(f"❌ {name}: unavailable ({e})")
+            continue
+        caught_up = primary_mark is None or (mark is not None and mark >= primary_mark)
+        print(f"{'✅' if caught_up else '⏳'} {name}: watermark {mark}{'' if caught_up else ' (behind)'}")
+
+    replicas.REPLICA_CHECK_SECONDS = 0
+    db = ReadSessionLocal()
+    try:
+        engine = db.get_bind()
+        print(f"➡️  Read sessions now go to {engine.url.host or engine.url.database}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Parity check and benchmark: DuckDB over Parquet vs the SQLAlchemy analytics
+
+Exports a fresh Parquet snapshot (unless --no-export), then runs every query
+DuckDB can serve - most shorted companies and top managers for each country,
+global top managers - through both implementations, compares the results and
+times them. Exits with status 1 on any mismatch.
+
+Requires duckdb (pip install duckdb==0.9.2; not in requirements.txt).
+The same parity checks run in pytest: tests/test_duckdb_parity.py.
+
+Usage:
+    python scripts/compare_duckdb_analytics.py
+    python scripts/compare_duckdb_analytics.py --repeat 20 --country GB --country DE
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.database import SessionLocal, ensure_db_ready, init_db
+from app.services import analytics, duckdb_analytics
+from benchmarks.scenarios import duckdb_parity_cases, same_ranking
+
+
+def _timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--country', action='append', default=[], help='country code (repeatable, default all)')
+    parser.add_argument('--repeat', type=int, default=5, help='timing repetitions per query')
+    parser.add_argument('--no-export', action='store_true', help='reuse the current Parquet snapshot')
+    args = parser.parse_args()
+
+    print("🦆 DuckDB vs SQLAlchemy analytics")
+    print("=" * 50)
+
+    if duckdb_analytics.duckdb is None:
+        print("❌ duckdb is not installed (pip install duckdb==0.9.2)")
+        sys.exit(1)
+
+    ensure_db_ready()
+    init_db()
+
+    # The SQL side must not be answered by another read path
+    analytics.USE_POSITION_STORE = False
+    duckdb_analytics.DUCKDB_QUERIES = set()
+
+    db = SessionLocal()
+    try:
+        if not args.no_export:
+            start = time.perf_counter()
+            version = duckdb_analytics.export_parquet(db)
+            print(f"✅ Exported {version} in {time.perf_counter() - start:.2f}s")
+
+        cases = duckdb_parity_cases(db, args.country)
+
+        mismatches = 0
+        sql_total = duck_total = 0.0
+        for _, label, sql_fn, duck_fn, sort_key, id_key in cases:
+            expected, sql_ms = _timed(sql_fn, args.repeat)
+            got, duck_ms = _timed(duck_fn, args.repeat)
+            same = same_ranking(expected, got, sort_key, id_key)
+            mismatches += not same
+            sql_total += sql_ms
+            duck_total += duck_ms
+            print(f"{'✅' if same else '❌'} {label:<28} SQL {sql_ms:8.2f} ms   DuckDB {duck_ms:8.2f} ms")
+    finally:
+        db.close()
+
+    print("=" * 50)
+    print(f"⏱️  Total: SQL {sql_total:.1f} ms, DuckDB {duck_total:.1f} ms over {len(cases)} queries")
+    if mismatches:
+        print(f"❌ {mismatches} queries differ")
+        sys.exit(1)
+    print("✅ All queries match")
+
+
+if __name__ == "__main__":
+    main()
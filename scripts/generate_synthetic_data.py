@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Seed a database with deterministic synthetic short positions
+
+Generates countries x companies x managers x disclosures with
+benchmarks/synthetic.py (same --positions and --seed: same rows) and loads
+them into an empty database, SQLite or Postgres, from 10k to 10M positions.
+Unless --no-derived is given, it then builds what the daily ingest would:
+rollups, company timelines and planner statistics.
+
+The target must not hold positions already (--reset drops the app's tables
+first). Without --database-url it seeds the configured DATABASE_URL.
+
+Usage:
+    python scripts/generate_synthetic_data.py --database-url sqlite:///synthetic_1m.db --positions 1000000
+    python scripts/generate_synthetic_data.py --database-url postgresql://localhost/bench --positions 10000000 --reset
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', help='database to seed (default: DATABASE_URL)')
+    parser.add_argument('--reset', action='store_true', help="drop the app's tables first")
+    parser.add_argument('--positions', type=int, default=100000, help='disclosures to generate')
+    parser.add_argument('--countries', type=int, help='countries (default: all configured)')
+    parser.add_argument('--seed', type=int, default=0, help='generator seed')
+    parser.add_argument('--no-derived', action='store_true', help='skip rollups, timelines and ANALYZE')
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+
+    from sqlalchemy import inspect, text
+    from benchmarks.synthetic import generate, populate
+    from app.core.config import settings
+    from app.db.database import engine
+    from app.db.models import Base
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    print("🌱 Synthetic data generator")
+    print("=" * 50)
+
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+        print("🗑️  Dropped the app's tables")
+    elif 'short_positions' in inspect(engine).get_table_names():
+        with engine.connect() as conn:
+            if conn.execute(text("SELECT COUNT(*) FROM short_positions")).scalar():
+                print(f"❌ {engine.url.render_as_string(hide_password=True)} already has positions: "
+                      f"use an empty database or --reset")
+                sys.exit(1)
+
+    start = time.perf_counter()
+    data = generate(args.positions, countries=args.countries or len(settings.countries), seed=args.seed)
+    print(f"🎲 Generated {len(data['short_positions'])} positions, {len(data['companies'])} companies, "
+          f"{len(data['managers'])} managers in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    counts = populate(engine, data, derived=not args.no_derived)
+    print(f"✅ Seeded {engine.dialect.name} in {time.perf_counter() - start:.0f}s: {counts}")
+
+
+if __name__ == "__main__":
+    main()
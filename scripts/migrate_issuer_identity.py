@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Migration: global issuer identity by ISIN
+
+- creates the issuers table
+- adds companies.issuer_id (+ index) to existing databases
+- links every company that has an ISIN to its issuer, in batches
+
+Safe to re-run: only companies that are not linked yet are processed.
+
+Usage:
+    python scripts/migrate_issuer_identity.py [--batch-size 1000]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app.db.database import SessionLocal, engine, ensure_db_ready
+from app.db.models import Company, Issuer
+from app.services.issuer_identity import IssuerIndex
+
+
+def ensure_schema():
+    Issuer.__table__.create(bind=engine, checkfirst=True)
+
+    inspector = inspect(engine)
+    columns = {column['name'] for column in inspector.get_columns('companies')}
+    with engine.begin() as conn:
+        if 'issuer_id' not in columns:
+            print("➕ Adding companies.issuer_id")
+            conn.execute(text("ALTER TABLE companies ADD COLUMN issuer_id INTEGER REFERENCES issuers(id)"))
+        indexes = {index['name'] for index in inspector.get_indexes('companies')}
+        if 'idx_company_issuer' not in indexes:
+            conn.execute(text("CREATE INDEX idx_company_issuer ON companies (issuer_id)"))
+
+
+def link_companies(batch_size: int):
+    db = SessionLocal()
+    try:
+        index = IssuerIndex.load(db)
+        linked = 0
+        last_id = 0
+        while True:
+            companies = db.query(Company).filter(
+                Company.id > last_id,
+                Company.issuer_id.is_(None),
+                Company.isin.isnot(None),
+            ).order_by(Company.id).limit(batch_size).all()
+            if not companies:
+                break
+
+            for company in companies:
+                index.link_company(db, company)
+                linked += company.issuer_id is not None
+            last_id = companies[-1].id
+            db.commit()
+            print(f"   ... {linked} companies linked (up to id {last_id})")
+
+        print(f"✅ {linked} companies linked to {len(index)} issuers")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    print("🏷️  Issuer identity migration")
+    print("=" * 50)
+
+    ensure_db_ready()
+    ensure_schema()
+    link_companies(args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Migration: stored name_key lookup columns on managers and companies
+
+- adds managers.name_key / companies.name_key and their indexes to existing
+  databases
+- backfills the keys in batches (keyset pagination on id, one UPDATE
+  round-trip per batch)
+
+New and renamed rows get their key from the ORM (see models._set_name_key).
+Safe to re-run: only rows whose key is missing or stale are written.
+
+Usage:
+    python scripts/migrate_name_keys.py [--batch-size 5000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app.db.database import SessionLocal, engine, ensure_db_ready
+from app.db.models import Company, Manager
+from app.utils.name_normalization import name_key
+
+# table -> (model, index name, indexed columns)
+TABLES = {
+    'managers': (Manager, 'ix_managers_name_key', 'name_key'),
+    'companies': (Company, 'idx_company_name_key_country', 'name_key, country_id'),
+}
+
+
+def ensure_schema():
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table, (_, index_name, index_columns) in TABLES.items():
+            columns = {column['name'] for column in inspector.get_columns(table)}
+            if 'name_key' not in columns:
+                print(f"➕ Adding {table}.name_key")
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN name_key VARCHAR(200)"))
+            indexes = {index['name'] for index in inspector.get_indexes(table)}
+            if index_name not in indexes:
+                print(f"➕ Creating index {index_name}")
+                conn.execute(text(f"CREATE INDEX {index_name} ON {table} ({index_columns})"))
+
+
+def backfill(model, batch_size: int) -> int:
+    table = model.__table__
+    # Plain UPDATE: a backfill shouldn't bump updated_at
+    stmt = text(f"UPDATE {table.name} SET name_key = :key WHERE id = :row_id")
+
+    db = SessionLocal()
+    updated = 0
+    last_id = 0
+    try:
+        while True:
+            rows = db.query(model.id, model.name, model.name_key).filter(
+                model.id > last_id
+            ).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            changes = [
+                {'row_id': row.id, 'key': name_key(row.name)}
+                for row in rows if row.name_key != name_key(row.name)
+            ]
+            if changes:
+                db.execute(stmt, changes)
+                db.commit()
+            updated += len(changes)
+            last_id = rows[-1].id
+            print(f"   ... {table.name}: {updated} keys written (up to id {last_id})")
+    finally:
+        db.close()
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    print("🔑 name_key migration")
+    print("=" * 50)
+
+    ensure_db_ready()
+    ensure_schema()
+
+    for table, (model, _, _) in TABLES.items():
+        start = time.perf_counter()
+        updated = backfill(model, args.batch_size)
+        print(f"✅ {table}: {updated} rows backfilled in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
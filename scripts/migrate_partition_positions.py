@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Migration (Postgres, opt-in): partition short_positions by country
+
+Rebuilds short_positions as a table partitioned BY LIST (country_id), in one
+transaction:
+
+- renames the current table to short_positions_unpartitioned
+- creates the partitioned table with the same columns, PRIMARY KEY (id, country_id)
+  and the foreign keys, and hands the id sequence over to it
+- one partition per country (short_positions_<code>) plus short_positions_default
+- copies every row, checks the counts, drops the old table
+- recreates the model's indexes on the parent (each partition gets its own)
+
+Afterwards, country-scoped queries and each country's daily load only touch
+that country's partition. The ingestion service creates the partitions of
+countries added later. Take a backup first. With --dry-run it only prints the SQL.
+Re-running on a partitioned table just adds missing country partitions.
+
+Usage:
+    python scripts/migrate_partition_positions.py --dry-run
+    python scripts/migrate_partition_positions.py
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+
+from app.db.database import engine, ensure_db_ready
+from app.db.models import ShortPosition
+from app.db.partitioning import (
+    DEFAULT_PARTITION, PARENT, create_country_partition, is_partitioned, partition_name,
+)
+
+OLD = "short_positions_unpartitioned"
+FOREIGN_KEYS = {
+    'company_id': 'companies',
+    'manager_id': 'managers',
+    'country_id': 'countries',
+}
+
+
+def migration_sql(conn):
+    """The statements turning the plain table into the partitioned one"""
+    columns = ", ".join(column.name for column in ShortPosition.__table__.columns)
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": PARENT}).scalar()
+    countries = conn.execute(text("SELECT id, code FROM countries ORDER BY code")).fetchall()
+    primary_key = conn.execute(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:table AS regclass) AND contype = 'p'"
+    ), {"table": PARENT}).scalar()
+
+    statements = [
+        f"ALTER TABLE {PARENT} RENAME TO {OLD}",
+    ]
+    if primary_key:
+        # Frees the name for the new table's key
+        statements.append(f"ALTER TABLE {OLD} RENAME CONSTRAINT {primary_key} TO {OLD}_pkey")
+    statements += [
+        f"CREATE TABLE {PARENT} (LIKE {OLD} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY LIST (country_id)",
+        f"ALTER TABLE {PARENT} ADD PRIMARY KEY (id, country_id)",
+    ]
+    statements += [
+        f"ALTER TABLE {PARENT} ADD FOREIGN KEY ({column}) REFERENCES {table} (id)"
+        for column, table in FOREIGN_KEYS.items()
+    ]
+    if sequence:
+        # The sequence belongs to the old id column: without this it would be dropped with it
+        statements.append(f"ALTER SEQUENCE {sequence} OWNED BY {PARENT}.id")
+    statements += [
+        f"CREATE TABLE {partition_name(code)} PARTITION OF {PARENT} FOR VALUES IN ({int(country_id)})"
+        for country_id, code in countries
+    ]
+    statements += [
+        f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT",
+        f"INSERT INTO {PARENT} ({columns}) SELECT {columns} FROM {OLD}",
+    ]
+    return statements
+
+
+def index_sql():
+    """The model's indexes, created on the parent after the copy (one per partition, built in bulk)"""
+    return [str(CreateIndex(index).compile(dialect=engine.dialect)) for index in ShortPosition.__table__.indexes]
+
+
+def migrate(dry_run: bool):
+    with engine.connect() as conn:
+        statements = migration_sql(conn)
+    indexes = index_sql()
+
+    if dry_run:
+        for statement in statements + [f"DROP TABLE {OLD}"] + indexes + [f"ANALYZE {PARENT}"]:
+            print(f"{statement};")
+        return
+
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        before = conn.execute(text(f"SELECT COUNT(*) FROM {PARENT}")).scalar()
+        for statement in statements:
+            print(f"▶️  {statement[:100]}")
+            conn.execute(text(statement))
+
+        after = conn.execute(text(f"SELECT COUNT(*) FROM {PARENT}")).scalar()
+        if after != before:
+            raise RuntimeError(f"Row count mismatch after copy: {after} != {before}")
+        print(f"✅ Copied {after} positions")
+
+        conn.execute(text(f"DROP TABLE {OLD}"))
+        for statement in indexes:
+            print(f"➕ {statement}")
+            conn.execute(text(statement))
+
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text(f"ANALYZE {PARENT}"))
+        rows = conn.execute(text(f"""
+            SELECT c.relname, c.reltuples::bigint
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = :parent ORDER BY c.relname
+        """), {"parent": PARENT}).fetchall()
+    for name, tuples in rows:
+        print(f"   {name}: ~{tuples} rows")
+    print(f"✅ short_positions partitioned by country in {time.perf_counter() - start:.1f}s")
+
+
+def add_missing_partitions():
+    with engine.begin() as conn:
+        countries = conn.execute(text("SELECT id, code FROM countries ORDER BY code")).fetchall()
+        created = [code for country_id, code in countries if create_country_partition(conn, country_id, code)]
+    print(f"✅ Already partitioned; {len(created)} country partitions added {created if created else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dry-run', action='store_true', help='print the SQL without running it')
+    args = parser.parse_args()
+
+    print("🧩 short_positions country partitioning")
+    print("=" * 50)
+
+    ensure_db_ready()
+    if engine.dialect.name != 'postgresql':
+        print(f"❌ List partitioning needs Postgres (this database is {engine.dialect.name})")
+        sys.exit(1)
+
+    if is_partitioned(engine):
+        if not args.dry_run:
+            add_missing_partitions()
+        return
+    migrate(args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Migration: move raw_data and source_url out of short_positions
+
+- creates position_payloads
+- copies each position's raw_data (zlib-compressed) and source_url into it,
+  in id-ordered batches with a commit per batch, so it can be stopped and
+  re-run (positions that already have a payload are skipped)
+- drops short_positions.raw_data / source_url (unless --keep-columns)
+
+Dropping a column doesn't shrink the table by itself: pass --vacuum to rewrite
+it (VACUUM FULL on Postgres, which locks the table; VACUUM on SQLite).
+
+Usage:
+    python scripts/migrate_position_payloads.py [--batch-size 5000] [--keep-columns] [--vacuum]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app.db.database import SessionLocal, engine, ensure_db_ready
+from app.db.models import PositionPayload
+from app.services.position_payloads import payload_row, write_payloads
+
+MOVED_COLUMNS = ('raw_data', 'source_url')
+MIGRATION_RUN_ID = 'migrated'
+
+
+def existing_columns(bind=engine):
+    return {column['name'] for column in inspect(bind).get_columns('short_positions')}
+
+
+def move_payloads(batch_size: int) -> int:
+    db = SessionLocal()
+    moved = 0
+    last_id = 0
+    try:
+        while True:
+            rows = db.execute(text("""
+                SELECT id, raw_data, source_url FROM short_positions
+                WHERE id > :last_id AND (raw_data IS NOT NULL OR source_url IS NOT NULL)
+                ORDER BY id LIMIT :limit
+            """), {"last_id": last_id, "limit": batch_size}).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            done = {position_id for (position_id,) in db.query(PositionPayload.position_id).filter(
+                PositionPayload.position_id.between(rows[0].id, last_id)
+            )}
+            # raw_data was free text: it is kept as a JSON string
+            moved += write_payloads(db, [
+                payload_row(row.id, row.raw_data, row.source_url, MIGRATION_RUN_ID)
+                for row in rows if row.id not in done
+            ])
+            db.commit()
+            print(f"   ... up to position {last_id}: {moved} payloads moved")
+    finally:
+        db.close()
+    return moved
+
+
+def drop_columns(vacuum: bool):
+    with engine.begin() as conn:
+        columns = existing_columns(conn)
+        for column in MOVED_COLUMNS:
+            if column in columns:
+                print(f"➖ Dropping short_positions.{column}")
+                conn.execute(text(f"ALTER TABLE short_positions DROP COLUMN {column}"))
+
+    if vacuum:
+        statement = "VACUUM FULL short_positions" if engine.dialect.name == 'postgresql' else "VACUUM"
+        print(f"🧹 {statement}")
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text(statement))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=5000, help='positions per batch')
+    parser.add_argument('--keep-columns', action='store_true', help="copy only, don't drop the old columns")
+    parser.add_argument('--vacuum', action='store_true', help='rewrite the table afterwards to reclaim the space')
+    args = parser.parse_args()
+
+    print("📦 Position payload migration")
+    print("=" * 50)
+
+    ensure_db_ready()
+    PositionPayload.__table__.create(bind=engine, checkfirst=True)
+
+    columns = existing_columns()
+    if not any(column in columns for column in MOVED_COLUMNS):
+        print("✅ short_positions has no raw_data/source_url columns: nothing to move")
+        return
+
+    start = time.perf_counter()
+    moved = move_payloads(args.batch_size)
+    print(f"✅ {moved} payloads moved in {time.perf_counter() - start:.1f}s")
+
+    if not args.keep_columns:
+        drop_columns(args.vacuum)
+    print("✅ Done")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Migration: point-in-time validity intervals on short_positions
+
+- adds short_positions.valid_from / valid_to (+ indexes) to existing databases
+- computes every interval with a LEAD() window function, one country at a time
+  (a latest disclosure reported historic ends the day after its date)
+
+Daily ingestion maintains the intervals from then on. Re-run it after bulk
+imports that bypass the ingestion service (the legacy import scripts); it
+always recomputes from scratch, so it is safe to run any number of times.
+
+Usage:
+    python scripts/migrate_position_validity.py [--country GB]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app.db.database import SessionLocal, engine, ensure_db_ready
+from app.db.models import Country
+from app.services.position_validity import rebuild_position_validity
+
+INDEXES = {
+    'idx_position_validity': '(valid_to, valid_from)',
+    'idx_position_country_validity': '(country_id, valid_to, valid_from)',
+    'idx_position_key_validity': '(company_id, manager_id, valid_to)',
+}
+
+
+def ensure_schema():
+    inspector = inspect(engine)
+    columns = {column['name'] for column in inspector.get_columns('short_positions')}
+    indexes = {index['name'] for index in inspector.get_indexes('short_positions')}
+    with engine.begin() as conn:
+        for column in ('valid_from', 'valid_to'):
+            if column not in columns:
+                print(f"➕ Adding short_positions.{column}")
+                conn.execute(text(f"ALTER TABLE short_positions ADD COLUMN {column} TIMESTAMP"))
+        for name, definition in INDEXES.items():
+            if name not in indexes:
+                print(f"➕ Creating index {name}")
+                conn.execute(text(f"CREATE INDEX {name} ON short_positions {definition}"))
+
+
+def rebuild(country_codes):
+    db = SessionLocal()
+    try:
+        query = db.query(Country).order_by(Country.code)
+        if country_codes:
+            query = query.filter(Country.code.in_([code.upper() for code in country_codes]))
+
+        total = 0
+        for country in query.all():
+            start = time.perf_counter()
+            updated = rebuild_position_validity(db, country_id=country.id)
+            total += updated
+            print(f"   {country.flag} {country.code}: {updated} positions ({time.perf_counter() - start:.2f}s)")
+
+        print(f"✅ Validity intervals computed for {total} positions")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--country', action='append', default=[], help='country code (repeatable, default: all)')
+    args = parser.parse_args()
+
+    print("🕰️  Position validity migration")
+    print("=" * 50)
+
+    ensure_db_ready()
+    ensure_schema()
+    rebuild(args.country)
+
+
+if __name__ == "__main__":
+    main()
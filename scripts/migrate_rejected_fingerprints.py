@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Migration: one rejected_positions row per distinct rejected input
+
+- adds rejected_positions.fingerprint to existing databases
+- backfills it in batches (keyset pagination on id) with
+  daily_scraping_service.rejected_fingerprint
+- deletes the copies quarantined again by earlier daily runs, keeping the
+  oldest row of each (country_id, fingerprint)
+- creates the unique index the ingestion dedupes against
+
+Safe to re-run: only rows without a fingerprint are backfilled.
+
+Usage:
+    python scripts/migrate_rejected_fingerprints.py [--batch-size 5000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+
+from app.db.database import SessionLocal, engine, ensure_db_ready
+from app.db.models import RejectedPosition
+from app.services.daily_scraping_service import rejected_fingerprint
+
+INDEX_NAME = 'uq_rejected_country_fingerprint'
+
+
+def ensure_column():
+    columns = {column['name'] for column in inspect(engine).get_columns('rejected_positions')}
+    if 'fingerprint' not in columns:
+        print("➕ Adding rejected_positions.fingerprint")
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE rejected_positions ADD COLUMN fingerprint VARCHAR(16)"))
+
+
+def backfill(batch_size: int) -> int:
+    stmt = text("UPDATE rejected_positions SET fingerprint = :fingerprint WHERE id = :row_id")
+    fields = ('reason', 'manager_name', 'company_name', 'isin', 'raw_date', 'raw_position_size')
+
+    db = SessionLocal()
+    updated = 0
+    last_id = 0
+    try:
+        while True:
+            rows = db.query(RejectedPosition.id, *(getattr(RejectedPosition, field) for field in fields)).filter(
+                RejectedPosition.id > last_id,
+                RejectedPosition.fingerprint.is_(None),
+            ).order_by(RejectedPosition.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            db.execute(stmt, [
+                {'row_id': row.id, 'fingerprint': rejected_fingerprint(dict(zip(fields, row[1:])))}
+                for row in rows
+            ])
+            db.commit()
+            updated += len(rows)
+            last_id = rows[-1].id
+            print(f"   ... {updated} fingerprints written (up to id {last_id})")
+    finally:
+        db.close()
+    return updated
+
+
+def delete_duplicates() -> int:
+    with engine.begin() as conn:
+        result = conn.execute(text(
+            "DELETE FROM rejected_positions WHERE id NOT IN ("
+            " SELECT MIN(id) FROM rejected_positions GROUP BY country_id, fingerprint)"
+        ))
+    return result.rowcount
+
+
+def ensure_index():
+    if INDEX_NAME not in {index['name'] for index in inspect(engine).get_indexes('rejected_positions')}:
+        print(f"➕ Creating unique index {INDEX_NAME}")
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE UNIQUE INDEX {INDEX_NAME} ON rejected_positions (country_id, fingerprint)"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    print("🧹 rejected_positions fingerprint migration")
+    print("=" * 50)
+
+    ensure_db_ready()
+    ensure_column()
+
+    start = time.perf_counter()
+    updated = backfill(args.batch_size)
+    print(f"✅ {updated} rows backfilled in {time.perf_counter() - start:.1f}s")
+
+    deleted = delete_duplicates()
+    print(f"🗑️  {deleted} duplicate rejected rows deleted")
+
+    ensure_index()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Publish a position store snapshot (memory-mapped columns for the API workers)
+
+With USE_POSITION_STORE=true daily ingestion publishes one after every run;
+use this after an import or a migration. With --compare it maps the new
+version and checks its top-manager rankings against the SQL queries, timing
+both.
+
+Usage:
+    python scripts/publish_position_snapshot.py
+    python scripts/publish_position_snapshot.py --compare
+    POSITION_STORE_DIR=/srv/position_store python scripts/publish_position_snapshot.py
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.database import SessionLocal, ensure_db_ready, init_db
+from app.db.models import Country
+from app.services import analytics
+from app.services.position_store import POSITION_STORE_DIR, PositionStore, publish_snapshot
+
+
+def _timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def compare(db, store: PositionStore, repeat: int) -> int:
+    """Rankings from the store vs SQL per country and globally; returns the number of mismatches"""
+    cases = [(f"{c.code} by exposure", c.id, "exposure") for c in db.query(Country).order_by(Country.code)]
+    cases.append(("global by count", None, "count"))
+
+    mismatches = 0
+    for label, country_id, order_by in cases:
+        if country_id is None:
+            sql_fn = lambda: asyncio.run(analytics.get_global_top_managers(db))
+        else:
+            sql_fn = lambda: asyncio.run(analytics.get_top_managers(db, country_id))
+        expected, sql_ms = _timed(sql_fn, repeat)
+        got, store_ms = _timed(lambda: store.top_managers(country_id, order_by=order_by), repeat)
+
+        key = "total_exposure" if order_by == "exposure" else "active_positions"
+        same = [round(m[key], 4) for m in expected] == [round(m[key], 4) for m in got]
+        mismatches += not same
+        print(f"{'✅' if same else '❌'} {label:<20} SQL {sql_ms:8.2f} ms   store {store_ms:8.3f} ms")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--directory', default=POSITION_STORE_DIR, help='store directory')
+    parser.add_argument('--compare', action='store_true', help='check rankings against SQL and time both')
+    parser.add_argument('--repeat', type=int, default=5, help='timing repetitions for --compare')
+    args = parser.parse_args()
+
+    print("🗂️ Position store snapshot")
+    print("=" * 50)
+
+    ensure_db_ready()
+    init_db()
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        version = publish_snapshot(db, args.directory)
+        elapsed = time.perf_counter() - start
+
+        store = PositionStore(os.path.join(args.directory, version), version)
+        size = sum(os.path.getsize(os.path.join(store.path, f)) for f in os.listdir(store.path))
+        print(f"✅ Published {version}: {len(store)} positions, {size / 1024:.0f} KB in {elapsed:.2f}s")
+
+        if args.compare:
+            # The SQL side must not read the store it is compared with
+            analytics.USE_POSITION_STORE = False
+            mismatches = compare(db, store, args.repeat)
+            if mismatches:
+                print(f"❌ {mismatches} rankings differ")
+                sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
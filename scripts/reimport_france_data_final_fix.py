@@ -69,7 +69,7 @@ def reimport_france_data_final():
     
     try:
         # Create scraper
-        scraper = FranceScraper()
+        scraper = FranceScraper(full_history=True)
         print(f"✅ France Scraper created: {scraper.country_name}")
         
         # Download and parse data
@@ -23,7 +23,7 @@ def reimport_france_data():
     
     try:
         # Create scraper
-        scraper = FranceScraper()
+        scraper = FranceScraper(full_history=True)
         print(f"✅ France Scraper created: {scraper.country_name}")
         
         # Download and parse data
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Request a full re-import for one or more countries
+
+Daily runs only ingest rows past each country's ingestion watermark. This
+flags the given countries so their next run imports every scraped row
+(existing positions are still de-duplicated), then moves the watermark on.
+
+Usage:
+    python scripts/request_backfill.py GB DE        # flag, picked up by the next daily run
+    python scripts/request_backfill.py GB --run     # flag and run the scraper now
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.database import ensure_db_ready, init_db
+from app.services.daily_scraping_service import DailyScrapingService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('codes', nargs='+', help='country codes, e.g. GB DE FR')
+    parser.add_argument('--run', action='store_true', help='run the scrapers right away')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    codes = [code.upper() for code in args.codes]
+
+    # Make sure the ingestion_state table exists
+    ensure_db_ready()
+    init_db()
+
+    svc = DailyScrapingService()
+    flagged = svc.request_backfill(codes)
+
+    unknown = sorted(set(codes) - set(flagged))
+    if unknown:
+        print(f"⚠️  Unknown country codes: {', '.join(unknown)}")
+    if not flagged:
+        sys.exit(1)
+
+    print(f"🔁 Backfill requested for: {', '.join(flagged)}")
+
+    if args.run:
+        result = asyncio.run(svc.run_for_country_codes(flagged))
+        print(f"✅ Backfill completed: {result}")
+    else:
+        print("The next scraping run will import their full history.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Find duplicate managers / companies and rebuild the entity_aliases table
+
+Daily ingestion resolves names through these aliases, so new disclosures
+for a known duplicate land on its canonical row.
+
+Usage:
+    python scripts/resolve_entities.py --dry-run          # report only
+    python scripts/resolve_entities.py                    # write entity_aliases
+    python scripts/resolve_entities.py --merge            # ...and move existing positions to the canonical rows
+    python scripts/resolve_entities.py --synthetic 100000 # time the matcher on generated names (no database)
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.entity_resolution import FUZZY_THRESHOLD, find_duplicates
+
+
+def synthetic_names(count, seed=0):
+    """Distinct fund names plus ~10% respelled duplicates"""
+    rng = random.Random(seed)
+    syllables = ['mar', 'shall', 'wa', 'ce', 'ci', 'ta', 'del', 'blue', 'crest', 'ak', 'o', 'lon', 'gen',
+                 'tree', 'van', 'ward', 'el', 'lio', 'tt', 'qube', 'rsch', 'pol', 'ar', 'ris']
+    forms = ['LLP', 'Ltd', 'Limited', 'L.P.', 'LP', 'Inc', 'GmbH', 'SA', 'AB', 'Management', 'Capital']
+    names = []
+    for _ in range(int(count * 0.9)):
+        words = [''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).title()
+                 for _ in range(rng.randint(1, 3))]
+        names.append(' '.join(words + [rng.choice(forms)]))
+    for _ in range(count - len(names)):
+        name = rng.choice(names)
+        variant = rng.choice([
+            lambda n: n.upper(),
+            lambda n: n.replace('Ltd', 'Limited').replace('LLP', 'L.L.P.'),
+            lambda n: n.replace(' ', '  ') + '.',
+            lambda n: n[:-1] if len(n) > 12 else n,
+            lambda n: 'The ' + n,
+        ])
+        names.append(variant(name))
+    return names
+
+
+def run_synthetic(count, threshold):
+    names = synthetic_names(count)
+    start = time.perf_counter()
+    links = find_duplicates(names, threshold=threshold)
+    elapsed = time.perf_counter() - start
+
+    methods = {}
+    for *_, method in links:
+        methods[method] = methods.get(method, 0) + 1
+    print(f"⏱️  {len(names):,} names resolved in {elapsed:.2f}s: {len(links):,} duplicate links {methods}")
+
+
+def run_database(args):
+    from app.db.database import SessionLocal, ensure_db_ready, init_db
+    from app.services.entity_resolution import ENTITY_COMPANY, ENTITY_MANAGER, resolve_entities
+
+    ensure_db_ready()
+    init_db()
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        result = resolve_entities(db, threshold=args.threshold, dry_run=args.dry_run, merge_positions=args.merge)
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+
+    for entity_type in (ENTITY_MANAGER, ENTITY_COMPANY):
+        aliases = result[entity_type]
+        print(f"\n📊 {entity_type.title()} aliases: {len(aliases)}")
+        for alias in sorted(aliases, key=lambda a: a['score'])[:args.show]:
+            print(f"   {alias['alias_name']!r} (#{alias['alias_id']}) -> #{alias['canonical_id']} "
+                  f"[{alias['method']} {alias['score']:.2f}]")
+
+    print(f"\n⏱️  Resolved in {elapsed:.2f}s")
+    if args.dry_run:
+        print("🔍 Dry run - entity_aliases not changed")
+    else:
+        print("✅ entity_aliases rebuilt" + (" and positions merged" if args.merge else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threshold', type=float, default=FUZZY_THRESHOLD, help='minimum fuzzy similarity')
+    parser.add_argument('--dry-run', action='store_true', help="report aliases without writing them")
+    parser.add_argument('--merge', action='store_true', help='move positions of aliases to their canonical rows')
+    parser.add_argument('--show', type=int, default=20, help='aliases to print per type (lowest scores first)')
+    parser.add_argument('--synthetic', type=int, default=0, help='benchmark on N generated names instead')
+    args = parser.parse_args()
+
+    print("🔗 Entity resolution")
+    print("=" * 50)
+
+    if args.synthetic:
+        run_synthetic(args.synthetic, args.threshold)
+    else:
+        run_database(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Benchmark suites (pytest-benchmark) on the seeded synthetic data
+
+    test_api_benchmarks.py      every read endpoint of benchmarks.scenarios.API_REQUESTS,
+                                through FastAPI's TestClient
+    test_ingest_benchmarks.py   DailyScrapingService._update_database on a synthetic
+                                re-scrape of the busiest country, and the rollup refresh
+    test_scraper_benchmarks.py  parse_data() / extract_positions() of every scraper on
+                                files rendered in its regulator's format
+    test_active_state_benchmarks.py
+                                the active-state engine on 1M scraped disclosures
+
+pytest.ini disables timing, so the plain test run executes each benchmark once
+as a smoke test. To time them, save the results (benchmarks/results/) and
+compare with an earlier run:
+
+    pytest tests/benchmarks --benchmark-enable --benchmark-autosave
+    pytest tests/benchmarks --benchmark-enable --benchmark-compare --benchmark-compare-fail=mean:20%
+    TEST_DATABASE_URL=postgresql://localhost/bench pytest tests/benchmarks -k api --benchmark-enable
+"""
+
+import logging
+
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def quiet_scrapers():
+    logging.getLogger('scraper').setLevel(logging.ERROR)  # Scrapers log every file and sheet at INFO
+
+
+@pytest.fixture(scope="session")
+def samples(engine):
+    """benchmarks.scenarios.pick_samples() of the seeded data"""
+    from app.db.database import SessionLocal
+    from benchmarks.scenarios import pick_samples
+
+    db = SessionLocal()
+    try:
+        return pick_samples(db)
+    finally:
+        db.close()
@@ -0,0 +1,23 @@
+"""
+The vectorized active-state engine on a million scraped disclosures
+"""
+
+import pytest
+
+from app.scrapers.active_state import apply_active_state
+from app.scrapers.france_scraper import FRANCE_ACTIVE_RULES
+
+ENGINE_ROWS = 1_000_000
+
+
+@pytest.mark.benchmark(group="active_state")
+def test_apply_active_state(benchmark, scraped_positions):
+    df = scraped_positions(ENGINE_ROWS, seed=1)
+    df['sort_date'] = df['position_start_date']
+
+    result = benchmark(apply_active_state, df, **FRANCE_ACTIVE_RULES)
+    benchmark.extra_info.update(rows=ENGINE_ROWS, active=int(result['is_active'].sum()),
+                                keys=int(result['manager_company_key'].nunique()))
+    current = result['recency_rank'] == 1
+    assert current.sum() == result['manager_company_key'].nunique()
+    assert not (result['is_active'] & ~current).any()
@@ -0,0 +1,25 @@
+"""
+Read endpoints: routing, validation, queries and serialization through FastAPI's TestClient
+"""
+
+import pytest
+
+from benchmarks.scenarios import API_REQUESTS
+
+
+@pytest.fixture(scope="module")
+def client(engine):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.benchmark(group="api")
+@pytest.mark.parametrize("template", API_REQUESTS)
+def test_get(benchmark, client, samples, template):
+    url = template.format(**samples)
+    benchmark.extra_info['url'] = url
+    response = benchmark(client.get, url)
+    assert response.status_code == 200, f"GET {url}: {response.status_code}"
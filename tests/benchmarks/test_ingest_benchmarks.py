@@ -0,0 +1,54 @@
+"""
+Daily ingestion of a synthetic re-scrape of the busiest country
+
+Every round writes new rows, so the rounds are fixed (benchmark.pedantic) and
+each one gets a fresh service and scrape in its untimed setup, like a daily run:
+the service caches managers and companies bound to the session of its first
+_update_database.
+"""
+
+import asyncio
+
+import pytest
+
+INGEST_ROWS = 200  # Re-scraped disclosures per round, plus as many new ones after them
+INGEST_ROUNDS = 3
+
+
+def _scrape(country_id: int):
+    """A fresh DailyScrapingService, the detached country and a synthetic scrape of it"""
+    from app.db.database import SessionLocal
+    from app.db.models import Country
+    from app.services.daily_scraping_service import DailyScrapingService
+    from benchmarks.scenarios import synthetic_scrape
+
+    db = SessionLocal()
+    try:
+        country = db.get(Country, country_id)
+        positions = synthetic_scrape(db, country, INGEST_ROWS)
+        db.expunge(country)
+    finally:
+        db.close()
+    return DailyScrapingService(), country, positions
+
+
+def _ingest(service, country, positions):
+    return asyncio.run(service._update_database(country, positions, source_url="synthetic://benchmarks"))
+
+
+@pytest.mark.benchmark(group="ingest")
+def test_update_database(benchmark, samples):
+    benchmark.extra_info.update(country=samples['country_code'], positions=2 * INGEST_ROWS + 1)
+    benchmark.pedantic(_ingest, setup=lambda: (_scrape(samples['country_id']), {}),
+                       rounds=INGEST_ROUNDS, iterations=1)
+
+
+@pytest.mark.benchmark(group="ingest")
+def test_update_rollups(benchmark, samples):
+    def ingested():
+        service, country, positions = _scrape(samples['country_id'])
+        _ingest(service, country, positions)
+        return (service,), {}
+
+    benchmark.pedantic(lambda service: service._update_rollups(), setup=ingested,
+                       rounds=INGEST_ROUNDS, iterations=1)
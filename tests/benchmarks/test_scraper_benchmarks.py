@@ -0,0 +1,56 @@
+"""
+Scraper parsing on files rendered in each regulator's format (benchmarks.regulator_files)
+"""
+
+import pytest
+
+from app.scrapers.scraper_factory import ScraperFactory
+from benchmarks.regulator_files import disclosures, file_bytes, parse, render
+
+SCRAPER_ROWS = 5000  # Synthetic disclosures per country's file set
+COUNTRIES = ScraperFactory().get_available_countries()
+
+
+@pytest.fixture(scope="module")
+def regulator_files():
+    """code -> (disclosures, rendered files), generated once per country"""
+    from app.core.config import settings
+    from benchmarks.synthetic import generate
+
+    countries = len(settings.countries)
+    data = generate(SCRAPER_ROWS * countries, countries=countries, seed=0)
+    cache = {}
+
+    def files_of(code):
+        if code not in cache:
+            frame = disclosures(data, code)
+            cache[code] = frame, render(code, frame)
+        return cache[code]
+
+    return files_of
+
+
+@pytest.mark.benchmark(group="scrapers.parse_data")
+@pytest.mark.parametrize("code", COUNTRIES)
+def test_parse_data(benchmark, regulator_files, code):
+    frame, files = regulator_files(code)
+    scraper = ScraperFactory().create_scraper(code)
+    benchmark.extra_info.update(disclosures=len(frame), file_bytes=file_bytes(files))
+    parsed = benchmark(parse, scraper, files)
+    assert parsed is not None
+
+
+@pytest.mark.benchmark(group="scrapers.extract_positions")
+@pytest.mark.parametrize("code", COUNTRIES)
+def test_extract_positions(benchmark, regulator_files, code):
+    frame, files = regulator_files(code)
+    scraper = ScraperFactory().create_scraper(code)
+    parsed = parse(scraper, files)
+
+    def extract():
+        scraper.rejected_positions.clear()
+        return scraper.extract_positions(parsed)
+
+    positions = benchmark(extract)
+    benchmark.extra_info.update(disclosures=len(frame), positions=len(positions))
+    assert len(positions) >= len(frame) // 2, f"only {len(positions)} of {len(frame)} disclosures extracted"
@@ -0,0 +1,100 @@
+"""
+Shared fixtures: the app runs against a scratch SQLite database seeded with the
+synthetic data of benchmarks/synthetic.py.
+
+The app reads its configuration when it is imported, so the environment is set
+here, before any test module imports it. SEED_POSITIONS matches the default of
+scripts/check_query_plans.py, whose baseline the query-plan tests compare with.
+
+TEST_DATABASE_URL runs the tests and benchmarks against a database seeded
+beforehand instead, e.g. 1M-10M positions on Postgres from
+scripts/generate_synthetic_data.py (the ingest tests write to it).
+"""
+
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.scenarios import configure_environment
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+configure_environment(TEST_DATABASE_URL, name="pytest")
+
+SEED_POSITIONS = 100000
+SEED = 0
+
+
+@pytest.fixture(scope="session")
+def synthetic():
+    """generate() arguments of the seeded data (None on TEST_DATABASE_URL)"""
+    if TEST_DATABASE_URL:
+        return None
+    return {'positions': SEED_POSITIONS, 'seed': SEED}
+
+
+@pytest.fixture(scope="session")
+def engine(synthetic):
+    """The app's engine, on the seeded scratch database"""
+    from app.core.config import settings
+    from app.db.database import engine
+    from benchmarks.synthetic import generate, populate
+
+    if synthetic:
+        populate(engine, generate(synthetic['positions'], countries=len(settings.countries), seed=synthetic['seed']))
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    from app.db.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def scratch_db(tmp_path):
+    """A session on an empty schema of its own, for tests that write"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.db.models import Base
+
+    scratch_engine = create_engine(f"sqlite:///{tmp_path / 'scratch.db'}")
+    Base.metadata.create_all(bind=scratch_engine)
+    session = sessionmaker(bind=scratch_engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        scratch_engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def scraped_positions():
+    """Factory of random scraper output (disclosure histories with both sheets) for the active-state engine"""
+    def build(rows: int, seed: int = 0) -> pd.DataFrame:
+        rng = np.random.default_rng(seed)
+        managers = np.array([f"Fund {i} Capital" for i in range(max(rows // 5000, 5))])
+        isins = np.array([f"NL{i:010d}" for i in range(max(rows // 2500, 5))] + [''])
+        start = pd.Timestamp(datetime.now().date()) - pd.to_timedelta(rng.integers(0, 1500, rows), unit='D')
+        end = start + pd.to_timedelta(rng.integers(1, 300, rows), unit='D')
+        return pd.DataFrame({
+            'manager_name': rng.choice(managers, rows),
+            'company_name': rng.choice(['Alpha NV', 'Beta NV', 'Gamma NV'], rows),
+            'isin': rng.choice(isins, rows),
+            'position_size': rng.choice([0.0, 0.2, 0.45, 0.5, 0.62, 0.8, 1.3], rows),
+            'date': start,
+            'position_start_date': start,
+            'publication_start_date': start + pd.to_timedelta(rng.integers(0, 2, rows), unit='D'),
+            'publication_end_date': pd.Series(end).where(rng.random(rows) < 0.6),
+            'source_sheet': rng.choice(['current', 'historical'], rows),
+        })
+
+    return build
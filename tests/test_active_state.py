@@ -0,0 +1,165 @@
+"""
+The shared active-state engine (app/scrapers/active_state.py), through the France
+and Netherlands scrapers, against the row-wise implementations it replaced
+"""
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from app.scrapers.france_scraper import FranceScraper
+from app.scrapers.netherlands_scraper import NetherlandsScraper
+
+RANDOM_ROWS = 20_000
+
+
+# ----------------------------------------------------------------------
+# Reference implementations (as they were before the shared engine)
+# ----------------------------------------------------------------------
+
+def legacy_france_active_logic(positions):
+    df = pd.DataFrame(positions).copy()
+    df['sort_date'] = pd.to_datetime(df['position_start_date'].fillna(df['publication_start_date']))
+    df['isin'] = df['isin'].fillna('').str.strip().str.upper()
+    df['company_name'] = df['company_name'].fillna('').str.strip()
+    df['manager_name'] = df['manager_name'].fillna('').str.strip()
+    df['manager_company_key'] = df['manager_name'] + '_' + df['isin'].fillna(df['company_name'])
+    df = df.sort_values(
+        by=['manager_company_key', 'sort_date', 'publication_end_date', 'position_size'],
+        ascending=[True, False, True, False]
+    )
+    df['recency_rank'] = df.groupby('manager_company_key')['sort_date'].rank(method='first', ascending=False)
+    df['was_active_at_row_time'] = df['position_size'] >= 0.5
+
+    date_barrier = datetime.now() - timedelta(days=730)
+    df['is_active'] = False
+    current_mask = df['recency_rank'] == 1
+    df.loc[current_mask & (df['position_size'] >= 0.5) & pd.isna(df['publication_end_date'])
+           & (df['sort_date'] >= date_barrier), 'is_active'] = True
+
+    cur = df[df['recency_rank'] == 1][['manager_company_key', 'position_size']].rename(columns={'position_size': 'curr_size'})
+    prev = df[df['recency_rank'] == 2][['manager_company_key', 'position_size']].rename(columns={'position_size': 'prev_size'})
+    trans = cur.merge(prev, on='manager_company_key', how='left')
+
+    def classify_transition(row):
+        curr = row['curr_size']
+        prev = row['prev_size']
+        curr_active = curr >= 0.5
+        prev_active = (prev >= 0.5) if pd.notna(prev) else None
+        if pd.isna(prev):
+            return 'entered' if curr_active else 'inactive_first'
+        if (not prev_active) and curr_active:
+            return 'entered'
+        if prev_active and (not curr_active):
+            return 'exited'
+        if prev_active and curr_active:
+            return 'active_size_change' if curr != prev else 'active_unchanged'
+        return 'inactive_unchanged'
+
+    trans['transition'] = trans.apply(classify_transition, axis=1)
+    df['transition'] = None
+    df.loc[current_mask, 'transition'] = df.loc[current_mask, 'manager_company_key'] \
+        .map(dict(zip(trans['manager_company_key'], trans['transition'])))
+    df['timeline_date'] = df['sort_date']
+    return df.drop(columns=['sort_date']).to_dict(orient='records')
+
+
+def legacy_netherlands_active_logic(positions):
+    df = pd.DataFrame(positions)
+    df['isin'] = df['isin'].fillna('').astype(str).str.strip().str.upper()
+    df['company_name'] = df['company_name'].fillna('').astype(str).str.strip()
+    df['manager_name'] = df['manager_name'].fillna('').astype(str).str.strip()
+    df['manager_company_key'] = df.apply(
+        lambda row: f"{row['manager_name']}_{row['isin'] if row['isin'] else row['company_name']}",
+        axis=1
+    )
+    df['date'] = pd.to_datetime(df['date'])
+    df = df.sort_values(['manager_company_key', 'date'], ascending=[True, False])
+    df['is_active'] = False
+    for sheet_name in df['source_sheet'].unique():
+        sheet_df = df[df['source_sheet'] == sheet_name]
+        if sheet_name.lower() == 'current':
+            df.loc[sheet_df.groupby('manager_company_key')['date'].idxmax(), 'is_active'] = True
+    return df.drop(columns=['manager_company_key', 'source_sheet']).to_dict('records')
+
+
+# ----------------------------------------------------------------------
+# Fixtures
+# ----------------------------------------------------------------------
+
+def _day(days_ago: int) -> pd.Timestamp:
+    return pd.Timestamp(datetime.now().date()) - pd.Timedelta(days=days_ago)
+
+
+def _disclosure(manager, company, isin, size, days_ago, sheet='current', ended=None):
+    return {
+        'manager_name': manager, 'company_name': company, 'isin': isin, 'position_size': size,
+        'date': _day(days_ago), 'position_start_date': _day(days_ago),
+        'publication_start_date': _day(days_ago - 1),
+        'publication_end_date': _day(ended) if ended is not None else pd.NaT,
+        'source_sheet': sheet,
+    }
+
+
+INLINE = pd.DataFrame([
+    # Exit after an active run, the last disclosure still published
+    _disclosure("Fund A", "Alpha NV", "NL0000000001", 0.7, 300, 'historical', ended=200),
+    _disclosure("Fund A", "Alpha NV", "NL0000000001", 0.6, 200, ended=100),
+    _disclosure("Fund A", "Alpha NV", "NL0000000001", 0.4, 100),
+    # Two disclosures on one day, decided by the tie-breaks (publication end date, then size)
+    _disclosure("Fund A", "Beta NV", "nl0000000002 ", 0.5, 50, ended=10),
+    _disclosure("Fund A", "Beta NV", "NL0000000002", 0.55, 50),
+    _disclosure("Fund A", "Beta NV", "NL0000000002", 0.8, 80, 'historical', ended=50),
+    # Active but too old
+    _disclosure("Fund B", "Alpha NV", "NL0000000001", 0.9, 900),
+    # Entered, from nothing and from below the threshold; unchanged
+    _disclosure(" Fund B", "Beta NV", "NL0000000002", 0.6, 5),
+    _disclosure("Fund C", "Alpha NV", "NL0000000001", 0.3, 60, 'historical', ended=30),
+    _disclosure("Fund C", "Alpha NV", "NL0000000001", 0.75, 30),
+    _disclosure("Fund D", "Gamma NV", "NL0000000003", 0.5, 40, ended=20),
+    _disclosure("Fund D", "Gamma NV", "NL0000000003", 0.5, 20),
+    # Blank ISIN: keyed by company name (Netherlands only, France drops these rows)
+    _disclosure("Fund E", "Delta NV", "", 0.6, 15),
+    _disclosure("Fund E", "Epsilon NV", "", 0.7, 10),
+    _disclosure("Fund E", "Epsilon NV", "", 0.2, 25, 'historical', ended=10),
+])
+
+
+@pytest.fixture(params=['inline', 'random'])
+def positions(request, scraped_positions):
+    return INLINE if request.param == 'inline' else scraped_positions(RANDOM_ROWS)
+
+
+def canonical(records, sort_cols):
+    df = pd.DataFrame(records)
+    df = df[sorted(df.columns)]
+    return df.sort_values(sort_cols).reset_index(drop=True)
+
+
+# ----------------------------------------------------------------------
+# Equivalence
+# ----------------------------------------------------------------------
+
+def test_france_matches_legacy(positions):
+    positions = positions.drop(columns=['source_sheet'])
+    positions = positions[positions['isin'] != '']  # France extraction drops rows without ISIN
+
+    expected = legacy_france_active_logic(positions.to_dict('records'))
+    actual = FranceScraper()._apply_france_active_logic(positions)
+
+    sort_cols = ['manager_company_key', 'recency_rank', 'position_size', 'publication_start_date']
+    pd.testing.assert_frame_equal(canonical(expected, sort_cols), canonical(actual, sort_cols), check_dtype=False)
+
+
+def test_netherlands_matches_legacy(positions):
+    positions = positions[['manager_name', 'company_name', 'isin', 'position_size', 'date', 'source_sheet']]
+    # Distinct dates per key and sheet, so idxmax() has no ties to break
+    positions = positions.drop_duplicates(['manager_name', 'isin', 'company_name', 'source_sheet', 'date'])
+    records = positions.to_dict('records')
+
+    expected = legacy_netherlands_active_logic(records)
+    actual = NetherlandsScraper('NL', 'Netherlands')._apply_netherlands_active_logic(records)
+
+    sort_cols = ['manager_name', 'isin', 'company_name', 'date', 'position_size', 'is_active']
+    pd.testing.assert_frame_equal(canonical(expected, sort_cols), canonical(actual, sort_cols), check_dtype=False)
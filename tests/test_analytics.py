@@ -0,0 +1,41 @@
+"""
+get_most_shorted_companies: the week-on-week change compares like with like
+"""
+
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from app.db.models import Company, Country, Manager, ShortPosition
+from app.services.analytics import get_most_shorted_companies
+from app.services.position_validity import rebuild_position_validity
+
+
+def _seed(db, code):
+    """One company: a fund raising its position three days ago, and a stale position nobody closed"""
+    country = Country(code=code, name=code, flag='🏳️', url='synthetic://' + code.lower())
+    db.add(country)
+    db.flush()
+    company = Company(name='Alpha PLC', isin=f'{code}0000000001', country_id=country.id)
+    managers = [Manager(name=name, slug=name.lower()) for name in ('Fund A', 'Fund B')]
+    db.add_all([company] + managers)
+    db.flush()
+    for manager, days_ago, size, active in ((managers[0], 30, 0.6, False),
+                                            (managers[0], 3, 0.8, True),
+                                            (managers[1], 900, 0.7, False)):
+        db.add(ShortPosition(date=date.today() - timedelta(days=days_ago), company_id=company.id,
+                             manager_id=manager.id, country_id=country.id, position_size=size,
+                             is_active=active))
+    db.commit()
+    rebuild_position_validity(db)
+    return country
+
+
+@pytest.mark.parametrize("code", ['GB', 'IE'])  # Ireland has its own query for the current totals
+def test_week_delta_only_counts_changes(scratch_db, code):
+    country = _seed(scratch_db, code)
+
+    [row] = asyncio.run(get_most_shorted_companies(scratch_db, country.id))
+    assert row['total_short_positions'] == pytest.approx(0.8)
+    assert row['week_delta'] == pytest.approx(0.2)
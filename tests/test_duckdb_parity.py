@@ -0,0 +1,37 @@
+"""
+DuckDB over Parquet returns the same analytics as the SQLAlchemy queries
+
+Skipped unless duckdb is installed (it is optional, see LOCAL_DEVELOPMENT_SETUP.md).
+scripts/compare_duckdb_analytics.py runs the same cases with timings.
+"""
+
+import pytest
+
+pytest.importorskip("duckdb")
+
+from app.services import duckdb_analytics
+from benchmarks.scenarios import duckdb_parity_cases, same_ranking
+
+
+@pytest.fixture(scope="module")
+def parquet_snapshot(engine):
+    from app.db.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return duckdb_analytics.export_parquet(db)
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("query", duckdb_analytics.QUERIES)
+def test_duckdb_matches_sqlalchemy(query, parquet_snapshot, db):
+    cases = [case for case in duckdb_parity_cases(db) if case[0] == query]
+    assert cases
+
+    mismatches = [
+        label for _, label, sql_fn, duck_fn, sort_key, id_key in cases
+        if not same_ranking(sql_fn(), duck_fn(), sort_key, id_key)
+    ]
+    assert not mismatches, f"DuckDB differs from SQLAlchemy for: {', '.join(mismatches)}"
+
@@ -0,0 +1,69 @@
+"""
+resolve_entities(merge_positions=True): everything derived from the positions follows the merge
+"""
+
+import os
+from datetime import date, timedelta
+from functools import partial
+
+from app.db.models import Company, CompanyDailyStats, Country, CountryDailyStats, Manager, ShortPosition
+from app.services import entity_resolution
+from app.services.position_store import PositionStore, publish_snapshot
+from app.services.position_validity import rebuild_position_validity
+from app.services.rollups import refresh_rollups
+from app.services.snapshot_versions import current_version
+
+
+def _seed(db):
+    """One fund and one company, each spelled two ways, with a position per spelling"""
+    country = Country(code='GB', name='United Kingdom', flag='🇬🇧', url='synthetic://gb')
+    db.add(country)
+    db.flush()
+    companies = [Company(name=name, isin=isin, country_id=country.id)
+                 for name, isin in (('Alpha Holdings PLC', 'GB0000000001'), ('Alpha Holdings P.L.C.', None))]
+    managers = [Manager(name=name, slug=slug) for name, slug in (('Marshall Wace LLP', 'marshall-wace-llp'),
+                                                                 ('Marshall Wace L.L.P.', 'marshall-wace-l-l-p'))]
+    db.add_all(companies + managers)
+    db.flush()
+    for days_ago, company, manager, size in ((30, companies[0], managers[0], 0.6),
+                                             (10, companies[1], managers[1], 0.7)):
+        db.add(ShortPosition(date=date.today() - timedelta(days=days_ago), company_id=company.id,
+                             manager_id=manager.id, country_id=country.id, position_size=size, is_active=True))
+    db.commit()
+    rebuild_position_validity(db)
+    refresh_rollups(db)
+    return companies, managers
+
+
+def _today(db):
+    return db.query(CountryDailyStats).filter(CountryDailyStats.country_id.is_(None),
+                                              CountryDailyStats.date == date.today()).one()
+
+
+def test_merge_refreshes_rollups_and_snapshot(scratch_db, tmp_path, monkeypatch):
+    companies, managers = _seed(scratch_db)
+    before = _today(scratch_db)
+    assert (before.active_positions, before.managers, before.companies) == (2, 2, 2)
+
+    store_dir = str(tmp_path / 'position_store')
+    monkeypatch.setattr(entity_resolution, 'USE_POSITION_STORE', True)
+    monkeypatch.setattr(entity_resolution, 'publish_snapshot', partial(publish_snapshot, directory=store_dir))
+
+    result = entity_resolution.resolve_entities(scratch_db, merge_positions=True)
+    assert len(result[entity_resolution.ENTITY_MANAGER]) == 1
+    assert len(result[entity_resolution.ENTITY_COMPANY]) == 1
+
+    # Both disclosures are now one holding: the later one supersedes the earlier
+    scratch_db.expire_all()
+    after = _today(scratch_db)
+    assert (after.active_positions, after.managers, after.companies) == (1, 1, 1)
+    assert after.total_short_interest == 0.7
+
+    alias_company = result[entity_resolution.ENTITY_COMPANY][0]['alias_id']
+    assert not scratch_db.query(CompanyDailyStats).filter(CompanyDailyStats.company_id == alias_company).count()
+
+    version = current_version(store_dir)
+    store = PositionStore(os.path.join(store_dir, version), version)
+    alias_manager = result[entity_resolution.ENTITY_MANAGER][0]['alias_id']
+    assert alias_manager not in set(store.manager_id.tolist())
+    assert store.top_managers()[0]['active_positions'] == 1
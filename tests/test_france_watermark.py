@@ -0,0 +1,87 @@
+"""
+France incremental parsing: a run from the watermark must flag its rows like a full-history run
+"""
+
+import unicodedata
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from app.scrapers import france_scraper
+from app.scrapers.france_scraper import FranceScraper, WATERMARK_STATE
+from app.scrapers.scrape_state import ScrapeState
+
+HEADER = ("Detenteur de la position courte nette;Legal Entity Identifier detenteur;Emetteur / issuer;Ratio;"
+          "code ISIN;Date de debut position;Date de debut de publication position;Date de fin de publication position")
+WATERMARK_DAYS_AGO = 10
+FONDS_E = "Fonds Épargne"
+
+
+def _day(days_ago: int) -> str:
+    return (date.today() - timedelta(days=days_ago)).isoformat()
+
+
+def _row(manager, issuer, isin, ratio, start, end=None):
+    """start/end in days ago; published the day after the position started"""
+    return ";".join([manager, "", issuer, str(ratio), isin, _day(start), _day(start - 1), _day(end) if end else ""])
+
+
+ROWS = [
+    # Closed, open and new disclosures of one key around the watermark
+    _row("Fund A", "Alpha", "FR0000000001", 0.3, 200, 150),
+    _row("Fund A", "Alpha", "FR0000000001", 0.6, 150, 100),
+    _row("Fund A", "Alpha", "FR0000000001", 0.7, 100, 40),
+    _row("Fund A", "Alpha", "FR0000000001", 0.55, 40),
+    _row("Fund A", "Alpha", "FR0000000001", 0.45, 5),
+    # Open before the watermark, nothing new
+    _row("Fund A", "Beta", "FR0000000002", 0.8, 300, 200),
+    _row("Fund A", "Beta", "FR0000000002", 0.6, 200),
+    # Several companies of one manager published with a blank ISIN: keyed by company name
+    _row("Fund A", "Gamma", " ", 0.9, 400, 380),
+    _row("Fund A", "Gamma", " ", 0.7, 380, 370),
+    _row("Fund A", "Gamma", " ", 0.6, 370, 360),
+    _row("Fund A", "Delta", " ", 0.6, 360, 350),
+    _row("Fund A", "Delta", " ", 0.7, 350),
+    _row("Fund A", "Gamma", " ", 0.4, 3),
+    # Untouched since before the watermark
+    _row("Fund C", "Beta", "FR0000000002", 0.7, 90, 60),
+    _row("Fund C", "Beta", "FR0000000002", 0.4, 60, 30),
+    # Size change after the watermark
+    _row("Fund B", "Alpha", "FR0000000001", 0.5, 20),
+    _row("Fund B", "Alpha", "FR0000000001", 0.9, 2),
+    # Manager name decomposed in the old rows, composed in the new one
+    _row(unicodedata.normalize('NFD', FONDS_E), "Alpha", "FR0000000001", 0.7, 120, 50),
+    _row(unicodedata.normalize('NFD', FONDS_E), "Alpha", "FR0000000001", 0.6, 50),
+    _row(FONDS_E, "Alpha", "FR0000000001", 0.3, 4),
+    # No manager
+    _row("", "Alpha", "FR0000000001", 0.7, 80),
+    # New position
+    _row("Fund D", "Beta", "FR0000000002", 0.6, 1),
+]
+
+ROW_KEY = ['manager_name', 'isin', 'company_name', 'position_start_date', 'position_size']
+
+
+def _extract(tmp_path, watermark):
+    scraper = FranceScraper(full_history=watermark is None)
+    scraper.state = ScrapeState('FR', base_dir=str(tmp_path))
+    if watermark is not None:
+        scraper.state.save(WATERMARK_STATE, {'publication_date': watermark})
+    parsed = scraper.parse_data({'csv_data': "\n".join([HEADER] + ROWS).encode('utf-8')})
+    return pd.DataFrame(scraper.extract_positions(parsed)).set_index(ROW_KEY).sort_index()
+
+
+@pytest.mark.parametrize("chunksize", [2, 50_000])
+def test_watermark_run_matches_full_history(tmp_path, monkeypatch, chunksize):
+    monkeypatch.setattr(france_scraper, 'FRANCE_CSV_CHUNKSIZE', chunksize)
+    full = _extract(tmp_path, None)
+    incremental = _extract(tmp_path, _day(WATERMARK_DAYS_AGO))
+
+    assert len(incremental) < len(full)
+    assert incremental.index.isin(full.index).all()
+    columns = ['is_active', 'transition', 'manager_company_key']
+    pd.testing.assert_frame_equal(incremental[columns], full.loc[incremental.index, columns])
+
+    # Open positions are kept even when nothing about them changed since the watermark
+    assert full[full['is_active']].index.isin(incremental.index).all()
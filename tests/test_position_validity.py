@@ -0,0 +1,72 @@
+"""
+Validity intervals follow the scraper's current/historic split: a position the
+register only lists as historic is not in force today, in the rollups either
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from app.db.models import Company, Country, CountryDailyStats, Manager, ShortPosition
+from app.services.position_validity import link_position_validity, rebuild_position_validity
+from app.services.rollups import refresh_rollups
+
+# (manager, days ago, size, is_active), in ingestion order
+DISCLOSURES = [
+    ('Fund A', 20, 0.6, True),     # Current tab
+    ('Fund B', 10, 0.7, False),    # Historical tab only, still >= 0.5%
+    ('Fund B', 40, 0.8, False),    # Historical tab, arriving out of order
+    ('Fund C', 30, 0.9, False),    # Historical tab, then re-disclosed in the current tab
+    ('Fund C', 5, 0.55, True),
+]
+
+
+def _ingest(db):
+    """The positions inserted one by one, as DailyScrapingService does"""
+    country = Country(code='GB', name='United Kingdom', flag='🇬🇧', url='synthetic://gb')
+    db.add(country)
+    db.flush()
+    company = Company(name='Alpha Holdings PLC', isin='GB0000000001', country_id=country.id)
+    managers = {name: Manager(name=name, slug=name.lower().replace(' ', '-'))
+                for name in dict.fromkeys(manager for manager, *_ in DISCLOSURES)}
+    db.add_all([company] + list(managers.values()))
+    db.flush()
+    for manager, days_ago, size, active in DISCLOSURES:
+        position = ShortPosition(date=date.today() - timedelta(days=days_ago), company_id=company.id,
+                                 manager_id=managers[manager].id, country_id=country.id,
+                                 position_size=size, is_active=active)
+        db.add(position)
+        db.flush()
+        link_position_validity(db, position)
+    db.commit()
+
+
+def _intervals(db):
+    return {(p.manager_id, p.date): (p.valid_from, p.valid_to) for p in db.query(ShortPosition)}
+
+
+def _day(db, days_ago):
+    return db.query(CountryDailyStats).filter(CountryDailyStats.country_id.is_(None),
+                                              CountryDailyStats.date == date.today() - timedelta(days=days_ago)).one()
+
+
+def test_historic_position_not_in_force_today(scratch_db):
+    _ingest(scratch_db)
+    refresh_rollups(scratch_db, since=date.today() - timedelta(days=60))
+
+    today = _day(scratch_db, 0)
+    assert (today.active_positions, today.managers) == (2, 2)  # Funds A and C
+    assert today.total_short_interest == pytest.approx(1.15)
+
+    on_its_day = _day(scratch_db, 10)
+    assert on_its_day.active_positions == 3
+    assert _day(scratch_db, 9).exits == 1
+
+
+def test_rebuild_matches_ingest(scratch_db):
+    _ingest(scratch_db)
+    linked = _intervals(scratch_db)
+
+    rebuild_position_validity(scratch_db)
+    scratch_db.expire_all()
+    assert _intervals(scratch_db) == linked
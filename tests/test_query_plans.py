@@ -0,0 +1,45 @@
+"""
+Query plans of the analytics, API and ingestion SQL against benchmarks/query_plans.json
+
+The statements are captured once on the seeded scratch database; each baseline
+scenario is a test, failing when one of its queries now scans a large table it
+used to reach through an index (or, on Postgres, costs more than THRESHOLD
+above the baseline). scripts/check_query_plans.py prints the plans, suggests
+indexes and updates the baseline (--update-baseline) after intended changes.
+"""
+
+import pytest
+
+from benchmarks.query_plans import THRESHOLD, capture, compare, load_baselines
+
+BASELINES = load_baselines()
+SCENARIOS = sorted({entry['scenario'] for baseline in BASELINES.values() for entry in baseline['queries'].values()})
+
+
+@pytest.fixture(scope="module")
+def baseline(engine, synthetic):
+    dialect = engine.dialect.name
+    if dialect not in BASELINES:
+        pytest.skip(f"no {dialect} baseline in benchmarks/query_plans.json")
+    if synthetic is None:
+        pytest.skip("TEST_DATABASE_URL: the baseline was captured on the seeded synthetic data")
+    if (BASELINES[dialect]['positions'], BASELINES[dialect]['seed']) != (synthetic['positions'], synthetic['seed']):
+        pytest.skip("the baseline was captured on other synthetic data")
+    return BASELINES[dialect]['queries']
+
+
+@pytest.fixture(scope="module")
+def captured(engine, baseline):
+    return capture(engine)
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS)
+def test_no_plan_regressions(scenario, baseline, captured):
+    expected = {key: entry for key, entry in baseline.items() if entry['scenario'] == scenario}
+    if not expected:
+        pytest.skip(f"{scenario} is not in this dialect's baseline")
+    plans = {key: plan for key, plan in captured['plans'].items() if plan['scenario'] == scenario}
+    assert plans, f"{scenario} issued no statements"
+
+    failures, _, _ = compare(plans, expected, captured['large'], THRESHOLD)
+    assert not failures, "\n".join(failures)
@@ -0,0 +1,42 @@
+"""Versioned snapshot directories shared by the position store and the Parquet export"""
+
+import os
+
+import pytest
+
+from app.services.snapshot_versions import KEEP_VERSIONS, current_version, publish_version
+
+
+def _write(name: str):
+    def write(staging: str):
+        with open(os.path.join(staging, 'data.txt'), 'w') as f:
+            f.write(name)
+    return write
+
+
+def test_publish_points_current_at_the_new_version(tmp_path):
+    assert current_version(str(tmp_path)) is None
+
+    version = publish_version(str(tmp_path), _write("first"))
+
+    assert current_version(str(tmp_path)) == version
+    assert (tmp_path / version / 'data.txt').read_text() == "first"
+
+
+def test_publish_keeps_the_newest_versions(tmp_path):
+    versions = [publish_version(str(tmp_path), _write(str(i))) for i in range(KEEP_VERSIONS + 2)]
+
+    assert sorted(os.listdir(tmp_path)) == ['CURRENT'] + versions[-KEEP_VERSIONS:]
+
+
+def test_failed_write_leaves_current_and_no_staging(tmp_path):
+    version = publish_version(str(tmp_path), _write("good"))
+
+    def broken(staging: str):
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        publish_version(str(tmp_path), broken)
+
+    assert current_version(str(tmp_path)) == version
+    assert sorted(os.listdir(tmp_path)) == ['CURRENT', version]
@@ -0,0 +1,79 @@
+"""
+read_ods against pd.read_excel(engine='odf') on small hand-written sheets
+"""
+
+import io
+import zipfile
+
+import pandas as pd
+import pytest
+
+from app.utils.spreadsheet import detect_file_format, read_ods
+
+pytest.importorskip("odf")  # pandas' odf engine, the reference
+
+CONTENT = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"'
+    ' xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"'
+    ' xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" office:version="1.2">'
+    '<office:body><office:spreadsheet><table:table table:name="Sheet1">{rows}</table:table>'
+    '</office:spreadsheet></office:body></office:document-content>'
+)
+MANIFEST = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" manifest:version="1.2">'
+    '<manifest:file-entry manifest:full-path="/" manifest:media-type="application/vnd.oasis.opendocument.spreadsheet"/>'
+    '<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>'
+    '</manifest:manifest>'
+)
+
+
+def _ods(rows: str) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr(zipfile.ZipInfo('mimetype'), 'application/vnd.oasis.opendocument.spreadsheet')
+        archive.writestr('META-INF/manifest.xml', MANIFEST)
+        archive.writestr('content.xml', CONTENT.format(rows=rows))
+    return buffer.getvalue()
+
+
+def _row(*cells: str, repeated: int = 1) -> str:
+    attribute = f' table:number-rows-repeated="{repeated}"' if repeated > 1 else ''
+    return f'<table:table-row{attribute}>{"".join(cells)}</table:table-row>'
+
+
+def _text(value: str) -> str:
+    return f'<table:table-cell office:value-type="string"><text:p>{value}</text:p></table:table-cell>'
+
+
+def _float(value: float) -> str:
+    return f'<table:table-cell office:value-type="float" office:value="{value}"><text:p>{value}</text:p></table:table-cell>'
+
+
+HEADER = _row(_text('Manager'), _text('ISIN'), _text('Position'), _text('Date'))
+POSITION = _row(
+    _text('Fund A'), _text('GB0000000001'), _float(0.62),
+    '<table:table-cell office:value-type="date" office:date-value="2024-06-28"><text:p>28/06/2024</text:p></table:table-cell>',
+)
+
+SHEETS = {
+    'plain': HEADER + POSITION,
+    'empty paragraph rows': HEADER + _row('<table:table-cell><text:p/></table:table-cell>') + POSITION
+    + _row('<table:table-cell><text:p/></table:table-cell>', '<table:table-cell><text:p/></table:table-cell>'),
+    'text-only trailing cell': HEADER + POSITION + _row('<table:table-cell> </table:table-cell>'),
+    'childless trailing rows': HEADER + POSITION + _row('<table:table-cell/>', repeated=1000),
+    'repeated rows and columns': HEADER + _row(
+        _text('Fund B'), '<table:table-cell table:number-columns-repeated="2"/>', _float(1.5), repeated=3
+    ),
+    'covered cells': HEADER + _row(
+        _text('Fund C'), '<table:covered-table-cell><text:p>merged</text:p></table:covered-table-cell>', _float(0.5)
+    ),
+}
+
+
+@pytest.mark.parametrize("sheet", SHEETS)
+def test_read_ods_matches_pandas(sheet):
+    content = _ods(SHEETS[sheet])
+    assert detect_file_format(content) == 'ods'
+    pd.testing.assert_frame_equal(read_ods(content), pd.read_excel(io.BytesIO(content), engine='odf'))